@@ -1,6 +1,8 @@
 import asyncio
 import logging
 import os
+import random
+import time
 from typing import List, Optional
 from uuid import UUID, uuid4
 
@@ -15,6 +17,17 @@ from language_model_gateway.configs.config_reader.github_config_zip_reader impor
 )
 from language_model_gateway.configs.config_reader.s3_config_reader import S3ConfigReader
 from language_model_gateway.configs.config_schema import ChatModelConfig
+from language_model_gateway.configs.model_registry import ModelRegistry
+from language_model_gateway.gateway.converters.compiled_graph_cache import (
+    CompiledGraphCache,
+)
+from language_model_gateway.gateway.metrics.gateway_metrics import (
+    CONFIG_REFRESH_DURATION_SECONDS,
+    CONFIG_REFRESH_FAILURES,
+)
+from language_model_gateway.gateway.utilities.environment_reader import (
+    EnvironmentReader,
+)
 from language_model_gateway.gateway.utilities.expiring_cache import ExpiringCache
 from language_model_gateway.gateway.utilities.url_parser import UrlParser
 
@@ -24,26 +37,30 @@ logger = logging.getLogger(__name__)
 class ConfigReader:
     _identifier: UUID = uuid4()
     _lock: asyncio.Lock = asyncio.Lock()
+    _model_registry: Optional[ModelRegistry] = None
+    _refresh_task: Optional[asyncio.Task[bool]] = None
 
-    def __init__(self, *, cache: ExpiringCache[List[ChatModelConfig]]) -> None:
+    def __init__(
+        self,
+        *,
+        cache: ExpiringCache[List[ChatModelConfig]],
+        compiled_graph_cache: CompiledGraphCache,
+    ) -> None:
         """
         Initialize the async config reader
 
         Args:
             cache: Expiring cache for model configurations
+            compiled_graph_cache: Cache of graphs compiled from the model configurations
         """
         assert cache is not None
         self._cache: ExpiringCache[List[ChatModelConfig]] = cache
         assert self._cache is not None
+        self._compiled_graph_cache: CompiledGraphCache = compiled_graph_cache
+        assert self._compiled_graph_cache is not None
 
     # noinspection PyMethodMayBeStatic
     async def read_model_configs_async(self) -> List[ChatModelConfig]:
-        config_path: str = os.environ["MODELS_OFFICIAL_PATH"]
-        assert (
-            config_path is not None
-        ), "MODELS_OFFICIAL_PATH environment variable is not set"
-        models_zip_path: Optional[str] = os.environ.get("MODELS_ZIP_PATH", "")
-
         # Check cache first
         cached_configs: List[ChatModelConfig] | None = await self._cache.get()
         if cached_configs is not None:
@@ -51,8 +68,20 @@ class ConfigReader:
                 f"ConfigReader with id: {self._identifier} using cached model configurations"
             )
             return cached_configs
-        else:
-            logger.info(f"ConfigReader with id: {self._identifier} cache is empty")
+
+        if EnvironmentReader.is_environment_variable_set(
+            "CONFIG_STALE_WHILE_REVALIDATE"
+        ):
+            # keep serving the last good configurations while they are refreshed in the background
+            stale_configs: List[ChatModelConfig] | None = await self._cache.get_stale()
+            if stale_configs is not None:
+                logger.info(
+                    f"ConfigReader with id: {self._identifier} cache is stale so refreshing in background"
+                )
+                self.start_refresh()
+                return stale_configs
+
+        logger.info(f"ConfigReader with id: {self._identifier} cache is empty")
 
         # Use lock to prevent multiple simultaneous loads
         async with self._lock:
@@ -64,37 +93,9 @@ class ConfigReader:
                 )
                 return cached_configs
 
-            logger.info(
-                f"ConfigReader with id: {self._identifier} reading model configurations from {config_path}"
-            )
-
+            models: List[ChatModelConfig]
             try:
-                if models_zip_path:
-                    models = await GitHubConfigZipDownloader().read_model_configs(
-                        github_url=models_zip_path,
-                        models_official_path=config_path,
-                        models_testing_path=os.environ.get("MODELS_TESTING_PATH"),
-                    )
-                    logger.info(
-                        f"ConfigReader with id:  {self._identifier} loaded {len(models)} model configurations from GitHub Zip"
-                    )
-
-                else:
-                    models = await self.read_models_from_path_async(config_path)
-                    config_testing_path = os.environ.get("MODELS_TESTING_PATH")
-                    if config_testing_path:
-                        models_testing: List[ChatModelConfig] = (
-                            await self.read_models_from_path_async(config_testing_path)
-                        )
-                        if models_testing and len(models_testing) > 0:
-                            models.append(
-                                ChatModelConfig(
-                                    id="testing",
-                                    name="----- Models in Testing -----",
-                                    description="",
-                                )
-                            )
-                            models.extend(models_testing)
+                models = await self._read_model_configs_from_source_async()
             except Exception as e:
                 logger.error(
                     f"Using config backup since got error reading model configurations: {str(e)}"
@@ -114,9 +115,148 @@ class ConfigReader:
 
             # remove any models that are marked disabled
             models = [model for model in models if not model.disabled]
-            await self._cache.set(models)
+            await self._set_model_configs_async(models)
             return models
 
+    async def _read_model_configs_from_source_async(self) -> List[ChatModelConfig]:
+        """
+        Reads the model configurations from the configured GitHub zip, S3, GitHub or file system path
+        """
+        config_path: str = os.environ["MODELS_OFFICIAL_PATH"]
+        assert (
+            config_path is not None
+        ), "MODELS_OFFICIAL_PATH environment variable is not set"
+        models_zip_path: Optional[str] = os.environ.get("MODELS_ZIP_PATH", "")
+
+        logger.info(
+            f"ConfigReader with id: {self._identifier} reading model configurations from {config_path}"
+        )
+
+        models: List[ChatModelConfig]
+        if models_zip_path:
+            models = await GitHubConfigZipDownloader().read_model_configs(
+                github_url=models_zip_path,
+                models_official_path=config_path,
+                models_testing_path=os.environ.get("MODELS_TESTING_PATH"),
+            )
+            logger.info(
+                f"ConfigReader with id:  {self._identifier} loaded {len(models)} model configurations from GitHub Zip"
+            )
+
+        else:
+            models = await self.read_models_from_path_async(config_path)
+            config_testing_path = os.environ.get("MODELS_TESTING_PATH")
+            if config_testing_path:
+                models_testing: List[ChatModelConfig] = (
+                    await self.read_models_from_path_async(config_testing_path)
+                )
+                if models_testing and len(models_testing) > 0:
+                    models.append(
+                        ChatModelConfig(
+                            id="testing",
+                            name="----- Models in Testing -----",
+                            description="",
+                        )
+                    )
+                    models.extend(models_testing)
+        return models
+
+    async def refresh_model_configs_async(self) -> bool:
+        """
+        Reloads the model configurations and replaces the cached ones.  If the reload fails then the
+        previous configurations are kept (instead of using the backup config store) until the next refresh.
+
+        :return: whether the refresh succeeded
+        """
+        async with self._lock:
+            start_time: float = time.perf_counter()
+            models: List[ChatModelConfig]
+            try:
+                models = await self._read_model_configs_from_source_async()
+                if not models or len(models) == 0:
+                    raise ValueError("No model configurations were found")
+            except Exception as e:
+                CONFIG_REFRESH_FAILURES.inc()
+                logger.error(
+                    f"ConfigReader with id: {self._identifier} keeping previous model configurations since got error refreshing: {str(e)}"
+                )
+                logger.exception(e, stack_info=True)
+                previous_configs: List[ChatModelConfig] | None = (
+                    await self._cache.get_stale()
+                )
+                if previous_configs is not None:
+                    # reset the expiry so we don't retry on every request
+                    await self._cache.set(previous_configs)
+                return False
+            finally:
+                CONFIG_REFRESH_DURATION_SECONDS.observe(
+                    time.perf_counter() - start_time
+                )
+
+            # remove any models that are marked disabled
+            models = [model for model in models if not model.disabled]
+            await self._set_model_configs_async(models)
+            logger.info(
+                f"ConfigReader with id: {self._identifier} refreshed {len(models)} model configurations"
+            )
+            return True
+
+    async def _set_model_configs_async(self, models: List[ChatModelConfig]) -> None:
+        """Caches the model configurations and builds their registry"""
+        await self._cache.set(models)
+        # built here and swapped in so a refresh replaces the configurations and the registry at once
+        # and readers never see a partially built registry
+        ConfigReader._model_registry = ModelRegistry(configs=models)
+        logger.info(
+            f"ConfigReader with id:  {self._identifier} built model registry with {len(models)} models"
+        )
+
+    def start_refresh(self) -> asyncio.Task[bool]:
+        """
+        Starts refreshing the model configurations in a background task unless a refresh is already running
+
+        :return: the task doing the refresh
+        """
+        refresh_task: Optional[asyncio.Task[bool]] = ConfigReader._refresh_task
+        if (
+            refresh_task is None
+            or refresh_task.done()
+            or refresh_task.get_loop() is not asyncio.get_running_loop()
+        ):
+            refresh_task = asyncio.create_task(self.refresh_model_configs_async())
+            ConfigReader._refresh_task = refresh_task
+        return refresh_task
+
+    async def run_periodic_refresh_async(
+        self, *, interval_seconds: float, jitter_seconds: float
+    ) -> None:
+        """
+        Refreshes the model configurations every interval_seconds (plus a random jitter so
+        multiple workers don't all refresh at the same time) until cancelled
+
+        :param interval_seconds: seconds between refreshes
+        :param jitter_seconds: maximum random seconds to add to each interval
+        """
+        logger.info(
+            f"ConfigReader with id: {self._identifier} refreshing model configurations every {interval_seconds} seconds"
+        )
+        while True:
+            await asyncio.sleep(interval_seconds + random.uniform(0, jitter_seconds))
+            await self.start_refresh()
+
+    async def get_model_registry_async(self) -> ModelRegistry:
+        """
+        Returns the registry for the current model configurations.  The registry is built when the
+        model configurations are loaded or refreshed.
+        """
+        configs: List[ChatModelConfig] = await self.read_model_configs_async()
+        model_registry: Optional[ModelRegistry] = ConfigReader._model_registry
+        if model_registry is None or model_registry.configs is not configs:
+            # the configurations were put in the cache directly (e.g. by a test)
+            model_registry = ModelRegistry(configs=configs)
+            ConfigReader._model_registry = model_registry
+        return model_registry
+
     async def read_models_from_path_async(
         self, config_path: str
     ) -> List[ChatModelConfig]:
@@ -142,4 +282,6 @@ class ConfigReader:
 
     async def clear_cache(self) -> None:
         await self._cache.clear()
+        ConfigReader._model_registry = None
+        await self._compiled_graph_cache.clear()
         logger.info(f"ConfigReader with id:  {self._identifier} cleared cache")
@@ -14,6 +14,12 @@ logger = logging.getLogger(__name__)
 
 
 class GitHubConfigReader:
+    # ETag and parsed configs of the last directory listing for each GitHub API url
+    _cached_listings: Dict[str, Tuple[str, List[ChatModelConfig]]] = {}
+    # parsed config for each file (keyed by the git blob sha) of each GitHub API url
+    # so unchanged files are not downloaded again
+    _cached_files: Dict[str, Dict[str, ChatModelConfig]] = {}
+
     def __init__(self) -> None:
         """
         Initialize the async GitHub config reader
@@ -171,11 +177,28 @@ class GitHubConfigReader:
                 )
                 headers["Accept"] = "application/vnd.github.v3+json"
 
+                # Send the ETag of the last listing so GitHub can tell us nothing changed.
+                # Conditional requests that return 304 do not count against the rate limit.
+                cached_listing: Optional[Tuple[str, List[ChatModelConfig]]] = (
+                    GitHubConfigReader._cached_listings.get(api_url)
+                )
+                listing_headers: Dict[str, str] = (
+                    {**headers, "If-None-Match": cached_listing[0]}
+                    if cached_listing
+                    else headers
+                )
+
                 # Get the list of files with rate limit handling
                 response = await self._make_request(
-                    client=client, url=api_url, headers=headers
+                    client=client, url=api_url, headers=listing_headers
                 )
 
+                if response.status_code == 304 and cached_listing:
+                    logger.info(
+                        f"Model configurations in GitHub: {repo_url}/{path} have not changed"
+                    )
+                    return list(cached_listing[1])
+
                 response.raise_for_status()
 
                 # Process each file in the directory
@@ -186,16 +209,29 @@ class GitHubConfigReader:
                     if item["type"] == "file" and item["name"].endswith(".json")
                 ]
 
+                previous_files: Dict[str, ChatModelConfig] = (
+                    GitHubConfigReader._cached_files.get(api_url, {})
+                )
+                current_files: Dict[str, ChatModelConfig] = {}
+
                 async def fetch_and_parse_config(
                     item: Dict[str, Any]
                 ) -> Optional[ChatModelConfig]:
+                    cached_config: Optional[ChatModelConfig] = previous_files.get(
+                        item["sha"]
+                    )
+                    if cached_config is not None:
+                        current_files[item["sha"]] = cached_config
+                        return cached_config
                     try:
                         raw_url = item["download_url"]
                         file_response = await client.get(raw_url, headers=headers)
                         file_response.raise_for_status()
 
                         data = file_response.json()
-                        return ChatModelConfig(**data)
+                        config = ChatModelConfig(**data)
+                        current_files[item["sha"]] = config
+                        return config
                     except httpx.RequestError as e:
                         logger.error(f"Error reading file {item['name']}: {str(e)}")
                     except json.JSONDecodeError as e:
@@ -217,6 +253,13 @@ class GitHubConfigReader:
                 # sort the configs by name
                 configs.sort(key=lambda x: x.name)
 
+                # only keep the files that are still in the listing
+                GitHubConfigReader._cached_files[api_url] = current_files
+                etag: Optional[str] = response.headers.get("ETag")
+                # don't reuse the listing if any file failed so it is retried on the next read
+                if etag and len(current_files) == len(json_files):
+                    GitHubConfigReader._cached_listings[api_url] = (etag, list(configs))
+
                 return configs
 
             except Exception as e:
@@ -4,7 +4,7 @@ import logging
 import os
 import tempfile
 import zipfile
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 
 import httpx
 
@@ -14,6 +14,12 @@ logger = logging.getLogger(__name__)
 
 
 class GitHubConfigZipDownloader:
+    # ETag and parsed configs of the last download for each (zip url, official path, testing path)
+    # so unchanged archives are not downloaded and parsed again
+    _cached_configs: Dict[
+        Tuple[str, str, Optional[str]], Tuple[str, List[ChatModelConfig]]
+    ] = {}
+
     def __init__(
         self,
         github_token: Optional[str] = None,
@@ -36,26 +42,26 @@ class GitHubConfigZipDownloader:
         self.timeout: int = int(os.environ.get("GITHUB_TIMEOUT", 3600))
 
     async def download_zip(
-        self, zip_url: str, target_path: Optional[str] = None
-    ) -> str:
+        self,
+        zip_url: str,
+        target_path: Optional[str] = None,
+        *,
+        etag: Optional[str] = None,
+    ) -> Tuple[Optional[str], Optional[str]]:
         """
         Download ZIP file from given URL
 
         Args:
             zip_url: Full URL to the ZIP file
             target_path: Optional target directory for extraction
+            etag: Optional ETag of a previous download.  If the ZIP has not changed since then
+                it is not downloaded again.
 
         Returns:
-            Path to the extracted repository
+            Tuple of (path to the extracted repository or None if the ZIP has not changed, ETag of the ZIP)
         """
-        # Create a temporary directory if no target path is provided
-        if target_path is None:
-            target_path = tempfile.mkdtemp(prefix="github_config_")
 
-        # Ensure target path exists
-        os.makedirs(target_path, exist_ok=True)
-
-        async def download_with_retry(url: str) -> bytes:
+        async def download_with_retry(url: str) -> httpx.Response:
             """
             Download with exponential backoff and retry logic
 
@@ -63,11 +69,13 @@ class GitHubConfigZipDownloader:
                 url: Download URL
 
             Returns:
-                Downloaded content as bytes
+                Response of the download
             """
             headers = {}
             if self.github_token:
                 headers["Authorization"] = f"token {self.github_token}"
+            if etag:
+                headers["If-None-Match"] = etag
 
             for attempt in range(self.max_retries):
                 try:
@@ -78,8 +86,9 @@ class GitHubConfigZipDownloader:
                             follow_redirects=True,
                             timeout=httpx.Timeout(self.timeout),
                         )
-                        response.raise_for_status()
-                        return response.content
+                        if response.status_code != 304:
+                            response.raise_for_status()
+                        return response
                 except Exception as e1:
                     logger.warning(f"Download attempt {attempt + 1} failed: {str(e1)}")
 
@@ -93,9 +102,20 @@ class GitHubConfigZipDownloader:
         try:
             # Download ZIP archive
             logger.info(f"Downloading ZIP from: {zip_url}")
-            zip_content = await download_with_retry(zip_url)
+            response: httpx.Response = await download_with_retry(zip_url)
+            if response.status_code == 304:
+                logger.info(f"ZIP from {zip_url} has not changed")
+                return None, etag
+            zip_content: bytes = response.content
             logger.info(f"Downloaded ZIP from {zip_url}")
 
+            # Create a temporary directory if no target path is provided
+            if target_path is None:
+                target_path = tempfile.mkdtemp(prefix="github_config_")
+
+            # Ensure target path exists
+            os.makedirs(target_path, exist_ok=True)
+
             # Create a temporary file to save the ZIP
             with tempfile.NamedTemporaryFile(delete=False, suffix=".zip") as temp_zip:
                 temp_zip.write(zip_content)
@@ -119,7 +139,7 @@ class GitHubConfigZipDownloader:
 
             # Return the full path to the extracted repository
             extracted_path = os.path.join(target_path, root_dir)
-            return extracted_path
+            return extracted_path, response.headers.get("ETag")
 
         except Exception as e:
             logger.error(f"Error downloading ZIP: {str(e)}")
@@ -177,9 +197,25 @@ class GitHubConfigZipDownloader:
         Returns:
             List of model configurations
         """
+        cache_key: Tuple[str, str, Optional[str]] = (
+            github_url,
+            models_official_path,
+            models_testing_path,
+        )
+        cached: Optional[Tuple[str, List[ChatModelConfig]]] = (
+            GitHubConfigZipDownloader._cached_configs.get(cache_key)
+        )
         try:
             # Download and extract ZIP
-            repo_path: str = await self.download_zip(zip_url=github_url)
+            repo_path: Optional[str]
+            etag: Optional[str]
+            repo_path, etag = await self.download_zip(
+                zip_url=github_url, etag=cached[0] if cached else None
+            )
+            if repo_path is None:
+                assert cached is not None
+                # nothing changed so reuse the configs we parsed last time
+                return list(cached[1])
 
             # Find and parse JSON configs
             configs: List[ChatModelConfig] = self._find_json_configs(
@@ -201,6 +237,11 @@ class GitHubConfigZipDownloader:
                     )
                     configs.extend(test_configs)
 
+            if etag:
+                GitHubConfigZipDownloader._cached_configs[cache_key] = (
+                    etag,
+                    list(configs),
+                )
             return configs
 
         except Exception as e:
@@ -1,7 +1,7 @@
 import logging
 import boto3
 import json
-from typing import List
+from typing import Dict, List, Optional, Tuple
 from botocore.exceptions import ClientError
 from language_model_gateway.configs.config_schema import ChatModelConfig
 from language_model_gateway.gateway.utilities.url_parser import UrlParser
@@ -10,6 +10,9 @@ logger = logging.getLogger(__name__)
 
 
 class S3ConfigReader:
+    # ETag and parsed config of each (bucket, key) so unchanged objects are not downloaded again
+    _cached_objects: Dict[Tuple[str, str], Tuple[str, ChatModelConfig]] = {}
+
     # noinspection PyMethodMayBeStatic
     async def read_model_configs(self, *, s3_url: str) -> List[ChatModelConfig]:
         """
@@ -41,6 +44,15 @@ class S3ConfigReader:
                 if "Contents" in page:
                     for obj in page["Contents"]:
                         if obj["Key"].endswith(".json"):
+                            # the listing includes the ETag so reuse the config if the object has not changed
+                            cached: Optional[Tuple[str, ChatModelConfig]] = (
+                                S3ConfigReader._cached_objects.get(
+                                    (bucket_name, obj["Key"])
+                                )
+                            )
+                            if cached and cached[0] == obj.get("ETag"):
+                                configs.append(cached[1])
+                                continue
                             try:
                                 # Get the JSON file content
                                 response = s3_client.get_object(
@@ -51,7 +63,12 @@ class S3ConfigReader:
                                 data = json.loads(
                                     response["Body"].read().decode("utf-8")
                                 )
-                                configs.append(ChatModelConfig(**data))
+                                config = ChatModelConfig(**data)
+                                configs.append(config)
+                                if response.get("ETag"):
+                                    S3ConfigReader._cached_objects[
+                                        (bucket_name, obj["Key"])
+                                    ] = (response["ETag"], config)
 
                             except ClientError as e:
                                 logger.error(
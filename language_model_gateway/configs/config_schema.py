@@ -1,3 +1,4 @@
+import os
 from typing import List, Optional
 
 from pydantic import BaseModel
@@ -16,7 +17,7 @@ class PromptConfig(BaseModel):
     """The hub id of the prompt"""
 
     cache: bool | None = None
-    """Whether to cache the prompt"""
+    """Whether to cache the prompt.  Only supported by Bedrock and Anthropic-compatible models."""
 
 
 class ModelParameterConfig(BaseModel):
@@ -69,6 +70,36 @@ class AgentConfig(BaseModel):
     """The parameters for the tool"""
 
 
+class HedgingConfig(BaseModel):
+    """Configuration for sending a second request to the next model if the first is slow"""
+
+    percentile: float = 95
+    """Send the second request once the first has taken longer than this percentile of the recent
+    times to first token of the model"""
+
+    min_samples: int = 20
+    """Use default_delay_seconds until this many times to first token have been recorded"""
+
+    default_delay_seconds: float = 2
+    """Delay before sending the second request while there are too few recorded times"""
+
+
+class ModelEndpointConfig(BaseModel):
+    """Endpoint of a model.  Fields that are not set are taken from the model configuration."""
+
+    provider: str | None = None
+    """The provider of the endpoint"""
+
+    model: str | None = None
+    """The model or Bedrock inference profile to use"""
+
+    region: str | None = None
+    """The AWS region of a Bedrock endpoint"""
+
+    url: str | None = None
+    """The base URL of an OpenAI-compatible endpoint"""
+
+
 class ModelConfig(BaseModel):
     """Model configuration"""
 
@@ -78,6 +109,76 @@ class ModelConfig(BaseModel):
     model: str
     """The model to use"""
 
+    region: str | None = None
+    """The AWS region of Bedrock models.  Defaults to the AWS_REGION environment variable."""
+
+    url: str | None = None
+    """The base URL of OpenAI-compatible models.  Defaults to the OpenAI API."""
+
+    endpoints: List[ModelEndpointConfig] | None = None
+    """Endpoints to spread the requests across, picking the least loaded of two at random"""
+
+    fallbacks: List["ModelConfig"] | None = None
+    """Models to try in order if this one is throttled, fails with a server error or does not
+    send the first token within time_to_first_token_seconds"""
+
+    time_to_first_token_seconds: float | None = None
+    """Try the next fallback if the first token has not arrived within this many seconds"""
+
+    hedging: HedgingConfig | None = None
+    """Send a second request to the first fallback if the first token is late and use whichever
+    responds first"""
+
+
+class StreamCoalescingConfig(BaseModel):
+    """Configuration for coalescing streamed tokens into fewer SSE frames"""
+
+    max_bytes: int = 256
+    """Send the pending tokens once they reach this many bytes"""
+
+    max_delay_ms: int = 50
+    """Send the pending tokens once the oldest one has waited this many milliseconds"""
+
+
+class ResponseCacheConfig(BaseModel):
+    """Configuration for caching chat completion responses"""
+
+    ttl_seconds: int = 60 * 60
+    """How long to keep a cached response"""
+
+
+class SemanticCacheConfig(BaseModel):
+    """Configuration for answering near-duplicate questions from a cache"""
+
+    similarity_threshold: float = 0.95
+    """Minimum cosine similarity between the embeddings of the questions to use the cached answer"""
+
+    max_entries: int = 1000
+    """Maximum number of questions to keep.  The oldest are dropped first."""
+
+
+class RequestCoalescingConfig(BaseModel):
+    """Configuration for sharing one upstream call between identical concurrent requests"""
+
+    max_wait_seconds: float = 30
+    """Requests only join a call that started at most this long ago"""
+
+    max_buffer_bytes: int = 1024 * 1024
+    """Streaming requests only join a stream while less than this much of it has been sent"""
+
+
+class AdmissionControlConfig(BaseModel):
+    """Configuration for limiting the number of concurrent requests in a worker"""
+
+    max_concurrency: int = 10
+    """Maximum number of requests that run at the same time"""
+
+    max_queue_size: int = 10
+    """Maximum number of requests waiting to run.  Requests beyond this are rejected at once."""
+
+    max_wait_seconds: float = 5
+    """Requests that have waited this long are rejected"""
+
 
 class ChatModelConfig(BaseModel):
     """Model configuration for chat models"""
@@ -123,6 +224,29 @@ class ChatModelConfig(BaseModel):
     example_prompts: List[PromptConfig] | None = None
     """Example prompts for the model"""
 
+    stream_coalescing: StreamCoalescingConfig | None = None
+    """Coalesce streamed tokens into fewer SSE frames"""
+
+    response_cache: ResponseCacheConfig | None = None
+    """Cache responses to identical requests.  Only use for models whose responses are deterministic."""
+
+    semantic_cache: SemanticCacheConfig | None = None
+    """Answer questions similar to the last user message of an earlier request from a cache"""
+
+    request_coalescing: RequestCoalescingConfig | None = None
+    """Share one upstream call between identical requests that arrive while it is in flight"""
+
+    admission_control: AdmissionControlConfig | None = None
+    """Limit the number of concurrent requests to this model in a worker"""
+
     def get_agents(self) -> List[AgentConfig]:
         """Get the agents for the model"""
         return self.agents or self.tools or []
+
+    def get_provider(self) -> str:
+        """Get the provider of the model (for metrics)"""
+        if self.model is not None:
+            return self.model.provider
+        if self.type == "openai":
+            return "openai"
+        return os.environ.get("DEFAULT_MODEL_PROVIDER", "bedrock")
@@ -0,0 +1,67 @@
+import hashlib
+import json
+import time
+from typing import Dict, List, Optional, Any
+
+from openai.types import Model
+
+from language_model_gateway.configs.config_schema import ChatModelConfig
+
+
+class ModelRegistry:
+    """
+    Immutable index over a set of model configurations.
+
+    It is built once per config load so lookups by name or id are O(1) and the /models
+    response body (and its ETag) is only serialized once.  The ETag does not include the created
+    time of the models (the time the registry was built) so it only changes when the models do.
+    """
+
+    def __init__(self, *, configs: List[ChatModelConfig]) -> None:
+        """
+        Build the registry
+
+        Args:
+            configs: model configurations to index
+        """
+        assert configs is not None
+        self.configs: List[ChatModelConfig] = configs
+        self._configs_by_name: Dict[str, ChatModelConfig] = {}
+        self._configs_by_id: Dict[str, ChatModelConfig] = {}
+        config: ChatModelConfig
+        for config in configs:
+            # first one wins if there are duplicates
+            self._configs_by_name.setdefault(config.name.casefold(), config)
+            self._configs_by_id.setdefault(config.id, config)
+
+        created: int = int(time.time())
+        models_list: List[Dict[str, Any]] = [
+            Model(
+                id=config.name,
+                created=created,
+                object="model",
+                owned_by="openai",
+            ).model_dump()
+            for config in configs
+        ]
+        self.models_response_body: bytes = json.dumps(
+            {"object": "list", "data": models_list}
+        ).encode("utf-8")
+        self.models_response_etag: str = '"{}"'.format(
+            hashlib.sha256(
+                json.dumps(
+                    [
+                        {k: v for k, v in model.items() if k != "created"}
+                        for model in models_list
+                    ]
+                ).encode("utf-8")
+            ).hexdigest()
+        )
+
+    def get_by_name(self, name: str) -> Optional[ChatModelConfig]:
+        """Returns the model configuration with the given name (case-insensitive)"""
+        return self._configs_by_name.get(name.casefold())
+
+    def get_by_id(self, id_: str) -> Optional[ChatModelConfig]:
+        """Returns the model configuration with the given id"""
+        return self._configs_by_id.get(id_)
@@ -1,16 +1,23 @@
 import logging
 import os
+import tempfile
 
 from language_model_gateway.configs.config_reader.config_reader import ConfigReader
+from language_model_gateway.configs.config_schema import AdmissionControlConfig
 from language_model_gateway.container.simple_container import SimpleContainer
 from language_model_gateway.gateway.aws.aws_client_factory import AwsClientFactory
+from language_model_gateway.gateway.converters.compiled_graph_cache import (
+    CompiledGraphCache,
+)
 from language_model_gateway.gateway.converters.langgraph_to_openai_converter import (
     LangGraphToOpenAIConverter,
 )
 from language_model_gateway.gateway.file_managers.file_manager_factory import (
     FileManagerFactory,
 )
+from language_model_gateway.gateway.http.http_cache import HttpCache
 from language_model_gateway.gateway.http.http_client_factory import HttpClientFactory
+from language_model_gateway.gateway.http.http_fetcher import HttpFetcher
 from language_model_gateway.gateway.image_generation.image_generator_factory import (
     ImageGeneratorFactory,
 )
@@ -21,6 +28,8 @@ from language_model_gateway.gateway.managers.image_generation_manager import (
     ImageGenerationManager,
 )
 from language_model_gateway.gateway.managers.model_manager import ModelManager
+from language_model_gateway.gateway.models.endpoint_router import EndpointRouter
+from language_model_gateway.gateway.models.latency_tracker import LatencyTracker
 from language_model_gateway.gateway.models.model_factory import ModelFactory
 from language_model_gateway.gateway.ocr.ocr_extractor_factory import OCRExtractorFactory
 from language_model_gateway.gateway.providers.image_generation_provider import (
@@ -33,7 +42,31 @@ from language_model_gateway.gateway.providers.langchain_chat_completions_provide
 from language_model_gateway.gateway.providers.openai_chat_completions_provider import (
     OpenAiChatCompletionsProvider,
 )
+from language_model_gateway.gateway.semantic_cache.base_embedder import BaseEmbedder
+from language_model_gateway.gateway.semantic_cache.bedrock_embedder import (
+    BedrockEmbedder,
+)
+from language_model_gateway.gateway.semantic_cache.semantic_cache import SemanticCache
 from language_model_gateway.gateway.tools.tool_provider import ToolProvider
+from language_model_gateway.gateway.utilities.admission_controller import (
+    AdmissionController,
+)
+from language_model_gateway.gateway.utilities.content_cache import ContentCache
+from language_model_gateway.gateway.utilities.environment_reader import (
+    EnvironmentReader,
+)
+from language_model_gateway.gateway.utilities.rate_limit_store import (
+    InMemoryRateLimitStore,
+)
+from language_model_gateway.gateway.utilities.rate_limiter import RateLimiter
+from language_model_gateway.gateway.utilities.parser_pool import ParserPool
+from language_model_gateway.gateway.utilities.request_coalescer import (
+    RequestCoalescer,
+)
+from language_model_gateway.gateway.utilities.response_cache import ResponseCache
+from language_model_gateway.gateway.utilities.response_cache_backend import (
+    InMemoryResponseCacheBackend,
+)
 from language_model_gateway.gateway.utilities.environment_variables import (
     EnvironmentVariables,
 )
@@ -56,7 +89,24 @@ class ContainerFactory:
         container = SimpleContainer()
 
         # register services here
-        container.register(HttpClientFactory, lambda c: HttpClientFactory())
+        # shared so connections are pooled across requests.  Closed in the app lifespan.
+        container.lazy_singleton(
+            HttpClientFactory,
+            lambda c: HttpClientFactory(
+                max_connections=int(
+                    os.environ.get("HTTP_CLIENT_MAX_CONNECTIONS") or 100
+                ),
+                max_keepalive_connections=int(
+                    os.environ.get("HTTP_CLIENT_MAX_KEEPALIVE_CONNECTIONS") or 20
+                ),
+                keepalive_expiry=float(
+                    os.environ.get("HTTP_CLIENT_KEEPALIVE_EXPIRY_SECONDS") or 30
+                ),
+                http2=EnvironmentReader.is_environment_variable_set(
+                    "HTTP_CLIENT_HTTP2"
+                ),
+            ),
+        )
 
         container.register(
             OpenAiChatCompletionsProvider,
@@ -64,11 +114,29 @@ class ContainerFactory:
                 http_client_factory=c.resolve(HttpClientFactory)
             ),
         )
-        container.register(ModelFactory, lambda c: ModelFactory())
-
+        # shared so the times to first token used for hedging are kept across requests
+        container.lazy_singleton(LatencyTracker, lambda c: LatencyTracker())
+        # shared so the endpoint stats used for load balancing are kept across requests
+        container.lazy_singleton(EndpointRouter, lambda c: EndpointRouter())
         container.register(
+            ModelFactory,
+            lambda c: ModelFactory(
+                latency_tracker=c.resolve(LatencyTracker),
+                endpoint_router=c.resolve(EndpointRouter),
+            ),
+        )
+
+        # shared so boto3 clients are cached across requests
+        container.lazy_singleton(
             AwsClientFactory,
-            lambda c: AwsClientFactory(),
+            lambda c: AwsClientFactory(
+                region_name=os.environ.get("AWS_REGION"),
+                max_pool_connections=int(
+                    os.environ.get("AWS_MAX_POOL_CONNECTIONS") or 10
+                ),
+                max_attempts=int(os.environ.get("AWS_MAX_ATTEMPTS") or 3),
+                retry_mode=os.environ.get("AWS_RETRY_MODE") or "standard",
+            ),
         )
 
         container.register(
@@ -120,6 +188,64 @@ class ContainerFactory:
             ),
         )
 
+        # shared so fetches of the same url are collapsed and the host limits apply to all requests
+        container.lazy_singleton(
+            HttpFetcher,
+            lambda c: HttpFetcher(
+                http_client_factory=c.resolve(HttpClientFactory),
+                http_cache=HttpCache(
+                    cache_directory=os.environ.get("HTTP_FETCH_CACHE_DIRECTORY")
+                    or os.path.join(tempfile.gettempdir(), "http_fetch_cache"),
+                    max_size_bytes=int(
+                        os.environ.get("HTTP_FETCH_CACHE_MAX_SIZE_MB") or 256
+                    )
+                    * 1024
+                    * 1024,
+                ),
+                max_connections_per_host=int(
+                    os.environ.get("HTTP_FETCH_MAX_CONNECTIONS_PER_HOST") or 4
+                ),
+            ),
+        )
+        # shared so documents converted for one request are reused by later ones
+        container.lazy_singleton(
+            ContentCache,
+            lambda c: ContentCache(
+                max_memory_size_bytes=int(
+                    os.environ.get("CONTENT_CACHE_MEMORY_SIZE_MB") or 64
+                )
+                * 1024
+                * 1024,
+                cache_directory=os.environ.get("CONTENT_CACHE_DIRECTORY")
+                or os.path.join(tempfile.gettempdir(), "content_cache"),
+                max_disk_size_bytes=int(
+                    os.environ.get("CONTENT_CACHE_DISK_SIZE_MB") or 512
+                )
+                * 1024
+                * 1024,
+            ),
+        )
+        # shared so the limits apply to all parsing in the worker.  Shut down in the app lifespan.
+        container.lazy_singleton(
+            ParserPool,
+            lambda c: ParserPool(
+                pool_type=(
+                    "thread"
+                    if os.environ.get("PARSER_POOL_TYPE") == "thread"
+                    else "process"
+                ),
+                max_workers=int(os.environ.get("PARSER_POOL_MAX_WORKERS") or 2),
+                max_queue_size=int(os.environ.get("PARSER_POOL_MAX_QUEUE_SIZE") or 20),
+                timeout_seconds=float(
+                    os.environ.get("PARSER_POOL_TIMEOUT_SECONDS") or 60
+                ),
+                max_memory_bytes=int(
+                    os.environ.get("PARSER_POOL_MAX_MEMORY_MB") or 2048
+                )
+                * 1024
+                * 1024,
+            ),
+        )
         container.register(
             ToolProvider,
             lambda c: ToolProvider(
@@ -129,6 +255,21 @@ class ContainerFactory:
                 environment_variables=c.resolve(EnvironmentVariables),
                 github_pull_request_helper=c.resolve(GithubPullRequestHelper),
                 jira_issues_helper=c.resolve(JiraIssueHelper),
+                http_fetcher=c.resolve(HttpFetcher),
+                content_cache=c.resolve(ContentCache),
+                parser_pool=c.resolve(ParserPool),
+            ),
+        )
+        # the compiled graphs hold on to the model and tools so they are
+        # rebuilt if any of the services are re-registered
+        container.lazy_singleton(
+            CompiledGraphCache,
+            lambda c: CompiledGraphCache(
+                max_size=(
+                    int(os.environ["COMPILED_GRAPH_CACHE_SIZE"])
+                    if os.environ.get("COMPILED_GRAPH_CACHE_SIZE")
+                    else 100
+                )
             ),
         )
         container.register(
@@ -137,6 +278,7 @@ class ContainerFactory:
                 model_factory=c.resolve(ModelFactory),
                 lang_graph_to_open_ai_converter=c.resolve(LangGraphToOpenAIConverter),
                 tool_provider=c.resolve(ToolProvider),
+                compiled_graph_cache=c.resolve(CompiledGraphCache),
             ),
         )
         # we want only one instance of the cache so we use singleton
@@ -151,8 +293,77 @@ class ContainerFactory:
             ),
         )
 
+        # shared so cached responses survive across requests
+        container.lazy_singleton(
+            ResponseCache,
+            lambda c: ResponseCache(
+                local_backend=InMemoryResponseCacheBackend(
+                    max_size=int(os.environ.get("RESPONSE_CACHE_MAX_SIZE") or 1000)
+                )
+            ),
+        )
         container.register(
-            ConfigReader, lambda c: ConfigReader(cache=c.resolve(ExpiringCache))
+            BaseEmbedder,
+            lambda c: BedrockEmbedder(
+                aws_client_factory=c.resolve(AwsClientFactory),
+                model_id=os.environ.get("SEMANTIC_CACHE_EMBEDDING_MODEL")
+                or "amazon.titan-embed-text-v2:0",
+            ),
+        )
+        # shared so cached answers survive across requests.  Saved in the app lifespan.
+        container.lazy_singleton(
+            SemanticCache,
+            lambda c: SemanticCache(
+                embedder=c.resolve(BaseEmbedder),
+                cache_path=os.environ.get("SEMANTIC_CACHE_PATH"),
+            ),
+        )
+        # shared so identical requests can find the call in flight
+        container.lazy_singleton(RequestCoalescer, lambda c: RequestCoalescer())
+        # shared so the limits apply to all requests in the worker
+        container.lazy_singleton(
+            AdmissionController,
+            lambda c: AdmissionController(
+                global_config=(
+                    AdmissionControlConfig(
+                        max_concurrency=int(os.environ["ADMISSION_MAX_CONCURRENCY"]),
+                        max_queue_size=int(
+                            os.environ.get("ADMISSION_MAX_QUEUE_SIZE") or 100
+                        ),
+                        max_wait_seconds=float(
+                            os.environ.get("ADMISSION_MAX_WAIT_SECONDS") or 5
+                        ),
+                    )
+                    if os.environ.get("ADMISSION_MAX_CONCURRENCY")
+                    else None
+                )
+            ),
+        )
+        # shared so the budgets apply to all requests in the worker
+        container.lazy_singleton(
+            RateLimiter,
+            lambda c: RateLimiter(
+                store=InMemoryRateLimitStore(
+                    max_size=int(os.environ.get("RATE_LIMIT_MAX_TENANTS") or 10000)
+                ),
+                requests_per_minute=(
+                    int(os.environ["RATE_LIMIT_REQUESTS_PER_MINUTE"])
+                    if os.environ.get("RATE_LIMIT_REQUESTS_PER_MINUTE")
+                    else None
+                ),
+                tokens_per_minute=(
+                    int(os.environ["RATE_LIMIT_TOKENS_PER_MINUTE"])
+                    if os.environ.get("RATE_LIMIT_TOKENS_PER_MINUTE")
+                    else None
+                ),
+            ),
+        )
+        container.register(
+            ConfigReader,
+            lambda c: ConfigReader(
+                cache=c.resolve(ExpiringCache),
+                compiled_graph_cache=c.resolve(CompiledGraphCache),
+            ),
         )
         container.register(
             ChatCompletionManager,
@@ -160,6 +371,10 @@ class ContainerFactory:
                 open_ai_provider=c.resolve(OpenAiChatCompletionsProvider),
                 langchain_provider=c.resolve(LangChainCompletionsProvider),
                 config_reader=c.resolve(ConfigReader),
+                response_cache=c.resolve(ResponseCache),
+                semantic_cache=c.resolve(SemanticCache),
+                request_coalescer=c.resolve(RequestCoalescer),
+                admission_controller=c.resolve(AdmissionController),
             ),
         )
 
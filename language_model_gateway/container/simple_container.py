@@ -51,6 +51,8 @@ class SimpleContainer:
             raise ValueError(f"Factory for {service_type} must be callable")
 
         self._factories[service_type] = factory
+        # lazy singletons may hold on to the service that was just replaced so rebuild them on next resolve
+        self._clear_lazy_singletons()
         return self
 
     def resolve(self, service_type: type[T]) -> T:
@@ -85,6 +87,26 @@ class SimpleContainer:
         self._singleton_types.add(service_type)
         return self
 
+    def lazy_singleton(
+        self, service_type: type[T], factory: ServiceFactory[T]
+    ) -> "SimpleContainer":
+        """
+        Register a singleton that is created by the factory on first resolve
+
+        Args:
+            service_type: The type of service to register
+            factory: Factory function that creates the service
+        """
+        self.register(service_type, factory)
+        self._singleton_types.add(service_type)
+        return self
+
+    def _clear_lazy_singletons(self) -> None:
+        """Discard instances of singletons that were created from a factory"""
+        for service_type in self._singleton_types:
+            if service_type in self._factories:
+                self._singletons.pop(service_type, None)
+
     def transient(
         self, service_type: type[T], factory: ServiceFactory[T]
     ) -> "SimpleContainer":
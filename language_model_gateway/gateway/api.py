@@ -1,9 +1,10 @@
+import asyncio
 import logging
 import os
 from contextlib import asynccontextmanager
 from os import makedirs, environ
 from pathlib import Path
-from typing import AsyncGenerator, Annotated, List
+from typing import AsyncGenerator, Annotated, List, Optional
 
 from fastapi import FastAPI, HTTPException
 from fastapi.params import Depends
@@ -13,7 +14,19 @@ from starlette.staticfiles import StaticFiles
 
 from language_model_gateway.configs.config_reader.config_reader import ConfigReader
 from language_model_gateway.configs.config_schema import ChatModelConfig
-from language_model_gateway.gateway.api_container import get_config_reader
+from language_model_gateway.gateway.api_container import (
+    get_config_reader,
+    get_container_async,
+)
+from language_model_gateway.gateway.http.http_client_factory import HttpClientFactory
+from language_model_gateway.gateway.http.rate_limit_middleware import (
+    RateLimitMiddleware,
+)
+from language_model_gateway.gateway.metrics.metrics_app import (
+    create_metrics_app,
+    mark_worker_dead,
+)
+from language_model_gateway.gateway.routers.admin_router import AdminRouter
 from language_model_gateway.gateway.routers.chat_completion_router import (
     ChatCompletionsRouter,
 )
@@ -22,7 +35,12 @@ from language_model_gateway.gateway.routers.image_generation_router import (
 )
 from language_model_gateway.gateway.routers.images_router import ImagesRouter
 from language_model_gateway.gateway.routers.models_router import ModelsRouter
+from language_model_gateway.gateway.semantic_cache.semantic_cache import SemanticCache
 from language_model_gateway.gateway.utilities.endpoint_filter import EndpointFilter
+from language_model_gateway.gateway.utilities.environment_reader import (
+    EnvironmentReader,
+)
+from language_model_gateway.gateway.utilities.parser_pool import ParserPool
 
 # warnings.filterwarnings("ignore", category=LangChainBetaWarning)
 
@@ -46,11 +64,38 @@ uvicorn_logger.addFilter(EndpointFilter(path="/health"))
 async def lifespan(app1: FastAPI) -> AsyncGenerator[None, None]:
     # Startup: This runs when the first request comes in
     worker_id = id(app)
+    config_refresh_task: Optional[asyncio.Task[None]] = None
+    http_client_factory: Optional[HttpClientFactory] = None
+    semantic_cache: Optional[SemanticCache] = None
+    parser_pool: Optional[ParserPool] = None
     try:
         # Configure logging
         logger.info(f"Starting application initialization for worker {worker_id}...")
 
         # perform any startup tasks here
+        container = await get_container_async()
+        # create the shared http clients so they can be closed on shutdown
+        http_client_factory = container.resolve(HttpClientFactory)
+        # loaded from disk on first use and saved on shutdown
+        semantic_cache = container.resolve(SemanticCache)
+        # its worker processes are started on first use and stopped on shutdown
+        parser_pool = container.resolve(ParserPool)
+        if EnvironmentReader.is_environment_variable_set(
+            "CONFIG_STALE_WHILE_REVALIDATE"
+        ):
+            config_reader: ConfigReader = container.resolve(ConfigReader)
+            config_refresh_task = asyncio.create_task(
+                config_reader.run_periodic_refresh_async(
+                    interval_seconds=float(
+                        os.environ.get("CONFIG_REFRESH_INTERVAL_SECONDS")
+                        or os.environ.get("CONFIG_CACHE_TIMEOUT_SECONDS")
+                        or 60 * 60
+                    ),
+                    jitter_seconds=float(
+                        os.environ.get("CONFIG_REFRESH_JITTER_SECONDS") or 30
+                    ),
+                )
+            )
 
         logger.info(f"Application initialization completed for worker {worker_id}")
         yield
@@ -62,6 +107,15 @@ async def lifespan(app1: FastAPI) -> AsyncGenerator[None, None]:
     finally:
         try:
             logger.info(f"Starting application shutdown for worker {worker_id}...")
+            if config_refresh_task is not None:
+                config_refresh_task.cancel()
+            if http_client_factory is not None:
+                await http_client_factory.aclose()
+            if semantic_cache is not None:
+                semantic_cache.save()
+            if parser_pool is not None:
+                parser_pool.shutdown()
+            mark_worker_dead()
             # await container.cleanup()
             # Clean up on shutdown
             logger.info("Application shutdown completed")
@@ -72,9 +126,14 @@ async def lifespan(app1: FastAPI) -> AsyncGenerator[None, None]:
 
 def create_app() -> FastAPI:
     app1: FastAPI = FastAPI(title="OpenAI-compatible API", lifespan=lifespan)
+    # per-tenant budgets set by RATE_LIMIT_REQUESTS_PER_MINUTE and RATE_LIMIT_TOKENS_PER_MINUTE
+    app1.add_middleware(RateLimitMiddleware)
     app1.include_router(ChatCompletionsRouter().get_router())
     app1.include_router(ModelsRouter().get_router())
     app1.include_router(ImageGenerationRouter().get_router())
+    if environ.get("ENABLE_ADMIN_ENDPOINTS", "0") == "1":
+        # not authenticated and shows the internal urls of the endpoints so it is off by default
+        app1.include_router(AdminRouter().get_router())
     # Mount the static directory
     app1.mount(
         "/static",
@@ -83,6 +142,8 @@ def create_app() -> FastAPI:
         ),
         name="static",
     )
+    # expose prometheus metrics (combined across workers if PROMETHEUS_MULTIPROC_DIR is set)
+    app1.mount("/metrics", create_metrics_app())
 
     image_generation_path: str = environ["IMAGE_GENERATION_PATH"]
 
@@ -17,6 +17,7 @@ from language_model_gateway.gateway.managers.image_generation_manager import (
     ImageGenerationManager,
 )
 from language_model_gateway.gateway.managers.model_manager import ModelManager
+from language_model_gateway.gateway.models.endpoint_router import EndpointRouter
 from language_model_gateway.gateway.utilities.cached import cached
 
 logger = logging.getLogger(__name__)
@@ -74,3 +75,11 @@ def get_file_manager_factory(
     """helper function to get the chat manager"""
     assert isinstance(container, SimpleContainer), type(container)
     return container.resolve(FileManagerFactory)
+
+
+def get_endpoint_router(
+    container: Annotated[SimpleContainer, Depends(get_container_async)]
+) -> EndpointRouter:
+    """helper function to get the endpoint router"""
+    assert isinstance(container, SimpleContainer), type(container)
+    return container.resolve(EndpointRouter)
@@ -1,15 +1,84 @@
+import logging
 import os
+import threading
+from typing import Dict, Optional, Tuple
 
 import boto3
+from botocore.config import Config
+
+logger = logging.getLogger(__name__)
 
 
 class AwsClientFactory:
-    # noinspection PyMethodMayBeStatic
+    """
+    Creates boto3 clients and caches them per (service, region, profile) since creating a
+    session and client loads the endpoint data and credentials every time.
+
+    boto3 clients are thread-safe and refresh their credentials (including SSO credentials)
+    when they expire so a cached client can be reused for the life of the process.
+    """
+
+    def __init__(
+        self,
+        *,
+        region_name: Optional[str] = None,
+        max_pool_connections: int = 10,
+        max_attempts: int = 3,
+        retry_mode: str = "standard",
+    ) -> None:
+        """
+        Initialize the AWS client factory
+
+        Args:
+            region_name: AWS region of the clients.  Defaults to AWS_REGION or us-east-1
+            max_pool_connections: Maximum number of connections each client keeps in its pool
+            max_attempts: Maximum number of attempts (including the first) for a request
+            retry_mode: botocore retry mode (legacy, standard or adaptive)
+        """
+        self.region_name: str = (
+            region_name or os.environ.get("AWS_REGION") or "us-east-1"
+        )
+        self.config: Config = Config(
+            max_pool_connections=max_pool_connections,
+            retries={"max_attempts": max_attempts, "mode": retry_mode},
+        )
+        self._clients: Dict[Tuple[str, str, Optional[str]], boto3.client] = {}
+        # boto3 sessions are not thread-safe so clients are created under a lock
+        self._lock: threading.Lock = threading.Lock()
+
     def create_client(self, *, service_name: str) -> boto3.client:
-        """Create and return a Bedrock client"""
-        session = boto3.Session(profile_name=os.environ.get("AWS_CREDENTIALS_PROFILE"))
-        bedrock_client = session.client(
-            service_name=service_name,
-            region_name="us-east-1",
+        """Returns a cached client for the AWS service, creating it if needed"""
+        profile_name: Optional[str] = os.environ.get("AWS_CREDENTIALS_PROFILE")
+        key: Tuple[str, str, Optional[str]] = (
+            service_name,
+            self.region_name,
+            profile_name,
         )
-        return bedrock_client
+        client: Optional[boto3.client] = self._clients.get(key)
+        if client is not None:
+            return client
+
+        with self._lock:
+            client = self._clients.get(key)
+            if client is not None:
+                return client
+            session = boto3.Session(profile_name=profile_name)
+            client = session.client(
+                service_name=service_name,
+                region_name=self.region_name,
+                config=self.config,
+            )
+            # if no credentials could be found (e.g. not logged in to SSO yet) don't cache the client
+            # so the credentials are looked up again on the next call
+            if session.get_credentials() is not None:
+                self._clients[key] = client
+            else:
+                logger.warning(
+                    f"No AWS credentials found for {service_name} so not caching the client"
+                )
+            return client
+
+    def clear(self) -> None:
+        """Discards the cached clients"""
+        with self._lock:
+            self._clients.clear()
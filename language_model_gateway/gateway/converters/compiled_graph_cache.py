@@ -0,0 +1,89 @@
+import asyncio
+import hashlib
+import json
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional
+from uuid import UUID, uuid4
+
+from cachetools import LRUCache
+from langgraph.graph.state import CompiledStateGraph
+
+from language_model_gateway.configs.config_schema import ChatModelConfig
+
+logger = logging.getLogger(__name__)
+
+
+class CompiledGraphCache:
+    """
+    Size bounded LRU cache of compiled LangGraph graphs keyed by a hash of the parts of the
+    model configuration that are used to build the graph (model, model parameters and agents)
+    """
+
+    def __init__(self, *, max_size: int) -> None:
+        """
+        Initialize the compiled graph cache
+
+        Args:
+            max_size: Maximum number of compiled graphs to keep
+        """
+        assert max_size > 0
+        self._cache: LRUCache[str, CompiledStateGraph] = LRUCache(maxsize=max_size)
+        self._lock: asyncio.Lock = asyncio.Lock()
+        self._identifier: UUID = uuid4()
+
+    @staticmethod
+    def get_key(*, chat_model_config: ChatModelConfig) -> str:
+        """
+        Returns a stable hash of the parts of the model configuration that affect the graph
+
+        :param chat_model_config: model configuration
+        :return: hex digest to use as cache key
+        """
+        key_data: Dict[str, Any] = {
+            "model": (
+                chat_model_config.model.model_dump()
+                if chat_model_config.model
+                else None
+            ),
+            "model_parameters": [
+                p.model_dump() for p in chat_model_config.model_parameters or []
+            ],
+            "agents": [a.model_dump() for a in chat_model_config.get_agents()],
+        }
+        return hashlib.sha256(
+            json.dumps(key_data, sort_keys=True).encode("utf-8")
+        ).hexdigest()
+
+    async def get_or_create_async(
+        self,
+        *,
+        chat_model_config: ChatModelConfig,
+        fn_create_graph: Callable[[], Awaitable[CompiledStateGraph]],
+    ) -> CompiledStateGraph:
+        """
+        Returns the cached graph for the model configuration or creates (and caches) it
+
+        :param chat_model_config: model configuration
+        :param fn_create_graph: function to call to create the graph on a cache miss
+        :return: compiled graph
+        """
+        key: str = self.get_key(chat_model_config=chat_model_config)
+        compiled_state_graph: Optional[CompiledStateGraph] = self._cache.get(key)
+        if compiled_state_graph is not None:
+            return compiled_state_graph
+
+        # Use lock so concurrent requests for the same model only build the graph once
+        async with self._lock:
+            compiled_state_graph = self._cache.get(key)
+            if compiled_state_graph is None:
+                logger.info(
+                    f"CompiledGraphCache with id: {self._identifier} creating graph for model {chat_model_config.name}"
+                )
+                compiled_state_graph = await fn_create_graph()
+                self._cache[key] = compiled_state_graph
+            return compiled_state_graph
+
+    async def clear(self) -> None:
+        async with self._lock:
+            self._cache.clear()
+            logger.info(f"CompiledGraphCache with id: {self._identifier} cleared cache")
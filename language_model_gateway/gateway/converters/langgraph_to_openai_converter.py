@@ -2,6 +2,7 @@ import json
 import logging
 import os
 import time
+from contextlib import nullcontext
 from typing import (
     Any,
     List,
@@ -15,6 +16,7 @@ from typing import (
 from typing import (
     Dict,
     AsyncGenerator,
+    AsyncIterator,
     Iterable,
 )
 
@@ -29,7 +31,7 @@ from langchain_core.messages import (
 from langchain_core.messages import AIMessageChunk
 from langchain_core.messages.ai import UsageMetadata
 from langchain_core.prompt_values import PromptValue
-from langchain_core.runnables import Runnable
+from langchain_core.runnables import Runnable, RunnableConfig
 from langchain_core.runnables.schema import CustomStreamEvent, StandardStreamEvent
 from langchain_core.tools import BaseTool
 from langgraph.graph import END, START, StateGraph
@@ -37,34 +39,53 @@ from langgraph.graph.state import CompiledStateGraph
 from langgraph.prebuilt import ToolNode
 from openai import NotGiven, NOT_GIVEN
 from openai.types import CompletionUsage
+from openai.types.completion_usage import PromptTokensDetails
 from openai.types.chat import (
-    ChatCompletionChunk,
     ChatCompletion,
     ChatCompletionMessage,
     ChatCompletionSystemMessageParam,
 )
 from openai.types.chat import ChatCompletionMessageParam
 from openai.types.chat.chat_completion import Choice
-from openai.types.chat.chat_completion_chunk import ChoiceDelta, Choice as ChunkChoice
 from openai.types.chat.completion_create_params import ResponseFormat
 from openai.types.shared_params import ResponseFormatJSONSchema
 from openai.types.shared_params.response_format_json_schema import JSONSchema
 from starlette.responses import StreamingResponse, JSONResponse
 
+from language_model_gateway.configs.config_schema import StreamCoalescingConfig
 from language_model_gateway.gateway.converters.my_messages_state import MyMessagesState
+from language_model_gateway.gateway.converters.sse_chunk_encoder import (
+    SseChunkEncoder,
+)
+from language_model_gateway.gateway.converters.stream_coalescer import (
+    StreamCoalescer,
+)
 from language_model_gateway.gateway.converters.streaming_tool_node import (
     StreamingToolNode,
 )
+from language_model_gateway.gateway.http.cancellable_streaming_response import (
+    CancellableStreamingResponse,
+)
+from language_model_gateway.gateway.converters.request_timings_callback_handler import (
+    RequestTimingsCallbackHandler,
+)
+from language_model_gateway.gateway.metrics.gateway_metrics import TOKENS
 from language_model_gateway.gateway.schema.openai.completions import (
     ChatRequest,
     ROLE_TYPES,
     INCOMING_MESSAGE_TYPES,
 )
+from language_model_gateway.gateway.tools.resilient_base_tool import TOOL_PROGRESS_EVENT
 from language_model_gateway.gateway.utilities.chat_message_helpers import (
+    add_prompt_tokens_details,
     langchain_to_chat_message,
     convert_message_content_to_string,
 )
 from language_model_gateway.gateway.utilities.json_extractor import JsonExtractor
+from language_model_gateway.gateway.semantic_cache.streamed_answer import (
+    StreamedAnswer,
+)
+from language_model_gateway.gateway.utilities.request_timings import RequestTimings
 
 logger = logging.getLogger(__file__)
 
@@ -77,6 +98,9 @@ class LangGraphToOpenAIConverter:
         request_id: str,
         compiled_state_graph: CompiledStateGraph,
         messages: List[ChatCompletionMessageParam],
+        stream_coalescing: Optional[StreamCoalescingConfig] = None,
+        provider: Optional[str] = None,
+        streamed_answer: Optional[StreamedAnswer] = None,
     ) -> AsyncGenerator[str, None]:
         """
         Asynchronously generate streaming responses from the agent.
@@ -86,18 +110,50 @@ class LangGraphToOpenAIConverter:
             request_id: The unique request identifier.
             compiled_state_graph: The compiled state graph.
             messages: The list of chat completion message parameters.
+            stream_coalescing: Optional configuration to coalesce tokens into fewer frames.
+            provider: Provider of the model (for metrics).
+            streamed_answer: Optional answer to record the tokens of the model in for the semantic cache.
 
         Yields:
             The streaming response as a string.
         """
+        # the parts of the chunk that don't change are encoded once for the whole stream
+        chunk_encoder: SseChunkEncoder = SseChunkEncoder(
+            request_id=request_id, model=request["model"], created=int(time.time())
+        )
+        log_input_and_output: bool = os.environ.get("LOG_INPUT_AND_OUTPUT", "0") == "1"
+        coalescer: Optional[StreamCoalescer] = (
+            StreamCoalescer(config=stream_coalescing) if stream_coalescing else None
+        )
+        pending_content: str
+        pending_usage: Optional[CompletionUsage]
+        # usage of each call to the model so the end of the graph reports the total
+        model_usages: List[UsageMetadata] = []
         try:
             # Process streamed events from the graph and yield messages over the SSE stream.
-            event: StandardStreamEvent | CustomStreamEvent
-            async for event in self.astream_events(
-                request=request,
-                compiled_state_graph=compiled_state_graph,
-                messages=messages,
-            ):
+            events: AsyncIterator[Optional[StandardStreamEvent | CustomStreamEvent]] = (
+                self.astream_events(
+                    request=request,
+                    compiled_state_graph=compiled_state_graph,
+                    messages=messages,
+                )
+            )
+            if coalescer is not None:
+                # yields None when the pending content has waited long enough
+                events = coalescer.iterate_async(events)
+            event: Optional[StandardStreamEvent | CustomStreamEvent]
+            async for event in events:
+                if (
+                    coalescer is not None
+                    and coalescer.has_pending
+                    and (event is None or event["event"] != "on_chat_model_stream")
+                ):
+                    # send the pending content before anything else
+                    pending_content, pending_usage = coalescer.flush()
+                    yield chunk_encoder.encode_content(
+                        content=pending_content, usage=pending_usage
+                    )
+
                 if not event:
                     continue
 
@@ -124,13 +180,6 @@ class LangGraphToOpenAIConverter:
 
                             # print(f"chunk: {chunk}")
 
-                            usage_metadata = chunk.usage_metadata
-                            completion_usage_metadata = (
-                                self.convert_usage_meta_data_to_openai(
-                                    usages=[usage_metadata] if usage_metadata else []
-                                )
-                            )
-
                             content_text: str = convert_message_content_to_string(
                                 content
                             )
@@ -139,32 +188,47 @@ class LangGraphToOpenAIConverter:
                                 content_text, str
                             ), f"content_text: {content_text} (type: {type(content_text)})"
 
-                            if (
-                                os.environ.get("LOG_INPUT_AND_OUTPUT", "0") == "1"
-                                and content_text
-                            ):
+                            if log_input_and_output and content_text:
                                 logger.info(f"Returning content: {content_text}")
 
                             if content_text:
-                                chat_model_stream_response: ChatCompletionChunk = (
-                                    ChatCompletionChunk(
-                                        id=request_id,
-                                        created=int(time.time()),
-                                        model=request["model"],
-                                        choices=[
-                                            ChunkChoice(
-                                                index=0,
-                                                delta=ChoiceDelta(
-                                                    role="assistant",
-                                                    content=content_text,
-                                                ),
-                                            )
-                                        ],
-                                        usage=completion_usage_metadata,
-                                        object="chat.completion.chunk",
+                                if streamed_answer is not None:
+                                    streamed_answer.add(content=content_text)
+                                usage_metadata = chunk.usage_metadata
+                                completion_usage: Optional[CompletionUsage] = (
+                                    self.convert_usage_meta_data_to_openai(
+                                        usages=[usage_metadata]
                                     )
+                                    if usage_metadata
+                                    else None
                                 )
-                                yield f"data: {json.dumps(chat_model_stream_response.model_dump())}\n\n"
+                                if coalescer is None:
+                                    yield chunk_encoder.encode_content(
+                                        content=content_text, usage=completion_usage
+                                    )
+                                elif coalescer.add(
+                                    content=content_text, usage=completion_usage
+                                ):
+                                    pending_content, pending_usage = coalescer.flush()
+                                    yield chunk_encoder.encode_content(
+                                        content=pending_content, usage=pending_usage
+                                    )
+                    case "on_chat_model_end":
+                        # the message has the usage of the whole call to the model
+                        model_output: AIMessage | None = event.get("data", {}).get(
+                            "output"
+                        )
+                        if model_output is not None and getattr(
+                            model_output, "usage_metadata", None
+                        ):
+                            model_usages.append(model_output.usage_metadata)  # type: ignore[arg-type]
+                            self.record_token_usage(
+                                model=request["model"],
+                                provider=provider,
+                                usage=self.convert_usage_meta_data_to_openai(
+                                    usages=[model_output.usage_metadata]  # type: ignore[list-item]
+                                ),
+                            )
                     case "on_chain_end":
                         # print(f"===== {event_type} =====\n{event}\n")
                         output: Dict[str, Any] | str | None = event.get("data", {}).get(
@@ -175,24 +239,22 @@ class LangGraphToOpenAIConverter:
                             and isinstance(output, dict)
                             and output.get("usage_metadata")
                         ):
+                            # the state only has the usage of the last call to the model so the
+                            # end of the graph (the last usage frame) reports the total of all calls
                             completion_usage_metadata = (
                                 self.convert_usage_meta_data_to_openai(
-                                    usages=[output["usage_metadata"]]
+                                    usages=(
+                                        model_usages
+                                        if model_usages and not event.get("parent_ids")
+                                        else [output["usage_metadata"]]
+                                    )
                                 )
                             )
 
                             # Handle the end of the chain event
-                            chat_end_stream_response: ChatCompletionChunk = (
-                                ChatCompletionChunk(
-                                    id=request_id,
-                                    created=int(time.time()),
-                                    model=request["model"],
-                                    choices=[],
-                                    usage=completion_usage_metadata,
-                                    object="chat.completion.chunk",
-                                )
+                            yield chunk_encoder.encode_usage(
+                                usage=completion_usage_metadata
                             )
-                            yield f"data: {json.dumps(chat_end_stream_response.model_dump())}\n\n"
                     case "on_tool_start":
                         # Handle the start of the tool event
                         tool_name: Optional[str] = event.get("name", None)
@@ -201,27 +263,9 @@ class LangGraphToOpenAIConverter:
                         )
                         if tool_name:
                             logger.debug(f"on_tool_start: {tool_name} {tool_input}")
-                            chat_stream_response = ChatCompletionChunk(
-                                id=request_id,
-                                created=int(time.time()),
-                                model=request["model"],
-                                choices=[
-                                    ChunkChoice(
-                                        index=0,
-                                        delta=ChoiceDelta(
-                                            role="assistant",
-                                            content=f"\n\n> Running Agent {tool_name}: {tool_input}\n",
-                                        ),
-                                    )
-                                ],
-                                usage=CompletionUsage(
-                                    prompt_tokens=0,
-                                    completion_tokens=0,
-                                    total_tokens=0,
-                                ),
-                                object="chat.completion.chunk",
+                            yield chunk_encoder.encode_content(
+                                content=f"\n\n> Running Agent {tool_name}: {tool_input}\n"
                             )
-                            yield f"data: {json.dumps(chat_stream_response.model_dump())}\n\n"
 
                     case "on_tool_end":
                         # Handle the end of the tool event
@@ -234,53 +278,39 @@ class LangGraphToOpenAIConverter:
                             # print(f"on_tool_end: {tool_message}")
 
                             if artifact:
-                                if os.environ.get("LOG_INPUT_AND_OUTPUT", "0") == "1":
+                                if log_input_and_output:
                                     logger.info(f"Returning artifact: {artifact}")
 
-                                chat_stream_response = ChatCompletionChunk(
-                                    id=request_id,
-                                    created=int(time.time()),
-                                    model=request["model"],
-                                    choices=[
-                                        ChunkChoice(
-                                            index=0,
-                                            delta=ChoiceDelta(
-                                                role="assistant",
-                                                content=f"\n> {artifact}\n",
-                                            ),
-                                        )
-                                    ],
-                                    usage=CompletionUsage(
-                                        prompt_tokens=0,
-                                        completion_tokens=0,
-                                        total_tokens=0,
-                                    ),
-                                    object="chat.completion.chunk",
+                                yield chunk_encoder.encode_content(
+                                    content=f"\n> {artifact}\n"
+                                )
+                    case "on_custom_event":
+                        # progress of a tool that is still running
+                        if event.get("name") == TOOL_PROGRESS_EVENT:
+                            progress: Optional[Any] = event.get("data", {}).get(
+                                "artifact"
+                            )
+                            if progress:
+                                yield chunk_encoder.encode_content(
+                                    content=f"\n> {progress}\n"
                                 )
-                                yield f"data: {json.dumps(chat_stream_response.model_dump())}\n\n"
                     case _:
                         # Handle other event types
                         pass
+            if coalescer is not None and coalescer.has_pending:
+                pending_content, pending_usage = coalescer.flush()
+                yield chunk_encoder.encode_content(
+                    content=pending_content, usage=pending_usage
+                )
         except Exception as e:
-            chat_stream_response = ChatCompletionChunk(
-                id=request_id,
-                created=int(time.time()),
-                model=request["model"],
-                choices=[
-                    ChunkChoice(
-                        index=0,
-                        delta=ChoiceDelta(
-                            role="assistant",
-                            content=f"\nError:\n{e}\n",
-                        ),
-                    )
-                ],
-                usage=CompletionUsage(
-                    prompt_tokens=0, completion_tokens=0, total_tokens=0
-                ),
-                object="chat.completion.chunk",
-            )
-            yield f"data: {json.dumps(chat_stream_response.model_dump())}\n\n"
+            if streamed_answer is not None:
+                streamed_answer.fail()
+            if coalescer is not None and coalescer.has_pending:
+                pending_content, pending_usage = coalescer.flush()
+                yield chunk_encoder.encode_content(
+                    content=pending_content, usage=pending_usage
+                )
+            yield chunk_encoder.encode_content(content=f"\nError:\n{e}\n")
 
         yield "data: [DONE]\n\n"
 
@@ -291,6 +321,8 @@ class LangGraphToOpenAIConverter:
         request_id: str,
         compiled_state_graph: CompiledStateGraph,
         system_messages: List[ChatCompletionSystemMessageParam],
+        stream_coalescing: Optional[StreamCoalescingConfig] = None,
+        provider: Optional[str] = None,
     ) -> StreamingResponse | JSONResponse:
         """
         Call the agent with the provided input and return the response.
@@ -300,6 +332,8 @@ class LangGraphToOpenAIConverter:
             request_id: The unique request identifier.
             compiled_state_graph: The compiled state graph.
             system_messages: The list of chat completion message parameters.
+            stream_coalescing: Optional configuration to coalesce streamed tokens into fewer frames.
+            provider: Provider of the model (for metrics).
 
         Returns:
             The response as a StreamingResponse or JSONResponse.
@@ -308,12 +342,14 @@ class LangGraphToOpenAIConverter:
         assert isinstance(chat_request, dict)
 
         if chat_request.get("stream"):
-            return StreamingResponse(
+            return CancellableStreamingResponse(
                 await self.get_streaming_response_async(
                     request=chat_request,
                     request_id=request_id,
                     compiled_state_graph=compiled_state_graph,
                     system_messages=system_messages,
+                    stream_coalescing=stream_coalescing,
+                    provider=provider,
                 ),
                 media_type="text/event-stream",
             )
@@ -339,6 +375,11 @@ class LangGraphToOpenAIConverter:
                         ]
                     )
                 )
+                self.record_token_usage(
+                    model=chat_request["model"],
+                    provider=provider,
+                    usage=total_usage_metadata,
+                )
 
                 output_messages_raw: List[ChatCompletionMessage | None] = [
                     langchain_to_chat_message(m)
@@ -378,15 +419,17 @@ class LangGraphToOpenAIConverter:
                 if os.environ.get("LOG_INPUT_AND_OUTPUT", "0") == "1" and choices_text:
                     logger.info(f"Returning content: {choices_text}")
 
-                chat_response: ChatCompletion = ChatCompletion(
-                    id=request_id,
-                    model=chat_request["model"],
-                    choices=choices,
-                    usage=total_usage_metadata,
-                    created=int(time.time()),
-                    object="chat.completion",
-                )
-                return JSONResponse(content=chat_response.model_dump())
+                timings: Optional[RequestTimings] = RequestTimings.get_current()
+                with timings.measure("serialization") if timings else nullcontext():
+                    chat_response: ChatCompletion = ChatCompletion(
+                        id=request_id,
+                        model=chat_request["model"],
+                        choices=choices,
+                        usage=total_usage_metadata,
+                        created=int(time.time()),
+                        object="chat.completion",
+                    )
+                    return JSONResponse(content=chat_response.model_dump())
             except Exception as e:
                 logger.exception(e, stack_info=True)
                 raise HTTPException(status_code=500, detail=f"Unexpected error: {e}")
@@ -469,13 +512,61 @@ class LangGraphToOpenAIConverter:
         total_usage_metadata: CompletionUsage = CompletionUsage(
             prompt_tokens=0, completion_tokens=0, total_tokens=0
         )
+        cache_read_tokens: int = 0
+        cache_write_tokens: int = 0
         usage_metadata: UsageMetadata
         for usage_metadata in usages:
             total_usage_metadata.prompt_tokens += usage_metadata["input_tokens"]
             total_usage_metadata.completion_tokens += usage_metadata["output_tokens"]
             total_usage_metadata.total_tokens += usage_metadata["total_tokens"]
+            # prompt caching tokens are either in the standard input_token_details or
+            # in the keys ChatBedrockConverse copies from the Bedrock usage
+            input_token_details: Dict[str, Any] = cast(
+                Dict[str, Any], usage_metadata.get("input_token_details") or {}
+            )
+            raw_usage_metadata: Dict[str, Any] = cast(Dict[str, Any], usage_metadata)
+            cache_read_tokens += (
+                input_token_details.get("cache_read")
+                or raw_usage_metadata.get("cache_read_input_tokens")
+                or 0
+            )
+            cache_write_tokens += (
+                input_token_details.get("cache_creation")
+                or raw_usage_metadata.get("cache_write_input_tokens")
+                or 0
+            )
+        if cache_read_tokens or cache_write_tokens:
+            # cache_write_tokens is not part of the OpenAI schema so it is passed as an extra field
+            total_usage_metadata.prompt_tokens_details = (
+                PromptTokensDetails.model_validate(
+                    {
+                        "cached_tokens": cache_read_tokens,
+                        "cache_write_tokens": cache_write_tokens,
+                    }
+                )
+            )
         return total_usage_metadata
 
+    @staticmethod
+    def record_token_usage(
+        *, model: str, provider: Optional[str], usage: CompletionUsage
+    ) -> None:
+        """
+        Adds the tokens of a call to the model to the token counters
+
+        :param model: name of the model
+        :param provider: provider of the model
+        :param usage: usage returned by convert_usage_meta_data_to_openai
+        """
+        if usage.prompt_tokens:
+            TOKENS.labels(
+                model=model, provider=provider or "unknown", direction="input"
+            ).inc(usage.prompt_tokens)
+        if usage.completion_tokens:
+            TOKENS.labels(
+                model=model, provider=provider or "unknown", direction="output"
+            ).inc(usage.completion_tokens)
+
     async def get_streaming_response_async(
         self,
         *,
@@ -483,6 +574,8 @@ class LangGraphToOpenAIConverter:
         request_id: str,
         compiled_state_graph: CompiledStateGraph,
         system_messages: List[ChatCompletionSystemMessageParam],
+        stream_coalescing: Optional[StreamCoalescingConfig] = None,
+        provider: Optional[str] = None,
     ) -> AsyncGenerator[str, None]:
         """
         Get the streaming response asynchronously.
@@ -492,6 +585,8 @@ class LangGraphToOpenAIConverter:
             request_id: The unique request identifier.
             compiled_state_graph: The compiled state graph.
             system_messages: The list of chat completion message parameters.
+            stream_coalescing: Optional configuration to coalesce streamed tokens into fewer frames.
+            provider: Provider of the model (for metrics).
 
         Returns:
             The streaming response as an async generator.
@@ -510,6 +605,10 @@ class LangGraphToOpenAIConverter:
             request_id=request_id,
             compiled_state_graph=compiled_state_graph,
             messages=messages,
+            stream_coalescing=stream_coalescing,
+            provider=provider,
+            # captured here since the body is streamed in another context
+            streamed_answer=StreamedAnswer.get_current(),
         )
         return generator
 
@@ -533,7 +632,9 @@ class LangGraphToOpenAIConverter:
         input1: Dict[str, List[tuple[ROLE_TYPES, INCOMING_MESSAGE_TYPES]]] = {
             "messages": messages
         }
-        output: Dict[str, Any] = await compiled_state_graph.ainvoke(input=input1)
+        output: Dict[str, Any] = await compiled_state_graph.ainvoke(
+            input=input1, config=self.get_run_config()
+        )
         out_messages: List[AnyMessage] = output["messages"]
         return out_messages
 
@@ -561,10 +662,21 @@ class LangGraphToOpenAIConverter:
         }
         event: StandardStreamEvent | CustomStreamEvent
         async for event in compiled_state_graph.astream_events(
-            input=input1, version="v2"
+            input=input1, version="v2", config=self.get_run_config()
         ):
             yield event
 
+    @staticmethod
+    def get_run_config() -> RunnableConfig:
+        """
+        Returns the config for running the graph.  It adds the model and tool calls to the
+        timings of the request if there are any.
+        """
+        timings: Optional[RequestTimings] = RequestTimings.get_current()
+        if timings is None:
+            return {}
+        return {"callbacks": [RequestTimingsCallbackHandler(timings=timings)]}
+
     # noinspection SpellCheckingInspection
     async def ainvoke(
         self,
@@ -670,7 +782,12 @@ class LangGraphToOpenAIConverter:
 
     # noinspection PyMethodMayBeStatic
     async def create_graph_for_llm_async(
-        self, *, llm: BaseChatModel, tools: Sequence[BaseTool]
+        self,
+        *,
+        llm: BaseChatModel,
+        tools: Sequence[BaseTool],
+        tool_max_concurrency: Optional[Dict[str, int]] = None,
+        tool_timeout_seconds: Optional[Dict[str, float]] = None,
     ) -> CompiledStateGraph:
         """
         Create a graph for the language model asynchronously.
@@ -678,15 +795,27 @@ class LangGraphToOpenAIConverter:
         Args:
             llm: The base chat model.
             tools: The sequence of tools.
+            tool_max_concurrency: Maximum number of concurrent calls by tool name.
+            tool_timeout_seconds: Timeout of each call by tool name.
 
         Returns:
             The compiled state graph.
         """
-        return await self._create_graph_for_llm_with_tools_async(llm=llm, tools=tools)
+        return await self._create_graph_for_llm_with_tools_async(
+            llm=llm,
+            tools=tools,
+            tool_max_concurrency=tool_max_concurrency,
+            tool_timeout_seconds=tool_timeout_seconds,
+        )
 
     # noinspection PyMethodMayBeStatic
     async def _create_graph_for_llm_with_tools_async(
-        self, *, llm: BaseChatModel, tools: Sequence[BaseTool]
+        self,
+        *,
+        llm: BaseChatModel,
+        tools: Sequence[BaseTool],
+        tool_max_concurrency: Optional[Dict[str, int]] = None,
+        tool_timeout_seconds: Optional[Dict[str, float]] = None,
     ) -> CompiledStateGraph:
         """
         Create a graph for the language model asynchronously.
@@ -694,6 +823,8 @@ class LangGraphToOpenAIConverter:
 
         :param llm: base chat model
         :param tools: list of tools
+        :param tool_max_concurrency: maximum number of concurrent calls by tool name
+        :param tool_timeout_seconds: timeout of each call by tool name
         :return: compiled state graph
         """
         tool_node: ToolNode | None = None
@@ -706,7 +837,11 @@ class LangGraphToOpenAIConverter:
             BaseMessage,
         ]
         if len(tools) > 0:
-            tool_node = StreamingToolNode(tools)
+            tool_node = StreamingToolNode(
+                tools,
+                max_concurrency=tool_max_concurrency,
+                timeout_seconds=tool_timeout_seconds,
+            )
             model_with_tools = llm.bind_tools(tools)
         else:
             model_with_tools = llm
@@ -770,4 +905,8 @@ class LangGraphToOpenAIConverter:
             prompt_tokens=original.prompt_tokens + new_one.prompt_tokens,
             completion_tokens=original.completion_tokens + new_one.completion_tokens,
             total_tokens=original.total_tokens + new_one.total_tokens,
+            prompt_tokens_details=add_prompt_tokens_details(
+                original=original.prompt_tokens_details,
+                new_one=new_one.prompt_tokens_details,
+            ),
         )
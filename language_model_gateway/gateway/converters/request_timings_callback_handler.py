@@ -0,0 +1,124 @@
+import time
+from typing import Any, Dict, List, Optional, Union
+from uuid import UUID
+
+from langchain_core.callbacks import AsyncCallbackHandler
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatGenerationChunk, GenerationChunk, LLMResult
+
+from language_model_gateway.gateway.utilities.request_timings import RequestTimings
+
+
+class RequestTimingsCallbackHandler(AsyncCallbackHandler):
+    """
+    Adds the time to first token and duration of each model call and the duration of each tool
+    call of a graph run to the request timings
+    """
+
+    def __init__(self, *, timings: RequestTimings) -> None:
+        self.timings: RequestTimings = timings
+        # run id => start of the model or tool call
+        self._model_started_at: Dict[UUID, float] = {}
+        self._model_first_token: set[UUID] = set()
+        self._tool_started_at: Dict[UUID, float] = {}
+
+    async def on_chat_model_start(
+        self,
+        serialized: Dict[str, Any],
+        messages: List[List[BaseMessage]],
+        *,
+        run_id: UUID,
+        parent_run_id: Optional[UUID] = None,
+        tags: Optional[List[str]] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> None:
+        self._model_started_at[run_id] = time.perf_counter()
+
+    async def on_llm_new_token(
+        self,
+        token: str,
+        *,
+        chunk: Optional[Union[GenerationChunk, ChatGenerationChunk]] = None,
+        run_id: UUID,
+        parent_run_id: Optional[UUID] = None,
+        tags: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> None:
+        if run_id in self._model_first_token:
+            return
+        started_at: Optional[float] = self._model_started_at.get(run_id)
+        if started_at is not None:
+            self._model_first_token.add(run_id)
+            self.timings.add(
+                name="model_ttft", start=started_at, end=time.perf_counter()
+            )
+
+    async def on_llm_end(
+        self,
+        response: LLMResult,
+        *,
+        run_id: UUID,
+        parent_run_id: Optional[UUID] = None,
+        tags: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> None:
+        self._end_model(run_id=run_id)
+
+    async def on_llm_error(
+        self,
+        error: BaseException,
+        *,
+        run_id: UUID,
+        parent_run_id: Optional[UUID] = None,
+        tags: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> None:
+        self._end_model(run_id=run_id)
+
+    def _end_model(self, *, run_id: UUID) -> None:
+        self._model_first_token.discard(run_id)
+        started_at: Optional[float] = self._model_started_at.pop(run_id, None)
+        if started_at is not None:
+            self.timings.add(name="model", start=started_at, end=time.perf_counter())
+
+    async def on_tool_start(
+        self,
+        serialized: Dict[str, Any],
+        input_str: str,
+        *,
+        run_id: UUID,
+        parent_run_id: Optional[UUID] = None,
+        tags: Optional[List[str]] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        inputs: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> None:
+        self._tool_started_at[run_id] = time.perf_counter()
+
+    async def on_tool_end(
+        self,
+        output: Any,
+        *,
+        run_id: UUID,
+        parent_run_id: Optional[UUID] = None,
+        tags: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> None:
+        self._end_tool(run_id=run_id)
+
+    async def on_tool_error(
+        self,
+        error: BaseException,
+        *,
+        run_id: UUID,
+        parent_run_id: Optional[UUID] = None,
+        tags: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> None:
+        self._end_tool(run_id=run_id)
+
+    def _end_tool(self, *, run_id: UUID) -> None:
+        started_at: Optional[float] = self._tool_started_at.pop(run_id, None)
+        if started_at is not None:
+            self.timings.add(name="tool", start=started_at, end=time.perf_counter())
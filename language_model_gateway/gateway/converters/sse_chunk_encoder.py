@@ -0,0 +1,130 @@
+import json
+from json.encoder import encode_basestring_ascii
+from typing import Any, Dict, List, Optional
+
+from openai.types import CompletionUsage
+from openai.types.chat import ChatCompletionChunk
+from openai.types.chat.chat_completion_chunk import ChoiceDelta, Choice as ChunkChoice
+
+
+class SseChunkEncoder:
+    """
+    Encodes the chat.completion.chunk server sent events of one stream.
+
+    Building a pydantic ChatCompletionChunk and calling model_dump() and json.dumps() for every token
+    is the main CPU cost when streaming, so the parts of the JSON that don't change during the stream
+    (id, model, object, created) are serialized once and only the content and usage are spliced in.
+
+    The output is byte-for-byte the same as
+    f"data: {json.dumps(ChatCompletionChunk(...).model_dump())}\\n\\n".  orjson is not used since it
+    can't escape non-ASCII characters the way json.dumps does.
+    """
+
+    # usage sent with every content chunk that doesn't have its own usage
+    _zero_usage: str = json.dumps(
+        CompletionUsage(
+            prompt_tokens=0, completion_tokens=0, total_tokens=0
+        ).model_dump()
+    )
+
+    # placeholders replaced by the content and usage of each chunk
+    _content_placeholder: str = "__sse_chunk_encoder_content__"
+    _usage_placeholder: str = "__sse_chunk_encoder_usage__"
+
+    def __init__(self, *, request_id: str, model: str, created: int) -> None:
+        """
+        Initialize the encoder
+
+        Args:
+            request_id: id of the chunks
+            model: model of the chunks
+            created: unix timestamp of the chunks
+        """
+        # the templates are built from the SDK's own model so the output follows the fields
+        # (and their order) of whichever version of the SDK is installed
+        self._content_template: List[str] = self._create_template(
+            request_id=request_id,
+            model=model,
+            created=created,
+            choices=[
+                ChunkChoice(
+                    index=0,
+                    delta=ChoiceDelta(
+                        role="assistant", content=self._content_placeholder
+                    ),
+                )
+            ],
+            placeholders=[self._content_placeholder, self._usage_placeholder],
+        )
+        self._usage_template: List[str] = self._create_template(
+            request_id=request_id,
+            model=model,
+            created=created,
+            choices=[],
+            placeholders=[self._usage_placeholder],
+        )
+
+    @classmethod
+    def _create_template(
+        cls,
+        *,
+        request_id: str,
+        model: str,
+        created: int,
+        choices: List[ChunkChoice],
+        placeholders: List[str],
+    ) -> List[str]:
+        """
+        Returns the event split at the placeholders in the order they appear in the JSON
+
+        :return: the parts of the event around the placeholders
+        """
+        chunk: Dict[str, Any] = ChatCompletionChunk(
+            id=request_id,
+            created=created,
+            model=model,
+            choices=choices,
+            object="chat.completion.chunk",
+        ).model_dump()
+        chunk["usage"] = cls._usage_placeholder
+        event: str = f"data: {json.dumps(chunk)}\n\n"
+        parts: List[str] = []
+        for placeholder in placeholders:
+            before, separator, event = event.partition(json.dumps(placeholder))
+            assert separator, f"{placeholder} not found in the chunk"
+            parts.append(before)
+        parts.append(event)
+        return parts
+
+    def encode_content(
+        self, *, content: str, usage: Optional[CompletionUsage] = None
+    ) -> str:
+        """
+        Returns the event for a chunk with the assistant content
+
+        :param content: content of the delta
+        :param usage: usage of the chunk.  If not passed then zero usage is sent.
+        :return: server sent event
+        """
+        template: List[str] = self._content_template
+        return (
+            template[0]
+            + encode_basestring_ascii(content)
+            + template[1]
+            + (
+                json.dumps(usage.model_dump())
+                if usage is not None
+                else self._zero_usage
+            )
+            + template[2]
+        )
+
+    def encode_usage(self, *, usage: CompletionUsage) -> str:
+        """
+        Returns the event for a chunk without choices that just has the usage
+
+        :param usage: usage of the chunk
+        :return: server sent event
+        """
+        template: List[str] = self._usage_template
+        return template[0] + json.dumps(usage.model_dump()) + template[1]
@@ -0,0 +1,135 @@
+import asyncio
+import time
+from typing import AsyncGenerator, AsyncIterator, List, Optional, Tuple
+
+from openai.types import CompletionUsage
+
+from language_model_gateway.configs.config_schema import StreamCoalescingConfig
+from language_model_gateway.gateway.utilities.chat_message_helpers import (
+    add_prompt_tokens_details,
+)
+
+
+class StreamCoalescer:
+    """
+    Buffers streamed content deltas so they can be sent as fewer, larger SSE frames.
+
+    The pending content is sent once it reaches max_bytes or once the oldest pending delta has
+    waited max_delay_ms, whichever comes first.  The first delta of a stream is always sent
+    immediately so the time to first token is not affected.
+    """
+
+    def __init__(self, *, config: StreamCoalescingConfig) -> None:
+        """
+        Initialize the coalescer
+
+        Args:
+            config: when to send the pending content
+        """
+        assert config.max_bytes > 0
+        assert config.max_delay_ms >= 0
+        self._max_bytes: int = config.max_bytes
+        self._max_delay_seconds: float = config.max_delay_ms / 1000
+        self._pending_content: List[str] = []
+        self._pending_bytes: int = 0
+        self._pending_usage: Optional[CompletionUsage] = None
+        self._pending_since: Optional[float] = None
+        self._sent_first: bool = False
+
+    @property
+    def has_pending(self) -> bool:
+        return self._pending_since is not None
+
+    def add(self, *, content: str, usage: Optional[CompletionUsage]) -> bool:
+        """
+        Adds a delta to the pending content
+
+        :param content: content of the delta
+        :param usage: usage of the delta
+        :return: whether the pending content should be sent now
+        """
+        self._pending_content.append(content)
+        self._pending_bytes += len(content.encode("utf-8"))
+        if usage is not None:
+            if self._pending_usage is None:
+                self._pending_usage = usage.model_copy()
+            else:
+                self._pending_usage.prompt_tokens += usage.prompt_tokens
+                self._pending_usage.completion_tokens += usage.completion_tokens
+                self._pending_usage.total_tokens += usage.total_tokens
+                self._pending_usage.prompt_tokens_details = add_prompt_tokens_details(
+                    original=self._pending_usage.prompt_tokens_details,
+                    new_one=usage.prompt_tokens_details,
+                )
+        if self._pending_since is None:
+            self._pending_since = time.monotonic()
+        return not self._sent_first or self._pending_bytes >= self._max_bytes
+
+    def flush(self) -> Tuple[str, Optional[CompletionUsage]]:
+        """
+        Returns the pending content and usage and clears them
+
+        :return: tuple of (content, usage)
+        """
+        content: str = "".join(self._pending_content)
+        usage: Optional[CompletionUsage] = self._pending_usage
+        self._pending_content = []
+        self._pending_bytes = 0
+        self._pending_usage = None
+        self._pending_since = None
+        self._sent_first = True
+        return content, usage
+
+    def seconds_until_flush(self) -> Optional[float]:
+        """Returns the seconds until the pending content should be sent or None if nothing is pending"""
+        if self._pending_since is None:
+            return None
+        return max(
+            0.0, self._pending_since + self._max_delay_seconds - time.monotonic()
+        )
+
+    async def iterate_async[
+        T
+    ](self, items: AsyncIterator[T]) -> AsyncGenerator[Optional[T], None]:
+        """
+        Iterates over items yielding None whenever the pending content should be sent because
+        no new item arrived within max_delay_ms.
+
+        The items are read in a separate task (so its context vars are kept for the whole
+        iteration) and handed over through a queue.
+
+        :param items: items to iterate
+        :return: the items or None when it is time to send the pending content
+        """
+        queue: asyncio.Queue[Tuple[Optional[T], Optional[BaseException], bool]] = (
+            asyncio.Queue(maxsize=100)
+        )
+
+        async def read_items() -> None:
+            try:
+                async for item in items:
+                    await queue.put((item, None, False))
+                await queue.put((None, None, True))
+            except Exception as e:
+                await queue.put((None, e, True))
+
+        reader_task: asyncio.Task[None] = asyncio.create_task(read_items())
+        try:
+            while True:
+                item: Optional[T]
+                error: Optional[BaseException]
+                done: bool
+                try:
+                    item, error, done = await asyncio.wait_for(
+                        queue.get(), timeout=self.seconds_until_flush()
+                    )
+                except TimeoutError:
+                    yield None
+                    continue
+                if error is not None:
+                    raise error
+                if done:
+                    return
+                yield item
+        finally:
+            reader_task.cancel()
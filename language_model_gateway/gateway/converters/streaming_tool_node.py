@@ -1,20 +1,65 @@
 from __future__ import annotations
 
+import asyncio
+import logging
+import time
 from typing import (
     Any,
     AsyncIterator,
+    Callable,
+    Dict,
+    Literal,
     Optional,
+    Sequence,
+    Union,
 )
 
+from langchain_core.messages import ToolCall, ToolMessage
 from langchain_core.runnables import RunnableConfig
 from langchain_core.runnables.utils import Input
 from langchain_core.runnables.utils import (
     Output,
 )
+from langchain_core.tools import BaseTool
 from langgraph.prebuilt import ToolNode
 
+from language_model_gateway.gateway.metrics.gateway_metrics import (
+    TOOL_DURATION_SECONDS,
+)
+
+logger = logging.getLogger(__name__)
+
 
 class StreamingToolNode(ToolNode):
+    """
+    ToolNode that runs the tool calls of a turn concurrently (each tool's on_tool_end event is
+    streamed as soon as that tool finishes) while limiting how many calls of each tool can run
+    at the same time and how long each call can take.
+    """
+
+    def __init__(
+        self,
+        tools: Sequence[Union[BaseTool, Callable[..., Any]]],
+        *,
+        max_concurrency: Optional[Dict[str, int]] = None,
+        timeout_seconds: Optional[Dict[str, float]] = None,
+    ) -> None:
+        """
+        Initialize the tool node
+
+        Args:
+            tools: tools that can be called
+            max_concurrency: maximum number of concurrent calls by tool name
+            timeout_seconds: timeout of each call by tool name
+        """
+        super().__init__(tools)
+        # the graph (and so this node) is shared by requests so the limits apply across requests
+        self._semaphores: Dict[str, asyncio.Semaphore] = {
+            name: asyncio.Semaphore(limit)
+            for name, limit in (max_concurrency or {}).items()
+        }
+        self._timeout_seconds: Dict[str, float] = timeout_seconds or {}
+
     async def astream(
         self,
         input: Input,
@@ -35,58 +80,38 @@ class StreamingToolNode(ToolNode):
         """
         yield await self.ainvoke(input, config, **kwargs)
 
-    # async def _arun_one(
-    #     self,
-    #     call: ToolCall,
-    #     input_type: Literal["list", "dict"],
-    #     config: RunnableConfig,
-    # ) -> ToolMessage:
-    #     if invalid_tool_message := self._validate_tool_call(call):
-    #         return invalid_tool_message
-    #
-    #     try:
-    #         input = {**call, **{"type": "tool_call"}}
-    #         response = await self.tools_by_name[call["name"]].ainvoke(input, config)
-    #
-    #     # GraphInterrupt is a special exception that will always be raised.
-    #     # It can be triggered in the following scenarios:
-    #     # (1) a NodeInterrupt is raised inside a tool
-    #     # (2) a NodeInterrupt is raised inside a graph node for a graph called as a tool
-    #     # (3) a GraphInterrupt is raised when a subgraph is interrupted inside a graph called as a tool
-    #     # (2 and 3 can happen in a "supervisor w/ tools" multi-agent architecture)
-    #     except GraphBubbleUp as e:
-    #         raise e
-    #     except Exception as e:
-    #         if isinstance(self.handle_tool_errors, tuple):
-    #             handled_types: tuple = self.handle_tool_errors
-    #         elif callable(self.handle_tool_errors):
-    #             handled_types = _infer_handled_types(self.handle_tool_errors)
-    #         else:
-    #             # default behavior is catching all exceptions
-    #             handled_types = (Exception,)
-    #
-    #         # Unhandled
-    #         if not self.handle_tool_errors or not isinstance(e, handled_types):
-    #             raise e
-    #         # Handled
-    #         else:
-    #             content = _handle_tool_error(e, flag=self.handle_tool_errors)
-    #
-    #         return ToolMessage(
-    #             content=content,
-    #             name=call["name"],
-    #             tool_call_id=call["id"],
-    #             status="error",
-    #         )
-    #
-    #     if isinstance(response, Command):
-    #         return self._validate_tool_command(response, call, input_type)
-    #     elif isinstance(response, ToolMessage):
-    #         response.content = cast(
-    #             Union[str, list], msg_content_output(response.content)
-    #         )
-    #         return response
-    #     else:
-    #         raise TypeError(
-    #             f"Tool {call['name']} returned unexpected type: {type(response)}"
-    #         )
+    async def _arun_one(
+        self,
+        call: ToolCall,
+        input_type: Literal["list", "dict"],
+        config: RunnableConfig,
+    ) -> ToolMessage:
+        semaphore: Optional[asyncio.Semaphore] = self._semaphores.get(call["name"])
+        timeout_seconds: Optional[float] = self._timeout_seconds.get(call["name"])
+        start_time: float = time.perf_counter()
+        status: str = "error"
+        try:
+            tool_message: ToolMessage
+            async with asyncio.timeout(timeout_seconds):
+                if semaphore is None:
+                    tool_message = await super()._arun_one(call, input_type, config)
+                else:
+                    async with semaphore:
+                        tool_message = await super()._arun_one(call, input_type, config)
+            status = tool_message.status
+            return tool_message
+        except TimeoutError:
+            status = "timeout"
+            logger.warning(
+                f"Tool {call['name']} timed out after {timeout_seconds} seconds"
+            )
+            return ToolMessage(
+                content=f"Error: {call['name']} did not finish within {timeout_seconds} seconds",
+                name=call["name"],
+                tool_call_id=call["id"],
+                status="error",
+            )
+        finally:
+            TOOL_DURATION_SECONDS.labels(tool=call["name"], status=status).observe(
+                time.perf_counter() - start_time
+            )
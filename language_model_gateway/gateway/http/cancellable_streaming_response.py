@@ -0,0 +1,39 @@
+import logging
+from typing import override
+
+from starlette.responses import StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+from language_model_gateway.gateway.metrics.gateway_metrics import (
+    STREAMS_CANCELLED_ON_DISCONNECT,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class CancellableStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse that closes the body generator as soon as the client disconnects
+    (or sending to the client fails) so the work producing the stream (the LangGraph graph,
+    any running tools and any upstream http calls) is cancelled instead of running to completion.
+    """
+
+    _completed: bool = False
+
+    @override
+    async def stream_response(self, send: Send) -> None:
+        await super().stream_response(send)
+        self._completed = True
+
+    @override
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            if not self._completed:
+                STREAMS_CANCELLED_ON_DISCONNECT.inc()
+                logger.info("Client disconnected so cancelling the streaming response")
+                # the generator may be suspended at a yield so close it explicitly
+                aclose = getattr(self.body_iterator, "aclose", None)
+                if aclose is not None:
+                    await aclose()
@@ -0,0 +1,334 @@
+import asyncio
+import email.utils
+import hashlib
+import json
+import logging
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from language_model_gateway.gateway.utilities.disk_lru_store import DiskLruStore
+
+logger = logging.getLogger(__name__)
+
+# headers that describe the encoded body or the connection so they are not stored with the decoded body.
+# Cookies are set for one caller so they are not stored either.
+_UNSTORED_HEADERS = {
+    "connection",
+    "content-encoding",
+    "content-length",
+    "keep-alive",
+    "set-cookie",
+    "transfer-encoding",
+}
+
+# query parameters that carry credentials so their values are not written to the cache directory
+_CREDENTIAL_PARAMS = {
+    "access_token",
+    "api_key",
+    "apikey",
+    "client_secret",
+    "key",
+    "password",
+    "secret",
+    "sig",
+    "signature",
+    "token",
+}
+
+
+class HttpCacheEntry:
+    """Response stored in the HttpCache"""
+
+    def __init__(
+        self,
+        *,
+        url: str,
+        status_code: int,
+        headers: Dict[str, str],
+        content: bytes,
+        expires_at: float,
+    ) -> None:
+        self.url: str = url
+        self.status_code: int = status_code
+        self.headers: Dict[str, str] = headers
+        self.content: bytes = content
+        self.expires_at: float = expires_at
+
+    def is_fresh(self) -> bool:
+        return time.time() < self.expires_at
+
+    def get_validators(self) -> Dict[str, str]:
+        """Returns the headers to revalidate the entry with a conditional request"""
+        validators: Dict[str, str] = {}
+        if "etag" in self.headers:
+            validators["If-None-Match"] = self.headers["etag"]
+        if "last-modified" in self.headers:
+            validators["If-Modified-Since"] = self.headers["last-modified"]
+        return validators
+
+
+class HttpCache:
+    """
+    Bounded on-disk cache of HTTP GET responses that follows Cache-Control, Expires, ETag and
+    Last-Modified.  Each response is stored in a DiskLruStore as a metadata file and a body file
+    named after the hash of the key, so the directory can be shared by the workers on a host.
+
+    The cache is shared by every caller so responses marked Cache-Control: private, responses to
+    requests with an Authorization header that are not explicitly shareable and cookies are not
+    stored, and credentials in the query string are redacted from the stored url.
+    """
+
+    def __init__(
+        self,
+        *,
+        cache_directory: str,
+        max_size_bytes: int,
+        max_heuristic_seconds: float = 24 * 60 * 60,
+    ) -> None:
+        """
+        Initialize the cache
+
+        Args:
+            cache_directory: directory to store the responses in.  Created if it does not exist.
+            max_size_bytes: maximum total size of the stored bodies
+            max_heuristic_seconds: maximum freshness of responses that only have Last-Modified
+        """
+        assert cache_directory
+        assert max_size_bytes > 0
+        self.cache_directory: str = cache_directory
+        self.max_size_bytes: int = max_size_bytes
+        self.max_heuristic_seconds: float = max_heuristic_seconds
+        # the body is the main file so the metadata does not count towards the size
+        self._store: DiskLruStore = DiskLruStore(
+            directory=self.cache_directory,
+            max_size_bytes=self.max_size_bytes,
+            suffix=".body",
+            companion_suffixes=(".json",),
+        )
+
+    @staticmethod
+    def get_key(*, url: str, headers: Dict[str, str]) -> str:
+        """
+        Returns the key of a GET request.  The request headers are part of the key since they can
+        change the response (e.g. Accept).
+        """
+        return json.dumps(
+            {"url": url, "headers": sorted((k.lower(), v) for k, v in headers.items())}
+        )
+
+    @staticmethod
+    def redact_url(url: str) -> str:
+        """Returns the url with the values of query parameters that carry credentials replaced"""
+        parts = urlsplit(url)
+        if not parts.query:
+            return url
+        return urlunsplit(
+            parts._replace(
+                query=urlencode(
+                    [
+                        (k, "REDACTED" if k.lower() in _CREDENTIAL_PARAMS else v)
+                        for k, v in parse_qsl(parts.query, keep_blank_values=True)
+                    ]
+                )
+            )
+        )
+
+    @staticmethod
+    def _hash(key: str) -> str:
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _parse_cache_control(headers: Dict[str, str]) -> Dict[str, Optional[str]]:
+        directives: Dict[str, Optional[str]] = {}
+        for directive in headers.get("cache-control", "").split(","):
+            name, _, value = directive.strip().partition("=")
+            if name:
+                directives[name.lower()] = value.strip('"') if value else None
+        return directives
+
+    @staticmethod
+    def _parse_date(value: Optional[str]) -> Optional[float]:
+        if not value:
+            return None
+        try:
+            parsed: datetime = email.utils.parsedate_to_datetime(value)
+            return parsed.timestamp()
+        except (TypeError, ValueError):
+            return None
+
+    def get_freshness_seconds(self, *, headers: Dict[str, str]) -> Optional[float]:
+        """
+        Returns how long a response stays fresh or None if it must not be stored (RFC 9111)
+
+        :param headers: response headers with lower case names
+        :return: seconds the response is fresh for.  0 means it must be revalidated before use.
+        """
+        directives: Dict[str, Optional[str]] = self._parse_cache_control(headers)
+        # the cache is shared by every caller so responses for one caller are not stored
+        if "no-store" in directives or "private" in directives:
+            return None
+        if "no-cache" in directives:
+            return 0
+        age: float = 0
+        try:
+            age = float(headers.get("age", 0))
+        except ValueError:
+            pass
+        max_age: Optional[str] = directives.get("max-age")
+        if max_age is not None:
+            try:
+                return max(0.0, float(max_age) - age)
+            except ValueError:
+                return 0
+        date: float = self._parse_date(headers.get("date")) or time.time()
+        expires: Optional[str] = headers.get("expires")
+        if expires is not None:
+            expires_at: Optional[float] = self._parse_date(expires)
+            # an invalid Expires means the response has already expired
+            return max(0.0, expires_at - date - age) if expires_at is not None else 0
+        last_modified: Optional[float] = self._parse_date(headers.get("last-modified"))
+        if last_modified is not None:
+            # heuristic freshness of a tenth of the time since the last change
+            return min(
+                max(0.0, (date - last_modified) / 10 - age), self.max_heuristic_seconds
+            )
+        return 0
+
+    def create_entry(
+        self,
+        *,
+        url: str,
+        request_headers: Dict[str, str],
+        status_code: int,
+        headers: Dict[str, str],
+        content: bytes,
+    ) -> Optional[HttpCacheEntry]:
+        """
+        Returns the entry for a response or None if the response cannot be stored
+
+        :param url: url of the request
+        :param request_headers: headers of the request
+        :param status_code: status code of the response
+        :param headers: headers of the response
+        :param content: decoded body of the response
+        :return: entry or None
+        """
+        if status_code != 200 or len(content) > self.max_size_bytes:
+            return None
+        if any(k.lower() == "authorization" for k in request_headers):
+            # only stored in a shared cache if the response says so (RFC 9111 section 3.5)
+            directives: Dict[str, Optional[str]] = self._parse_cache_control(
+                {k.lower(): v for k, v in headers.items()}
+            )
+            if not (
+                "public" in directives
+                or "s-maxage" in directives
+                or "must-revalidate" in directives
+            ):
+                return None
+        stored_headers: Dict[str, str] = {
+            k.lower(): v
+            for k, v in headers.items()
+            if k.lower() not in _UNSTORED_HEADERS
+        }
+        freshness_seconds: Optional[float] = self.get_freshness_seconds(
+            headers=stored_headers
+        )
+        if freshness_seconds is None:
+            return None
+        if freshness_seconds == 0 and not (
+            "etag" in stored_headers or "last-modified" in stored_headers
+        ):
+            # it would have to be downloaded again anyway
+            return None
+        return HttpCacheEntry(
+            url=self.redact_url(url),
+            status_code=status_code,
+            headers=stored_headers,
+            content=content,
+            expires_at=time.time() + freshness_seconds,
+        )
+
+    def refresh_entry(
+        self,
+        *,
+        entry: HttpCacheEntry,
+        request_headers: Dict[str, str],
+        headers: Dict[str, str],
+    ) -> Optional[HttpCacheEntry]:
+        """
+        Returns the entry updated with the headers of a 304 Not Modified response
+
+        :param entry: entry that was revalidated
+        :param request_headers: headers of the revalidation request
+        :param headers: headers of the 304 response
+        :return: updated entry or None if it can no longer be stored
+        """
+        return self.create_entry(
+            url=entry.url,
+            request_headers=request_headers,
+            status_code=entry.status_code,
+            headers={
+                # the age of the stored response no longer applies
+                **{k: v for k, v in entry.headers.items() if k != "age"},
+                **{k.lower(): v for k, v in headers.items()},
+            },
+            content=entry.content,
+        )
+
+    async def get_async(self, *, key: str) -> Optional[HttpCacheEntry]:
+        """
+        Returns the stored response, fresh or stale, or None if there is none
+
+        :param key: key from get_key()
+        :return: entry or None
+        """
+        return await asyncio.to_thread(self._read, self._hash(key))
+
+    def _read(self, key_hash: str) -> Optional[HttpCacheEntry]:
+        try:
+            metadata: Dict[str, Any] = json.loads(
+                self._store.read(key_hash, suffix=".json")
+            )
+            content: bytes = self._store.read(key_hash)
+            # the modification time is used to find the least recently used entries
+            self._store.mark_used(key_hash)
+        except (OSError, ValueError):
+            return None
+        if len(content) != metadata.get("size"):
+            # written by another worker in between the reads
+            return None
+        return HttpCacheEntry(
+            url=metadata["url"],
+            status_code=metadata["status_code"],
+            headers=metadata["headers"],
+            content=content,
+            expires_at=metadata["expires_at"],
+        )
+
+    async def set_async(self, *, key: str, entry: HttpCacheEntry) -> None:
+        """
+        Stores a response and removes the least recently used entries if the cache is full
+
+        :param key: key from get_key()
+        :param entry: entry from create_entry()
+        """
+        metadata: bytes = json.dumps(
+            {
+                "url": entry.url,
+                "status_code": entry.status_code,
+                "headers": entry.headers,
+                "expires_at": entry.expires_at,
+                "size": len(entry.content),
+            }
+        ).encode("utf-8")
+        try:
+            # the body is replaced first so the metadata never describes a body not yet written
+            await self._store.write_async(
+                key=self._hash(key),
+                files={".body": entry.content, ".json": metadata},
+            )
+        except OSError as e:
+            logger.warning(f"Could not store {entry.url} in the http cache: {e}")
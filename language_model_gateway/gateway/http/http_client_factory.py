@@ -1,10 +1,142 @@
+import asyncio
+import importlib.util
+import logging
+import time
 from contextlib import asynccontextmanager
-from typing import AsyncGenerator, Dict, Optional
+from typing import AsyncGenerator, Dict, Optional, Tuple
+from uuid import UUID, uuid4
 
 import httpx
 
+from language_model_gateway.gateway.metrics.gateway_metrics import (
+    UPSTREAM_REQUEST_DURATION_SECONDS,
+)
+
+logger = logging.getLogger(__name__)
+
 
 class HttpClientFactory:
+    """
+    Owns long-lived httpx.AsyncClient instances so that connections (and their TCP/TLS setup)
+    are pooled and reused across requests instead of creating a new client per call.
+
+    A client is kept per base url, default headers and default timeout.  Timeouts and headers
+    can still be passed on each request made with the client.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_connections: Optional[int] = 100,
+        max_keepalive_connections: Optional[int] = 20,
+        keepalive_expiry: Optional[float] = 30.0,
+        http2: bool = False,
+    ) -> None:
+        """
+        Initialize the http client factory
+
+        Args:
+            max_connections: Maximum number of connections per client
+            max_keepalive_connections: Maximum number of idle connections to keep per client
+            keepalive_expiry: Seconds to keep an idle connection open
+            http2: Whether to use HTTP/2 (requires the h2 package)
+        """
+        self._limits: httpx.Limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        if http2 and importlib.util.find_spec("h2") is None:
+            logger.warning(
+                "HTTP/2 was requested but the h2 package is not installed so using HTTP/1.1"
+            )
+            http2 = False
+        self._http2: bool = http2
+        # pooled connections are bound to the event loop they were opened on so each loop has
+        # its own clients
+        self._clients: Dict[
+            asyncio.AbstractEventLoop,
+            Dict[
+                Tuple[str, Tuple[Tuple[str, str], ...], Optional[float]],
+                httpx.AsyncClient,
+            ],
+        ] = {}
+        self._identifier: UUID = uuid4()
+
+    def get_http_client(
+        self,
+        *,
+        base_url: str,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = 5.0,
+    ) -> httpx.AsyncClient:
+        """
+        Returns the shared client for the base url, headers and timeout creating it if needed.
+        The client is owned by the factory so callers should not close it.
+
+        :param base_url: base url of the client
+        :param headers: default headers sent on every request
+        :param timeout: default timeout for requests
+        :return: shared client
+        """
+        loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+        clients: Optional[
+            Dict[
+                Tuple[str, Tuple[Tuple[str, str], ...], Optional[float]],
+                httpx.AsyncClient,
+            ]
+        ] = self._clients.get(loop)
+        if clients is None:
+            self._drop_clients_of_closed_loops()
+            clients = self._clients[loop] = {}
+
+        key: Tuple[str, Tuple[Tuple[str, str], ...], Optional[float]] = (
+            base_url,
+            tuple(sorted((headers or {}).items())),
+            timeout,
+        )
+        client: Optional[httpx.AsyncClient] = clients.get(key)
+        if client is None or client.is_closed:
+            logger.info(
+                f"HttpClientFactory with id: {self._identifier} creating client for {base_url}"
+            )
+            client = httpx.AsyncClient(
+                base_url=base_url,
+                headers=headers,
+                timeout=timeout,
+                limits=self._limits,
+                http2=self._http2,
+                event_hooks={
+                    "request": [self._on_request_async],
+                    "response": [self._on_response_async],
+                },
+            )
+            clients[key] = client
+        return client
+
+    def _drop_clients_of_closed_loops(self) -> None:
+        """
+        Drops the clients of event loops that have been closed.  They cannot be used or closed with
+        aclose() any more so their connections are closed when the clients are garbage collected.
+        """
+        for loop in [loop for loop in self._clients if loop.is_closed()]:
+            clients = self._clients.pop(loop)
+            logger.info(
+                f"HttpClientFactory with id: {self._identifier} dropped {len(clients)} clients of a closed event loop"
+            )
+
+    @staticmethod
+    async def _on_request_async(request: httpx.Request) -> None:
+        request.extensions["start_time"] = time.perf_counter()
+
+    @staticmethod
+    async def _on_response_async(response: httpx.Response) -> None:
+        start_time: Optional[float] = response.request.extensions.get("start_time")
+        if start_time is not None:
+            UPSTREAM_REQUEST_DURATION_SECONDS.labels(
+                host=response.request.url.host, status_code=str(response.status_code)
+            ).observe(time.perf_counter() - start_time)
+
     @asynccontextmanager
     async def create_http_client(
         self,
@@ -13,7 +145,26 @@ class HttpClientFactory:
         headers: Optional[Dict[str, str]] = None,
         timeout: Optional[float] = 5.0,
     ) -> AsyncGenerator[httpx.AsyncClient, None]:
-        async with httpx.AsyncClient(
-            base_url=base_url, headers=headers, timeout=timeout
-        ) as client:
-            yield client
+        # the client is shared so it is not closed when the context exits
+        yield self.get_http_client(base_url=base_url, headers=headers, timeout=timeout)
+
+    async def aclose(self) -> None:
+        """
+        Closes all the clients.  The clients of event loops running in other threads are closed on
+        their loop.
+        """
+        current_loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+        self._drop_clients_of_closed_loops()
+        clients_by_loop = self._clients
+        self._clients = {}
+        count: int = 0
+        for loop, clients in clients_by_loop.items():
+            for client in clients.values():
+                if loop is current_loop:
+                    await client.aclose()
+                elif loop.is_running():
+                    asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+                count += 1
+        logger.info(
+            f"HttpClientFactory with id: {self._identifier} closed {count} clients"
+        )
@@ -0,0 +1,203 @@
+import asyncio
+import logging
+from typing import Any, Dict, Optional
+
+import httpx
+
+from language_model_gateway.gateway.http.http_cache import HttpCache, HttpCacheEntry
+from language_model_gateway.gateway.http.http_client_factory import HttpClientFactory
+from language_model_gateway.gateway.metrics.gateway_metrics import HTTP_FETCH_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+
+class HttpFetcher:
+    """
+    Fetches URLs for the web tools (web pages, PDFs, scraping and search APIs).
+
+    Requests use the pooled clients of the HttpClientFactory and at most max_connections_per_host
+    requests are sent to a host at a time.  GET responses are stored in the HttpCache following
+    their caching headers and revalidated with ETag/Last-Modified once stale.  Concurrent GETs of
+    the same URL share one request.
+    """
+
+    def __init__(
+        self,
+        *,
+        http_client_factory: HttpClientFactory,
+        http_cache: Optional[HttpCache],
+        max_connections_per_host: int = 4,
+        timeout: float = 30.0,
+    ) -> None:
+        """
+        Initialize the fetcher
+
+        Args:
+            http_client_factory: factory for the pooled http clients
+            http_cache: cache for GET responses or None to not cache them
+            max_connections_per_host: maximum number of requests in flight to a host
+            timeout: default timeout of requests in seconds
+        """
+        self.http_client_factory: HttpClientFactory = http_client_factory
+        assert self.http_client_factory is not None
+        assert isinstance(self.http_client_factory, HttpClientFactory)
+        self.http_cache: Optional[HttpCache] = http_cache
+        assert max_connections_per_host > 0
+        self.max_connections_per_host: int = max_connections_per_host
+        self.timeout: float = timeout
+        # only accessed from the event loop
+        self._host_semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._in_flight: Dict[str, asyncio.Future[Optional[httpx.Response]]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def fetch_async(
+        self,
+        *,
+        url: str,
+        method: str = "GET",
+        headers: Optional[Dict[str, str]] = None,
+        params: Optional[Dict[str, str]] = None,
+        json: Optional[Any] = None,
+        timeout: Optional[float] = None,
+    ) -> httpx.Response:
+        """
+        Sends a request following redirects.  Only GET requests are cached and shared.
+
+        :param url: url to fetch
+        :param method: http method
+        :param headers: request headers
+        :param params: query parameters added to the url
+        :param json: json body of the request
+        :param timeout: timeout in seconds.  Defaults to the timeout of the fetcher.
+        :return: response with the body read
+        """
+        loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # semaphores and futures are bound to the event loop they were created on
+            self._host_semaphores = {}
+            self._in_flight = {}
+            self._loop = loop
+
+        request_url: str = str(httpx.URL(url, params=params))
+        request_headers: Dict[str, str] = dict(headers or {})
+        if method.upper() != "GET":
+            HTTP_FETCH_REQUESTS.labels(result="uncached").inc()
+            return await self._send_async(
+                method=method,
+                url=request_url,
+                headers=request_headers,
+                json=json,
+                timeout=timeout,
+            )
+
+        key: str = HttpCache.get_key(url=request_url, headers=request_headers)
+        in_flight: Optional[asyncio.Future[Optional[httpx.Response]]] = (
+            self._in_flight.get(key)
+        )
+        if in_flight is not None:
+            shared_response: Optional[httpx.Response] = await asyncio.shield(in_flight)
+            if shared_response is not None:
+                HTTP_FETCH_REQUESTS.labels(result="coalesced").inc()
+                return shared_response
+            # the first fetch was cancelled so make our own
+            return await self._get_async(
+                key=key, url=request_url, headers=request_headers, timeout=timeout
+            )
+
+        future: asyncio.Future[Optional[httpx.Response]] = loop.create_future()
+        self._in_flight[key] = future
+        try:
+            response: httpx.Response = await self._get_async(
+                key=key, url=request_url, headers=request_headers, timeout=timeout
+            )
+        except asyncio.CancelledError:
+            future.set_result(None)
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # mark the exception as retrieved in case no fetch joined
+            future.exception()
+            raise
+        finally:
+            if self._in_flight.get(key) is future:
+                del self._in_flight[key]
+        future.set_result(response)
+        return response
+
+    async def _get_async(
+        self,
+        *,
+        key: str,
+        url: str,
+        headers: Dict[str, str],
+        timeout: Optional[float],
+    ) -> httpx.Response:
+        if self.http_cache is None:
+            HTTP_FETCH_REQUESTS.labels(result="uncached").inc()
+            return await self._send_async(
+                method="GET", url=url, headers=headers, json=None, timeout=timeout
+            )
+
+        entry: Optional[HttpCacheEntry] = await self.http_cache.get_async(key=key)
+        if entry is not None and entry.is_fresh():
+            HTTP_FETCH_REQUESTS.labels(result="hit").inc()
+            return self._create_response(url=url, entry=entry)
+
+        response: httpx.Response = await self._send_async(
+            method="GET",
+            url=url,
+            headers={**headers, **(entry.get_validators() if entry else {})},
+            json=None,
+            timeout=timeout,
+        )
+        if entry is not None and response.status_code == 304:
+            HTTP_FETCH_REQUESTS.labels(result="revalidated").inc()
+            refreshed_entry: Optional[HttpCacheEntry] = self.http_cache.refresh_entry(
+                entry=entry, request_headers=headers, headers=dict(response.headers)
+            )
+            if refreshed_entry is not None:
+                await self.http_cache.set_async(key=key, entry=refreshed_entry)
+            return self._create_response(url=url, entry=refreshed_entry or entry)
+
+        HTTP_FETCH_REQUESTS.labels(result="miss").inc()
+        new_entry: Optional[HttpCacheEntry] = self.http_cache.create_entry(
+            url=url,
+            request_headers=headers,
+            status_code=response.status_code,
+            headers=dict(response.headers),
+            content=response.content,
+        )
+        if new_entry is not None:
+            await self.http_cache.set_async(key=key, entry=new_entry)
+        return response
+
+    async def _send_async(
+        self,
+        *,
+        method: str,
+        url: str,
+        headers: Dict[str, str],
+        json: Optional[Any],
+        timeout: Optional[float],
+    ) -> httpx.Response:
+        host: str = httpx.URL(url).host
+        semaphore: Optional[asyncio.Semaphore] = self._host_semaphores.get(host)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.max_connections_per_host)
+            self._host_semaphores[host] = semaphore
+        async with semaphore:
+            async with self.http_client_factory.create_http_client(
+                base_url="", timeout=timeout or self.timeout
+            ) as client:
+                return await client.request(
+                    method, url, headers=headers, json=json, follow_redirects=True
+                )
+
+    @staticmethod
+    def _create_response(*, url: str, entry: HttpCacheEntry) -> httpx.Response:
+        return httpx.Response(
+            status_code=entry.status_code,
+            headers=entry.headers,
+            content=entry.content,
+            request=httpx.Request("GET", url),
+        )
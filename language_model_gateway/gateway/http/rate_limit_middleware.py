@@ -0,0 +1,157 @@
+import hashlib
+import json
+import logging
+import math
+import os
+from typing import Any, List, Optional
+
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from language_model_gateway.gateway.api_container import get_container_async
+from language_model_gateway.gateway.http.server_sent_event_parser import (
+    ServerSentEventParser,
+)
+from language_model_gateway.gateway.utilities.rate_limiter import RateLimiter
+
+logger = logging.getLogger(__name__)
+
+
+class UsageMeter:
+    """
+    Reads the total tokens in the usage of a chat completion response as it is sent.
+
+    A stream can send usage in several frames (e.g. the agent sends one as each node of the graph
+    ends) and the last one has the usage of the whole response, so only the last one is counted.
+    """
+
+    def __init__(self) -> None:
+        self.total_tokens: int = 0
+        self._parser: Optional[ServerSentEventParser] = None
+        self._body: List[bytes] = []
+
+    def observe(self, message: Message) -> None:
+        """
+        Reads the usage from an ASGI message that is being sent
+
+        :param message: ASGI message
+        """
+        if message["type"] == "http.response.start":
+            content_type: str = Headers(raw=message.get("headers", [])).get(
+                "content-type", ""
+            )
+            if content_type.startswith("text/event-stream"):
+                self._parser = ServerSentEventParser()
+        elif message["type"] == "http.response.body":
+            body: bytes = message.get("body", b"")
+            if self._parser is not None:
+                for data in self._parser.feed(body):
+                    self._add_usage(data=data)
+            else:
+                self._body.append(body)
+                if not message.get("more_body", False):
+                    self._add_usage(data=b"".join(self._body))
+                    self._body = []
+
+    def _add_usage(self, *, data: str | bytes) -> None:
+        try:
+            response_json: Any = json.loads(data)
+        except json.JSONDecodeError:
+            return
+        if isinstance(response_json, dict) and isinstance(
+            response_json.get("usage"), dict
+        ):
+            self.total_tokens = int(response_json["usage"].get("total_tokens") or 0)
+
+
+class RateLimitMiddleware:
+    """
+    ASGI middleware that applies the RateLimiter budgets to chat completion requests per tenant.
+
+    The tenant is the value of the RATE_LIMIT_KEY_HEADER header (x-openwebui-user-id by default,
+    which OpenWebUI sends when ENABLE_FORWARD_USER_INFO_HEADERS is set).  The header must be set by
+    something that has authenticated the caller since the gateway does not check it.  If the header
+    is authorization then the tenant is the hash of the whole token rather than a claim read from
+    it, so a token with a forged subject cannot spend the budget of another tenant.  Requests without
+    the header are not limited.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        path_suffix: str = "/chat/completions",
+        key_header: Optional[str] = None,
+    ) -> None:
+        """
+        Initialize the middleware
+
+        Args:
+            app: ASGI app to call
+            path_suffix: only POST requests to paths ending with this are limited
+            key_header: header that identifies the tenant.  Defaults to RATE_LIMIT_KEY_HEADER.
+        """
+        self.app: ASGIApp = app
+        self.path_suffix: str = path_suffix
+        self.key_header: str = (
+            key_header
+            or os.environ.get("RATE_LIMIT_KEY_HEADER")
+            or "x-openwebui-user-id"
+        ).lower()
+
+    def get_key(self, *, headers: Headers) -> Optional[str]:
+        """Returns the tenant of the request or None if it has none"""
+        value: Optional[str] = headers.get(self.key_header)
+        if not value:
+            return None
+        if self.key_header == "authorization":
+            # hashed so the tokens are not kept in the store
+            return hashlib.sha256(value.encode("utf-8")).hexdigest()
+        return value
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or scope["method"] != "POST"
+            or not scope["path"].endswith(self.path_suffix)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        rate_limiter: RateLimiter = (await get_container_async()).resolve(RateLimiter)
+        key: Optional[str] = (
+            self.get_key(headers=Headers(scope=scope)) if rate_limiter.enabled else None
+        )
+        if key is None:
+            await self.app(scope, receive, send)
+            return
+
+        retry_after_seconds: float = await rate_limiter.check_request_async(key=key)
+        if retry_after_seconds > 0:
+            logger.info(f"Rate limiting {key} for {retry_after_seconds} seconds")
+            response: JSONResponse = JSONResponse(
+                status_code=429,
+                content={
+                    "error": {
+                        "message": "Rate limit exceeded",
+                        "type": "rate_limit_exceeded",
+                    }
+                },
+                headers={"Retry-After": str(max(1, math.ceil(retry_after_seconds)))},
+            )
+            await response(scope, receive, send)
+            return
+
+        usage_meter: UsageMeter = UsageMeter()
+
+        async def send_and_meter(message: Message) -> None:
+            usage_meter.observe(message)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_and_meter)
+        finally:
+            await rate_limiter.charge_tokens_async(
+                key=key, tokens=usage_meter.total_tokens
+            )
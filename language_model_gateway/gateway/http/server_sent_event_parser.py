@@ -0,0 +1,33 @@
+import codecs
+from typing import List
+
+
+class ServerSentEventParser:
+    """
+    Incrementally parses a server sent event stream that may be split anywhere (including
+    inside a multibyte character) and returns the data of the complete events.
+    """
+
+    def __init__(self) -> None:
+        self._decoder: codecs.IncrementalDecoder = codecs.getincrementaldecoder(
+            "utf-8"
+        )()
+        self._buffer: str = ""
+
+    def feed(self, chunk: str | bytes | memoryview) -> List[str]:
+        """
+        Adds a chunk of the stream
+
+        :param chunk: chunk of the stream
+        :return: data of the events completed by this chunk
+        """
+        self._buffer += (
+            chunk if isinstance(chunk, str) else self._decoder.decode(bytes(chunk))
+        ).replace("\r\n", "\n")
+        data: List[str] = []
+        while "\n\n" in self._buffer:
+            event, self._buffer = self._buffer.split("\n\n", 1)
+            for line in event.splitlines():
+                if line.startswith("data:"):
+                    data.append(line[len("data:") :].strip())
+        return data
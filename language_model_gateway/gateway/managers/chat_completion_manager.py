@@ -3,6 +3,10 @@ import logging
 import os
 import time
 from typing import Dict, List, cast, AsyncGenerator, Optional
+from uuid import uuid4
+
+import numpy as np
+import numpy.typing as npt
 
 from fastapi import HTTPException
 from openai.types import CompletionUsage
@@ -13,12 +17,23 @@ from openai.types.chat import (
     ChatCompletionMessage,
     ChatCompletionUserMessageParam,
     ChatCompletionChunk,
+    ChatCompletionContentPartTextParam,
 )
 from openai.types.chat.chat_completion import Choice
+from pydantic import ValidationError
 from starlette.responses import StreamingResponse, JSONResponse
 
 from language_model_gateway.configs.config_reader.config_reader import ConfigReader
 from language_model_gateway.configs.config_schema import ChatModelConfig, PromptConfig
+from language_model_gateway.configs.model_registry import ModelRegistry
+from language_model_gateway.gateway.converters.sse_chunk_encoder import (
+    SseChunkEncoder,
+)
+from language_model_gateway.gateway.metrics.gateway_metrics import (
+    REQUEST_DURATION_SECONDS,
+    RESPONSE_CACHE_REQUESTS,
+    SEMANTIC_CACHE_REQUESTS,
+)
 from language_model_gateway.gateway.providers.base_chat_completions_provider import (
     BaseChatCompletionsProvider,
 )
@@ -29,6 +44,27 @@ from language_model_gateway.gateway.providers.openai_chat_completions_provider i
     OpenAiChatCompletionsProvider,
 )
 from language_model_gateway.gateway.schema.openai.completions import ChatRequest
+from language_model_gateway.gateway.semantic_cache.semantic_cache import SemanticCache
+from language_model_gateway.gateway.semantic_cache.streamed_answer import (
+    StreamedAnswer,
+)
+from language_model_gateway.gateway.semantic_cache.streamed_answer_collector import (
+    StreamedAnswerCollector,
+)
+from language_model_gateway.gateway.utilities.admission_controller import (
+    AdmissionController,
+    AdmissionPermit,
+    AdmissionRejectedError,
+    ReleasingAsyncIterator,
+)
+from language_model_gateway.gateway.utilities.request_coalescer import (
+    RequestCoalescer,
+)
+from language_model_gateway.gateway.utilities.measured_async_iterator import (
+    MeasuredAsyncIterator,
+)
+from language_model_gateway.gateway.utilities.request_timings import RequestTimings
+from language_model_gateway.gateway.utilities.response_cache import ResponseCache
 from openai.types.chat.chat_completion_chunk import ChoiceDelta, Choice as ChunkChoice
 
 logger = logging.getLogger(__name__)
@@ -49,12 +85,21 @@ class ChatCompletionManager:
         open_ai_provider: OpenAiChatCompletionsProvider,
         langchain_provider: LangChainCompletionsProvider,
         config_reader: ConfigReader,
+        response_cache: ResponseCache,
+        semantic_cache: SemanticCache,
+        request_coalescer: RequestCoalescer,
+        admission_controller: AdmissionController,
     ) -> None:
         """
         Chat completion manager
 
         :param open_ai_provider: provider to use for OpenAI completions
         :param langchain_provider: provider to use for LangChain completions
+        :param config_reader: reader for the model configurations
+        :param response_cache: cache for responses of models that have response_cache set
+        :param semantic_cache: cache for answers of models that have semantic_cache set
+        :param request_coalescer: shares calls between identical requests of models that have request_coalescing set
+        :param admission_controller: limits the number of concurrent requests
         :return:
         """
 
@@ -67,6 +112,18 @@ class ChatCompletionManager:
         self.config_reader: ConfigReader = config_reader
         assert self.config_reader is not None
         assert isinstance(self.config_reader, ConfigReader)
+        self.response_cache: ResponseCache = response_cache
+        assert self.response_cache is not None
+        assert isinstance(self.response_cache, ResponseCache)
+        self.semantic_cache: SemanticCache = semantic_cache
+        assert self.semantic_cache is not None
+        assert isinstance(self.semantic_cache, SemanticCache)
+        self.request_coalescer: RequestCoalescer = request_coalescer
+        assert self.request_coalescer is not None
+        assert isinstance(self.request_coalescer, RequestCoalescer)
+        self.admission_controller: AdmissionController = admission_controller
+        assert self.admission_controller is not None
+        assert isinstance(self.admission_controller, AdmissionController)
 
     # noinspection PyMethodMayBeStatic
     async def chat_completions(
@@ -75,20 +132,21 @@ class ChatCompletionManager:
         headers: Dict[str, str],
         chat_request: ChatRequest,
     ) -> StreamingResponse | JSONResponse:
+        started_at: float = time.monotonic()
+        timings: RequestTimings = RequestTimings()
+        timings.set_current()
         # Use the model to choose the provider
         try:
             model: str = chat_request["model"]
             assert model is not None
 
-            configs: List[ChatModelConfig] = (
-                await self.config_reader.read_model_configs_async()
-            )
+            with timings.measure("config"):
+                model_registry: ModelRegistry = (
+                    await self.config_reader.get_model_registry_async()
+                )
 
             # Find the model config
-            model_config: ChatModelConfig | None = next(
-                (config for config in configs if config.name.lower() == model.lower()),
-                None,
-            )
+            model_config: ChatModelConfig | None = model_registry.get_by_name(model)
             if model_config is None:
                 logger.error(f"Model {model} not found in the config")
                 raise HTTPException(
@@ -96,7 +154,9 @@ class ChatCompletionManager:
                 )
 
             chat_request = self.add_system_messages(
-                chat_request=chat_request, system_prompts=model_config.system_prompts
+                chat_request=chat_request,
+                system_prompts=model_config.system_prompts,
+                provider=model_config.get_provider(),
             )
 
             provider: BaseChatCompletionsProvider
@@ -123,21 +183,350 @@ class ChatCompletionManager:
                 logger.info(
                     f"Running chat completion for {chat_request} with headers {headers}"
                 )
-            # Use the provider to get the completions
-            response: StreamingResponse | JSONResponse = (
-                await provider.chat_completions(
+            cache_key: Optional[str] = None
+            if model_config.response_cache is not None:
+                cache_key = ResponseCache.get_key(
                     model_config=model_config,
-                    headers=headers,
                     chat_request=chat_request,
+                    headers=headers,
+                )
+                with timings.measure("cache"):
+                    cached_response: Optional[bytes] = (
+                        await self.response_cache.get_async(
+                            key=cache_key,
+                            ttl_seconds=model_config.response_cache.ttl_seconds,
+                        )
+                    )
+                if cached_response is not None:
+                    RESPONSE_CACHE_REQUESTS.labels(
+                        model=model_config.name, result="hit"
+                    ).inc()
+                    return self.write_cached_response(
+                        chat_request=chat_request, cached_response=cached_response
+                    )
+                RESPONSE_CACHE_REQUESTS.labels(
+                    model=model_config.name, result="miss"
+                ).inc()
+
+            semantic_cache_vector: Optional[npt.NDArray[np.float32]] = None
+            if model_config.semantic_cache is not None:
+                question: Optional[str] = self.get_question_text(
+                    chat_request=chat_request
                 )
+                if question:
+                    try:
+                        with timings.measure("cache"):
+                            semantic_cache_vector = (
+                                await self.semantic_cache.embed_async(question=question)
+                            )
+                    except Exception as e:
+                        # the model can still answer if the embedding model is unavailable
+                        logger.warning(
+                            f"Could not embed question for model {model}: {e}"
+                        )
+                if semantic_cache_vector is not None:
+                    with timings.measure("cache"):
+                        answer: Optional[str] = self.semantic_cache.lookup(
+                            model_config=model_config,
+                            vector=semantic_cache_vector,
+                            caller=ResponseCache.get_caller(headers=headers),
+                        )
+                    SEMANTIC_CACHE_REQUESTS.labels(
+                        model=model_config.name,
+                        result="hit" if answer is not None else "miss",
+                    ).inc()
+                    if answer is not None:
+                        return self.write_cached_response(
+                            chat_request=chat_request,
+                            cached_response=ChatCompletion(
+                                id=str(uuid4()),
+                                model=model,
+                                choices=[
+                                    Choice(
+                                        index=0,
+                                        message=ChatCompletionMessage(
+                                            role="assistant", content=answer
+                                        ),
+                                        finish_reason="stop",
+                                    )
+                                ],
+                                created=int(time.time()),
+                                object="chat.completion",
+                            )
+                            .model_dump_json()
+                            .encode("utf-8"),
+                        )
+
+            async def get_response_async() -> StreamingResponse | JSONResponse:
+                with timings.measure("admission"):
+                    permit: AdmissionPermit = (
+                        await self.admission_controller.acquire_async(
+                            model_config=model_config
+                        )
+                    )
+                try:
+                    provider_response: StreamingResponse | JSONResponse = (
+                        await self.get_provider_response_async(
+                            provider=provider,
+                            model_config=model_config,
+                            headers=headers,
+                            chat_request=chat_request,
+                            cache_key=cache_key,
+                            semantic_cache_vector=semantic_cache_vector,
+                        )
+                    )
+                except BaseException:
+                    permit.release()
+                    raise
+                if isinstance(provider_response, StreamingResponse):
+                    # the work runs while the response is streamed so keep the slot until then
+                    provider_response.body_iterator = ReleasingAsyncIterator(
+                        iterable=provider_response.body_iterator, permit=permit
+                    )
+                else:
+                    permit.release()
+                return provider_response
+
+            response: StreamingResponse | JSONResponse
+            if model_config.request_coalescing is not None:
+                # streaming and non-streaming requests are shared separately
+                response = await self.request_coalescer.run_async(
+                    key=f"{bool(chat_request.get('stream'))}:"
+                    + (
+                        cache_key
+                        or ResponseCache.get_key(
+                            model_config=model_config,
+                            chat_request=chat_request,
+                            headers=headers,
+                        )
+                    ),
+                    model=model_config.name,
+                    max_wait_seconds=model_config.request_coalescing.max_wait_seconds,
+                    max_buffer_bytes=model_config.request_coalescing.max_buffer_bytes,
+                    fn=get_response_async,
+                )
+            else:
+                response = await get_response_async()
+            return self.add_latency_metrics(
+                response=response,
+                model_config=model_config,
+                started_at=started_at,
+                timings=timings,
+            )
+        except AdmissionRejectedError as e:
+            return JSONResponse(
+                status_code=e.status_code,
+                content={
+                    "error": {
+                        "message": str(e),
+                        "type": (
+                            "rate_limit_exceeded"
+                            if e.status_code == 429
+                            else "server_overloaded"
+                        ),
+                    }
+                },
+                headers={"Retry-After": str(e.retry_after_seconds)},
             )
-            return response
         except Exception as e:
             return await self.handle_exception(chat_request=chat_request, e=e)
 
+    async def get_provider_response_async(
+        self,
+        *,
+        provider: BaseChatCompletionsProvider,
+        model_config: ChatModelConfig,
+        headers: Dict[str, str],
+        chat_request: ChatRequest,
+        cache_key: Optional[str],
+        semantic_cache_vector: Optional[npt.NDArray[np.float32]],
+    ) -> StreamingResponse | JSONResponse:
+        """
+        Calls the provider and adds the response to the caches that are enabled for the model
+
+        :param provider: provider of the model
+        :param model_config: model configuration
+        :param headers: headers of the request
+        :param chat_request: chat request
+        :param cache_key: response cache key if the response cache is enabled
+        :param semantic_cache_vector: embedding of the question if the semantic cache is enabled
+        :return: response
+        """
+        model: str = model_config.name
+        streamed_answer: Optional[StreamedAnswer] = None
+        if semantic_cache_vector is not None:
+            # the converter records the tokens of the model in it while the answer is streamed
+            streamed_answer = StreamedAnswer()
+            streamed_answer.set_current()
+        # Use the provider to get the completions
+        response: StreamingResponse | JSONResponse = await provider.chat_completions(
+            model_config=model_config,
+            headers=headers,
+            chat_request=chat_request,
+        )
+        # only complete (non-streaming) successful responses are cached
+        if (
+            cache_key is not None
+            and model_config.response_cache is not None
+            and isinstance(response, JSONResponse)
+            and response.status_code == 200
+        ):
+            try:
+                ChatCompletion.model_validate_json(response.body)
+                await self.response_cache.set_async(
+                    key=cache_key,
+                    value=bytes(response.body),
+                    ttl_seconds=model_config.response_cache.ttl_seconds,
+                )
+            except ValidationError:
+                logger.warning(
+                    f"Not caching response for model {model} since it is not a chat completion"
+                )
+        if semantic_cache_vector is not None and streamed_answer is not None:
+            self.add_to_semantic_cache(
+                model_config=model_config,
+                vector=semantic_cache_vector,
+                caller=ResponseCache.get_caller(headers=headers),
+                response=response,
+                streamed_answer=streamed_answer,
+            )
+        return response
+
+    def add_latency_metrics(
+        self,
+        *,
+        response: StreamingResponse | JSONResponse,
+        model_config: ChatModelConfig,
+        started_at: float,
+        timings: Optional[RequestTimings] = None,
+    ) -> StreamingResponse | JSONResponse:
+        """
+        Records the duration of the request.  For a streaming response the time to the first
+        chunk, the average time between chunks and the duration are recorded once the stream ends.
+
+        The phase timings are returned in a Server-Timing header, or in an SSE comment after the
+        last chunk of a stream, and emitted as spans.
+
+        :param response: response to send
+        :param model_config: model configuration
+        :param started_at: time.monotonic() when the request was received
+        :param timings: phase timings of the request
+        :return: response
+        """
+        if isinstance(response, StreamingResponse):
+            response.body_iterator = MeasuredAsyncIterator(
+                iterable=response.body_iterator,
+                model=model_config.name,
+                provider=model_config.get_provider(),
+                started_at=started_at,
+                timings=timings,
+                span_attributes=self.get_span_attributes(
+                    model_config=model_config, stream=True
+                ),
+            )
+        else:
+            REQUEST_DURATION_SECONDS.labels(
+                model=model_config.name,
+                provider=model_config.get_provider(),
+                stream="false",
+            ).observe(time.monotonic() - started_at)
+            if timings is not None:
+                response.headers["Server-Timing"] = timings.get_server_timing()
+                timings.emit_spans(
+                    attributes=self.get_span_attributes(
+                        model_config=model_config, stream=False
+                    )
+                )
+        return response
+
+    @staticmethod
+    def get_span_attributes(
+        *, model_config: ChatModelConfig, stream: bool
+    ) -> Dict[str, str]:
+        """Returns the attributes of the span of the request"""
+        return {
+            "model": model_config.name,
+            "provider": model_config.get_provider(),
+            "stream": str(stream).lower(),
+        }
+
+    # noinspection PyMethodMayBeStatic
+    def get_question_text(self, *, chat_request: ChatRequest) -> Optional[str]:
+        """
+        Returns the text of the user message of a request that starts a conversation or None.
+        A follow-up question (e.g. "and in French?") depends on the earlier messages so it
+        is not looked up in or added to the semantic cache.
+        """
+        if any(
+            m["role"] not in ("system", "developer", "user")
+            for m in chat_request["messages"]
+        ):
+            return None
+        user_messages: List[ChatCompletionUserMessageParam] = [
+            cast(ChatCompletionUserMessageParam, m)
+            for m in chat_request["messages"]
+            if m["role"] == "user"
+        ]
+        if len(user_messages) != 1:
+            return None
+        content = user_messages[0]["content"]
+        if isinstance(content, str):
+            return content
+        return "\n".join(part["text"] for part in content if part["type"] == "text")
+
+    def add_to_semantic_cache(
+        self,
+        *,
+        model_config: ChatModelConfig,
+        vector: npt.NDArray[np.float32],
+        caller: str,
+        response: StreamingResponse | JSONResponse,
+        streamed_answer: StreamedAnswer,
+    ) -> None:
+        """
+        Caches the answer in the response for the caller.  For a streaming response the tokens
+        the model streamed are cached once the stream has completed without failing.  For a
+        complete response the last message (the answer after any tool calls) is cached.
+
+        :param model_config: model configuration
+        :param vector: embedding of the question
+        :param caller: identity of the caller
+        :param response: response of the provider
+        :param streamed_answer: tokens the converter records while the response is streamed
+        """
+        if isinstance(response, StreamingResponse):
+            response.body_iterator = StreamedAnswerCollector(
+                iterable=response.body_iterator,
+                semantic_cache=self.semantic_cache,
+                model_config=model_config,
+                vector=vector,
+                caller=caller,
+                streamed_answer=streamed_answer,
+            )
+        elif response.status_code == 200:
+            try:
+                chat_completion: ChatCompletion = ChatCompletion.model_validate_json(
+                    response.body
+                )
+            except ValidationError:
+                return
+            if not chat_completion.choices:
+                return
+            answer: Optional[str] = chat_completion.choices[-1].message.content
+            if answer:
+                self.semantic_cache.add(
+                    model_config=model_config,
+                    vector=vector,
+                    answer=answer,
+                    caller=caller,
+                )
+
     # noinspection PyMethodMayBeStatic
     def add_system_messages(
-        self, chat_request: ChatRequest, system_prompts: List[PromptConfig] | None
+        self,
+        chat_request: ChatRequest,
+        system_prompts: List[PromptConfig] | None,
+        provider: str | None = None,
     ) -> ChatRequest:
         # see if there are any system prompts in chat_request
         has_system_messages_in_chat_request: bool = any(
@@ -152,8 +541,27 @@ class ChatCompletionManager:
             and system_prompts is not None
             and len(system_prompts) > 0
         ):
+            # other providers (e.g. OpenAI) reject the cache_control field
+            supports_prompt_cache: bool = provider == "bedrock"
             system_messages: List[ChatCompletionSystemMessageParam] = [
-                ChatCompletionSystemMessageParam(role="system", content=message.content)
+                ChatCompletionSystemMessageParam(
+                    role="system",
+                    content=(
+                        [
+                            # Anthropic style marker.  Converted to a cache point for Bedrock.
+                            cast(
+                                ChatCompletionContentPartTextParam,
+                                {
+                                    "type": "text",
+                                    "text": message.content,
+                                    "cache_control": {"type": "ephemeral"},
+                                },
+                            )
+                        ]
+                        if message.cache and supports_prompt_cache
+                        else message.content
+                    ),
+                )
                 for message in system_prompts
                 if message.role == "system" and message.content is not None
             ]
@@ -295,6 +703,42 @@ class ChatCompletionManager:
 
             return JSONResponse(content=chat_response.model_dump())
 
+    # noinspection PyMethodMayBeStatic
+    def write_cached_response(
+        self, *, chat_request: ChatRequest, cached_response: bytes
+    ) -> StreamingResponse | JSONResponse:
+        """
+        Returns the cached ChatCompletion.  If the request is for a stream then the completion
+        is replayed as server sent events.
+
+        :param chat_request: chat request
+        :param cached_response: serialized ChatCompletion
+        :return: response
+        """
+        if not chat_request.get("stream"):
+            return JSONResponse(content=json.loads(cached_response))
+
+        chat_completion: ChatCompletion = ChatCompletion.model_validate_json(
+            cached_response
+        )
+
+        async def replay_chat_completion() -> AsyncGenerator[str, None]:
+            chunk_encoder: SseChunkEncoder = SseChunkEncoder(
+                request_id=chat_completion.id,
+                model=chat_completion.model,
+                created=chat_completion.created,
+            )
+            for choice in chat_completion.choices:
+                if choice.message.content:
+                    yield chunk_encoder.encode_content(content=choice.message.content)
+            if chat_completion.usage is not None:
+                yield chunk_encoder.encode_usage(usage=chat_completion.usage)
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(
+            content=replay_chat_completion(), media_type="text/event-stream"
+        )
+
     async def handle_exception(
         self, *, chat_request: ChatRequest, e: Exception
     ) -> StreamingResponse | JSONResponse:
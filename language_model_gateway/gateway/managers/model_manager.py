@@ -1,11 +1,12 @@
 import logging
-import time
-from typing import Dict, List, Any
+from typing import Dict
 
-from openai.types import Model
+from starlette.responses import Response
 
 from language_model_gateway.configs.config_reader.config_reader import ConfigReader
-from language_model_gateway.configs.config_schema import ChatModelConfig
+from language_model_gateway.configs.model_registry import ModelRegistry
+
+logger = logging.getLogger(__name__)
 
 
 class ModelManager:
@@ -19,26 +20,19 @@ class ModelManager:
         self,
         *,
         headers: Dict[str, str],
-    ) -> Dict[str, str | List[Dict[str, str | int]]]:
-        configs: List[ChatModelConfig] = (
-            await self.config_reader.read_model_configs_async()
+    ) -> Response:
+        model_registry: ModelRegistry = (
+            await self.config_reader.get_model_registry_async()
         )
-        logger = logging.getLogger(__name__)
         logger.info("Received request for models")
-        # get time in seconds since epoch from ten minutes ago
-
-        models: List[Model] = [
-            Model(
-                id=config.name,
-                created=int(time.time()),
-                object="model",
-                owned_by="openai",
-            )
-            for config in configs
-        ]
-        models_list: List[Dict[str, Any]] = [model.model_dump() for model in models]
-        # return {"data": models_list}
-        # models2 = [
-        #     {"id": config.name, "description": config.description, "created": 1686935002} for config in configs
-        # ]
-        return {"object": "list", "data": models_list}
+
+        response_headers: Dict[str, str] = {"ETag": model_registry.models_response_etag}
+        # the response body is serialized once per config load so just check if the client has it already
+        if headers.get("if-none-match") == model_registry.models_response_etag:
+            return Response(status_code=304, headers=response_headers)
+
+        return Response(
+            content=model_registry.models_response_body,
+            media_type="application/json",
+            headers=response_headers,
+        )
@@ -0,0 +1,162 @@
+from prometheus_client import Counter, Gauge, Histogram
+
+# Metrics are defined once per process here and exported via the /metrics endpoint.
+# When PROMETHEUS_MULTIPROC_DIR is set (e.g. with uvicorn --workers) each worker writes its
+# samples to that directory and /metrics combines them (see metrics_app.py).
+
+CONFIG_REFRESH_DURATION_SECONDS: Histogram = Histogram(
+    "config_refresh_duration_seconds",
+    "Time taken to refresh the model configurations",
+)
+
+CONFIG_REFRESH_FAILURES: Counter = Counter(
+    "config_refresh_failures",
+    "Number of model configuration refreshes that failed and kept the previous configurations",
+)
+
+STREAMS_CANCELLED_ON_DISCONNECT: Counter = Counter(
+    "streams_cancelled_on_disconnect",
+    "Number of streaming responses that were cancelled because the client disconnected",
+)
+
+RESPONSE_CACHE_REQUESTS: Counter = Counter(
+    "response_cache_requests",
+    "Number of chat completion requests looked up in the response cache",
+    ["model", "result"],
+)
+
+SEMANTIC_CACHE_REQUESTS: Counter = Counter(
+    "semantic_cache_requests",
+    "Number of chat completion requests looked up in the semantic cache",
+    ["model", "result"],
+)
+
+COALESCED_REQUESTS: Counter = Counter(
+    "coalesced_requests",
+    "Number of chat completion requests that joined an identical request in flight",
+    ["model"],
+)
+
+ADMISSION_QUEUE_DEPTH: Gauge = Gauge(
+    "admission_queue_depth",
+    "Number of requests waiting to be admitted",
+    ["model"],
+    multiprocess_mode="livesum",
+)
+
+ADMISSION_WAIT_SECONDS: Histogram = Histogram(
+    "admission_wait_seconds",
+    "Time requests waited to be admitted",
+    ["model"],
+)
+
+ADMISSION_REJECTED: Counter = Counter(
+    "admission_rejected",
+    "Number of requests rejected because they could not be admitted in time",
+    ["model", "reason"],
+)
+
+RATE_LIMITED_REQUESTS: Counter = Counter(
+    "rate_limited_requests",
+    "Number of chat completion requests rejected because the tenant used up its budget",
+    ["limit"],
+)
+
+HTTP_FETCH_REQUESTS: Counter = Counter(
+    "http_fetch_requests",
+    "Number of web tool fetches by how they were served: hit, revalidated, miss, coalesced or uncached",
+    ["result"],
+)
+
+CONTENT_CACHE_REQUESTS: Counter = Counter(
+    "content_cache_requests",
+    "Number of document conversions looked up in the content cache by tier that served them",
+    ["kind", "result"],
+)
+
+PARSER_POOL_JOBS: Counter = Counter(
+    "parser_pool_jobs",
+    "Number of document parsing jobs by result: success, error, timeout or rejected",
+    ["result"],
+)
+
+MODEL_FAILOVERS: Counter = Counter(
+    "model_failovers",
+    "Number of model calls abandoned for the next model because of an error or a late first token",
+    ["model", "reason"],
+)
+
+HEDGED_REQUESTS: Counter = Counter(
+    "hedged_requests",
+    "Number of requests that also called the first fallback because the first token was late",
+    ["model", "winner"],
+)
+
+LATENCY_BUCKETS: tuple[float, ...] = (
+    0.1,
+    0.25,
+    0.5,
+    1,
+    2.5,
+    5,
+    10,
+    20,
+    30,
+    60,
+    120,
+    300,
+    float("inf"),
+)
+
+INTER_TOKEN_LATENCY_BUCKETS: tuple[float, ...] = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1,
+    float("inf"),
+)
+
+REQUEST_DURATION_SECONDS: Histogram = Histogram(
+    "chat_completion_duration_seconds",
+    "Time from receiving a chat completion request to sending the end of the response",
+    ["model", "provider", "stream"],
+    buckets=LATENCY_BUCKETS,
+)
+
+TIME_TO_FIRST_TOKEN_SECONDS: Histogram = Histogram(
+    "chat_completion_time_to_first_token_seconds",
+    "Time from receiving a streaming chat completion request to sending the first chunk",
+    ["model", "provider"],
+    buckets=LATENCY_BUCKETS,
+)
+
+INTER_TOKEN_LATENCY_SECONDS: Histogram = Histogram(
+    "chat_completion_inter_token_latency_seconds",
+    "Average time between the chunks of each streaming chat completion response",
+    ["model", "provider"],
+    buckets=INTER_TOKEN_LATENCY_BUCKETS,
+)
+
+TOOL_DURATION_SECONDS: Histogram = Histogram(
+    "tool_duration_seconds",
+    "Time taken by each tool call",
+    ["tool", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+
+UPSTREAM_REQUEST_DURATION_SECONDS: Histogram = Histogram(
+    "upstream_request_duration_seconds",
+    "Time from sending an HTTP request to an upstream service to receiving the response headers",
+    ["host", "status_code"],
+    buckets=LATENCY_BUCKETS,
+)
+
+TOKENS: Counter = Counter(
+    "chat_completion_tokens",
+    "Number of tokens sent to (input) and received from (output) the models",
+    ["model", "provider", "direction"],
+)
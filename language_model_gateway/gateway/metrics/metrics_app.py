@@ -0,0 +1,26 @@
+import logging
+import os
+
+from prometheus_client import CollectorRegistry, make_asgi_app, multiprocess
+from starlette.types import ASGIApp
+
+logger = logging.getLogger(__name__)
+
+
+def create_metrics_app() -> ASGIApp:
+    """
+    Returns the ASGI app that serves the metrics.  When PROMETHEUS_MULTIPROC_DIR is set the
+    metrics written by every worker process are combined so any worker can serve them.
+    """
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry: CollectorRegistry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)  # type: ignore[no-untyped-call]
+        return make_asgi_app(registry=registry)
+    return make_asgi_app()
+
+
+def mark_worker_dead() -> None:
+    """Removes the live gauge samples of this worker when it shuts down"""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(os.getpid())  # type: ignore[no-untyped-call]
+        logger.info(f"Marked metrics of worker {os.getpid()} as dead")
@@ -0,0 +1,141 @@
+import logging
+import random
+from typing import Any, Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+class EndpointStats:
+    """Recent latency, error rate and in-flight requests of one endpoint"""
+
+    def __init__(self) -> None:
+        self.ewma_latency_seconds: Optional[float] = None
+        self.ewma_error_rate: float = 0
+        self.in_flight: int = 0
+        self.requests: int = 0
+        self.errors: int = 0
+
+
+class EndpointRouter:
+    """
+    Picks which endpoint (Bedrock region, inference profile or OpenAI-compatible URL) of a model
+    to call using power-of-two-choices: two endpoints are sampled at random and the one with the
+    lower cost is used.  The cost is the EWMA latency scaled up by the number of requests in
+    flight plus a penalty for the EWMA error rate, so slow, busy or failing endpoints get less traffic without
+    being starved of the requests that show they have recovered.
+
+    The stats are kept per worker.
+    """
+
+    def __init__(
+        self,
+        *,
+        alpha: float = 0.3,
+        error_penalty_seconds: float = 10,
+        random_generator: Optional[random.Random] = None,
+    ) -> None:
+        """
+        Initialize the router
+
+        Args:
+            alpha: weight of the latest sample in the moving averages
+            error_penalty_seconds: cost added for an endpoint whose requests all fail
+            random_generator: random generator used to sample endpoints
+        """
+        assert 0 < alpha <= 1
+        self.alpha: float = alpha
+        self.error_penalty_seconds: float = error_penalty_seconds
+        self._random: random.Random = random_generator or random.Random()
+        # endpoint key => stats.  Only accessed from the event loop.
+        self._stats: Dict[str, EndpointStats] = {}
+
+    def _get_stats(self, *, key: str) -> EndpointStats:
+        stats: Optional[EndpointStats] = self._stats.get(key)
+        if stats is None:
+            stats = EndpointStats()
+            self._stats[key] = stats
+        return stats
+
+    def get_cost(self, *, key: str) -> float:
+        """
+        Returns the cost of sending a request to the endpoint.  Endpoints without a latency
+        sample are treated as fast so they are tried.
+
+        :param key: endpoint key
+        :return: cost
+        """
+        stats: EndpointStats = self._get_stats(key=key)
+        # the small constant makes requests in flight count before there is a latency sample
+        latency_seconds: float = (stats.ewma_latency_seconds or 0) + 0.001
+        return (
+            latency_seconds * (stats.in_flight + 1)
+            + self.error_penalty_seconds * stats.ewma_error_rate
+        )
+
+    def choose(self, *, keys: List[str], excluded: Optional[Set[str]] = None) -> int:
+        """
+        Picks an endpoint
+
+        :param keys: keys of the endpoints of the model
+        :param excluded: keys of endpoints not to use (e.g. ones that already failed this request)
+        :return: index of the endpoint in keys
+        """
+        candidates: List[int] = [
+            index for index, key in enumerate(keys) if key not in (excluded or set())
+        ]
+        if not candidates:
+            candidates = list(range(len(keys)))
+        assert candidates, "No endpoints to choose from"
+        if len(candidates) == 1:
+            return candidates[0]
+        first, second = self._random.sample(candidates, 2)
+        return (
+            first
+            if self.get_cost(key=keys[first]) <= self.get_cost(key=keys[second])
+            else second
+        )
+
+    def start(self, *, key: str) -> None:
+        """Records that a request was sent to the endpoint"""
+        stats: EndpointStats = self._get_stats(key=key)
+        stats.in_flight += 1
+        stats.requests += 1
+
+    def finish(
+        self, *, key: str, latency_seconds: Optional[float], error: bool
+    ) -> None:
+        """
+        Records that a request to the endpoint finished
+
+        :param key: endpoint key
+        :param latency_seconds: time to the first token or None if there was none
+        :param error: whether the request failed.  Requests cancelled before the first token
+            are neither errors nor successes.
+        """
+        stats: EndpointStats = self._get_stats(key=key)
+        stats.in_flight = max(0, stats.in_flight - 1)
+        if error:
+            stats.errors += 1
+            stats.ewma_error_rate += self.alpha * (1 - stats.ewma_error_rate)
+        if latency_seconds is not None:
+            stats.ewma_error_rate -= self.alpha * stats.ewma_error_rate
+            stats.ewma_latency_seconds = (
+                latency_seconds
+                if stats.ewma_latency_seconds is None
+                else stats.ewma_latency_seconds
+                + self.alpha * (latency_seconds - stats.ewma_latency_seconds)
+            )
+
+    def get_state(self) -> Dict[str, Dict[str, Any]]:
+        """Returns the stats and cost of each endpoint"""
+        return {
+            key: {
+                "ewma_latency_seconds": stats.ewma_latency_seconds,
+                "ewma_error_rate": stats.ewma_error_rate,
+                "in_flight": stats.in_flight,
+                "requests": stats.requests,
+                "errors": stats.errors,
+                "cost": self.get_cost(key=key),
+            }
+            for key, stats in self._stats.items()
+        }
@@ -0,0 +1,425 @@
+import asyncio
+import logging
+import time
+import typing
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Coroutine,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from botocore.exceptions import (
+    ClientError,
+    ConnectionError as BotoConnectionError,
+    HTTPClientError,
+)
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForLLMRun,
+    CallbackManagerForLLMRun,
+)
+from langchain_core.language_models import BaseChatModel, LanguageModelInput
+from langchain_core.messages import AIMessageChunk, BaseMessage, BaseMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.runnables import Runnable, RunnableBinding, RunnableConfig
+from langchain_core.tools import BaseTool
+from openai import APIConnectionError, APIStatusError
+
+from language_model_gateway.configs.config_schema import HedgingConfig
+from language_model_gateway.gateway.metrics.gateway_metrics import (
+    HEDGED_REQUESTS,
+    MODEL_FAILOVERS,
+)
+from language_model_gateway.gateway.models.latency_tracker import LatencyTracker
+
+logger = logging.getLogger(__name__)
+
+# Bedrock error codes that another model or region may not have
+RETRYABLE_BEDROCK_ERROR_CODES: frozenset[str] = frozenset(
+    [
+        "ThrottlingException",
+        "TooManyRequestsException",
+        "ServiceUnavailableException",
+        "InternalServerException",
+        "ModelNotReadyException",
+        "ModelTimeoutException",
+    ]
+)
+
+# the inner models run without callbacks so their tokens are only reported once, by this model
+INNER_MODEL_CONFIG: RunnableConfig = {"callbacks": []}
+
+
+class _Attempt:
+    """Call to one of the models that is waiting for its first token (or whole response)"""
+
+    def __init__(
+        self,
+        *,
+        index: int,
+        coroutine: Coroutine[Any, Any, Any],
+        iterator: Optional[AsyncIterator[BaseMessage]] = None,
+    ) -> None:
+        self.index: int = index
+        self.started_at: float = time.monotonic()
+        self.task: asyncio.Task[Any] = asyncio.create_task(coroutine)
+        self.iterator: Optional[AsyncIterator[BaseMessage]] = iterator
+
+    async def close_async(self) -> None:
+        """Cancels the call and closes its stream"""
+        if not self.task.done():
+            self.task.cancel()
+        # wait() does not raise so the cancellation of the caller is not swallowed
+        await asyncio.wait([self.task])
+        if not self.task.cancelled():
+            # mark the exception as retrieved
+            self.task.exception()
+        aclose = getattr(self.iterator, "aclose", None)
+        if aclose is not None:
+            await aclose()
+
+
+class FailoverChatModel(BaseChatModel):
+    """
+    Chat model that calls a list of models in order.
+
+    The next model is called if the current one is throttled, fails with a server error or does
+    not send its first token within time_to_first_token_seconds.  With hedging set, the first
+    fallback is also called once the first model has taken longer than the configured percentile
+    of its recent times to first token, and whichever sends the first token first is used while
+    the other call is cancelled.  Once a model has sent its first token the response is not
+    switched to another model.
+    """
+
+    targets: List[Runnable[LanguageModelInput, BaseMessage]]
+    """Models to call in order"""
+
+    target_names: List[str]
+    """Names of the models for metrics and latency tracking"""
+
+    time_to_first_token_seconds: Optional[float] = None
+    """Call the next model if the first token has not arrived within this many seconds"""
+
+    hedging: Optional[HedgingConfig] = None
+    """Hedging configuration or None to not send hedged requests"""
+
+    latency_tracker: LatencyTracker
+    """Recent latencies of the models shared by requests.  See get_latency_key()."""
+
+    @property
+    def _llm_type(self) -> str:
+        return "failover"
+
+    @staticmethod
+    def bind_tools_to_target(
+        target: Runnable[LanguageModelInput, BaseMessage],
+        tools: Sequence[
+            Union[
+                typing.Dict[str, Any], type, Callable[..., Any], BaseTool
+            ]  # noqa: UP006
+        ],
+        **kwargs: Any,
+    ) -> Runnable[LanguageModelInput, BaseMessage]:
+        """
+        Binds the tools to the chat model of a target.  A target that already has tools bound is
+        a RunnableBinding so the tools are bound to the model it wraps, replacing the earlier tools.
+
+        :param target: chat model or a binding of one
+        :param tools: tools to bind
+        :return: chat model with the tools bound
+        :raises TypeError: if the target does not wrap a chat model
+        """
+        model: Runnable[LanguageModelInput, BaseMessage] = target
+        while isinstance(model, RunnableBinding):
+            model = model.bound
+        if not isinstance(model, BaseChatModel):
+            raise TypeError(f"Cannot bind tools to {type(target).__name__}")
+        return model.bind_tools(tools, **kwargs)
+
+    @staticmethod
+    def is_retryable_error(error: BaseException) -> bool:
+        """
+        Returns whether another model may succeed where this error occurred
+
+        :param error: error raised by a model
+        :return: True for throttling, server errors and connection errors
+        """
+        if isinstance(error, ClientError):
+            if error.response.get("Error", {}).get("Code") in (
+                RETRYABLE_BEDROCK_ERROR_CODES
+            ):
+                return True
+            status_code: Optional[int] = error.response.get("ResponseMetadata", {}).get(
+                "HTTPStatusCode"
+            )
+            return status_code is not None and (
+                status_code == 429 or status_code >= 500
+            )
+        if isinstance(error, APIStatusError):
+            return error.status_code == 429 or error.status_code >= 500
+        return isinstance(
+            error,
+            (
+                APIConnectionError,
+                BotoConnectionError,
+                HTTPClientError,
+                TimeoutError,
+                ConnectionError,
+            ),
+        )
+
+    def get_latency_key(self, *, index: int, stream: bool) -> str:
+        """
+        Returns the key of the recorded latencies of a model.  A non-streaming call returns the
+        whole response instead of the first token so its latencies are kept separately.
+
+        :param index: index of the model
+        :param stream: whether the calls are streamed
+        :return: key in the latency tracker
+        """
+        name: str = self.target_names[index]
+        return name if stream else f"{name}:non-streaming"
+
+    def get_hedge_delay_seconds(self, *, stream: bool = True) -> float:
+        """
+        Returns how long to wait for the first model before calling the first fallback
+
+        :param stream: whether the calls are streamed
+        :return: delay in seconds
+        """
+        assert self.hedging is not None
+        delay_seconds: Optional[float] = self.latency_tracker.get_percentile(
+            key=self.get_latency_key(index=0, stream=stream),
+            percentile=self.hedging.percentile,
+            min_samples=self.hedging.min_samples,
+        )
+        return (
+            delay_seconds
+            if delay_seconds is not None
+            else self.hedging.default_delay_seconds
+        )
+
+    async def _race_async(
+        self, *, start: Callable[[int], _Attempt], stream: bool
+    ) -> Tuple[_Attempt, Any]:
+        """
+        Calls the models until one returns a result, hedging and failing over as configured
+
+        :param start: starts the call to the model with the given index
+        :param stream: whether the calls are streamed.  The result is the first token if they are.
+        :return: attempt that won and its result.  Every other attempt has been closed.
+        """
+        pending: List[_Attempt] = [start(0)]
+        next_index: int = 1
+        hedged: bool = False
+        last_error: Optional[BaseException] = None
+        try:
+            while pending:
+                deadlines: List[float] = []
+                if self.time_to_first_token_seconds is not None:
+                    deadlines.extend(
+                        attempt.started_at + self.time_to_first_token_seconds
+                        for attempt in pending
+                    )
+                hedge_at: Optional[float] = None
+                if (
+                    self.hedging is not None
+                    and not hedged
+                    and next_index < len(self.targets)
+                ):
+                    hedge_at = pending[0].started_at + self.get_hedge_delay_seconds(
+                        stream=stream
+                    )
+                    deadlines.append(hedge_at)
+                done, _ = await asyncio.wait(
+                    [attempt.task for attempt in pending],
+                    timeout=(
+                        max(0.0, min(deadlines) - time.monotonic())
+                        if deadlines
+                        else None
+                    ),
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                now: float = time.monotonic()
+                for attempt in list(pending):
+                    reason: str
+                    error: Optional[BaseException]
+                    if attempt.task in done:
+                        error = attempt.task.exception()
+                        if error is None:
+                            pending.remove(attempt)
+                            self.latency_tracker.record(
+                                key=self.get_latency_key(
+                                    index=attempt.index, stream=stream
+                                ),
+                                seconds=now - attempt.started_at,
+                            )
+                            if hedged:
+                                HEDGED_REQUESTS.labels(
+                                    model=self.target_names[0],
+                                    winner="hedge" if attempt.index > 0 else "primary",
+                                ).inc()
+                            return attempt, attempt.task.result()
+                        if not self.is_retryable_error(error):
+                            raise error
+                        reason = "error"
+                    elif (
+                        self.time_to_first_token_seconds is not None
+                        and now >= attempt.started_at + self.time_to_first_token_seconds
+                    ):
+                        reason = "timeout"
+                        error = TimeoutError(
+                            f"No first token within {self.time_to_first_token_seconds} seconds"
+                        )
+                    else:
+                        continue
+                    logger.warning(
+                        f"Model {self.target_names[attempt.index]} failed ({reason}): {error}"
+                    )
+                    MODEL_FAILOVERS.labels(
+                        model=self.target_names[attempt.index], reason=reason
+                    ).inc()
+                    pending.remove(attempt)
+                    await attempt.close_async()
+                    last_error = error
+                if hedge_at is not None and pending and now >= hedge_at:
+                    logger.info(
+                        f"Sending hedged request to {self.target_names[next_index]}"
+                    )
+                    hedged = True
+                    pending.append(start(next_index))
+                    next_index += 1
+                if not pending and next_index < len(self.targets):
+                    pending.append(start(next_index))
+                    next_index += 1
+            assert last_error is not None
+            raise last_error
+        finally:
+            for attempt in pending:
+                await attempt.close_async()
+
+    @staticmethod
+    def to_generation_chunk(message: BaseMessage) -> ChatGenerationChunk:
+        """Wraps a message streamed by one of the models in a generation chunk"""
+        return ChatGenerationChunk(
+            message=(
+                message
+                if isinstance(message, BaseMessageChunk)
+                else AIMessageChunk(content=message.content)
+            )
+        )
+
+    @staticmethod
+    async def _get_first_chunk_async(
+        iterator: AsyncIterator[BaseMessage],
+    ) -> Optional[BaseMessage]:
+        try:
+            return await iterator.__anext__()
+        except StopAsyncIteration:
+            return None
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        def start(index: int) -> _Attempt:
+            iterator: AsyncIterator[BaseMessage] = (
+                self.targets[index]
+                .astream(messages, config=INNER_MODEL_CONFIG, stop=stop, **kwargs)
+                .__aiter__()
+            )
+            return _Attempt(
+                index=index,
+                coroutine=self._get_first_chunk_async(iterator),
+                iterator=iterator,
+            )
+
+        attempt, first_chunk = await self._race_async(start=start, stream=True)
+        try:
+            if first_chunk is not None:
+                yield self.to_generation_chunk(first_chunk)
+                assert attempt.iterator is not None
+                async for chunk in attempt.iterator:
+                    yield self.to_generation_chunk(chunk)
+        finally:
+            await attempt.close_async()
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        def start(index: int) -> _Attempt:
+            return _Attempt(
+                index=index,
+                coroutine=self.targets[index].ainvoke(
+                    messages, config=INNER_MODEL_CONFIG, stop=stop, **kwargs
+                ),
+            )
+
+        _, message = await self._race_async(start=start, stream=False)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        # synchronous calls only fail over on errors
+        last_error: Optional[BaseException] = None
+        for index, target in enumerate(self.targets):
+            try:
+                message: BaseMessage = target.invoke(
+                    messages, config=INNER_MODEL_CONFIG, stop=stop, **kwargs
+                )
+                return ChatResult(generations=[ChatGeneration(message=message)])
+            except Exception as e:
+                if not self.is_retryable_error(e):
+                    raise
+                logger.warning(f"Model {self.target_names[index]} failed: {e}")
+                MODEL_FAILOVERS.labels(
+                    model=self.target_names[index], reason="error"
+                ).inc()
+                last_error = e
+        assert last_error is not None
+        raise last_error
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        result: ChatResult = self._generate(
+            messages, stop=stop, run_manager=run_manager, **kwargs
+        )
+        yield self.to_generation_chunk(result.generations[0].message)
+
+    def bind_tools(
+        self,
+        tools: Sequence[
+            Union[
+                typing.Dict[str, Any], type, Callable[..., Any], BaseTool
+            ]  # noqa: UP006
+        ],
+        **kwargs: Any,
+    ) -> Runnable[LanguageModelInput, BaseMessage]:
+        # each model formats the tools for its own provider
+        bound_targets: List[Runnable[LanguageModelInput, BaseMessage]] = []
+        for target in self.targets:
+            bound_targets.append(self.bind_tools_to_target(target, tools, **kwargs))
+        return self.model_copy(update={"targets": bound_targets})
@@ -0,0 +1,54 @@
+import math
+from collections import deque
+from typing import Deque, Dict, Optional
+
+
+class LatencyTracker:
+    """
+    Keeps the most recent latencies (times to first token or to the whole response) of each model
+    key so hedged requests can be sent after a delay derived from the observed latency
+    """
+
+    def __init__(self, *, max_samples: int = 200) -> None:
+        """
+        Initialize the tracker
+
+        Args:
+            max_samples: number of recent times kept per model
+        """
+        assert max_samples > 0
+        self.max_samples: int = max_samples
+        # model key => recent times in seconds.  Only accessed from the event loop.
+        self._samples: Dict[str, Deque[float]] = {}
+
+    def record(self, *, key: str, seconds: float) -> None:
+        """
+        Records a time to first token
+
+        :param key: model key
+        :param seconds: time to first token
+        """
+        samples: Optional[Deque[float]] = self._samples.get(key)
+        if samples is None:
+            samples = deque(maxlen=self.max_samples)
+            self._samples[key] = samples
+        samples.append(seconds)
+
+    def get_percentile(
+        self, *, key: str, percentile: float, min_samples: int
+    ) -> Optional[float]:
+        """
+        Returns the percentile of the recorded times
+
+        :param key: model key
+        :param percentile: percentile between 0 and 100
+        :param min_samples: return None if fewer times have been recorded
+        :return: time in seconds or None
+        """
+        samples: Optional[Deque[float]] = self._samples.get(key)
+        if samples is None or len(samples) == 0 or len(samples) < min_samples:
+            return None
+        ordered = sorted(samples)
+        # nearest rank
+        rank: int = max(1, math.ceil(percentile / 100 * len(ordered)))
+        return ordered[min(rank, len(ordered)) - 1]
@@ -0,0 +1,189 @@
+import logging
+import time
+import typing
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Union,
+)
+
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForLLMRun,
+    CallbackManagerForLLMRun,
+)
+from langchain_core.language_models import BaseChatModel, LanguageModelInput
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.runnables import Runnable
+from langchain_core.tools import BaseTool
+
+from language_model_gateway.gateway.models.endpoint_router import EndpointRouter
+from language_model_gateway.gateway.models.failover_chat_model import (
+    INNER_MODEL_CONFIG,
+    FailoverChatModel,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class LoadBalancedChatModel(BaseChatModel):
+    """
+    Chat model that spreads requests across several endpoints of the same model (Bedrock regions,
+    inference profiles or OpenAI-compatible URLs) using the EndpointRouter.
+
+    If an endpoint is throttled or fails with a server error before sending the first token,
+    the request is sent to another endpoint that has not been tried yet.
+    """
+
+    targets: List[Runnable[LanguageModelInput, BaseMessage]]
+    """Models for each endpoint"""
+
+    target_names: List[str]
+    """Keys of the endpoints in the router"""
+
+    router: EndpointRouter
+    """Stats of the endpoints shared by requests"""
+
+    @property
+    def _llm_type(self) -> str:
+        return "load_balanced"
+
+    def _should_retry(self, *, error: Exception, tried: Set[str]) -> bool:
+        return FailoverChatModel.is_retryable_error(error) and len(tried) < len(
+            self.target_names
+        )
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        tried: Set[str] = set()
+        while True:
+            index: int = self.router.choose(keys=self.target_names, excluded=tried)
+            key: str = self.target_names[index]
+            tried.add(key)
+            self.router.start(key=key)
+            started_at: float = time.monotonic()
+            latency_seconds: Optional[float] = None
+            error: bool = False
+            try:
+                async for chunk in self.targets[index].astream(
+                    messages, config=INNER_MODEL_CONFIG, stop=stop, **kwargs
+                ):
+                    if latency_seconds is None:
+                        latency_seconds = time.monotonic() - started_at
+                    yield FailoverChatModel.to_generation_chunk(chunk)
+                return
+            except Exception as e:
+                error = True
+                if latency_seconds is not None or not self._should_retry(
+                    error=e, tried=tried
+                ):
+                    raise
+                logger.warning(f"Endpoint {key} failed so trying another: {e}")
+            finally:
+                self.router.finish(
+                    key=key, latency_seconds=latency_seconds, error=error
+                )
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        tried: Set[str] = set()
+        while True:
+            index: int = self.router.choose(keys=self.target_names, excluded=tried)
+            key: str = self.target_names[index]
+            tried.add(key)
+            self.router.start(key=key)
+            started_at: float = time.monotonic()
+            latency_seconds: Optional[float] = None
+            error: bool = False
+            try:
+                message: BaseMessage = await self.targets[index].ainvoke(
+                    messages, config=INNER_MODEL_CONFIG, stop=stop, **kwargs
+                )
+                latency_seconds = time.monotonic() - started_at
+                return ChatResult(generations=[ChatGeneration(message=message)])
+            except Exception as e:
+                error = True
+                if not self._should_retry(error=e, tried=tried):
+                    raise
+                logger.warning(f"Endpoint {key} failed so trying another: {e}")
+            finally:
+                self.router.finish(
+                    key=key, latency_seconds=latency_seconds, error=error
+                )
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        tried: Set[str] = set()
+        while True:
+            index: int = self.router.choose(keys=self.target_names, excluded=tried)
+            key: str = self.target_names[index]
+            tried.add(key)
+            self.router.start(key=key)
+            started_at: float = time.monotonic()
+            latency_seconds: Optional[float] = None
+            error: bool = False
+            try:
+                message: BaseMessage = self.targets[index].invoke(
+                    messages, config=INNER_MODEL_CONFIG, stop=stop, **kwargs
+                )
+                latency_seconds = time.monotonic() - started_at
+                return ChatResult(generations=[ChatGeneration(message=message)])
+            except Exception as e:
+                error = True
+                if not self._should_retry(error=e, tried=tried):
+                    raise
+                logger.warning(f"Endpoint {key} failed so trying another: {e}")
+            finally:
+                self.router.finish(
+                    key=key, latency_seconds=latency_seconds, error=error
+                )
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        result: ChatResult = self._generate(
+            messages, stop=stop, run_manager=run_manager, **kwargs
+        )
+        yield FailoverChatModel.to_generation_chunk(result.generations[0].message)
+
+    def bind_tools(
+        self,
+        tools: Sequence[
+            Union[
+                typing.Dict[str, Any], type, Callable[..., Any], BaseTool
+            ]  # noqa: UP006
+        ],
+        **kwargs: Any,
+    ) -> Runnable[LanguageModelInput, BaseMessage]:
+        # each endpoint formats the tools for its own provider
+        bound_targets: List[Runnable[LanguageModelInput, BaseMessage]] = []
+        for target in self.targets:
+            bound_targets.append(
+                FailoverChatModel.bind_tools_to_target(target, tools, **kwargs)
+            )
+        return self.model_copy(update={"targets": bound_targets})
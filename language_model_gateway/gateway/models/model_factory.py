@@ -1,21 +1,50 @@
 import logging
 import os
-from typing import List, Any, Dict
+from typing import List, Any, Dict, Optional
 
-from langchain_aws import ChatBedrockConverse
 from langchain_core.language_models import BaseChatModel
 from langchain_openai import ChatOpenAI
 
 from language_model_gateway.configs.config_schema import (
     ModelConfig,
+    ModelEndpointConfig,
     ModelParameterConfig,
     ChatModelConfig,
 )
+from language_model_gateway.gateway.models.chat_bedrock_converse_with_prompt_cache import (
+    ChatBedrockConverseWithPromptCache,
+)
+from language_model_gateway.gateway.models.endpoint_router import EndpointRouter
+from language_model_gateway.gateway.models.failover_chat_model import (
+    FailoverChatModel,
+)
+from language_model_gateway.gateway.models.latency_tracker import LatencyTracker
+from language_model_gateway.gateway.models.load_balanced_chat_model import (
+    LoadBalancedChatModel,
+)
 
 logger = logging.getLogger(__name__)
 
 
 class ModelFactory:
+    def __init__(
+        self,
+        *,
+        latency_tracker: Optional[LatencyTracker] = None,
+        endpoint_router: Optional[EndpointRouter] = None,
+    ) -> None:
+        """
+        Initialize the model factory
+
+        Args:
+            latency_tracker: recent times to first token used to delay hedged requests
+            endpoint_router: stats used to pick the endpoint of models with several endpoints
+        """
+        self.latency_tracker: LatencyTracker = latency_tracker or LatencyTracker()
+        assert isinstance(self.latency_tracker, LatencyTracker)
+        self.endpoint_router: EndpointRouter = endpoint_router or EndpointRouter()
+        assert isinstance(self.endpoint_router, EndpointRouter)
+
     # noinspection PyMethodMayBeStatic
     def get_model(self, chat_model_config: ChatModelConfig) -> BaseChatModel:
         assert chat_model_config is not None
@@ -33,9 +62,6 @@ class ModelFactory:
                 provider=default_model_provider, model=default_model_name
             )
 
-        model_vendor: str = model_config.provider
-        model_name: str = model_config.model
-
         model_parameters: List[ModelParameterConfig] | None = (
             chat_model_config.model_parameters
         )
@@ -48,22 +74,106 @@ class ModelFactory:
                 model_parameters_dict[model_parameter.key] = model_parameter.value
 
         logger.debug(f"Creating ChatModel with parameters: {model_parameters_dict}")
-        model_parameters_dict["model"] = model_name
+
+        if (
+            not model_config.fallbacks
+            and model_config.time_to_first_token_seconds is None
+        ):
+            return self.create_model(
+                model_config=model_config, model_parameters_dict=model_parameters_dict
+            )
+
+        targets: List[ModelConfig] = [model_config, *(model_config.fallbacks or [])]
+        return FailoverChatModel(
+            targets=[
+                self.create_model(
+                    model_config=target, model_parameters_dict=model_parameters_dict
+                )
+                for target in targets
+            ],
+            target_names=[
+                self.get_model_key(model_config=target) for target in targets
+            ],
+            time_to_first_token_seconds=model_config.time_to_first_token_seconds,
+            hedging=model_config.hedging,
+            latency_tracker=self.latency_tracker,
+        )
+
+    @staticmethod
+    def get_model_key(*, model_config: ModelConfig) -> str:
+        """Returns a name for the provider, model and region or URL used in metrics"""
+        key: str = f"{model_config.provider}/{model_config.model}"
+        location: Optional[str] = model_config.region or model_config.url
+        return f"{key}@{location}" if location else key
+
+    @staticmethod
+    def get_endpoint_model_config(
+        *, model_config: ModelConfig, endpoint: ModelEndpointConfig
+    ) -> ModelConfig:
+        """Returns the model configuration with the fields set on the endpoint replaced"""
+        return model_config.model_copy(
+            update={
+                **endpoint.model_dump(exclude_none=True),
+                "endpoints": None,
+                "fallbacks": None,
+            }
+        )
+
+    # noinspection PyMethodMayBeStatic
+    def create_model(
+        self, *, model_config: ModelConfig, model_parameters_dict: Dict[str, Any]
+    ) -> BaseChatModel:
+        """
+        Creates the chat model for one provider, model and region, or a load balanced model if
+        the model has several endpoints
+
+        :param model_config: model configuration
+        :param model_parameters_dict: model parameters
+        :return: chat model
+        """
+        if model_config.endpoints:
+            endpoint_configs: List[ModelConfig] = [
+                self.get_endpoint_model_config(
+                    model_config=model_config, endpoint=endpoint
+                )
+                for endpoint in model_config.endpoints
+            ]
+            return LoadBalancedChatModel(
+                targets=[
+                    self.create_model(
+                        model_config=endpoint_config,
+                        model_parameters_dict=model_parameters_dict,
+                    )
+                    for endpoint_config in endpoint_configs
+                ],
+                target_names=[
+                    self.get_model_key(model_config=endpoint_config)
+                    for endpoint_config in endpoint_configs
+                ],
+                router=self.endpoint_router,
+            )
+
+        model_vendor: str = model_config.provider
+        model_name: str = model_config.model
+
+        model_parameters_dict = {**model_parameters_dict, "model": model_name}
         # model_parameters_dict["streaming"] = True
         llm: BaseChatModel
         if model_vendor == "openai":
-            llm = ChatOpenAI(**model_parameters_dict)
+            llm = ChatOpenAI(base_url=model_config.url, **model_parameters_dict)
         elif model_config.provider == "bedrock":
-            llm = ChatBedrockConverse(
+            # supports the cache points added for system prompts with cache set
+            llm = ChatBedrockConverseWithPromptCache(
                 client=None,
                 provider="anthropic",
                 credentials_profile_name=os.environ.get("AWS_CREDENTIALS_PROFILE"),
-                region_name=os.environ.get("AWS_REGION", "us-east-1"),
+                region_name=model_config.region
+                or os.environ.get("AWS_REGION", "us-east-1"),
                 # Setting temperature to 0 for deterministic results
                 **model_parameters_dict,
             )
         elif model_config.provider == "openai":
-            llm = ChatOpenAI(**model_parameters_dict)
+            llm = ChatOpenAI(base_url=model_config.url, **model_parameters_dict)
         else:
             raise ValueError(
                 f"Unsupported model vendor: {model_vendor} and model_provider: {model_config.provider} for {model_name}"
@@ -1,13 +1,22 @@
-import datetime
+import os
 import random
-from typing import Dict, Any, Sequence
+from contextlib import nullcontext
+from typing import Dict, Optional, Sequence
 
 from langchain_core.language_models import BaseChatModel
 from langchain_core.tools import BaseTool
 from langgraph.graph.state import CompiledStateGraph
 from starlette.responses import StreamingResponse, JSONResponse
 
-from language_model_gateway.configs.config_schema import ChatModelConfig
+from language_model_gateway.configs.config_schema import (
+    AgentConfig,
+    AgentParameterConfig,
+    ChatModelConfig,
+    StreamCoalescingConfig,
+)
+from language_model_gateway.gateway.converters.compiled_graph_cache import (
+    CompiledGraphCache,
+)
 from language_model_gateway.gateway.converters.langgraph_to_openai_converter import (
     LangGraphToOpenAIConverter,
 )
@@ -17,6 +26,7 @@ from language_model_gateway.gateway.providers.base_chat_completions_provider imp
 )
 from language_model_gateway.gateway.schema.openai.completions import ChatRequest
 from language_model_gateway.gateway.tools.tool_provider import ToolProvider
+from language_model_gateway.gateway.utilities.request_timings import RequestTimings
 
 
 class LangChainCompletionsProvider(BaseChatCompletionsProvider):
@@ -25,7 +35,8 @@ class LangChainCompletionsProvider(BaseChatCompletionsProvider):
         *,
         model_factory: ModelFactory,
         lang_graph_to_open_ai_converter: LangGraphToOpenAIConverter,
-        tool_provider: ToolProvider
+        tool_provider: ToolProvider,
+        compiled_graph_cache: CompiledGraphCache
     ) -> None:
         self.model_factory: ModelFactory = model_factory
         assert self.model_factory is not None
@@ -40,6 +51,9 @@ class LangChainCompletionsProvider(BaseChatCompletionsProvider):
         self.tool_provider: ToolProvider = tool_provider
         assert self.tool_provider is not None
         assert isinstance(self.tool_provider, ToolProvider)
+        self.compiled_graph_cache: CompiledGraphCache = compiled_graph_cache
+        assert self.compiled_graph_cache is not None
+        assert isinstance(self.compiled_graph_cache, CompiledGraphCache)
 
     async def chat_completions(
         self,
@@ -49,17 +63,65 @@ class LangChainCompletionsProvider(BaseChatCompletionsProvider):
         chat_request: ChatRequest
     ) -> StreamingResponse | JSONResponse:
 
+        timings: Optional[RequestTimings] = RequestTimings.get_current()
+        with timings.measure("graph") if timings else nullcontext():
+            compiled_state_graph: CompiledStateGraph = (
+                await self.compiled_graph_cache.get_or_create_async(
+                    chat_model_config=model_config,
+                    fn_create_graph=lambda: self.create_graph_async(
+                        model_config=model_config
+                    ),
+                )
+            )
+        request_id = random.randint(1, 1000)
+
+        return await self.lang_graph_to_open_ai_converter.call_agent_with_input(
+            request_id=str(request_id),
+            compiled_state_graph=compiled_state_graph,
+            chat_request=chat_request,
+            system_messages=[],
+            stream_coalescing=self.get_stream_coalescing_config(
+                model_config=model_config
+            ),
+            provider=model_config.get_provider(),
+        )
+
+    # noinspection PyMethodMayBeStatic
+    def get_stream_coalescing_config(
+        self, *, model_config: ChatModelConfig
+    ) -> Optional[StreamCoalescingConfig]:
+        """
+        Returns the stream coalescing configuration of the model or the default one from the
+        STREAM_COALESCE_MAX_BYTES and STREAM_COALESCE_MAX_DELAY_MS environment variables
+        """
+        if model_config.stream_coalescing is not None:
+            return model_config.stream_coalescing
+        max_bytes: Optional[str] = os.environ.get("STREAM_COALESCE_MAX_BYTES")
+        max_delay_ms: Optional[str] = os.environ.get("STREAM_COALESCE_MAX_DELAY_MS")
+        if not max_bytes and not max_delay_ms:
+            return None
+        default_config: StreamCoalescingConfig = StreamCoalescingConfig()
+        return StreamCoalescingConfig(
+            max_bytes=int(max_bytes) if max_bytes else default_config.max_bytes,
+            max_delay_ms=(
+                int(max_delay_ms) if max_delay_ms else default_config.max_delay_ms
+            ),
+        )
+
+    async def create_graph_async(
+        self, *, model_config: ChatModelConfig
+    ) -> CompiledStateGraph:
+        """
+        Creates the llm and tools for the model configuration and compiles them into a graph
+
+        :param model_config: model configuration
+        :return: compiled state graph
+        """
         # noinspection PyArgumentList
         llm: BaseChatModel = self.model_factory.get_model(
             chat_model_config=model_config
         )
 
-        # noinspection PyUnusedLocal
-        def get_current_time(*args: Any, **kwargs: Any) -> str:
-            """Returns the current time in H:MM AM/PM format."""
-            now = datetime.datetime.now()  # Get current time
-            return now.strftime("%Y-%m-%d %H:%M:%S%Z%z")
-
         # Initialize tools
         tools: Sequence[BaseTool] = (
             self.tool_provider.get_tools(tools=[t for t in model_config.get_agents()])
@@ -67,17 +129,22 @@ class LangChainCompletionsProvider(BaseChatCompletionsProvider):
             else []
         )
 
-        compiled_state_graph: CompiledStateGraph = (
-            await self.lang_graph_to_open_ai_converter.create_graph_for_llm_async(
-                llm=llm,
-                tools=tools,
-            )
-        )
-        request_id = random.randint(1, 1000)
+        # per tool limits are set with the max_concurrency and timeout_seconds agent parameters
+        tool_max_concurrency: Dict[str, int] = {}
+        tool_timeout_seconds: Dict[str, float] = {}
+        agent: AgentConfig
+        for agent in model_config.get_agents():
+            tool_name: str = self.tool_provider.get_tool_by_name(tool=agent).name
+            parameter: AgentParameterConfig
+            for parameter in agent.parameters or []:
+                if parameter.key == "max_concurrency":
+                    tool_max_concurrency[tool_name] = int(parameter.value)
+                elif parameter.key == "timeout_seconds":
+                    tool_timeout_seconds[tool_name] = float(parameter.value)
 
-        return await self.lang_graph_to_open_ai_converter.call_agent_with_input(
-            request_id=str(request_id),
-            compiled_state_graph=compiled_state_graph,
-            chat_request=chat_request,
-            system_messages=[],
+        return await self.lang_graph_to_open_ai_converter.create_graph_for_llm_async(
+            llm=llm,
+            tools=tools,
+            tool_max_concurrency=tool_max_concurrency,
+            tool_timeout_seconds=tool_timeout_seconds,
         )
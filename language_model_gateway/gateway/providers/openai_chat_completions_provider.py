@@ -7,13 +7,16 @@ from random import randint
 from typing import Any, Dict, AsyncGenerator
 
 from httpx import Response
-from httpx_sse import aconnect_sse, ServerSentEvent
+from httpx_sse import aconnect_sse, ServerSentEvent, SSEError
 from openai.types.chat import (
     ChatCompletion,
 )
 from pydantic_core import ValidationError
 
 from language_model_gateway.configs.config_schema import ChatModelConfig
+from language_model_gateway.gateway.http.cancellable_streaming_response import (
+    CancellableStreamingResponse,
+)
 from language_model_gateway.gateway.http.http_client_factory import HttpClientFactory
 
 
@@ -55,7 +58,7 @@ class OpenAiChatCompletionsProvider(BaseChatCompletionsProvider):
         assert agent_url
 
         if chat_request.get("stream"):
-            return StreamingResponse(
+            return CancellableStreamingResponse(
                 await self.get_streaming_response_async(
                     agent_url=agent_url,
                     request_id=request_id,
@@ -67,7 +70,7 @@ class OpenAiChatCompletionsProvider(BaseChatCompletionsProvider):
 
         response_text: Optional[str] = None
         async with self.http_client_factory.create_http_client(
-            base_url="http://test"
+            base_url=agent_url
         ) as client:
             try:
                 agent_response: Response = await client.post(
@@ -108,16 +111,82 @@ class OpenAiChatCompletionsProvider(BaseChatCompletionsProvider):
         request_id: str,
         headers: Dict[str, str],
         chat_request: ChatRequest,
-    ) -> AsyncGenerator[str, None]:
+    ) -> AsyncGenerator[str | bytes, None]:
         logger.info(f"Streaming response {request_id} from agent")
-        generator: AsyncGenerator[str, None] = self._stream_resp_async_generator(
-            agent_url=agent_url,
-            request_id=request_id,
-            chat_request=chat_request,
-            headers=headers,
-        )
+        generator: AsyncGenerator[str | bytes, None]
+        if os.environ.get("LOG_INPUT_AND_OUTPUT", "0") == "1":
+            # parse the events so they can be logged
+            generator = self._stream_resp_async_generator(
+                agent_url=agent_url,
+                request_id=request_id,
+                chat_request=chat_request,
+                headers=headers,
+            )
+        else:
+            generator = self._stream_raw_resp_async_generator(
+                agent_url=agent_url,
+                request_id=request_id,
+                chat_request=chat_request,
+                headers=headers,
+            )
         return generator
 
+    async def _stream_raw_resp_async_generator(
+        self,
+        *,
+        request_id: str,
+        agent_url: str,
+        chat_request: ChatRequest,
+        headers: Dict[str, str],
+    ) -> AsyncGenerator[bytes, None]:
+        """
+        Relays the bytes of the agent's event stream as they arrive without parsing them.
+
+        Since the bytes are read only as fast as the client reads them, the agent is slowed down
+        by a slow client and if the client disconnects the stream to the agent is closed right away.
+        """
+        logger.info(f"Relaying streaming response {request_id} from agent")
+        async with self.http_client_factory.create_http_client(
+            base_url=agent_url
+        ) as client:
+            async with client.stream(
+                "POST",
+                agent_url,
+                json=chat_request,
+                timeout=60 * 60,
+                headers={
+                    **{
+                        key: value
+                        for key, value in headers.items()
+                        if key.lower()
+                        not in ("accept", "cache-control", "accept-encoding")
+                    },
+                    "Accept": "text/event-stream",
+                    "Cache-Control": "no-store",
+                    # the bytes are relayed as-is so they must not be compressed
+                    "Accept-Encoding": "identity",
+                },
+            ) as response:
+                # an error from the agent must not be relayed as a successful event stream
+                content_type: str = response.headers.get("content-type", "")
+                if not response.is_success or not content_type.startswith(
+                    "text/event-stream"
+                ):
+                    error_text: str = (await response.aread()).decode(
+                        "utf-8", errors="replace"
+                    )
+                    logger.error(
+                        f"Error streaming response {request_id} from agent: "
+                        f"status {response.status_code} content type {content_type}"
+                        f" url: {agent_url}\n{error_text}"
+                    )
+                    response.raise_for_status()
+                    raise SSEError(
+                        f"Expected response header Content-Type to contain 'text/event-stream', got {content_type!r}"
+                    )
+                async for raw_bytes in response.aiter_raw():
+                    yield raw_bytes
+
     async def _stream_resp_async_generator(
         self,
         *,
@@ -129,7 +198,7 @@ class OpenAiChatCompletionsProvider(BaseChatCompletionsProvider):
 
         logger.info(f"Streaming response {request_id} from agent")
         async with self.http_client_factory.create_http_client(
-            base_url="http://test"
+            base_url=agent_url
         ) as client:
             async with aconnect_sse(
                 client,
@@ -0,0 +1,69 @@
+import logging
+import os
+from enum import Enum
+from typing import Annotated, Sequence
+
+from fastapi import APIRouter, Depends
+from fastapi import params
+from starlette.responses import JSONResponse
+
+from language_model_gateway.gateway.api_container import get_endpoint_router
+from language_model_gateway.gateway.models.endpoint_router import EndpointRouter
+
+logger = logging.getLogger(__name__)
+
+
+class AdminRouter:
+    """
+    Router class for endpoints that show the internal state of the worker
+    """
+
+    def __init__(
+        self,
+        *,
+        prefix: str = "/admin",
+        tags: list[str | Enum] | None = None,
+        dependencies: Sequence[params.Depends] | None = None,
+    ) -> None:
+        self.prefix = prefix
+        self.tags = tags or ["admin"]
+        self.dependencies = dependencies or []
+        self.router = APIRouter(
+            prefix=self.prefix, tags=self.tags, dependencies=self.dependencies
+        )
+        self._register_routes()
+
+    def _register_routes(self) -> None:
+        """Register all routes for this router"""
+        self.router.add_api_route(
+            "/endpoints",
+            self.get_endpoints,
+            methods=["GET"],
+            response_model=None,
+            summary="Show model endpoint stats",
+            description="Shows the load balancing stats of the model endpoints in this worker",
+            response_description="The stats of each endpoint",
+            status_code=200,
+        )
+
+    # noinspection PyMethodMayBeStatic
+    async def get_endpoints(
+        self,
+        endpoint_router: Annotated[EndpointRouter, Depends(get_endpoint_router)],
+    ) -> JSONResponse:
+        """
+        Get endpoints endpoint. endpoint_router is injected by FastAPI.
+
+        Args:
+            endpoint_router: Injected endpoint router instance
+
+        Returns:
+            Response with the stats of each endpoint
+        """
+        return JSONResponse(
+            {"worker": os.getpid(), "endpoints": endpoint_router.get_state()}
+        )
+
+    def get_router(self) -> APIRouter:
+        """Get the configured router"""
+        return self.router
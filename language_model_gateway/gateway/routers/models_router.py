@@ -1,8 +1,9 @@
 import logging
 from enum import Enum
-from typing import Annotated, Dict, List, Sequence
+from typing import Annotated, Sequence
 from fastapi import APIRouter, Depends
 from starlette.requests import Request
+from starlette.responses import Response
 from fastapi import params
 
 from language_model_gateway.gateway.api_container import get_model_manager
@@ -37,7 +38,7 @@ class ModelsRouter:
             "/models",
             self.get_models,
             methods=["GET"],
-            response_model=Dict[str, str | List[Dict[str, str | int]]],
+            response_model=None,
             summary="List available models",
             description="Lists the currently available models",
             response_description="The list of available models",
@@ -49,7 +50,7 @@ class ModelsRouter:
         self,
         request: Request,
         model_manager: Annotated[ModelManager, Depends(get_model_manager)],
-    ) -> Dict[str, str | List[Dict[str, str | int]]]:
+    ) -> Response:
         """
         Get models endpoint. model_manager is injected by FastAPI.
 
@@ -58,12 +59,11 @@ class ModelsRouter:
             model_manager: Injected model manager instance
 
         Returns:
-            Dictionary containing list of available models
+            Response containing list of available models
         """
-        models = await model_manager.get_models(
+        return await model_manager.get_models(
             headers={k: v for k, v in request.headers.items()}
         )
-        return models
 
     def get_router(self) -> APIRouter:
         """Get the configured router"""
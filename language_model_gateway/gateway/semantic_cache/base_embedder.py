@@ -0,0 +1,21 @@
+from abc import ABC, abstractmethod
+
+import numpy as np
+import numpy.typing as npt
+
+
+class BaseEmbedder(ABC):
+    """
+    Converts text into an embedding vector for the semantic cache.  Register a subclass in the
+    container under this type to change how questions are embedded.
+    """
+
+    @abstractmethod
+    async def embed_async(self, *, text: str) -> npt.NDArray[np.float32]:
+        """
+        Returns the embedding of the text
+
+        :param text: text to embed
+        :return: one dimensional vector.  It does not need to be normalized.
+        """
+        ...
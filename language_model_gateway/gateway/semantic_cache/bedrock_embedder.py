@@ -0,0 +1,34 @@
+import numpy as np
+import numpy.typing as npt
+from langchain_aws import BedrockEmbeddings
+
+from language_model_gateway.gateway.aws.aws_client_factory import AwsClientFactory
+from language_model_gateway.gateway.semantic_cache.base_embedder import BaseEmbedder
+
+
+class BedrockEmbedder(BaseEmbedder):
+    """Embeds text with an AWS Bedrock embedding model (Amazon Titan by default)"""
+
+    def __init__(self, *, aws_client_factory: AwsClientFactory, model_id: str) -> None:
+        """
+        Initialize the Bedrock embedder
+
+        Args:
+            aws_client_factory: factory for the bedrock-runtime client
+            model_id: Bedrock embedding model to use
+        """
+        self.aws_client_factory: AwsClientFactory = aws_client_factory
+        assert self.aws_client_factory is not None
+        assert isinstance(self.aws_client_factory, AwsClientFactory)
+        self.model_id: str = model_id
+        assert self.model_id
+        # created once since the client is shared by all the lookups
+        self.embeddings: BedrockEmbeddings = BedrockEmbeddings(
+            client=self.aws_client_factory.create_client(
+                service_name="bedrock-runtime"
+            ),
+            model_id=self.model_id,
+        )
+
+    async def embed_async(self, *, text: str) -> npt.NDArray[np.float32]:
+        return np.asarray(await self.embeddings.aembed_query(text), dtype=np.float32)
@@ -0,0 +1,195 @@
+import fcntl
+import hashlib
+import json
+import logging
+from pathlib import Path
+from typing import Dict, Optional
+from uuid import UUID, uuid4
+
+import numpy as np
+import numpy.typing as npt
+
+from language_model_gateway.configs.config_schema import ChatModelConfig
+from language_model_gateway.gateway.semantic_cache.base_embedder import BaseEmbedder
+from language_model_gateway.gateway.semantic_cache.semantic_cache_index import (
+    SemanticCacheIndex,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class SemanticCache:
+    """
+    Cache of answers keyed by the embedding of the question so near-duplicate questions
+    (e.g. differing only in wording or punctuation) get the same answer without calling the model.
+
+    An answer is only returned to the caller whose question it answered since the tools of an
+    agent can act with the caller's token.  There is one bounded index per model.  An index is discarded when the model configuration
+    changes and, if a cache path is passed, is written to disk on save() and read back on first use.
+    """
+
+    def __init__(
+        self, *, embedder: BaseEmbedder, cache_path: Optional[str] = None
+    ) -> None:
+        """
+        Initialize the semantic cache
+
+        Args:
+            embedder: converts the questions into embeddings
+            cache_path: optional folder to persist the indexes in
+        """
+        self.embedder: BaseEmbedder = embedder
+        assert self.embedder is not None
+        assert isinstance(self.embedder, BaseEmbedder)
+        self.cache_path: Optional[Path] = Path(cache_path) if cache_path else None
+        self._indexes: Dict[str, SemanticCacheIndex] = {}
+        self._identifier: UUID = uuid4()
+
+    @staticmethod
+    def get_config_hash(*, model_config: ChatModelConfig) -> str:
+        """Returns a hash of the model configuration so answers are discarded when it changes"""
+        return hashlib.sha256(
+            json.dumps(
+                model_config.model_dump(mode="json", exclude={"semantic_cache"}),
+                sort_keys=True,
+            ).encode("utf-8")
+        ).hexdigest()
+
+    def _get_path(self, *, model: str) -> Optional[Path]:
+        if self.cache_path is None:
+            return None
+        return self.cache_path / (
+            hashlib.sha256(model.encode("utf-8")).hexdigest() + ".npz"
+        )
+
+    def get_index(self, *, model_config: ChatModelConfig) -> SemanticCacheIndex:
+        """
+        Returns the index for the model, loading it from disk on first use
+
+        :param model_config: model configuration.  Must have semantic_cache set.
+        :return: index
+        """
+        assert model_config.semantic_cache is not None
+        config_hash: str = self.get_config_hash(model_config=model_config)
+        index: Optional[SemanticCacheIndex] = self._indexes.get(model_config.name)
+        if index is not None and index.config_hash == config_hash:
+            return index
+        path: Optional[Path] = self._get_path(model=model_config.name)
+        loaded: Optional[SemanticCacheIndex] = None
+        # only load on first use since a mismatched index in memory means the configuration changed
+        if index is None and path is not None:
+            try:
+                loaded = SemanticCacheIndex.load(
+                    path=path,
+                    max_entries=model_config.semantic_cache.max_entries,
+                    config_hash=config_hash,
+                )
+            except Exception as e:
+                logger.warning(
+                    f"SemanticCache with id: {self._identifier} could not load {path}: {e}"
+                )
+        index = loaded or SemanticCacheIndex(
+            max_entries=model_config.semantic_cache.max_entries,
+            config_hash=config_hash,
+        )
+        self._indexes[model_config.name] = index
+        return index
+
+    async def embed_async(self, *, question: str) -> npt.NDArray[np.float32]:
+        """Returns the embedding of the question"""
+        return await self.embedder.embed_async(text=question)
+
+    def lookup(
+        self,
+        *,
+        model_config: ChatModelConfig,
+        vector: npt.NDArray[np.float32],
+        caller: str,
+    ) -> Optional[str]:
+        """
+        Returns the cached answer of the caller's most similar question if it is above the model's
+        threshold
+
+        :param model_config: model configuration.  Must have semantic_cache set.
+        :param vector: embedding of the question
+        :param caller: identity of the caller
+        :return: answer or None
+        """
+        assert model_config.semantic_cache is not None
+        answer: Optional[str]
+        similarity: float
+        answer, similarity = self.get_index(model_config=model_config).search(
+            vector=vector, caller=caller
+        )
+        if (
+            answer is None
+            or similarity < model_config.semantic_cache.similarity_threshold
+        ):
+            return None
+        logger.debug(
+            f"SemanticCache with id: {self._identifier} found answer for model {model_config.name}"
+            f" with similarity {similarity}"
+        )
+        return answer
+
+    def add(
+        self,
+        *,
+        model_config: ChatModelConfig,
+        vector: npt.NDArray[np.float32],
+        answer: str,
+        caller: str,
+    ) -> None:
+        """
+        Caches the answer to the question
+
+        :param model_config: model configuration.  Must have semantic_cache set.
+        :param vector: embedding of the question
+        :param answer: answer to cache
+        :param caller: identity of the caller that asked the question
+        """
+        self.get_index(model_config=model_config).add(
+            vector=vector, answer=answer, caller=caller
+        )
+
+    def save(self) -> None:
+        """
+        Writes the indexes to the cache path if one was passed.
+
+        Every worker saves to the same file for a model, so the file is locked while the entries
+        other workers have saved are merged in and written.  The merged file is written to a
+        temporary file that replaces the old one, so no worker's entries are lost and readers
+        never see a partially written file.
+        """
+        for model, index in self._indexes.items():
+            path: Optional[Path] = self._get_path(model=model)
+            if path is None or len(index) == 0:
+                continue
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(path.with_suffix(".lock"), "w") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    saved: Optional[SemanticCacheIndex] = None
+                    try:
+                        saved = SemanticCacheIndex.load(
+                            path=path,
+                            max_entries=index.max_entries,
+                            config_hash=index.config_hash,
+                        )
+                    except Exception as e:
+                        logger.warning(
+                            f"SemanticCache with id: {self._identifier} could not load {path}: {e}"
+                        )
+                    merged: SemanticCacheIndex = (
+                        index.merge(other=saved) if saved is not None else index
+                    )
+                    merged.save(path=path)
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+            logger.info(
+                f"SemanticCache with id: {self._identifier} saved {len(merged)} entries for model {model}"
+            )
+
+    def clear(self) -> None:
+        """Discards the in-memory indexes"""
+        self._indexes.clear()
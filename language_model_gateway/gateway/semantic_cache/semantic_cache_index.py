@@ -0,0 +1,185 @@
+import os
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+import numpy.typing as npt
+
+
+class SemanticCacheIndex:
+    """
+    Bounded in-memory nearest neighbour index of question embeddings and their answers.
+
+    The normalized embeddings are kept in one preallocated matrix so a lookup is a single
+    matrix-vector product giving the cosine similarity to every cached question.  Once the index
+    is full the oldest entry is overwritten.
+
+    Each entry has the caller that asked the question and a lookup only matches the entries of
+    the same caller.
+    """
+
+    def __init__(self, *, max_entries: int, config_hash: str) -> None:
+        """
+        Initialize the index
+
+        Args:
+            max_entries: Maximum number of questions to keep
+            config_hash: hash of the model configuration the answers were created with
+        """
+        assert max_entries > 0
+        self.max_entries: int = max_entries
+        self.config_hash: str = config_hash
+        # allocated on the first add since the dimension depends on the embedder
+        self._vectors: Optional[npt.NDArray[np.float32]] = None
+        self._answers: List[str] = []
+        self._callers: List[str] = []
+        self._count: int = 0
+        self._next: int = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    @staticmethod
+    def _normalize(vector: npt.NDArray[np.float32]) -> npt.NDArray[np.float32]:
+        vector = np.asarray(vector, dtype=np.float32).ravel()
+        norm: float = float(np.linalg.norm(vector))
+        return vector / norm if norm > 0 else vector
+
+    def search(
+        self, *, vector: npt.NDArray[np.float32], caller: str
+    ) -> Tuple[Optional[str], float]:
+        """
+        Returns the answer of the most similar question cached for the caller
+
+        :param vector: embedding of the question
+        :param caller: identity of the caller
+        :return: tuple of (answer, cosine similarity) or (None, 0) if the index is empty
+        """
+        if self._vectors is None or self._count == 0:
+            return None, 0.0
+        query: npt.NDArray[np.float32] = self._normalize(vector)
+        if query.shape[0] != self._vectors.shape[1]:
+            return None, 0.0
+        similarities: npt.NDArray[np.float32] = self._vectors[: self._count] @ query
+        similarities[
+            np.fromiter(
+                (c != caller for c in self._callers), dtype=np.bool_, count=self._count
+            )
+        ] = -np.inf
+        if not np.isfinite(similarities).any():
+            return None, 0.0
+        best: int = int(np.argmax(similarities))
+        return self._answers[best], float(similarities[best])
+
+    def add(self, *, vector: npt.NDArray[np.float32], answer: str, caller: str) -> None:
+        """
+        Adds a question and its answer, overwriting the oldest entry if the index is full
+
+        :param vector: embedding of the question
+        :param answer: answer to the question
+        :param caller: identity of the caller that asked the question
+        """
+        normalized: npt.NDArray[np.float32] = self._normalize(vector)
+        if self._vectors is None or self._vectors.shape[1] != normalized.shape[0]:
+            # first entry or the embedder changed so start again
+            self._vectors = np.zeros(
+                (self.max_entries, normalized.shape[0]), dtype=np.float32
+            )
+            self._answers = []
+            self._callers = []
+            self._count = 0
+            self._next = 0
+        self._vectors[self._next] = normalized
+        if self._next < len(self._answers):
+            self._answers[self._next] = answer
+            self._callers[self._next] = caller
+        else:
+            self._answers.append(answer)
+            self._callers.append(caller)
+        self._next = (self._next + 1) % self.max_entries
+        self._count = min(self._count + 1, self.max_entries)
+
+    def get_entries(self) -> List[Tuple[npt.NDArray[np.float32], str, str]]:
+        """Returns the normalized embeddings, answers and callers, oldest entry first"""
+        if self._vectors is None:
+            return []
+        return [
+            (self._vectors[i], self._answers[i], self._callers[i])
+            for i in (
+                (self._next - self._count + j) % self.max_entries
+                for j in range(self._count)
+            )
+        ]
+
+    def merge(self, *, other: "SemanticCacheIndex") -> "SemanticCacheIndex":
+        """
+        Returns a new index with the entries of other followed by the entries of this index
+        that other does not have.  The oldest entries are dropped if there are more than max_entries.
+
+        :param other: index whose entries are older, e.g. the one on disk
+        :return: merged index
+        """
+        merged: SemanticCacheIndex = SemanticCacheIndex(
+            max_entries=self.max_entries, config_hash=self.config_hash
+        )
+        seen: set[Tuple[bytes, str, str]] = set()
+        for vector, answer, caller in other.get_entries() + self.get_entries():
+            key: Tuple[bytes, str, str] = (vector.tobytes(), answer, caller)
+            if key not in seen:
+                seen.add(key)
+                merged.add(vector=vector, answer=answer, caller=caller)
+        return merged
+
+    def save(self, *, path: Path) -> None:
+        """
+        Writes the index to path, oldest entry first.  The file is replaced atomically so
+        readers never see a partially written index.
+
+        :param path: file to write
+        """
+        if self._vectors is None:
+            return
+        # rotate so the oldest entry is first
+        order: List[int] = [
+            (self._next - self._count + i) % self.max_entries
+            for i in range(self._count)
+        ]
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path: Path = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(temp_path, "wb") as file:
+            np.savez(
+                file,
+                vectors=self._vectors[order],
+                answers=np.array([self._answers[i] for i in order], dtype=np.str_),
+                callers=np.array([self._callers[i] for i in order], dtype=np.str_),
+                config_hash=np.array(self.config_hash),
+            )
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(
+        cls, *, path: Path, max_entries: int, config_hash: str
+    ) -> Optional["SemanticCacheIndex"]:
+        """
+        Reads an index written by save()
+
+        :param path: file to read
+        :param max_entries: Maximum number of questions to keep.  The oldest are dropped if the file has more.
+        :param config_hash: hash of the current model configuration
+        :return: the index or None if the file does not exist, was created with a different
+                 configuration or does not have the callers of the entries
+        """
+        if not path.exists():
+            return None
+        with np.load(path, allow_pickle=False) as data:
+            if str(data["config_hash"]) != config_hash or "callers" not in data:
+                return None
+            vectors: npt.NDArray[np.float32] = data["vectors"][-max_entries:]
+            answers: List[str] = [str(a) for a in data["answers"][-max_entries:]]
+            callers: List[str] = [str(c) for c in data["callers"][-max_entries:]]
+        index: SemanticCacheIndex = cls(
+            max_entries=max_entries, config_hash=config_hash
+        )
+        for i, answer in enumerate(answers):
+            index.add(vector=vectors[i], answer=answer, caller=callers[i])
+        return index
@@ -0,0 +1,44 @@
+from contextvars import ContextVar
+from typing import List, Optional
+
+# answer being streamed for the semantic cache.  Set by ChatCompletionManager.
+_current_streamed_answer: ContextVar[Optional["StreamedAnswer"]] = ContextVar(
+    "streamed_answer", default=None
+)
+
+
+class StreamedAnswer:
+    """
+    The tokens the model streamed for a request whose answer goes in the semantic cache.
+
+    The response stream also has lines that are not part of the answer (e.g. which tool is running,
+    tool artifacts and errors) so the converter records the tokens of the model here as it streams
+    them.  A provider that does not record them (e.g. one relaying another agent's stream) leaves
+    the answer empty so its streamed responses are not cached.
+    """
+
+    def __init__(self) -> None:
+        self._parts: List[str] = []
+        self.failed: bool = False
+
+    @staticmethod
+    def get_current() -> Optional["StreamedAnswer"]:
+        """Returns the answer of the request being handled or None if it is not cached"""
+        return _current_streamed_answer.get()
+
+    def set_current(self) -> None:
+        """Makes this the answer of the request being handled in this context"""
+        _current_streamed_answer.set(self)
+
+    def add(self, *, content: str) -> None:
+        """Adds tokens streamed by the model"""
+        self._parts.append(content)
+
+    def fail(self) -> None:
+        """Marks the answer as failed so it is not cached"""
+        self.failed = True
+
+    @property
+    def answer(self) -> str:
+        """Returns the tokens streamed so far"""
+        return "".join(self._parts)
@@ -0,0 +1,60 @@
+from typing import AsyncIterable
+
+import numpy as np
+import numpy.typing as npt
+
+from language_model_gateway.configs.config_schema import ChatModelConfig
+from language_model_gateway.gateway.semantic_cache.semantic_cache import SemanticCache
+from language_model_gateway.gateway.semantic_cache.streamed_answer import (
+    StreamedAnswer,
+)
+from language_model_gateway.gateway.utilities.closing_async_iterator import (
+    ClosingAsyncIterator,
+)
+
+Chunk = str | bytes | memoryview
+
+
+class StreamedAnswerCollector(ClosingAsyncIterator[Chunk]):
+    """
+    Iterates a streaming response body and adds the answer the model streamed to the semantic
+    cache once the stream has completed without failing
+    """
+
+    def __init__(
+        self,
+        *,
+        iterable: AsyncIterable[Chunk],
+        semantic_cache: SemanticCache,
+        model_config: ChatModelConfig,
+        vector: npt.NDArray[np.float32],
+        caller: str,
+        streamed_answer: StreamedAnswer,
+    ) -> None:
+        """
+        Initialize the collector
+
+        Args:
+            iterable: body of the response
+            semantic_cache: cache to add the answer to
+            model_config: model configuration
+            vector: embedding of the question
+            caller: identity of the caller
+            streamed_answer: tokens recorded by the converter while the body is streamed
+        """
+        super().__init__(iterable=iterable)
+        self.semantic_cache: SemanticCache = semantic_cache
+        self.model_config: ChatModelConfig = model_config
+        self.vector: npt.NDArray[np.float32] = vector
+        self.caller: str = caller
+        self.streamed_answer: StreamedAnswer = streamed_answer
+
+    async def on_close_async(self, *, completed: bool) -> None:
+        answer: str = self.streamed_answer.answer
+        if completed and not self.streamed_answer.failed and answer:
+            self.semantic_cache.add(
+                model_config=self.model_config,
+                vector=self.vector,
+                answer=answer,
+                caller=self.caller,
+            )
@@ -1,17 +1,28 @@
 import base64
+import dataclasses
 import io
+import json
 import logging
 from typing import Type, Literal, Tuple, Optional, Dict
 
-import httpx
 import pypdf
-from httpx import Response, Headers
+from httpx import Response
+from langchain_core.callbacks import AsyncCallbackManagerForToolRun
 from pydantic import BaseModel, Field
-from pypdf import PageObject
 
+from language_model_gateway.gateway.http.http_fetcher import HttpFetcher
 from language_model_gateway.gateway.ocr.ocr_extractor import OCRExtractor
 from language_model_gateway.gateway.ocr.ocr_extractor_factory import OCRExtractorFactory
 from language_model_gateway.gateway.tools.resilient_base_tool import ResilientBaseTool
+from language_model_gateway.gateway.utilities.content_cache import ContentCache
+from language_model_gateway.gateway.utilities.parallel_pdf_text_extractor import (
+    ParallelPdfTextExtractor,
+    PdfTextExtractionResult,
+)
+from language_model_gateway.gateway.utilities.parser_pool import ParserPool
+from language_model_gateway.gateway.utilities.pdf_text_extractor import (
+    PdfTextExtractor,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -36,6 +47,10 @@ class PDFExtractionToolInput(BaseModel):
         default=False,
         description="Use OCR (Optical Character Recognition) if text extraction fails",
     )
+    max_characters: Optional[int] = Field(
+        default=None,
+        description="Optional maximum number of characters of text to extract",
+    )
 
 
 class PDFExtractionTool(ResilientBaseTool):
@@ -53,6 +68,12 @@ class PDFExtractionTool(ResilientBaseTool):
     response_format: Literal["content", "content_and_artifact"] = "content_and_artifact"
     ocr_extractor_factory: OCRExtractorFactory
     ocr_type: Literal["aws"] = "aws"
+    http_fetcher: HttpFetcher
+    content_cache: ContentCache
+    parser_pool: ParserPool
+    pages_per_job: int = 10
+    # used when the call does not ask for a smaller budget
+    max_characters: Optional[int] = None
 
     def _run(
         self,
@@ -61,6 +82,7 @@ class PDFExtractionTool(ResilientBaseTool):
         start_page: Optional[int] = None,
         end_page: Optional[int] = None,
         use_ocr: bool = False,
+        max_characters: Optional[int] = None,
     ) -> Tuple[str, str]:
         """
         Synchronous version of the tool (falls back to async implementation).
@@ -79,6 +101,8 @@ class PDFExtractionTool(ResilientBaseTool):
         start_page: Optional[int] = None,
         end_page: Optional[int] = None,
         use_ocr: bool = False,
+        max_characters: Optional[int] = None,
+        run_manager: Optional[AsyncCallbackManagerForToolRun] = None,
     ) -> Tuple[str, str]:
         """
         Asynchronous version of the tool with OCR support.
@@ -89,6 +113,8 @@ class PDFExtractionTool(ResilientBaseTool):
             start_page (Optional[int]): Starting page for extraction
             end_page (Optional[int]): Ending page for extraction
             use_ocr (bool): Use AWS Textract for OCR if text extraction fails
+            max_characters (Optional[int]): Stop extracting once this much text has been extracted
+            run_manager (Optional[AsyncCallbackManagerForToolRun]): Run manager used to stream progress
 
         Returns:
             Tuple of extracted text and artifact description
@@ -103,21 +129,18 @@ class PDFExtractionTool(ResilientBaseTool):
         pdf_bytes: bytes
         if not base64_pdf and url:
             # Read PDF from URL
-            headers = Headers(
-                {
-                    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-                    "Accept": "application/pdf, text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8",
-                    "Accept-Language": "en-US,en;q=0.9",
-                    # "Referer": "/".join(url.split("/")[:3]),  # Add base URL as referer
-                }
-            )
+            headers: Dict[str, str] = {
+                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+                "Accept": "application/pdf, text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8",
+                "Accept-Language": "en-US,en;q=0.9",
+                # "Referer": "/".join(url.split("/")[:3]),  # Add base URL as referer
+            }
             try:
-                async with httpx.AsyncClient(
-                    headers=headers, follow_redirects=True
-                ) as client:
-                    response: Response = await client.get(url)
-                    response.raise_for_status()
-                    pdf_bytes = response.content
+                response: Response = await self.http_fetcher.fetch_async(
+                    url=url, headers=headers
+                )
+                response.raise_for_status()
+                pdf_bytes = response.content
             except Exception as e:
                 return (
                     f"Failed to fetch or process the URL {url}: {str(e)}",
@@ -128,30 +151,94 @@ class PDFExtractionTool(ResilientBaseTool):
             pdf_bytes = base64.b64decode(base64_pdf)
 
         try:
-            # Create a bytes buffer to simulate file-like object
-            pdf_buffer: io.BytesIO = io.BytesIO(pdf_bytes)
 
-            # First, try PyPDF text extraction
-            full_text = self._extract_text_with_pypdf(pdf_buffer, start_page, end_page)
+            async def get_page_count_async() -> str:
+                return str(
+                    await self.parser_pool.run_async(
+                        PdfTextExtractor.get_page_count, pdf_bytes
+                    )
+                )
+
+            # the page count is needed to split the pages between the jobs
+            total_pages = int(
+                await self.content_cache.get_or_create_async(
+                    kind="pdf_page_count",
+                    content=pdf_bytes,
+                    options={},
+                    fn_create=get_page_count_async,
+                )
+            )
+            budget: Optional[int] = min(
+                [b for b in (max_characters, self.max_characters) if b],
+                default=None,
+            )
+
+            async def report_progress_async(first: int, last: int) -> None:
+                await self.dispatch_progress_async(
+                    run_manager=run_manager,
+                    artifact=f"PDFExtractionAgent: Extracted text from pages {first} to {last} of {total_pages}",
+                )
+
+            async def extract_text_async() -> str:
+                result: PdfTextExtractionResult = await ParallelPdfTextExtractor(
+                    parser_pool=self.parser_pool, pages_per_job=self.pages_per_job
+                ).extract_text_async(
+                    pdf_bytes=pdf_bytes,
+                    total_pages=total_pages,
+                    start_page=start_page,
+                    end_page=end_page,
+                    max_characters=budget,
+                    fn_progress=report_progress_async,
+                )
+                # cached with the pages that were extracted so a cache hit reports them too
+                return json.dumps(dataclasses.asdict(result))
+
+            # First, try PyPDF text extraction.  Pages are parsed in parallel in the parser pool.
+            extraction: PdfTextExtractionResult = PdfTextExtractionResult(
+                **json.loads(
+                    await self.content_cache.get_or_create_async(
+                        kind="pdf_text_extraction",
+                        content=pdf_bytes,
+                        options={
+                            "start_page": start_page,
+                            "end_page": end_page,
+                            "max_characters": budget,
+                        },
+                        fn_create=extract_text_async,
+                    )
+                )
+            )
+            full_text: str = extraction.text
+            start: int = extraction.start_page
+            end: int = extraction.end_page
+            truncated: bool = extraction.truncated
 
             # If text extraction fails and OCR is enabled, use Textract
             if not full_text.strip() and use_ocr:
                 ocr_extractor: OCRExtractor = self.ocr_extractor_factory.get(
                     name=self.ocr_type
                 )
-                full_text = await ocr_extractor.extract_text_with_textract_async(
-                    pdf_bytes
+                full_text = await self.content_cache.get_or_create_async(
+                    kind=f"pdf_ocr_{self.ocr_type}",
+                    content=pdf_bytes,
+                    options={},
+                    fn_create=lambda: ocr_extractor.extract_text_with_textract_async(
+                        pdf_bytes
+                    ),
                 )
+                # Textract reads the whole document
+                start, end = 0, total_pages - 1
+                truncated = budget is not None and len(full_text) > budget
+                if budget:
+                    full_text = full_text[:budget]
 
             # Prepare artifact description
-            total_pages = len(pypdf.PdfReader(pdf_buffer).pages)
-            start = start_page if start_page is not None else 0
-            end = end_page if end_page is not None else total_pages - 1
-
             artifact = (
                 f"PDFExtractionAgent: Extracted text from pages {start} to {end} "
                 f"(Total pages: {total_pages}, OCR: {'Yes' if use_ocr else 'No'})"
             )
+            if truncated:
+                artifact += f" Stopped after {budget} characters"
 
             return full_text.strip(), artifact
 
@@ -203,54 +290,6 @@ class PDFExtractionTool(ResilientBaseTool):
             print(f"Page extraction error: {e}")
             return None
 
-    @staticmethod
-    def _extract_text_with_pypdf(
-        pdf_buffer: io.BytesIO,
-        start_page: Optional[int] = None,
-        end_page: Optional[int] = None,
-    ) -> str:
-        """
-        Extract text using PyPDF with multiple extraction methods
-
-        Args:
-            pdf_buffer (io.BytesIO): PDF file buffer
-            start_page (Optional[int]): Starting page
-            end_page (Optional[int]): Ending page
-
-        Returns:
-            str: Extracted text
-        """
-        pdf_reader = pypdf.PdfReader(pdf_buffer)
-        total_pages = len(pdf_reader.pages)
-
-        # Determine page range
-        start = start_page if start_page is not None else 0
-        end = end_page if end_page is not None else total_pages - 1
-
-        # Validate page range
-        if start < 0 or end >= total_pages or start > end:
-            raise ValueError(f"Invalid page range. Total pages: {total_pages}")
-
-        full_text = ""
-        for page_num in range(start, end + 1):
-            page: PageObject = pdf_reader.pages[page_num]
-            try:
-                # Primary method: extract_text()
-                page_text: str = page.extract_text()
-
-                # Fallback: alternative extraction methods
-                if not page_text:
-                    page_text = page.extract_text(extraction_mode="layout")
-            except Exception as extract_error:
-                logger.warning(
-                    f"Text extraction failed for page {page_num}: {extract_error}"
-                )
-                page_text = ""
-
-            full_text += page_text + "\n"
-
-        return full_text
-
     @staticmethod
     def extract_metadata(base64_pdf: str) -> Dict[str, str]:
         """
@@ -6,6 +6,7 @@ from typing import Optional, Dict, Any, List, cast, Type, Literal, Tuple
 import httpx
 from pydantic import BaseModel, Field
 
+from language_model_gateway.gateway.http.http_fetcher import HttpFetcher
 from language_model_gateway.gateway.tools.resilient_base_tool import ResilientBaseTool
 
 logger = logging.getLogger(__name__)
@@ -32,6 +33,7 @@ class ProviderSearchTool(ResilientBaseTool):
     args_schema: Type[BaseModel] = ProviderSearchToolInput
     response_format: Literal["content", "content_and_artifact"] = "content_and_artifact"
     api_url: Optional[str] = os.environ.get("PROVIDER_SEARCH_API_URL")
+    http_fetcher: HttpFetcher
 
     # noinspection PyMethodMayBeStatic
     def _build_query(self) -> str:
@@ -198,10 +200,14 @@ class ProviderSearchTool(ResilientBaseTool):
             "accept": "*/*",
         }
 
-        async_client: httpx.AsyncClient = httpx.AsyncClient(headers=headers)
-
         try:
-            response = await async_client.post(self.api_url, json=payload, timeout=30.0)
+            response = await self.http_fetcher.fetch_async(
+                url=self.api_url,
+                method="POST",
+                headers=headers,
+                json=payload,
+                timeout=30.0,
+            )
             return (
                 self._handle_response(response),
                 f"ProviderSearchAgent: Searched for {search} {variables} ",
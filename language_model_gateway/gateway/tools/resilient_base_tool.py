@@ -1,8 +1,15 @@
 from abc import ABCMeta
 from typing import Optional, Any, Dict, Union, List
 
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForToolRun,
+    adispatch_custom_event,
+)
 from langchain_core.tools import BaseTool
 
+# name of the custom event a tool sends to stream its progress before it finishes
+TOOL_PROGRESS_EVENT: str = "tool_progress"
+
 
 class ResilientBaseTool(BaseTool, metaclass=ABCMeta):
     """
@@ -42,3 +49,22 @@ class ResilientBaseTool(BaseTool, metaclass=ABCMeta):
                 for key, value in tool_input.items()
             }
         return super()._parse_input(tool_input, tool_call_id)
+
+    @staticmethod
+    async def dispatch_progress_async(
+        *, run_manager: Optional[AsyncCallbackManagerForToolRun], artifact: str
+    ) -> None:
+        """
+        Streams a progress artifact of a tool that is still running.  The artifact is
+        written to the response like the artifact of a finished tool.
+
+        :param run_manager: run manager of the tool call or None if the tool is called directly
+        :param artifact: description of the progress
+        """
+        if run_manager is None:
+            return
+        await adispatch_custom_event(
+            TOOL_PROGRESS_EVENT,
+            {"artifact": artifact},
+            config={"callbacks": run_manager.get_child()},
+        )
@@ -2,13 +2,15 @@ import logging
 import os
 from typing import Optional, Dict, Type, Tuple, Literal
 
-import httpx
 from pydantic import BaseModel, Field
 
+from language_model_gateway.gateway.http.http_fetcher import HttpFetcher
 from language_model_gateway.gateway.tools.resilient_base_tool import ResilientBaseTool
+from language_model_gateway.gateway.utilities.content_cache import ContentCache
 from language_model_gateway.gateway.utilities.html_to_markdown_converter import (
     HtmlToMarkdownConverter,
 )
+from language_model_gateway.gateway.utilities.parser_pool import ParserPool
 
 logger = logging.getLogger(__name__)
 
@@ -35,6 +37,15 @@ class ScrapingBeeWebScraperTool(ResilientBaseTool):
     api_key: Optional[str]
     """API key for ScrapingBee"""
 
+    http_fetcher: HttpFetcher
+    """Shared fetcher that pools connections and caches responses"""
+
+    content_cache: ContentCache
+    """Cache of the text converted from the scraped pages"""
+
+    parser_pool: ParserPool
+    """Pool that converts the scraped pages outside the event loop"""
+
     base_url: str = "https://app.scrapingbee.com/api/v1/"
     """Base URL for ScrapingBee API"""
 
@@ -78,24 +89,23 @@ class ScrapingBeeWebScraperTool(ResilientBaseTool):
             params["ai_query"] = query
 
         try:
-            async with httpx.AsyncClient() as client:
+            if os.environ.get("LOG_INPUT_AND_OUTPUT", "0") == "1":
+                logger.info(f"Scraping {url} with ScrapingBee with params: {params}")
+            response = await self.http_fetcher.fetch_async(
+                url=self.base_url, params=params, timeout=30.0
+            )
+
+            if response.status_code == 200:
                 if os.environ.get("LOG_INPUT_AND_OUTPUT", "0") == "1":
                     logger.info(
-                        f"Scraping {url} with ScrapingBee with params: {params}"
-                    )
-                response = await client.get(self.base_url, params=params, timeout=30.0)
-
-                if response.status_code == 200:
-                    if os.environ.get("LOG_INPUT_AND_OUTPUT", "0") == "1":
-                        logger.info(
-                            f"====== Scraped {url} ======\n{response.text}\n====== End of Scraped Content ======"
-                        )
-                    return response.text
-                else:
-                    logger.error(
-                        f"ScrapingBee error: {response.status_code} - {response.text}"
+                        f"====== Scraped {url} ======\n{response.text}\n====== End of Scraped Content ======"
                     )
-                    return None
+                return response.text
+            else:
+                logger.error(
+                    f"ScrapingBee error: {response.status_code} - {response.text}"
+                )
+                return None
 
         except Exception as e:
             logger.error(f"Error scraping {url}: {str(e)}")
@@ -104,12 +114,22 @@ class ScrapingBeeWebScraperTool(ResilientBaseTool):
 
     async def _extract_text_content_async(self, html_content: str) -> str:
         if self.return_markdown:
-            return await HtmlToMarkdownConverter.get_markdown_from_html_async(
-                html_content=html_content
+            return await self.content_cache.get_or_create_async(
+                kind="html_to_markdown",
+                content=html_content.encode("utf-8"),
+                options={},
+                fn_create=lambda: self.parser_pool.run_async(
+                    HtmlToMarkdownConverter.get_markdown_from_html, html_content
+                ),
             )
         else:
-            return await HtmlToMarkdownConverter.get_plain_text_from_html_async(
-                html_content=html_content
+            return await self.content_cache.get_or_create_async(
+                kind="html_to_plain_text",
+                content=html_content.encode("utf-8"),
+                options={},
+                fn_create=lambda: self.parser_pool.run_async(
+                    HtmlToMarkdownConverter.get_plain_text_from_html, html_content
+                ),
             )
 
     def _run(self, url: str, query: Optional[str] = None) -> Tuple[str, str]:
@@ -11,6 +11,7 @@ from language_model_gateway.configs.config_schema import AgentConfig
 from language_model_gateway.gateway.file_managers.file_manager_factory import (
     FileManagerFactory,
 )
+from language_model_gateway.gateway.http.http_fetcher import HttpFetcher
 from language_model_gateway.gateway.image_generation.image_generator_factory import (
     ImageGeneratorFactory,
 )
@@ -51,6 +52,7 @@ from language_model_gateway.gateway.tools.sequence_diagram_generator_tool import
     SequenceDiagramGeneratorTool,
 )
 from language_model_gateway.gateway.tools.url_to_markdown_tool import URLToMarkdownTool
+from language_model_gateway.gateway.utilities.content_cache import ContentCache
 from language_model_gateway.gateway.utilities.environment_variables import (
     EnvironmentVariables,
 )
@@ -60,6 +62,7 @@ from language_model_gateway.gateway.utilities.github.github_pull_request_helper
 from language_model_gateway.gateway.utilities.jira.jira_issues_helper import (
     JiraIssueHelper,
 )
+from language_model_gateway.gateway.utilities.parser_pool import ParserPool
 
 
 class ToolProvider:
@@ -72,6 +75,9 @@ class ToolProvider:
         environment_variables: EnvironmentVariables,
         github_pull_request_helper: GithubPullRequestHelper,
         jira_issues_helper: JiraIssueHelper,
+        http_fetcher: HttpFetcher,
+        content_cache: ContentCache,
+        parser_pool: ParserPool,
     ) -> None:
         web_search_tool: BaseTool
         default_web_search_tool: str = environ.get(
@@ -94,7 +100,11 @@ class ToolProvider:
             "google_search": GoogleSearchTool(),
             "duckduckgo_search": DuckDuckGoSearchRun(),
             "python_repl": PythonReplTool(),
-            "get_web_page": URLToMarkdownTool(),
+            "get_web_page": URLToMarkdownTool(
+                http_fetcher=http_fetcher,
+                content_cache=content_cache,
+                parser_pool=parser_pool,
+            ),
             "arxiv_search": ArxivQueryRun(),
             "image_generator": ImageGeneratorTool(
                 image_generator_factory=image_generator_factory,
@@ -122,11 +132,20 @@ class ToolProvider:
                 file_manager_factory=file_manager_factory
             ),
             "scraping_bee_web_scraper": ScrapingBeeWebScraperTool(
-                api_key=environ.get("SCRAPING_BEE_API_KEY")
+                api_key=environ.get("SCRAPING_BEE_API_KEY"),
+                http_fetcher=http_fetcher,
+                content_cache=content_cache,
+                parser_pool=parser_pool,
             ),
-            "provider_search": ProviderSearchTool(),
+            "provider_search": ProviderSearchTool(http_fetcher=http_fetcher),
             "pdf_text_extractor": PDFExtractionTool(
-                ocr_extractor_factory=ocr_extractor_factory
+                ocr_extractor_factory=ocr_extractor_factory,
+                http_fetcher=http_fetcher,
+                content_cache=content_cache,
+                parser_pool=parser_pool,
+                pages_per_job=int(environ.get("PDF_EXTRACTION_PAGES_PER_JOB") or 10),
+                max_characters=int(environ.get("PDF_EXTRACTION_MAX_CHARACTERS") or 0)
+                or None,
             ),
             "github_pull_request_analyzer": GitHubPullRequestAnalyzerTool(
                 github_pull_request_helper=github_pull_request_helper
@@ -1,15 +1,16 @@
 import logging
 import os
-from typing import Type, Literal, Tuple
+from typing import Dict, Type, Literal, Tuple
 
-import httpx
-from httpx import Headers
 from pydantic import BaseModel, Field
 
+from language_model_gateway.gateway.http.http_fetcher import HttpFetcher
 from language_model_gateway.gateway.tools.resilient_base_tool import ResilientBaseTool
+from language_model_gateway.gateway.utilities.content_cache import ContentCache
 from language_model_gateway.gateway.utilities.html_to_markdown_converter import (
     HtmlToMarkdownConverter,
 )
+from language_model_gateway.gateway.utilities.parser_pool import ParserPool
 
 
 logger = logging.getLogger(__name__)
@@ -31,6 +32,9 @@ class URLToMarkdownTool(ResilientBaseTool):
     )
     args_schema: Type[BaseModel] = URLToMarkdownToolInput
     response_format: Literal["content", "content_and_artifact"] = "content_and_artifact"
+    http_fetcher: HttpFetcher
+    content_cache: ContentCache
+    parser_pool: ParserPool
 
     def _run(self, url: str) -> Tuple[str, str]:
         """
@@ -48,22 +52,22 @@ class URLToMarkdownTool(ResilientBaseTool):
         """
         logger.info(f"Fetching and converting URL to Markdown: {url}")
         try:
-            headers = Headers(
-                {
-                    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-                    "Accept": "application/pdf, text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8",
-                    "Accept-Language": "en-US,en;q=0.9",
-                }
-            )
-            async with httpx.AsyncClient(
-                headers=headers, follow_redirects=True
-            ) as client:
-                response = await client.get(url)
-                response.raise_for_status()
-                html_content = response.text
+            headers: Dict[str, str] = {
+                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+                "Accept": "application/pdf, text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8",
+                "Accept-Language": "en-US,en;q=0.9",
+            }
+            response = await self.http_fetcher.fetch_async(url=url, headers=headers)
+            response.raise_for_status()
+            html_content = response.text
 
-            content: str = await HtmlToMarkdownConverter.get_markdown_from_html_async(
-                html_content=html_content
+            content: str = await self.content_cache.get_or_create_async(
+                kind="html_to_markdown",
+                content=response.content,
+                options={"encoding": response.encoding},
+                fn_create=lambda: self.parser_pool.run_async(
+                    HtmlToMarkdownConverter.get_markdown_from_html, html_content
+                ),
             )
             if os.environ.get("LOG_INPUT_AND_OUTPUT", "0") == "1":
                 logger.info(
@@ -0,0 +1,183 @@
+import asyncio
+import logging
+import math
+import time
+from typing import AsyncIterable, Dict, List, Optional, Tuple
+
+from language_model_gateway.configs.config_schema import (
+    AdmissionControlConfig,
+    ChatModelConfig,
+)
+from language_model_gateway.gateway.metrics.gateway_metrics import (
+    ADMISSION_QUEUE_DEPTH,
+    ADMISSION_REJECTED,
+    ADMISSION_WAIT_SECONDS,
+)
+from language_model_gateway.gateway.utilities.closing_async_iterator import (
+    ClosingAsyncIterator,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class AdmissionRejectedError(Exception):
+    """Raised when a request can't be admitted in time"""
+
+    def __init__(self, *, message: str, status_code: int, retry_after_seconds: int):
+        super().__init__(message)
+        self.status_code: int = status_code
+        self.retry_after_seconds: int = retry_after_seconds
+
+
+class ConcurrencyLimiter:
+    """Semaphore with a bounded number of waiters and a maximum wait"""
+
+    def __init__(self, *, name: str, config: AdmissionControlConfig) -> None:
+        """
+        Initialize the limiter
+
+        Args:
+            name: name used in metrics (model name or "global")
+            config: limits
+        """
+        assert config.max_concurrency > 0
+        assert config.max_queue_size >= 0
+        self.name: str = name
+        self.config: AdmissionControlConfig = config
+        self._semaphore: asyncio.Semaphore = asyncio.Semaphore(config.max_concurrency)
+        self._waiting: int = 0
+
+    async def acquire_async(self, *, status_code: int) -> None:
+        """
+        Waits for a free slot
+
+        :param status_code: status code of the error if the request is rejected
+        """
+        if not self._semaphore.locked():
+            await self._semaphore.acquire()
+            ADMISSION_WAIT_SECONDS.labels(model=self.name).observe(0)
+            return
+        if self._waiting >= self.config.max_queue_size:
+            self._reject(reason="queue_full", status_code=status_code)
+        self._waiting += 1
+        ADMISSION_QUEUE_DEPTH.labels(model=self.name).inc()
+        start: float = time.monotonic()
+        try:
+            await asyncio.wait_for(
+                self._semaphore.acquire(), timeout=self.config.max_wait_seconds
+            )
+        except TimeoutError:
+            self._reject(reason="timeout", status_code=status_code)
+        finally:
+            self._waiting -= 1
+            ADMISSION_QUEUE_DEPTH.labels(model=self.name).dec()
+            ADMISSION_WAIT_SECONDS.labels(model=self.name).observe(
+                time.monotonic() - start
+            )
+
+    def release(self) -> None:
+        self._semaphore.release()
+
+    def _reject(self, *, reason: str, status_code: int) -> None:
+        ADMISSION_REJECTED.labels(model=self.name, reason=reason).inc()
+        logger.warning(f"Rejecting request for {self.name}: {reason}")
+        raise AdmissionRejectedError(
+            message=f"Too many concurrent requests for {self.name}",
+            status_code=status_code,
+            retry_after_seconds=max(1, math.ceil(self.config.max_wait_seconds)),
+        )
+
+
+class AdmissionPermit:
+    """Slots held by an admitted request.  release() can be called more than once."""
+
+    def __init__(self, *, limiters: List[ConcurrencyLimiter]) -> None:
+        self._limiters: List[ConcurrencyLimiter] = limiters
+
+    def release(self) -> None:
+        limiters: List[ConcurrencyLimiter] = self._limiters
+        self._limiters = []
+        for limiter in limiters:
+            limiter.release()
+
+
+class ReleasingAsyncIterator[T](ClosingAsyncIterator[T]):
+    """
+    Iterates a streaming response body and releases the permit when the stream ends,
+    fails or is closed (even if it was never started).
+    """
+
+    def __init__(self, *, iterable: AsyncIterable[T], permit: AdmissionPermit) -> None:
+        super().__init__(iterable=iterable)
+        self._permit: AdmissionPermit = permit
+
+    async def on_close_async(self, *, completed: bool) -> None:
+        self._permit.release()
+
+
+class AdmissionController:
+    """
+    Limits how many requests run at the same time in this worker, per model (for models with
+    admission_control set) and across all models, so a burst against one slow model can't starve
+    the others.  Requests wait in a bounded queue and are rejected with 429 (model limit) or
+    503 (worker limit) if the queue is full or they waited too long.
+    """
+
+    def __init__(self, *, global_config: Optional[AdmissionControlConfig]) -> None:
+        """
+        Initialize the admission controller
+
+        Args:
+            global_config: limits across all models or None for no limit
+        """
+        self._global_limiter: Optional[ConcurrencyLimiter] = (
+            ConcurrencyLimiter(name="global", config=global_config)
+            if global_config is not None
+            else None
+        )
+        # model name => limiter.  Replaced when the configuration of the model changes.
+        self._model_limiters: Dict[
+            str, Tuple[AdmissionControlConfig, ConcurrencyLimiter]
+        ] = {}
+
+    def _get_model_limiter(
+        self, *, model_config: ChatModelConfig
+    ) -> Optional[ConcurrencyLimiter]:
+        config: Optional[AdmissionControlConfig] = model_config.admission_control
+        if config is None:
+            return None
+        entry: Optional[Tuple[AdmissionControlConfig, ConcurrencyLimiter]] = (
+            self._model_limiters.get(model_config.name)
+        )
+        if entry is None or entry[0] != config:
+            entry = (
+                config,
+                ConcurrencyLimiter(name=model_config.name, config=config),
+            )
+            self._model_limiters[model_config.name] = entry
+        return entry[1]
+
+    async def acquire_async(self, *, model_config: ChatModelConfig) -> AdmissionPermit:
+        """
+        Waits until the request can run
+
+        :param model_config: model configuration
+        :return: permit to release once the response has been sent
+        :raises AdmissionRejectedError: if the request can't be admitted in time
+        """
+        limiters: List[ConcurrencyLimiter] = []
+        model_limiter: Optional[ConcurrencyLimiter] = self._get_model_limiter(
+            model_config=model_config
+        )
+        # wait for the model first so requests queued for a slow model don't hold worker slots
+        if model_limiter is not None:
+            await model_limiter.acquire_async(status_code=429)
+            limiters.append(model_limiter)
+        if self._global_limiter is not None:
+            try:
+                await self._global_limiter.acquire_async(status_code=503)
+            except BaseException:
+                AdmissionPermit(limiters=limiters).release()
+                raise
+            limiters.append(self._global_limiter)
+        return AdmissionPermit(limiters=limiters)
@@ -11,6 +11,7 @@ from langchain_core.messages import (
     ChatMessage as LangchainChatMessage,
 )
 from openai.types.chat import ChatCompletionMessage
+from openai.types.completion_usage import PromptTokensDetails
 
 
 def convert_message_content_to_string(content: str | list[str | Dict[str, Any]]) -> str:
@@ -82,3 +83,30 @@ def remove_tool_calls(
         for content_item in content
         if isinstance(content_item, str) or content_item["type"] != "tool_use"
     ]
+
+
+def add_prompt_tokens_details(
+    *,
+    original: Optional[PromptTokensDetails],
+    new_one: Optional[PromptTokensDetails],
+) -> Optional[PromptTokensDetails]:
+    """
+    Add the prompt caching token counts.
+
+    Args:
+        original: The original prompt token details.
+        new_one: The new prompt token details.
+
+    Returns:
+        The prompt token details or None if neither has any.
+    """
+    if original is None or new_one is None:
+        return original or new_one
+    return PromptTokensDetails.model_validate(
+        {
+            "cached_tokens": (original.cached_tokens or 0)
+            + (new_one.cached_tokens or 0),
+            "cache_write_tokens": getattr(original, "cache_write_tokens", 0)
+            + getattr(new_one, "cache_write_tokens", 0),
+        }
+    )
@@ -0,0 +1,50 @@
+from typing import AsyncIterable, AsyncIterator
+
+
+class ClosingAsyncIterator[T]:
+    """
+    Wraps the body iterator of a streaming response.  Subclasses override on_close_async() to run
+    code once the stream ends.
+
+    An async generator function that is closed before it was started does not run its finally block
+    so a wrapper written as one would not close the iterator it wraps, and the work producing the
+    stream would keep running.  This closes the wrapped iterator and calls on_close_async() exactly
+    once however the stream ends: exhausted, failed or closed before or after it was started.
+    """
+
+    def __init__(self, *, iterable: AsyncIterable[T]) -> None:
+        self._iterator: AsyncIterator[T] = iterable.__aiter__()
+        self._closed: bool = False
+
+    def __aiter__(self) -> "ClosingAsyncIterator[T]":
+        return self
+
+    async def __anext__(self) -> T:
+        if self._closed:
+            raise StopAsyncIteration
+        try:
+            return await self._iterator.__anext__()
+        except BaseException as e:
+            await self._close_async(completed=isinstance(e, StopAsyncIteration))
+            raise
+
+    async def aclose(self) -> None:
+        await self._close_async(completed=False)
+
+    async def _close_async(self, *, completed: bool) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            aclose = getattr(self._iterator, "aclose", None)
+            if aclose is not None:
+                await aclose()
+        finally:
+            await self.on_close_async(completed=completed)
+
+    async def on_close_async(self, *, completed: bool) -> None:
+        """
+        Called once when the stream ends
+
+        :param completed: whether every chunk of the wrapped iterator was read
+        """
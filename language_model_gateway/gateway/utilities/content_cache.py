@@ -0,0 +1,142 @@
+import asyncio
+import hashlib
+import json
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from cachetools import LRUCache
+
+from language_model_gateway.gateway.metrics.gateway_metrics import (
+    CONTENT_CACHE_REQUESTS,
+)
+from language_model_gateway.gateway.utilities.disk_lru_store import DiskLruStore
+
+logger = logging.getLogger(__name__)
+
+
+class ContentCache:
+    """
+    Content-addressed cache of the text converted from documents (Markdown from HTML, text from
+    PDFs) so byte-identical documents are only parsed once.  The key is a hash of the raw content,
+    the kind of conversion and its options.
+
+    Entries are kept in an in-memory LRU tier bounded by the size of the text and, if a
+    directory is given, in a DiskLruStore bounded by max_disk_size_bytes that can be shared by
+    the workers on a host.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_memory_size_bytes: int,
+        cache_directory: Optional[str],
+        max_disk_size_bytes: int,
+    ) -> None:
+        """
+        Initialize the cache
+
+        Args:
+            max_memory_size_bytes: maximum size of the text kept in memory
+            cache_directory: directory of the disk tier or None to only cache in memory
+            max_disk_size_bytes: maximum size of the files in the disk tier
+        """
+        assert max_memory_size_bytes > 0
+        assert max_disk_size_bytes > 0
+        # only accessed from the event loop without awaiting in between so no lock is needed
+        self._memory: LRUCache[str, str] = LRUCache(
+            maxsize=max_memory_size_bytes, getsizeof=len
+        )
+        self.cache_directory: Optional[str] = cache_directory
+        self.max_disk_size_bytes: int = max_disk_size_bytes
+        self._disk: Optional[DiskLruStore] = (
+            DiskLruStore(
+                directory=self.cache_directory,
+                max_size_bytes=self.max_disk_size_bytes,
+                suffix=".txt",
+            )
+            if self.cache_directory
+            else None
+        )
+
+    @staticmethod
+    def get_key(*, kind: str, content: bytes, options: Dict[str, Any]) -> str:
+        """
+        Returns the key for converting the content
+
+        :param kind: kind of conversion e.g. html_to_markdown
+        :param content: raw content of the document
+        :param options: options of the conversion that change its result
+        :return: key
+        """
+        return hashlib.sha256(
+            json.dumps(
+                [kind, hashlib.sha256(content).hexdigest(), options], sort_keys=True
+            ).encode("utf-8")
+        ).hexdigest()
+
+    async def get_or_create_async(
+        self,
+        *,
+        kind: str,
+        content: bytes,
+        options: Dict[str, Any],
+        fn_create: Callable[[], Awaitable[str]],
+    ) -> str:
+        """
+        Returns the cached conversion of the content or converts it with fn_create and caches it.
+        Conversions that raise an exception are not cached.
+
+        :param kind: kind of conversion e.g. html_to_markdown
+        :param content: raw content of the document
+        :param options: options of the conversion that change its result
+        :param fn_create: converts the content
+        :return: converted text
+        """
+        key: str = self.get_key(kind=kind, content=content, options=options)
+        text: Optional[str] = self._memory.get(key)
+        if text is not None:
+            CONTENT_CACHE_REQUESTS.labels(kind=kind, result="memory_hit").inc()
+            return text
+
+        if self._disk is not None:
+            # looked up even if this worker has not written it since other workers may have
+            text = await asyncio.to_thread(self._read, key)
+            if text is not None:
+                CONTENT_CACHE_REQUESTS.labels(kind=kind, result="disk_hit").inc()
+                self._disk.track(key=key, size=len(text.encode("utf-8")))
+                self._set_memory(key=key, text=text)
+                return text
+
+        CONTENT_CACHE_REQUESTS.labels(kind=kind, result="miss").inc()
+        text = await fn_create()
+        self._set_memory(key=key, text=text)
+        if self._disk is not None:
+            await self._set_disk_async(key=key, text=text)
+        return text
+
+    def _set_memory(self, *, key: str, text: str) -> None:
+        # LRUCache raises if a single value is larger than the cache
+        if len(text) <= self._memory.maxsize:
+            self._memory[key] = text
+
+    def _read(self, key: str) -> Optional[str]:
+        assert self._disk is not None
+        try:
+            text: str = self._disk.read(key).decode("utf-8")
+            # the modification time is used to find the least recently used entries
+            self._disk.mark_used(key)
+            return text
+        except OSError:
+            return None
+
+    async def _set_disk_async(self, *, key: str, text: str) -> None:
+        assert self._disk is not None
+        data: bytes = text.encode("utf-8")
+        if len(data) > self.max_disk_size_bytes:
+            return
+        try:
+            await self._disk.write_async(key=key, files={".txt": data})
+        except OSError as e:
+            logger.warning(
+                f"Could not store converted content in {self._disk.get_path(key)}: {e}"
+            )
@@ -0,0 +1,129 @@
+import asyncio
+import os
+from typing import Dict, List, Optional, Tuple
+
+
+class DiskLruStore:
+    """
+    Files in a local directory keyed by a hash where the least recently used entries are removed
+    once they are larger than max_size_bytes.  It is the disk tier of the ContentCache and the
+    HttpCache.
+
+    An entry is a main file, whose modification time records when the entry was last used and
+    whose size counts towards max_size_bytes, and optional companion files (e.g. metadata) that
+    are removed with it.  Files are replaced atomically so the directory can be shared by the
+    workers on a host.  Each worker only counts the size of the entries it has seen so the bound
+    is approximate.
+    """
+
+    def __init__(
+        self,
+        *,
+        directory: str,
+        max_size_bytes: int,
+        suffix: str,
+        companion_suffixes: Tuple[str, ...] = (),
+    ) -> None:
+        """
+        Initialize the store.  The directory is created if it does not exist and the sizes of the
+        entries already in it are read.
+
+        Args:
+            directory: directory of the files
+            max_size_bytes: maximum total size of the main files
+            suffix: suffix of the main file of an entry e.g. .txt
+            companion_suffixes: suffixes of the other files of an entry
+        """
+        assert directory
+        assert max_size_bytes > 0
+        self.directory: str = directory
+        self.max_size_bytes: int = max_size_bytes
+        self.suffix: str = suffix
+        self.companion_suffixes: Tuple[str, ...] = companion_suffixes
+        os.makedirs(self.directory, exist_ok=True)
+        # key => size of the main file.  Only accessed from the event loop.
+        self._sizes: Dict[str, int] = {}
+        for file_name in os.listdir(self.directory):
+            if file_name.endswith(self.suffix):
+                try:
+                    self._sizes[file_name.removesuffix(self.suffix)] = os.path.getsize(
+                        os.path.join(self.directory, file_name)
+                    )
+                except OSError:
+                    pass
+
+    def get_path(self, key: str, *, suffix: Optional[str] = None) -> str:
+        """Returns the path of a file of the entry.  Defaults to the main file."""
+        return os.path.join(self.directory, f"{key}{suffix or self.suffix}")
+
+    def read(self, key: str, *, suffix: Optional[str] = None) -> bytes:
+        """
+        Reads a file of the entry.  Blocking so call it in a thread.
+
+        :param key: key of the entry
+        :param suffix: suffix of the file.  Defaults to the main file.
+        :return: content of the file
+        :raises OSError: if the file does not exist, e.g. it was removed by another worker
+        """
+        with open(self.get_path(key, suffix=suffix), "rb") as file:
+            return file.read()
+
+    def mark_used(self, key: str) -> None:
+        """Records that the entry was used so it is removed last.  Blocking so call it in a thread."""
+        os.utime(self.get_path(key))
+
+    def track(self, *, key: str, size: int) -> None:
+        """Counts the size of an entry another worker has written"""
+        self._sizes.setdefault(key, size)
+
+    async def write_async(self, *, key: str, files: Dict[str, bytes]) -> None:
+        """
+        Writes the files of an entry and removes the least recently used entries if the store is
+        too large
+
+        :param key: key of the entry
+        :param files: suffix => content of each file of the entry.  Must have the main file.  They
+                      are replaced in this order.
+        :raises OSError: if the files could not be written
+        """
+        await asyncio.to_thread(self._write, key, files)
+        self._sizes[key] = len(files[self.suffix])
+        if sum(self._sizes.values()) > self.max_size_bytes:
+            removed: List[str] = await asyncio.to_thread(self._evict, dict(self._sizes))
+            for removed_key in removed:
+                self._sizes.pop(removed_key, None)
+
+    def _write(self, key: str, files: Dict[str, bytes]) -> None:
+        # written to temporary files first so readers never see a partial file
+        temporary_suffix: str = f".{os.getpid()}.tmp"
+        for suffix, data in files.items():
+            with open(
+                self.get_path(key, suffix=suffix) + temporary_suffix, "wb"
+            ) as file:
+                file.write(data)
+        for suffix in files:
+            path: str = self.get_path(key, suffix=suffix)
+            os.replace(path + temporary_suffix, path)
+
+    def _evict(self, sizes: Dict[str, int]) -> List[str]:
+        """Removes the least recently used entries and returns the keys of the removed entries"""
+        removed: List[str] = []
+        last_used: List[Tuple[float, str]] = []
+        for key in sizes:
+            try:
+                last_used.append((os.path.getmtime(self.get_path(key)), key))
+            except OSError:
+                # removed by another worker
+                removed.append(key)
+        total_size: int = sum(sizes[key] for _, key in last_used)
+        for _, key in sorted(last_used):
+            if total_size <= self.max_size_bytes:
+                break
+            total_size -= sizes[key]
+            removed.append(key)
+            for suffix in (self.suffix, *self.companion_suffixes):
+                try:
+                    os.remove(self.get_path(key, suffix=suffix))
+                except OSError:
+                    pass
+        return removed
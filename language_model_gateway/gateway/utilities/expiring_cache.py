@@ -32,6 +32,10 @@ class ExpiringCache[T]:
             return self._cache
         return None
 
+    async def get_stale(self) -> Optional[T]:
+        """Returns the last value set even if it has expired"""
+        return self._cache
+
     async def set(self, value: T) -> None:
         async with self._lock:
             self._cache = value
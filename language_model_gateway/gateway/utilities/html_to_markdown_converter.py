@@ -5,13 +5,18 @@ from markdownify import MarkdownConverter
 
 
 class HtmlToMarkdownConverter:
+    """
+    Converts HTML to Markdown or plain text.  The conversion is CPU-bound so the tools run the
+    synchronous methods in the ParserPool.
+    """
+
     @staticmethod
-    async def get_markdown_from_html_async(*, html_content: str) -> str:
+    def get_markdown_from_html(html_content: str) -> str:
         soup = BeautifulSoup(html_content, "html.parser")
         return cast(str, MarkdownConverter().convert_soup(soup))
 
     @staticmethod
-    async def get_plain_text_from_html_async(*, html_content: str) -> str:
+    def get_plain_text_from_html(html_content: str) -> str:
         soup = BeautifulSoup(html_content, "html.parser")
 
         # Remove script and style elements
@@ -0,0 +1,90 @@
+import time
+from typing import AsyncIterable, Dict, Optional
+
+from language_model_gateway.gateway.metrics.gateway_metrics import (
+    INTER_TOKEN_LATENCY_SECONDS,
+    REQUEST_DURATION_SECONDS,
+    TIME_TO_FIRST_TOKEN_SECONDS,
+)
+from language_model_gateway.gateway.utilities.closing_async_iterator import (
+    ClosingAsyncIterator,
+)
+from language_model_gateway.gateway.utilities.request_timings import RequestTimings
+
+Chunk = str | bytes | memoryview
+
+
+class MeasuredAsyncIterator(ClosingAsyncIterator[Chunk]):
+    """
+    Iterates a streaming response body and records the time to the first chunk, the average time
+    between chunks and the duration of the stream once it ends.  Only the clock is read per chunk.
+
+    If there are phase timings they are sent in an SSE comment after the last chunk and emitted
+    as spans.
+    """
+
+    def __init__(
+        self,
+        *,
+        iterable: AsyncIterable[Chunk],
+        model: str,
+        provider: str,
+        started_at: float,
+        timings: Optional[RequestTimings] = None,
+        span_attributes: Optional[Dict[str, str]] = None,
+    ) -> None:
+        """
+        Initialize the iterator
+
+        Args:
+            iterable: body of the response
+            model: name of the model (for metrics)
+            provider: provider of the model (for metrics)
+            started_at: time.monotonic() when the request was received
+            timings: phase timings of the request
+            span_attributes: attributes of the spans of the phases
+        """
+        super().__init__(iterable=iterable)
+        self.model: str = model
+        self.provider: str = provider
+        self.started_at: float = started_at
+        self.timings: Optional[RequestTimings] = timings
+        self.span_attributes: Dict[str, str] = span_attributes or {}
+        self._first_chunk_at: Optional[float] = None
+        self._last_chunk_at: float = started_at
+        self._chunk_count: int = 0
+        self._completed: bool = False
+        self._timings_sent: bool = False
+
+    async def __anext__(self) -> Chunk:
+        try:
+            chunk: Chunk = await super().__anext__()
+        except StopAsyncIteration:
+            if self._completed and self.timings is not None and not self._timings_sent:
+                self._timings_sent = True
+                return self.timings.get_server_sent_event_comment()
+            raise
+        self._last_chunk_at = time.monotonic()
+        if self._first_chunk_at is None:
+            self._first_chunk_at = self._last_chunk_at
+        self._chunk_count += 1
+        return chunk
+
+    async def on_close_async(self, *, completed: bool) -> None:
+        self._completed = completed
+        if self._first_chunk_at is not None:
+            TIME_TO_FIRST_TOKEN_SECONDS.labels(
+                model=self.model, provider=self.provider
+            ).observe(self._first_chunk_at - self.started_at)
+            if self._chunk_count > 1:
+                INTER_TOKEN_LATENCY_SECONDS.labels(
+                    model=self.model, provider=self.provider
+                ).observe(
+                    (self._last_chunk_at - self._first_chunk_at)
+                    / (self._chunk_count - 1)
+                )
+        REQUEST_DURATION_SECONDS.labels(
+            model=self.model, provider=self.provider, stream="true"
+        ).observe(time.monotonic() - self.started_at)
+        if self.timings is not None:
+            self.timings.emit_spans(attributes=self.span_attributes)
@@ -0,0 +1,172 @@
+import asyncio
+import dataclasses
+import logging
+import math
+from collections import deque
+from typing import Awaitable, Callable, Deque, List, Optional, Tuple
+
+from language_model_gateway.gateway.utilities.parser_pool import ParserPool
+from language_model_gateway.gateway.utilities.pdf_text_extractor import (
+    PdfTextExtractor,
+)
+
+logger = logging.getLogger(__name__)
+
+
+@dataclasses.dataclass
+class PdfTextExtractionResult:
+    text: str
+    total_pages: int
+    start_page: int
+    # last page whose text was extracted.  Before the requested end page if max_characters was reached.
+    end_page: int
+    truncated: bool = False
+
+
+class ParallelPdfTextExtractor:
+    """
+    Extracts the text of a PDF by splitting its pages into ranges of pages_per_job pages and
+    extracting the ranges concurrently in the ParserPool.
+
+    Ranges are collected in page order so progress can be reported as pages complete and the
+    extraction stops early once max_characters of text have been gathered.  At most as many
+    ranges as the pool has workers are submitted at a time so one large PDF does not fill the
+    queue of the pool.
+
+    Every job is sent the whole PDF and reads its cross-reference table before it extracts its
+    pages, so that cost is paid once per job.  The pages of a large PDF are therefore split into
+    at most jobs_per_worker jobs per worker of the pool, each with more than pages_per_job pages.
+    """
+
+    def __init__(
+        self,
+        *,
+        parser_pool: ParserPool,
+        pages_per_job: int = 10,
+        jobs_per_worker: int = 4,
+    ) -> None:
+        """
+        Initialize the extractor
+
+        Args:
+            parser_pool: pool the pages are parsed in
+            pages_per_job: minimum number of pages extracted by each job
+            jobs_per_worker: maximum number of jobs per worker of the pool.  More jobs report
+                progress and stop at max_characters sooner but each one parses the PDF again.
+        """
+        self.parser_pool: ParserPool = parser_pool
+        assert self.parser_pool is not None
+        assert isinstance(self.parser_pool, ParserPool)
+        assert pages_per_job > 0
+        self.pages_per_job: int = pages_per_job
+        assert jobs_per_worker > 0
+        self.jobs_per_worker: int = jobs_per_worker
+
+    def get_page_ranges(
+        self, *, start_page: int, end_page: int
+    ) -> List[Tuple[int, int]]:
+        """
+        Splits the pages into the ranges extracted by each job
+
+        :param start_page: first page (0-indexed)
+        :param end_page: last page (0-indexed, inclusive)
+        :return: list of (first page, last page) of each job
+        """
+        pages_per_job: int = max(
+            self.pages_per_job,
+            math.ceil(
+                (end_page - start_page + 1)
+                / (self.parser_pool.max_workers * self.jobs_per_worker)
+            ),
+        )
+        return [
+            (first, min(first + pages_per_job - 1, end_page))
+            for first in range(start_page, end_page + 1, pages_per_job)
+        ]
+
+    async def extract_text_async(
+        self,
+        *,
+        pdf_bytes: bytes,
+        total_pages: int,
+        start_page: Optional[int] = None,
+        end_page: Optional[int] = None,
+        max_characters: Optional[int] = None,
+        fn_progress: Optional[Callable[[int, int], Awaitable[None]]] = None,
+    ) -> PdfTextExtractionResult:
+        """
+        Extracts the text of the pages from start_page to end_page
+
+        :param pdf_bytes: PDF content
+        :param total_pages: number of pages of the PDF
+        :param start_page: first page (0-indexed).  Defaults to the first page.
+        :param end_page: last page (0-indexed, inclusive).  Defaults to the last page.
+        :param max_characters: stop once this much text has been extracted
+        :param fn_progress: called with the first and last page of each range as it completes
+        :return: extracted text
+        :raises ValueError: if the page range is not in the PDF
+        """
+        start: int = start_page if start_page is not None else 0
+        end: int = end_page if end_page is not None else total_pages - 1
+        if start < 0 or end >= total_pages or start > end:
+            raise ValueError(f"Invalid page range. Total pages: {total_pages}")
+
+        page_ranges: Deque[Tuple[int, int]] = deque(
+            self.get_page_ranges(start_page=start, end_page=end)
+        )
+        running: Deque[Tuple[Tuple[int, int], asyncio.Task[List[str]]]] = deque()
+
+        def submit() -> None:
+            first, last = page_ranges.popleft()
+            running.append(
+                (
+                    (first, last),
+                    asyncio.create_task(
+                        self.parser_pool.run_async(
+                            PdfTextExtractor.extract_pages, pdf_bytes, first, last
+                        )
+                    ),
+                )
+            )
+
+        page_texts: List[str] = []
+        characters: int = 0
+        last_page: int = start - 1
+        try:
+            while page_ranges and len(running) < self.parser_pool.max_workers:
+                submit()
+            while running:
+                (first, last), task = running.popleft()
+                range_texts: List[str] = await task
+                page_texts.extend(range_texts)
+                characters += sum(len(page_text) + 1 for page_text in range_texts)
+                last_page = last
+                if fn_progress is not None:
+                    await fn_progress(first, last)
+                if max_characters is not None and characters >= max_characters:
+                    break
+                if page_ranges:
+                    submit()
+        finally:
+            # ranges past the budget or left over after an error are not needed
+            for _, task in running:
+                task.cancel()
+            if running:
+                await asyncio.gather(
+                    *[task for _, task in running], return_exceptions=True
+                )
+
+        # joined once at the end since concatenating page by page copies the text every page
+        text: str = "".join(page_text + "\n" for page_text in page_texts)
+        truncated: bool = max_characters is not None and (
+            len(text) > max_characters or last_page < end
+        )
+        if max_characters is not None and len(text) > max_characters:
+            text = text[:max_characters]
+        return PdfTextExtractionResult(
+            text=text,
+            total_pages=total_pages,
+            start_page=start,
+            end_page=last_page,
+            truncated=truncated,
+        )
@@ -0,0 +1,197 @@
+import asyncio
+import functools
+import logging
+import multiprocessing
+import signal
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing.process import BaseProcess
+from types import FrameType
+from typing import Any, Callable, List, Literal, Optional, TypeVar
+
+from language_model_gateway.gateway.metrics.gateway_metrics import PARSER_POOL_JOBS
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class ParserPoolFullError(Exception):
+    """Raised when a parsing job is submitted while the pool and its queue are full"""
+
+
+def _initialize_worker(max_memory_bytes: Optional[int]) -> None:
+    """Runs in each worker process before it takes any jobs"""
+    # the parent handles Ctrl+C and shuts the pool down
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if max_memory_bytes:
+        import resource
+
+        # allocations past the cap raise MemoryError in the job instead of growing the worker
+        resource.setrlimit(resource.RLIMIT_AS, (max_memory_bytes, max_memory_bytes))
+
+
+def _raise_timeout(signal_number: int, frame: Optional[FrameType]) -> None:
+    raise TimeoutError("Parsing job took too long")
+
+
+def _run_job(timeout_seconds: Optional[float], fn: Callable[..., T], *args: Any) -> T:
+    """Runs fn in a worker process and interrupts it with SIGALRM after timeout_seconds"""
+    if timeout_seconds:
+        signal.signal(signal.SIGALRM, _raise_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout_seconds)
+    try:
+        return fn(*args)
+    finally:
+        if timeout_seconds:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+
+
+class ParserPool:
+    """
+    Runs CPU-heavy parsing (HTML to Markdown, PDF text extraction) outside the event loop so a
+    large document does not hold up the other streams of the worker.
+
+    Jobs run in a process pool by default.  Worker processes have a memory cap and a job that runs
+    past its timeout is interrupted inside the worker.  A thread pool can be used instead for parsers
+    that release the GIL; it has no memory cap and the result of a timed out job is discarded while
+    it keeps running in its thread.
+    Only max_workers + max_queue_size jobs can be submitted at a time and more are rejected.
+
+    The pool is created on first use and shut down in the app lifespan.
+    """
+
+    def __init__(
+        self,
+        *,
+        pool_type: Literal["process", "thread"] = "process",
+        max_workers: int = 2,
+        max_queue_size: int = 20,
+        timeout_seconds: float = 60,
+        max_memory_bytes: Optional[int] = None,
+    ) -> None:
+        """
+        Initialize the pool
+
+        Args:
+            pool_type: whether jobs run in worker processes or threads
+            max_workers: number of worker processes or threads
+            max_queue_size: number of jobs that can wait for a worker
+            timeout_seconds: maximum time a job can run for
+            max_memory_bytes: maximum address space of a worker process
+        """
+        assert pool_type in ("process", "thread")
+        assert max_workers > 0
+        assert max_queue_size >= 0
+        assert timeout_seconds > 0
+        self.pool_type: Literal["process", "thread"] = pool_type
+        self.max_workers: int = max_workers
+        self.max_queue_size: int = max_queue_size
+        self.timeout_seconds: float = timeout_seconds
+        self.max_memory_bytes: Optional[int] = max_memory_bytes
+        self._executor: Optional[Executor] = None
+        # jobs submitted and not finished.  Only accessed from the event loop.
+        self._jobs: int = 0
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.pool_type == "process":
+                # spawned rather than forked so the workers do not inherit the event loop and threads
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_initialize_worker,
+                    initargs=(self.max_memory_bytes,),
+                )
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="parser_pool"
+                )
+        return self._executor
+
+    def _replace_executor(self) -> None:
+        """
+        Starts a new pool for later jobs.  The worker processes of the old pool are killed
+        since a job stuck in native code would otherwise keep its worker running.
+        """
+        if self._executor is not None:
+            processes: List[BaseProcess] = (
+                list((self._executor._processes or {}).values())
+                if isinstance(self._executor, ProcessPoolExecutor)
+                else []
+            )
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            for process in processes:
+                if process.is_alive():
+                    process.kill()
+
+    async def run_async(self, fn: Callable[..., T], *args: Any) -> T:
+        """
+        Runs fn(*args) in the pool.  fn and its arguments and result are pickled when using
+        processes so fn must be a module level function or static method.
+
+        :param fn: parsing function
+        :param args: arguments of fn
+        :return: result of fn
+        :raises ParserPoolFullError: if the pool and its queue are full
+        :raises TimeoutError: if the job ran for longer than timeout_seconds
+        """
+        if self._jobs >= self.max_workers + self.max_queue_size:
+            PARSER_POOL_JOBS.labels(result="rejected").inc()
+            raise ParserPoolFullError(
+                f"Parser pool is full with {self._jobs} jobs so not parsing the document"
+            )
+        use_processes: bool = self.pool_type == "process"
+        executor: Executor = self._get_executor()
+        # each job ahead of this one runs for at most timeout_seconds
+        rounds: int = self._jobs // self.max_workers + 1
+        self._jobs += 1
+        try:
+            future: asyncio.Future[T] = asyncio.get_running_loop().run_in_executor(
+                executor,
+                functools.partial(
+                    _run_job, self.timeout_seconds if use_processes else None, fn, *args
+                ),
+            )
+            # a worker process interrupts the job itself so this deadline is only reached
+            # by jobs stuck in native code or running in threads
+            done, _ = await asyncio.wait(
+                {future},
+                timeout=self.timeout_seconds * rounds + (5 if use_processes else 0),
+            )
+            if not done:
+                future.cancel()
+                PARSER_POOL_JOBS.labels(result="timeout").inc()
+                if use_processes and self._executor is executor:
+                    # the job is stuck in native code so later jobs get new workers
+                    logger.warning(
+                        "Parsing job did not stop at its timeout so replacing the pool"
+                    )
+                    self._replace_executor()
+                raise TimeoutError("Parsing job took too long")
+            result: T = future.result()
+            PARSER_POOL_JOBS.labels(result="success").inc()
+            return result
+        except TimeoutError:
+            if future.done() and not future.cancelled():
+                # interrupted in the worker
+                PARSER_POOL_JOBS.labels(result="timeout").inc()
+            raise
+        except BrokenProcessPool:
+            # a worker died e.g. it was killed by the kernel for using too much memory
+            PARSER_POOL_JOBS.labels(result="error").inc()
+            if self._executor is executor:
+                self._replace_executor()
+            raise
+        except Exception:
+            PARSER_POOL_JOBS.labels(result="error").inc()
+            raise
+        finally:
+            self._jobs -= 1
+
+    def shutdown(self) -> None:
+        """Stops the workers.  Jobs that have not started are cancelled."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
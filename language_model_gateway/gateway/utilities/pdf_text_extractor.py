@@ -0,0 +1,60 @@
+import io
+import logging
+from typing import List
+
+import pypdf
+from pypdf import PageObject
+
+logger = logging.getLogger(__name__)
+
+
+class PdfTextExtractor:
+    """
+    Extracts text from PDFs with PyPDF.  Parsing is CPU-bound so the tools run these methods in
+    the ParserPool, which only sends the PDF bytes to the worker and the text back.
+    """
+
+    @staticmethod
+    def get_page_count(pdf_bytes: bytes) -> int:
+        """Returns the number of pages of the PDF"""
+        return len(pypdf.PdfReader(io.BytesIO(pdf_bytes)).pages)
+
+    @staticmethod
+    def extract_pages(pdf_bytes: bytes, start_page: int, end_page: int) -> List[str]:
+        """
+        Extract the text of each page using PyPDF with multiple extraction methods
+
+        Args:
+            pdf_bytes (bytes): PDF content
+            start_page (int): Starting page (0-indexed)
+            end_page (int): Ending page (0-indexed, inclusive)
+
+        Returns:
+            List[str]: Text of each page from start_page to end_page
+        """
+        pdf_reader = pypdf.PdfReader(io.BytesIO(pdf_bytes))
+        total_pages = len(pdf_reader.pages)
+
+        # Validate page range
+        if start_page < 0 or end_page >= total_pages or start_page > end_page:
+            raise ValueError(f"Invalid page range. Total pages: {total_pages}")
+
+        page_texts: List[str] = []
+        for page_num in range(start_page, end_page + 1):
+            page: PageObject = pdf_reader.pages[page_num]
+            try:
+                # Primary method: extract_text()
+                page_text: str = page.extract_text()
+
+                # Fallback: alternative extraction methods
+                if not page_text:
+                    page_text = page.extract_text(extraction_mode="layout")
+            except Exception as extract_error:
+                logger.warning(
+                    f"Text extraction failed for page {page_num}: {extract_error}"
+                )
+                page_text = ""
+
+            page_texts.append(page_text)
+
+        return page_texts
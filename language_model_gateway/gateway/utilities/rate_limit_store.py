@@ -0,0 +1,71 @@
+import time
+from abc import ABC, abstractmethod
+from typing import Tuple
+
+from cachetools import LRUCache
+
+
+class RateLimitStore(ABC):
+    """
+    Store for token buckets.  Implement this to share the buckets between workers
+    (e.g. in Redis with a script that does the same update atomically).
+    """
+
+    @abstractmethod
+    async def consume_async(
+        self,
+        *,
+        key: str,
+        amount: float,
+        capacity: float,
+        refill_per_second: float,
+        allow_debt: bool,
+    ) -> float:
+        """
+        Refills the bucket for the time since it was last used and then takes amount from it
+
+        :param key: key of the bucket
+        :param amount: number of tokens to take
+        :param capacity: maximum number of tokens in the bucket.  A new bucket starts full.
+        :param refill_per_second: number of tokens added per second
+        :param allow_debt: take the tokens even if the bucket doesn't have enough (used to charge
+                           for usage that is only known after the response)
+        :return: 0 if the tokens were taken, otherwise the seconds until the bucket has enough tokens
+        """
+        ...
+
+
+class InMemoryRateLimitStore(RateLimitStore):
+    """Token buckets of this worker.  The least recently used buckets are dropped first."""
+
+    def __init__(self, *, max_size: int) -> None:
+        """
+        Initialize the in-memory store
+
+        Args:
+            max_size: Maximum number of buckets to keep
+        """
+        assert max_size > 0
+        # key => (tokens, last update).  Only accessed from the event loop without awaiting
+        # in between so no lock is needed.
+        self._buckets: LRUCache[str, Tuple[float, float]] = LRUCache(maxsize=max_size)
+
+    async def consume_async(
+        self,
+        *,
+        key: str,
+        amount: float,
+        capacity: float,
+        refill_per_second: float,
+        allow_debt: bool,
+    ) -> float:
+        now: float = time.monotonic()
+        tokens: float
+        updated_at: float
+        tokens, updated_at = self._buckets.get(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated_at) * refill_per_second)
+        if allow_debt or tokens >= amount:
+            self._buckets[key] = (tokens - amount, now)
+            return 0
+        self._buckets[key] = (tokens, now)
+        return (amount - tokens) / refill_per_second
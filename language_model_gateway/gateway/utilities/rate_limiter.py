@@ -0,0 +1,97 @@
+import logging
+from typing import Optional
+
+from language_model_gateway.gateway.metrics.gateway_metrics import (
+    RATE_LIMITED_REQUESTS,
+)
+from language_model_gateway.gateway.utilities.rate_limit_store import (
+    RateLimitStore,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimiter:
+    """
+    Per-tenant requests-per-minute and tokens-per-minute budgets kept in token buckets.
+
+    A request is admitted if the tenant has a request token left and its token budget is not
+    overdrawn.  The tokens a response actually used are charged after it has been sent so the
+    token budget can go negative, which blocks the tenant until it has refilled.
+    """
+
+    def __init__(
+        self,
+        *,
+        store: RateLimitStore,
+        requests_per_minute: Optional[int] = None,
+        tokens_per_minute: Optional[int] = None,
+    ) -> None:
+        """
+        Initialize the rate limiter
+
+        Args:
+            store: store for the token buckets.  Pass a shared store to apply the budgets across workers.
+            requests_per_minute: requests budget per tenant or None for no limit
+            tokens_per_minute: tokens budget per tenant or None for no limit
+        """
+        self.store: RateLimitStore = store
+        assert self.store is not None
+        assert isinstance(self.store, RateLimitStore)
+        self.requests_per_minute: Optional[int] = requests_per_minute
+        self.tokens_per_minute: Optional[int] = tokens_per_minute
+
+    @property
+    def enabled(self) -> bool:
+        return (
+            self.requests_per_minute is not None or self.tokens_per_minute is not None
+        )
+
+    async def check_request_async(self, *, key: str) -> float:
+        """
+        Admits a request of the tenant
+
+        :param key: tenant
+        :return: 0 if the request is admitted, otherwise the seconds until it can be retried
+        """
+        if self.tokens_per_minute is not None:
+            retry_after_seconds: float = await self.store.consume_async(
+                key=f"tpm:{key}",
+                amount=0,
+                capacity=self.tokens_per_minute,
+                refill_per_second=self.tokens_per_minute / 60,
+                allow_debt=False,
+            )
+            if retry_after_seconds > 0:
+                RATE_LIMITED_REQUESTS.labels(limit="tokens_per_minute").inc()
+                return retry_after_seconds
+        if self.requests_per_minute is not None:
+            retry_after_seconds = await self.store.consume_async(
+                key=f"rpm:{key}",
+                amount=1,
+                capacity=self.requests_per_minute,
+                refill_per_second=self.requests_per_minute / 60,
+                allow_debt=False,
+            )
+            if retry_after_seconds > 0:
+                RATE_LIMITED_REQUESTS.labels(limit="requests_per_minute").inc()
+                return retry_after_seconds
+        return 0
+
+    async def charge_tokens_async(self, *, key: str, tokens: int) -> None:
+        """
+        Charges the tokens used by a response to the tenant
+
+        :param key: tenant
+        :param tokens: total tokens of the response
+        """
+        if self.tokens_per_minute is None or tokens <= 0:
+            return
+        await self.store.consume_async(
+            key=f"tpm:{key}",
+            amount=tokens,
+            capacity=self.tokens_per_minute,
+            refill_per_second=self.tokens_per_minute / 60,
+            allow_debt=True,
+        )
+        logger.debug(f"Charged {tokens} tokens to {key}")
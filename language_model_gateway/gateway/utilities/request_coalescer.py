@@ -0,0 +1,294 @@
+import asyncio
+import copy
+import logging
+import time
+from typing import (
+    AsyncGenerator,
+    AsyncIterable,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+)
+from uuid import UUID, uuid4
+
+from starlette.responses import JSONResponse, StreamingResponse
+
+from language_model_gateway.gateway.http.cancellable_streaming_response import (
+    CancellableStreamingResponse,
+)
+from language_model_gateway.gateway.metrics.gateway_metrics import COALESCED_REQUESTS
+from language_model_gateway.gateway.utilities.closing_async_iterator import (
+    ClosingAsyncIterator,
+)
+
+logger = logging.getLogger(__name__)
+
+Chunk = str | bytes | memoryview
+
+
+class InFlightStream:
+    """
+    Streaming response shared by identical requests.
+
+    One task reads the upstream stream into a buffer and each subscriber gets the buffered prefix
+    followed by the live tail.  The upstream stream is cancelled once every subscriber has gone.
+
+    New subscribers are only accepted until max_buffer_bytes of the stream have been buffered.
+    After that the chunks every subscriber has read are dropped so a long stream is not kept in memory.
+    """
+
+    def __init__(
+        self,
+        *,
+        response: StreamingResponse,
+        on_done: Callable[[], None],
+        max_buffer_bytes: int,
+    ) -> None:
+        """
+        Initialize the shared stream and start reading the upstream stream
+
+        Args:
+            response: response of the first request
+            on_done: called once the upstream stream has finished, failed or been cancelled
+            max_buffer_bytes: size of the stream after which new subscribers are not accepted
+        """
+        assert max_buffer_bytes >= 0
+        self.status_code: int = response.status_code
+        self.media_type: Optional[str] = response.media_type
+        self.headers: Dict[str, str] = {
+            key: value
+            for key, value in response.headers.items()
+            if key.lower() != "content-length"
+        }
+        self._chunks: List[Chunk] = []
+        # number of chunks dropped from the start of the buffer
+        self._offset: int = 0
+        # size of all the chunks read so far including the dropped ones
+        self._buffered_bytes: int = 0
+        self._max_buffer_bytes: int = max_buffer_bytes
+        # position in the whole stream (including the dropped chunks) of each subscriber.
+        # A subscriber is added when its response is created so the chunks it needs are kept
+        # until it starts.
+        self._positions: Dict[int, int] = {}
+        self._done: bool = False
+        self._error: Optional[BaseException] = None
+        self._condition: asyncio.Condition = asyncio.Condition()
+        self._on_done: Callable[[], None] = on_done
+        self._task: asyncio.Task[None] = asyncio.create_task(
+            self._read_async(body_iterator=response.body_iterator)
+        )
+
+    async def _read_async(self, *, body_iterator: AsyncIterable[Chunk]) -> None:
+        try:
+            async for chunk in body_iterator:
+                async with self._condition:
+                    self._chunks.append(chunk)
+                    self._buffered_bytes += len(chunk)
+                    self._condition.notify_all()
+        except Exception as e:
+            self._error = e
+        finally:
+            aclose = getattr(body_iterator, "aclose", None)
+            if aclose is not None:
+                await aclose()
+            self._done = True
+            self._on_done()
+            async with self._condition:
+                self._condition.notify_all()
+
+    @property
+    def accepts_subscribers(self) -> bool:
+        """Whether the buffered prefix is still small enough for a new subscriber to join"""
+        return self._buffered_bytes <= self._max_buffer_bytes
+
+    async def iterate_async(self, *, subscriber: int) -> AsyncGenerator[Chunk, None]:
+        """Yields the buffered chunks and then the new chunks as they arrive"""
+        position: int = self._positions[subscriber]
+        while True:
+            async with self._condition:
+                await self._condition.wait_for(
+                    lambda: position < self._offset + len(self._chunks) or self._done
+                )
+                chunks: List[Chunk] = self._chunks[position - self._offset :]
+                done: bool = self._done
+            for chunk in chunks:
+                yield chunk
+            position += len(chunks)
+            self._positions[subscriber] = position
+            self._drop_read_chunks()
+            if done and position >= self._offset + len(self._chunks):
+                if self._error is not None:
+                    raise self._error
+                return
+
+    def unsubscribe(self, *, subscriber: int) -> None:
+        """Removes a subscriber and cancels the upstream stream once every subscriber has gone"""
+        self._positions.pop(subscriber, None)
+        self._drop_read_chunks()
+        if not self._positions and not self._done:
+            logger.info(
+                "All subscribers of the shared stream have gone so cancelling it"
+            )
+            self._task.cancel()
+
+    def _drop_read_chunks(self) -> None:
+        """Drops the chunks that every subscriber has read once no new subscriber can join"""
+        if self.accepts_subscribers or not self._positions:
+            return
+        count: int = min(self._positions.values()) - self._offset
+        if count > 0:
+            del self._chunks[:count]
+            self._offset += count
+
+    def create_response(self) -> StreamingResponse:
+        """Returns a new response for a subscriber"""
+        subscriber: int = id(object())
+        # starts at the first chunk that has not been dropped
+        self._positions[subscriber] = self._offset
+        return CancellableStreamingResponse(
+            content=InFlightStreamSubscription(stream=self, subscriber=subscriber),
+            status_code=self.status_code,
+            headers=self.headers,
+            media_type=self.media_type,
+        )
+
+
+class InFlightStreamSubscription(ClosingAsyncIterator[Chunk]):
+    """Body of the response of one subscriber of an InFlightStream"""
+
+    def __init__(self, *, stream: InFlightStream, subscriber: int) -> None:
+        super().__init__(iterable=stream.iterate_async(subscriber=subscriber))
+        self._stream: InFlightStream = stream
+        self._subscriber: int = subscriber
+
+    async def on_close_async(self, *, completed: bool) -> None:
+        # also when the response is closed before it was started
+        self._stream.unsubscribe(subscriber=self._subscriber)
+
+
+class RequestCoalescer:
+    """
+    Single-flight layer that attaches identical concurrent requests to one upstream call.
+
+    Requests only join a call that started at most max_wait_seconds ago and a non-streaming request
+    stops waiting once the call has been running for max_wait_seconds and makes its own call instead.
+    A streaming request does not join a stream once more than max_buffer_bytes of it have been sent.
+    """
+
+    def __init__(self) -> None:
+        # key => (start time, result of the call or None if the call was cancelled).
+        # Only accessed from the event loop.
+        self._in_flight: Dict[
+            str,
+            Tuple[float, asyncio.Future[Optional[JSONResponse | InFlightStream]]],
+        ] = {}
+        self._identifier: UUID = uuid4()
+
+    async def run_async(
+        self,
+        *,
+        key: str,
+        model: str,
+        max_wait_seconds: float,
+        fn: Callable[[], Awaitable[StreamingResponse | JSONResponse]],
+        max_buffer_bytes: int = 1024 * 1024,
+    ) -> StreamingResponse | JSONResponse:
+        """
+        Returns the response of fn, sharing it with identical requests that are in flight
+
+        :param key: key that is the same for identical requests
+        :param model: name of the model (for metrics)
+        :param max_wait_seconds: how long after a call started requests can still join it
+        :param fn: makes the upstream call
+        :param max_buffer_bytes: size of a shared stream after which requests stop joining it
+        :return: response
+        """
+        entry: Optional[
+            Tuple[float, asyncio.Future[Optional[JSONResponse | InFlightStream]]]
+        ] = self._in_flight.get(key)
+        if entry is not None:
+            started_at, future = entry
+            remaining_seconds: float = max_wait_seconds - (
+                time.monotonic() - started_at
+            )
+            if remaining_seconds > 0:
+                try:
+                    result: Optional[JSONResponse | InFlightStream] = (
+                        await asyncio.wait_for(
+                            asyncio.shield(future), timeout=remaining_seconds
+                        )
+                    )
+                except TimeoutError:
+                    logger.info(
+                        f"RequestCoalescer with id: {self._identifier} gave up waiting for key {key}"
+                    )
+                    return await fn()
+                if result is None:
+                    # the first request was cancelled
+                    return await fn()
+                if (
+                    isinstance(result, InFlightStream)
+                    and not result.accepts_subscribers
+                ):
+                    # too much of the stream would have to be replayed
+                    return await fn()
+                COALESCED_REQUESTS.labels(model=model).inc()
+                return self._create_response(result=result)
+            # too old to join so make a separate call without replacing the one in flight
+            return await fn()
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = (time.monotonic(), future)
+        try:
+            response: StreamingResponse | JSONResponse = await fn()
+        except asyncio.CancelledError:
+            # let the requests that joined make their own call
+            self._remove(key=key, future=future)
+            future.set_result(None)
+            raise
+        except Exception as e:
+            self._remove(key=key, future=future)
+            future.set_exception(e)
+            # mark the exception as retrieved in case no request joined
+            future.exception()
+            raise
+
+        if isinstance(response, StreamingResponse):
+            stream: InFlightStream = InFlightStream(
+                response=response,
+                on_done=lambda: self._remove(key=key, future=future),
+                max_buffer_bytes=max_buffer_bytes,
+            )
+            future.set_result(stream)
+            return stream.create_response()
+
+        self._remove(key=key, future=future)
+        future.set_result(response)
+        return response
+
+    def _remove(
+        self,
+        *,
+        key: str,
+        future: asyncio.Future[Optional[JSONResponse | InFlightStream]],
+    ) -> None:
+        entry: Optional[
+            Tuple[float, asyncio.Future[Optional[JSONResponse | InFlightStream]]]
+        ] = self._in_flight.get(key)
+        if entry is not None and entry[1] is future:
+            del self._in_flight[key]
+
+    @staticmethod
+    def _create_response(
+        *, result: JSONResponse | InFlightStream
+    ) -> StreamingResponse | JSONResponse:
+        if isinstance(result, InFlightStream):
+            return result.create_response()
+        # copy so headers can be set on each response independently
+        response: JSONResponse = copy.copy(result)
+        response.raw_headers = list(result.raw_headers)
+        response.__dict__.pop("_headers", None)
+        return response
@@ -0,0 +1,105 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from opentelemetry import trace
+from opentelemetry.trace import Span, Tracer
+
+# timings of the request being handled.  Set by ChatCompletionManager.
+_current_request_timings: ContextVar[Optional["RequestTimings"]] = ContextVar(
+    "request_timings", default=None
+)
+
+
+class RequestTimings:
+    """
+    Durations of the phases of one request (config load, graph build, model time to first
+    token, tools, serialization...).  They are returned in a Server-Timing header or SSE comment
+    and emitted as OpenTelemetry spans once the request has finished.
+    """
+
+    def __init__(self, *, name: str = "chat_completion") -> None:
+        """
+        Initialize the timings.  The request starts now.
+
+        Args:
+            name: name of the span of the whole request
+        """
+        self.name: str = name
+        self._started_at: float = time.perf_counter()
+        self._started_at_ns: int = time.time_ns()
+        # phase name, start and end (time.perf_counter())
+        self.phases: List[Tuple[str, float, float]] = []
+
+    @staticmethod
+    def get_current() -> Optional["RequestTimings"]:
+        """Returns the timings of the request being handled or None"""
+        return _current_request_timings.get()
+
+    def set_current(self) -> None:
+        """Makes these the timings of the request being handled in this context"""
+        _current_request_timings.set(self)
+
+    def add(self, *, name: str, start: float, end: float) -> None:
+        """
+        Adds a phase
+
+        :param name: name of the phase.  Phases with the same name are summed in the header.
+        :param start: time.perf_counter() at the start of the phase
+        :param end: time.perf_counter() at the end of the phase
+        """
+        self.phases.append((name, start, end))
+
+    @contextmanager
+    def measure(self, name: str) -> Iterator[None]:
+        """Adds a phase for the code in the with block"""
+        start: float = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name=name, start=start, end=time.perf_counter())
+
+    def get_durations_ms(self) -> Dict[str, float]:
+        """Returns the total milliseconds of each phase (in order of first occurrence) and of the request"""
+        durations_ms: Dict[str, float] = {}
+        for name, start, end in self.phases:
+            durations_ms[name] = durations_ms.get(name, 0) + (end - start) * 1000
+        durations_ms["total"] = (time.perf_counter() - self._started_at) * 1000
+        return durations_ms
+
+    def get_server_timing(self) -> str:
+        """Returns the value of the Server-Timing header"""
+        return ", ".join(
+            f"{name};dur={duration_ms:.1f}"
+            for name, duration_ms in self.get_durations_ms().items()
+        )
+
+    def get_server_sent_event_comment(self) -> str:
+        """Returns an SSE comment with the timings that clients ignore"""
+        return f": server-timing {self.get_server_timing()}\n\n"
+
+    def _to_ns(self, perf_counter_time: float) -> int:
+        return self._started_at_ns + int(
+            (perf_counter_time - self._started_at) * 1_000_000_000
+        )
+
+    def emit_spans(
+        self, *, tracer: Optional[Tracer] = None, attributes: Dict[str, str]
+    ) -> None:
+        """
+        Emits a span for the request with a child span for each phase
+
+        :param tracer: tracer to use.  Defaults to the tracer of the global tracer provider.
+        :param attributes: attributes of the request span
+        """
+        tracer = tracer or trace.get_tracer(__name__)
+        root: Span = tracer.start_span(
+            self.name, start_time=self._started_at_ns, attributes=attributes
+        )
+        context = trace.set_span_in_context(root)
+        for name, start, end in self.phases:
+            tracer.start_span(name, context=context, start_time=self._to_ns(start)).end(
+                end_time=self._to_ns(end)
+            )
+        root.end(end_time=self._to_ns(time.perf_counter()))
@@ -0,0 +1,144 @@
+import hashlib
+import json
+import logging
+from typing import Any, Dict, Optional
+from uuid import UUID, uuid4
+
+from language_model_gateway.configs.config_schema import ChatModelConfig
+from language_model_gateway.gateway.schema.openai.completions import ChatRequest
+from language_model_gateway.gateway.utilities.response_cache_backend import (
+    InMemoryResponseCacheBackend,
+    ResponseCacheBackend,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """
+    Cache of serialized ChatCompletion responses keyed by a canonical hash of the request.
+
+    Entries are kept in an in-process LRU and, if a shared backend is passed, also in the shared
+    backend so other workers can use them.
+
+    The key includes the identity of the caller (the user field of the request and the forwarded
+    authorization and OpenWebUI user headers) since the tools of an agent can act with the
+    caller's token, so a response is only reused for the same caller.
+    """
+
+    # request fields that don't change the completion
+    _ignored_request_fields: frozenset[str] = frozenset(
+        ["stream", "stream_options", "metadata"]
+    )
+    # forwarded headers that identify the caller
+    _caller_headers: tuple[str, ...] = (
+        "authorization",
+        "x-openwebui-user-id",
+        "x-openwebui-user-email",
+    )
+
+    def __init__(
+        self,
+        *,
+        local_backend: InMemoryResponseCacheBackend,
+        shared_backend: Optional[ResponseCacheBackend] = None,
+    ) -> None:
+        """
+        Initialize the response cache
+
+        Args:
+            local_backend: in-process cache that is checked first
+            shared_backend: optional cache shared by workers that is checked on a local miss
+        """
+        self._local_backend: InMemoryResponseCacheBackend = local_backend
+        assert self._local_backend is not None
+        self._shared_backend: Optional[ResponseCacheBackend] = shared_backend
+        self._identifier: UUID = uuid4()
+
+    @classmethod
+    def get_key(
+        cls,
+        *,
+        model_config: ChatModelConfig,
+        chat_request: ChatRequest,
+        headers: Dict[str, str],
+    ) -> str:
+        """
+        Returns a canonical hash of the model name, model configuration (so any change to the
+        configuration invalidates the cached responses), messages, response format, tools and
+        sampling parameters of the request and the caller
+
+        :param model_config: model configuration
+        :param chat_request: chat request
+        :param headers: headers of the request
+        :return: hex digest to use as cache key
+        """
+        key_data: Dict[str, Any] = {
+            "caller": cls.get_caller(headers=headers),
+            "model": model_config.name,
+            "model_config": model_config.model_dump(mode="json"),
+            "request": {
+                key: value
+                for key, value in chat_request.items()
+                if key not in cls._ignored_request_fields
+            },
+        }
+        return hashlib.sha256(
+            json.dumps(key_data, sort_keys=True, default=str).encode("utf-8")
+        ).hexdigest()
+
+    @classmethod
+    def get_caller(cls, *, headers: Dict[str, str]) -> str:
+        """
+        Returns a hash of the forwarded headers that identify the caller so other caches can be
+        scoped to the caller too
+
+        :param headers: headers of the request
+        :return: hex digest
+        """
+        lower_case_headers: Dict[str, str] = {
+            key.lower(): value for key, value in headers.items()
+        }
+        return hashlib.sha256(
+            json.dumps(
+                [lower_case_headers.get(header) for header in cls._caller_headers]
+            ).encode("utf-8")
+        ).hexdigest()
+
+    async def get_async(self, *, key: str, ttl_seconds: float) -> Optional[bytes]:
+        """
+        Returns the cached response for the key
+
+        :param key: cache key
+        :param ttl_seconds: how long to keep the response locally if it is found in the shared backend
+        :return: serialized ChatCompletion or None if not cached
+        """
+        value: Optional[bytes] = await self._local_backend.get(key=key)
+        if value is None and self._shared_backend is not None:
+            value = await self._shared_backend.get(key=key)
+            if value is not None:
+                await self._local_backend.set(
+                    key=key, value=value, ttl_seconds=ttl_seconds
+                )
+        return value
+
+    async def set_async(self, *, key: str, value: bytes, ttl_seconds: float) -> None:
+        """
+        Caches the response for the key
+
+        :param key: cache key
+        :param value: serialized ChatCompletion
+        :param ttl_seconds: how long to keep the response
+        """
+        await self._local_backend.set(key=key, value=value, ttl_seconds=ttl_seconds)
+        if self._shared_backend is not None:
+            await self._shared_backend.set(
+                key=key, value=value, ttl_seconds=ttl_seconds
+            )
+        logger.debug(
+            f"ResponseCache with id: {self._identifier} cached response for key {key}"
+        )
+
+    async def clear(self) -> None:
+        """Clears the in-process cache"""
+        await self._local_backend.clear()
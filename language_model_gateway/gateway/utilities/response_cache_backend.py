@@ -0,0 +1,56 @@
+import time
+from abc import ABC, abstractmethod
+from typing import Optional, Tuple
+
+from cachetools import LRUCache
+
+
+class ResponseCacheBackend(ABC):
+    """
+    Store for cached chat completion responses.  Implement this to share the cache between
+    workers (e.g. in Redis or Memcached).
+    """
+
+    @abstractmethod
+    async def get(self, *, key: str) -> Optional[bytes]:
+        """Returns the value for the key or None if it is missing or expired"""
+        ...
+
+    @abstractmethod
+    async def set(self, *, key: str, value: bytes, ttl_seconds: float) -> None:
+        """Stores the value for the key for ttl_seconds"""
+        ...
+
+
+class InMemoryResponseCacheBackend(ResponseCacheBackend):
+    """
+    Size bounded LRU store with a TTL per entry.  Used as the in-process cache and can stand in
+    for a shared backend when running locally.
+    """
+
+    def __init__(self, *, max_size: int) -> None:
+        """
+        Initialize the in-memory backend
+
+        Args:
+            max_size: Maximum number of entries to keep
+        """
+        assert max_size > 0
+        # only accessed from the event loop without awaiting in between so no lock is needed
+        self._cache: LRUCache[str, Tuple[float, bytes]] = LRUCache(maxsize=max_size)
+
+    async def get(self, *, key: str) -> Optional[bytes]:
+        entry: Optional[Tuple[float, bytes]] = self._cache.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            self._cache.pop(key, None)
+            return None
+        return value
+
+    async def set(self, *, key: str, value: bytes, ttl_seconds: float) -> None:
+        self._cache[key] = (time.monotonic() + ttl_seconds, value)
+
+    async def clear(self) -> None:
+        self._cache.clear()
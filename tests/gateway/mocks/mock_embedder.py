@@ -0,0 +1,24 @@
+import hashlib
+import re
+
+import numpy as np
+import numpy.typing as npt
+
+from language_model_gateway.gateway.semantic_cache.base_embedder import BaseEmbedder
+
+
+class MockEmbedder(BaseEmbedder):
+    """Deterministic bag of words embedder so similar questions get similar embeddings"""
+
+    def __init__(self, *, dimensions: int = 256) -> None:
+        self.dimensions: int = dimensions
+        self.calls: int = 0
+
+    async def embed_async(self, *, text: str) -> npt.NDArray[np.float32]:
+        self.calls += 1
+        vector: npt.NDArray[np.float32] = np.zeros(self.dimensions, dtype=np.float32)
+        for word in re.findall(r"\w+", text.lower()):
+            vector[
+                int(hashlib.md5(word.encode("utf-8")).hexdigest(), 16) % self.dimensions
+            ] += 1
+        return vector
@@ -3,6 +3,9 @@ from typing import Dict, Any
 from starlette.responses import StreamingResponse, JSONResponse
 
 from language_model_gateway.configs.config_schema import ChatModelConfig
+from language_model_gateway.gateway.converters.compiled_graph_cache import (
+    CompiledGraphCache,
+)
 from language_model_gateway.gateway.converters.langgraph_to_openai_converter import (
     LangGraphToOpenAIConverter,
 )
@@ -22,12 +25,14 @@ class MockLangChainChatCompletionsProvider(LangChainCompletionsProvider):
         model_factory: ModelFactory,
         lang_graph_to_open_ai_converter: LangGraphToOpenAIConverter,
         tool_provider: ToolProvider,
+        compiled_graph_cache: CompiledGraphCache,
         fn_get_response: MockChatResponseProtocol,
     ) -> None:
         super().__init__(
             model_factory=model_factory,
             lang_graph_to_open_ai_converter=lang_graph_to_open_ai_converter,
             tool_provider=tool_provider,
+            compiled_graph_cache=compiled_graph_cache,
         )
         self.fn_get_response: MockChatResponseProtocol = fn_get_response
 
@@ -0,0 +1,88 @@
+import asyncio
+import typing
+from typing import Any, AsyncIterator, Callable, List, Optional, Sequence, Union
+
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForLLMRun,
+    CallbackManagerForLLMRun,
+)
+from langchain_core.language_models import BaseChatModel, LanguageModelInput
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.messages.ai import UsageMetadata
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.runnables import Runnable
+from langchain_core.tools import BaseTool
+
+
+class SlowChatModel(BaseChatModel):
+    """Chat model that waits before sending its first token or raises an error"""
+
+    response: str
+    delay_seconds: float = 0
+    error: Optional[Exception] = None
+    calls: List[str]
+    usage_metadata: Optional[UsageMetadata] = None
+
+    @property
+    def _llm_type(self) -> str:
+        return "slow"
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        raise NotImplementedError
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        self.calls.append("started")
+        await asyncio.sleep(self.delay_seconds)
+        if self.error is not None:
+            raise self.error
+        return ChatResult(
+            generations=[ChatGeneration(message=AIMessage(content=self.response))]
+        )
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        self.calls.append("started")
+        try:
+            await asyncio.sleep(self.delay_seconds)
+            if self.error is not None:
+                raise self.error
+            for word in self.response.split():
+                yield ChatGenerationChunk(message=AIMessageChunk(content=word + " "))
+            if self.usage_metadata is not None:
+                yield ChatGenerationChunk(
+                    message=AIMessageChunk(
+                        content="", usage_metadata=self.usage_metadata
+                    )
+                )
+        except asyncio.CancelledError:
+            self.calls.append("cancelled")
+            raise
+
+    def bind_tools(
+        self,
+        tools: Sequence[
+            Union[
+                typing.Dict[str, Any], type, Callable[..., Any], BaseTool
+            ]  # noqa: UP006
+        ],
+        **kwargs: Any,
+    ) -> Runnable[LanguageModelInput, BaseMessage]:
+        # like the provider models the tools are bound as call arguments
+        return self.bind(tools=tools, **kwargs)
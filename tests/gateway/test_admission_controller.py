@@ -0,0 +1,188 @@
+import asyncio
+from typing import List
+
+import httpx
+import pytest
+from starlette.responses import JSONResponse, StreamingResponse
+
+from language_model_gateway.configs.config_schema import (
+    AdmissionControlConfig,
+    ChatModelConfig,
+    ModelConfig,
+    RequestCoalescingConfig,
+)
+from language_model_gateway.container.simple_container import SimpleContainer
+from language_model_gateway.gateway.api_container import get_container_async
+from language_model_gateway.gateway.utilities.admission_controller import (
+    AdmissionController,
+    AdmissionPermit,
+    AdmissionRejectedError,
+)
+from language_model_gateway.gateway.managers.chat_completion_manager import (
+    ChatCompletionManager,
+)
+from language_model_gateway.gateway.models.model_factory import ModelFactory
+from language_model_gateway.gateway.utilities.closing_async_iterator import (
+    ClosingAsyncIterator,
+)
+from language_model_gateway.gateway.utilities.expiring_cache import ExpiringCache
+from tests.gateway.mocks.mock_model_factory import MockModelFactory
+from tests.gateway.mocks.mock_slow_chat_model import SlowChatModel
+
+
+def get_model_config(*, max_queue_size: int) -> ChatModelConfig:
+    return ChatModelConfig(
+        id="admission",
+        name="Admission",
+        description="Admission",
+        type="langchain",
+        model=ModelConfig(
+            provider="bedrock",
+            model="us.anthropic.claude-3-5-haiku-20241022-v1:0",
+        ),
+        admission_control=AdmissionControlConfig(
+            max_concurrency=1, max_queue_size=max_queue_size, max_wait_seconds=0.1
+        ),
+    )
+
+
+async def test_admission_controller_limits_model() -> None:
+    admission_controller = AdmissionController(global_config=None)
+    model_config: ChatModelConfig = get_model_config(max_queue_size=1)
+
+    first: AdmissionPermit = await admission_controller.acquire_async(
+        model_config=model_config
+    )
+    waiting = asyncio.create_task(
+        admission_controller.acquire_async(model_config=model_config)
+    )
+    await asyncio.sleep(0)
+
+    # the queue is full so this is rejected at once
+    with pytest.raises(AdmissionRejectedError) as queue_full:
+        await admission_controller.acquire_async(model_config=model_config)
+    assert queue_full.value.status_code == 429
+    assert queue_full.value.retry_after_seconds == 1
+
+    # the queued request gives up after max_wait_seconds
+    with pytest.raises(AdmissionRejectedError):
+        await waiting
+
+    first.release()
+    # releasing twice has no effect
+    first.release()
+    second: AdmissionPermit = await admission_controller.acquire_async(
+        model_config=model_config
+    )
+    second.release()
+
+
+async def test_admission_controller_limits_worker() -> None:
+    admission_controller = AdmissionController(
+        global_config=AdmissionControlConfig(
+            max_concurrency=1, max_queue_size=0, max_wait_seconds=0.1
+        )
+    )
+    model_config: ChatModelConfig = get_model_config(max_queue_size=1)
+    other_model_config: ChatModelConfig = model_config.model_copy(
+        update={"name": "Other", "admission_control": None}
+    )
+
+    permit: AdmissionPermit = await admission_controller.acquire_async(
+        model_config=other_model_config
+    )
+    with pytest.raises(AdmissionRejectedError) as worker_full:
+        await admission_controller.acquire_async(model_config=model_config)
+    assert worker_full.value.status_code == 503
+
+    permit.release()
+    # the model slot taken before the worker limit was hit was given back
+    permit = await admission_controller.acquire_async(model_config=model_config)
+    permit.release()
+
+
+async def test_chat_completions_rejected_when_model_is_busy(
+    async_client: httpx.AsyncClient,
+) -> None:
+    print("")
+    test_container: SimpleContainer = await get_container_async()
+    model_config: ChatModelConfig = get_model_config(max_queue_size=0)
+    model_configuration_cache: ExpiringCache[List[ChatModelConfig]] = (
+        test_container.resolve(ExpiringCache)
+    )
+    await model_configuration_cache.set([model_config])
+
+    admission_controller: AdmissionController = test_container.resolve(
+        AdmissionController
+    )
+    permit: AdmissionPermit = await admission_controller.acquire_async(
+        model_config=model_config
+    )
+    try:
+        response: httpx.Response = await async_client.post(
+            "/api/v1/chat/completions",
+            json={
+                "model": "Admission",
+                "messages": [{"role": "user", "content": "Hello"}],
+            },
+        )
+    finally:
+        permit.release()
+        # so the following tests read the model configurations again
+        await model_configuration_cache.clear()
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "1"
+    assert response.json()["error"]["type"] == "rate_limit_exceeded"
+
+
+async def test_chat_completions_stream_closed_before_start_releases_permit() -> None:
+    test_container: SimpleContainer = await get_container_async()
+    slow_model: SlowChatModel = SlowChatModel(
+        response="Hello", delay_seconds=10, calls=[]
+    )
+    test_container.register(
+        ModelFactory,
+        lambda c: MockModelFactory(fn_get_model=lambda chat_model_config: slow_model),
+    )
+    model_config: ChatModelConfig = get_model_config(max_queue_size=0).model_copy(
+        update={"request_coalescing": RequestCoalescingConfig()}
+    )
+    model_configuration_cache: ExpiringCache[List[ChatModelConfig]] = (
+        test_container.resolve(ExpiringCache)
+    )
+    await model_configuration_cache.set([model_config])
+    try:
+        response: StreamingResponse | JSONResponse = await test_container.resolve(
+            ChatCompletionManager
+        ).chat_completions(
+            headers={},
+            chat_request={
+                "model": "Admission",
+                "messages": [{"role": "user", "content": "Hello"}],
+                "stream": True,
+            },
+        )
+        assert isinstance(response, StreamingResponse)
+        assert isinstance(response.body_iterator, ClosingAsyncIterator)
+        # the shared upstream stream runs in its own task
+        for _ in range(100):
+            if slow_model.calls:
+                break
+            await asyncio.sleep(0.01)
+        assert slow_model.calls == ["started"]
+        # e.g. the client disconnected before the response was started
+        await response.body_iterator.aclose()
+
+        # the shared upstream stream is cancelled and the slot of the model is free again
+        for _ in range(100):
+            if "cancelled" in slow_model.calls:
+                break
+            await asyncio.sleep(0.01)
+        assert slow_model.calls == ["started", "cancelled"]
+        permit: AdmissionPermit = await test_container.resolve(
+            AdmissionController
+        ).acquire_async(model_config=model_config)
+        permit.release()
+    finally:
+        await model_configuration_cache.clear()
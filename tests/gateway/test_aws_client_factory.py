@@ -0,0 +1,22 @@
+import pytest
+from moto import mock_aws
+
+from language_model_gateway.gateway.aws.aws_client_factory import AwsClientFactory
+
+
+def test_aws_client_factory_caches_clients(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("AWS_REGION", "us-west-2")
+    monkeypatch.delenv("AWS_CREDENTIALS_PROFILE", raising=False)
+    with mock_aws():
+        aws_client_factory = AwsClientFactory(max_pool_connections=25)
+        s3_client = aws_client_factory.create_client(service_name="s3")
+
+        assert aws_client_factory.create_client(service_name="s3") is s3_client
+        assert aws_client_factory.create_client(service_name="textract") is not (
+            s3_client
+        )
+        assert s3_client.meta.region_name == "us-west-2"
+        assert s3_client.meta.config.max_pool_connections == 25
+
+        aws_client_factory.clear()
+        assert aws_client_factory.create_client(service_name="s3") is not s3_client
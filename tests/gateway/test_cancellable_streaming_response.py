@@ -0,0 +1,86 @@
+import asyncio
+from typing import AsyncGenerator, List
+
+from prometheus_client import REGISTRY
+from starlette.types import Message
+
+from language_model_gateway.gateway.http.cancellable_streaming_response import (
+    CancellableStreamingResponse,
+)
+from language_model_gateway.gateway.utilities.closing_async_iterator import (
+    ClosingAsyncIterator,
+)
+
+
+async def test_streaming_response_is_cancelled_on_client_disconnect() -> None:
+    produced: List[str] = []
+    closed: asyncio.Event = asyncio.Event()
+
+    async def generate() -> AsyncGenerator[str, None]:
+        try:
+            while True:
+                produced.append("token")
+                yield "data: token\n\n"
+                # simulates the model generating the next token
+                await asyncio.sleep(0.01)
+        finally:
+            closed.set()
+
+    client_disconnected: asyncio.Event = asyncio.Event()
+
+    async def receive() -> Message:
+        await client_disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message: Message) -> None:
+        if message["type"] == "http.response.body" and len(produced) >= 3:
+            client_disconnected.set()
+
+    cancelled_before: float = (
+        REGISTRY.get_sample_value("streams_cancelled_on_disconnect_total") or 0
+    )
+    response = CancellableStreamingResponse(generate(), media_type="text/event-stream")
+    await asyncio.wait_for(
+        response({"type": "http", "asgi": {"spec_version": "2.3"}}, receive, send),
+        timeout=5,
+    )
+
+    assert closed.is_set()
+    assert len(produced) < 10
+    assert REGISTRY.get_sample_value("streams_cancelled_on_disconnect_total") == (
+        cancelled_before + 1
+    )
+
+
+class RecordingIterator(ClosingAsyncIterator[str]):
+    """Records whether the stream was closed"""
+
+    closed: bool = False
+
+    async def on_close_async(self, *, completed: bool) -> None:
+        self.closed = True
+
+
+async def test_streaming_response_is_closed_when_client_disconnects_before_start() -> (
+    None
+):
+    async def generate() -> AsyncGenerator[str, None]:
+        yield "data: token\n\n"
+
+    async def receive() -> Message:
+        return {"type": "http.disconnect"}
+
+    async def send(message: Message) -> None:
+        # the client goes away before the first chunk is read
+        await asyncio.sleep(10)
+
+    body: RecordingIterator = RecordingIterator(
+        iterable=ClosingAsyncIterator(iterable=generate())
+    )
+    response = CancellableStreamingResponse(body, media_type="text/event-stream")
+    await asyncio.wait_for(
+        response({"type": "http", "asgi": {"spec_version": "2.3"}}, receive, send),
+        timeout=5,
+    )
+    # closing the outer iterator reaches every iterator it wraps even though none were started
+    assert body.closed
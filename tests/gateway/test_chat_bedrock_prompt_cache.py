@@ -0,0 +1,114 @@
+from typing import Any, Dict, List, cast
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
+from openai.types import CompletionUsage
+
+from language_model_gateway.configs.config_schema import PromptConfig
+from language_model_gateway.container.simple_container import SimpleContainer
+from language_model_gateway.gateway.api_container import get_container_async
+from language_model_gateway.gateway.converters.langgraph_to_openai_converter import (
+    LangGraphToOpenAIConverter,
+)
+from language_model_gateway.gateway.managers.chat_completion_manager import (
+    ChatCompletionManager,
+)
+from language_model_gateway.gateway.models.chat_bedrock_converse_with_prompt_cache import (
+    ChatBedrockConverseWithPromptCache,
+)
+from language_model_gateway.gateway.schema.openai.completions import ChatRequest
+
+
+class MockBedrockRuntimeClient:
+    def __init__(self) -> None:
+        self.requests: List[Dict[str, Any]] = []
+
+    def converse(self, **kwargs: Any) -> Dict[str, Any]:
+        self.requests.append(kwargs)
+        return {
+            "output": {"message": {"role": "assistant", "content": [{"text": "Hi"}]}},
+            "usage": {
+                "inputTokens": 10,
+                "outputTokens": 2,
+                "totalTokens": 12,
+                "cacheReadInputTokens": 2048,
+                "cacheWriteInputTokens": 0,
+            },
+            "stopReason": "end_turn",
+            "metrics": {"latencyMs": 100},
+        }
+
+
+async def test_bedrock_prompt_cache() -> None:
+    print("")
+    test_container: SimpleContainer = await get_container_async()
+    chat_completion_manager: ChatCompletionManager = test_container.resolve(
+        ChatCompletionManager
+    )
+
+    # system prompts with cache set are marked for caching
+    chat_request: ChatRequest = chat_completion_manager.add_system_messages(
+        chat_request=ChatRequest(
+            model="General Purpose", messages=[{"role": "user", "content": "Hello"}]
+        ),
+        system_prompts=[
+            PromptConfig(role="system", content="Long instructions", cache=True),
+            PromptConfig(role="system", content="Short instructions"),
+        ],
+        provider="bedrock",
+    )
+    messages = list(chat_request["messages"])
+    assert messages[0]["content"] == [
+        {
+            "type": "text",
+            "text": "Long instructions",
+            "cache_control": {"type": "ephemeral"},
+        }
+    ]
+    assert messages[1]["content"] == "Short instructions"
+
+    # other providers get the plain prompt
+    openai_request: ChatRequest = chat_completion_manager.add_system_messages(
+        chat_request=ChatRequest(
+            model="General Purpose", messages=[{"role": "user", "content": "Hello"}]
+        ),
+        system_prompts=[
+            PromptConfig(role="system", content="Long instructions", cache=True)
+        ],
+        provider="openai",
+    )
+    assert list(openai_request["messages"])[0]["content"] == "Long instructions"
+
+    # the marker is sent to Bedrock as a cache point after the prompt
+    client: MockBedrockRuntimeClient = MockBedrockRuntimeClient()
+    llm: ChatBedrockConverseWithPromptCache = ChatBedrockConverseWithPromptCache(
+        client=client,
+        provider="anthropic",
+        model="us.anthropic.claude-3-5-haiku-20241022-v1:0",
+        region_name="us-east-1",
+    )
+    lc_messages: List[BaseMessage] = [
+        SystemMessage(
+            content=cast(List[str | Dict[str, Any]], list(messages[0]["content"]))
+        ),
+        SystemMessage(content="Short instructions"),
+        HumanMessage(content="Hello"),
+    ]
+    response: BaseMessage = await llm.ainvoke(lc_messages)
+    assert client.requests[0]["system"] == [
+        {"text": "Long instructions"},
+        {"cachePoint": {"type": "default"}},
+        {"text": "Short instructions"},
+    ]
+
+    # the cache token counts are returned in the usage
+    assert isinstance(response, AIMessage)
+    assert response.usage_metadata is not None
+    usage: (
+        CompletionUsage
+    ) = LangGraphToOpenAIConverter().convert_usage_meta_data_to_openai(
+        usages=[response.usage_metadata, response.usage_metadata]
+    )
+    assert usage.prompt_tokens == 20
+    assert usage.prompt_tokens_details is not None
+    assert usage.prompt_tokens_details.cached_tokens == 4096
+    assert usage.model_dump()["prompt_tokens_details"]["cache_write_tokens"] == 0
@@ -0,0 +1,78 @@
+from typing import List
+
+import httpx
+from openai import AsyncOpenAI
+from openai.types.chat import ChatCompletion
+
+from language_model_gateway.configs.config_reader.config_reader import ConfigReader
+from language_model_gateway.configs.config_schema import (
+    ChatModelConfig,
+    ModelConfig,
+    AgentConfig,
+)
+from language_model_gateway.container.simple_container import SimpleContainer
+from language_model_gateway.gateway.api_container import get_container_async
+from language_model_gateway.gateway.models.model_factory import ModelFactory
+from language_model_gateway.gateway.utilities.expiring_cache import ExpiringCache
+from tests.gateway.mocks.mock_chat_model import MockChatModel
+from tests.gateway.mocks.mock_model_factory import MockModelFactory
+
+
+async def test_chat_completions_reuses_compiled_graph(
+    async_client: httpx.AsyncClient,
+) -> None:
+    print("")
+    test_container: SimpleContainer = await get_container_async()
+
+    model_configs: List[ChatModelConfig] = []
+
+    def get_model(*, chat_model_config: ChatModelConfig) -> MockChatModel:
+        model_configs.append(chat_model_config)
+        return MockChatModel(fn_get_response=lambda messages: "Barack")
+
+    test_container.register(
+        ModelFactory, lambda c: MockModelFactory(fn_get_model=get_model)
+    )
+
+    model_configuration_cache: ExpiringCache[List[ChatModelConfig]] = (
+        test_container.resolve(ExpiringCache)
+    )
+    chat_model_config = ChatModelConfig(
+        id="graph_cache",
+        name="Graph Cache",
+        description="Graph Cache",
+        type="langchain",
+        model=ModelConfig(
+            provider="bedrock",
+            model="us.anthropic.claude-3-5-haiku-20241022-v1:0",
+        ),
+        tools=[AgentConfig(name="current_date")],
+    )
+    await model_configuration_cache.set([chat_model_config])
+
+    client = AsyncOpenAI(
+        api_key="fake-api-key",
+        base_url="http://localhost:5000/api/v1",
+        http_client=async_client,
+    )
+
+    for _ in range(3):
+        chat_completion: ChatCompletion = await client.chat.completions.create(
+            messages=[{"role": "user", "content": "what is the first name of Obama?"}],
+            model="Graph Cache",
+        )
+        assert "Barack" in (chat_completion.choices[0].message.content or "")
+
+    # the graph is only built once for the same model configuration
+    assert len(model_configs) == 1
+
+    # clearing the config cache also drops the compiled graphs
+    config_reader: ConfigReader = test_container.resolve(ConfigReader)
+    await config_reader.clear_cache()
+    await model_configuration_cache.set([chat_model_config])
+
+    await client.chat.completions.create(
+        messages=[{"role": "user", "content": "what is the first name of Obama?"}],
+        model="Graph Cache",
+    )
+    assert len(model_configs) == 2
@@ -2,10 +2,12 @@ import json
 from typing import List
 
 import httpx
+import pytest
 from httpx import Response
 from openai import AsyncOpenAI, AsyncStream
 from openai.types import CompletionUsage
 from openai.types.chat import ChatCompletionChunk
+from httpx_sse import SSEError
 from pytest_httpx import HTTPXMock, IteratorStream
 
 from language_model_gateway.configs.config_schema import (
@@ -16,6 +18,10 @@ from language_model_gateway.configs.config_schema import (
 )
 from language_model_gateway.container.simple_container import SimpleContainer
 from language_model_gateway.gateway.api_container import get_container_async
+from language_model_gateway.gateway.http.http_client_factory import HttpClientFactory
+from language_model_gateway.gateway.providers.openai_chat_completions_provider import (
+    OpenAiChatCompletionsProvider,
+)
 from language_model_gateway.gateway.utilities.environment_reader import (
     EnvironmentReader,
 )
@@ -148,3 +154,111 @@ async def test_chat_completions_streaming(
             [choice.delta.content or "" for choice in chunk.choices]
         )
         print(delta_content)
+
+
+async def test_chat_completions_streaming_relays_raw_bytes(
+    async_client: httpx.AsyncClient,
+    httpx_mock: HTTPXMock,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    # without logging the agent's bytes are relayed without parsing them
+    monkeypatch.setenv("LOG_INPUT_AND_OUTPUT", "0")
+    test_container: SimpleContainer = await get_container_async()
+
+    chunk = ChatCompletionChunk(
+        id=str(0),
+        created=1633660000,
+        model="ChatGPT",
+        choices=[
+            ChunkChoice(
+                index=0,
+                delta=ChoiceDelta(role="assistant", content="This is a test"),
+            )
+        ],
+        object="chat.completion.chunk",
+    )
+    chunks: List[bytes] = [
+        b": keep-alive\n\n",
+        f"data: {json.dumps(chunk.model_dump())}\n\n".encode("utf-8"),
+        b"data: [DONE]\n\n",
+    ]
+
+    def get_response(request: httpx.Request) -> Response:
+        assert request.headers["Accept-Encoding"] == "identity"
+        return Response(
+            status_code=200,
+            headers={"Content-Type": "text/event-stream"},
+            stream=IteratorStream(chunks),
+        )
+
+    httpx_mock.add_callback(
+        callback=get_response,
+        url="http://host.docker.internal:5055/api/v1/chat/completions",
+    )
+
+    model_configuration_cache: ExpiringCache[List[ChatModelConfig]] = (
+        test_container.resolve(ExpiringCache)
+    )
+    await model_configuration_cache.set(
+        [
+            ChatModelConfig(
+                id="raw_relay",
+                name="ChatGPT",
+                description="ChatGPT",
+                type="openai",
+                url="http://host.docker.internal:5055/api/v1/chat/completions",
+            )
+        ]
+    )
+
+    response: httpx.Response = await async_client.post(
+        "/api/v1/chat/completions",
+        json={
+            "model": "ChatGPT",
+            "messages": [{"role": "user", "content": "Say this is a test"}],
+            "stream": True,
+        },
+    )
+    # the relayed bytes are unchanged and only followed by the server timing comment
+    relayed: bytes = b"".join(chunks)
+    assert response.content.startswith(relayed)
+    assert response.content[len(relayed) :].startswith(b": server-timing ")
+
+
+@pytest.mark.parametrize(
+    "status_code,content_type,expected_error",
+    [
+        (500, "application/json", httpx.HTTPStatusError),
+        (200, "application/json", SSEError),
+    ],
+)
+async def test_chat_completions_streaming_raw_relay_rejects_errors(
+    httpx_mock: HTTPXMock,
+    status_code: int,
+    content_type: str,
+    expected_error: type[Exception],
+) -> None:
+    # an error from the agent is raised instead of being relayed as an event stream
+    httpx_mock.add_response(
+        url="http://host.docker.internal:5055/api/v1/chat/completions",
+        status_code=status_code,
+        headers={"Content-Type": content_type},
+        json={"error": {"message": "Invalid request"}},
+    )
+    provider: OpenAiChatCompletionsProvider = OpenAiChatCompletionsProvider(
+        http_client_factory=HttpClientFactory()
+    )
+    relayed: List[bytes] = []
+    with pytest.raises(expected_error):
+        async for raw_bytes in provider._stream_raw_resp_async_generator(
+            request_id="1",
+            agent_url="http://host.docker.internal:5055/api/v1/chat/completions",
+            chat_request={
+                "model": "ChatGPT",
+                "messages": [{"role": "user", "content": "Say this is a test"}],
+                "stream": True,
+            },
+            headers={},
+        ):
+            relayed.append(raw_bytes)
+    assert relayed == []
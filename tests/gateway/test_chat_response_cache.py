@@ -0,0 +1,118 @@
+from typing import List
+
+import httpx
+from openai import AsyncOpenAI, AsyncStream
+from openai.types.chat import ChatCompletion, ChatCompletionChunk
+from prometheus_client import REGISTRY
+
+from language_model_gateway.configs.config_schema import (
+    ChatModelConfig,
+    ModelConfig,
+    ResponseCacheConfig,
+)
+from language_model_gateway.container.simple_container import SimpleContainer
+from language_model_gateway.gateway.api_container import get_container_async
+from language_model_gateway.gateway.models.model_factory import ModelFactory
+from language_model_gateway.gateway.utilities.expiring_cache import ExpiringCache
+from tests.gateway.mocks.mock_chat_model import MockChatModel
+from tests.gateway.mocks.mock_model_factory import MockModelFactory
+
+
+async def test_chat_completions_response_cache(
+    async_client: httpx.AsyncClient,
+) -> None:
+    print("")
+    test_container: SimpleContainer = await get_container_async()
+
+    model_calls: List[str] = []
+
+    def get_response(messages: object) -> str:
+        model_calls.append("called")
+        return "Barack"
+
+    test_container.register(
+        ModelFactory,
+        lambda c: MockModelFactory(
+            fn_get_model=lambda chat_model_config: MockChatModel(
+                fn_get_response=get_response
+            )
+        ),
+    )
+
+    model_configuration_cache: ExpiringCache[List[ChatModelConfig]] = (
+        test_container.resolve(ExpiringCache)
+    )
+    await model_configuration_cache.set(
+        [
+            ChatModelConfig(
+                id="response_cache",
+                name="Response Cache",
+                description="Response Cache",
+                type="langchain",
+                model=ModelConfig(
+                    provider="bedrock",
+                    model="us.anthropic.claude-3-5-haiku-20241022-v1:0",
+                ),
+                response_cache=ResponseCacheConfig(ttl_seconds=60),
+            )
+        ]
+    )
+
+    client = AsyncOpenAI(
+        api_key="fake-api-key",
+        base_url="http://localhost:5000/api/v1",
+        http_client=async_client,
+    )
+    hits_before: float = (
+        REGISTRY.get_sample_value(
+            "response_cache_requests_total",
+            {"model": "Response Cache", "result": "hit"},
+        )
+        or 0
+    )
+
+    for _ in range(2):
+        chat_completion: ChatCompletion = await client.chat.completions.create(
+            messages=[{"role": "user", "content": "what is the first name of Obama?"}],
+            model="Response Cache",
+            temperature=0,
+        )
+        assert chat_completion.choices[0].message.content == "Barack"
+
+    # the second request is answered from the cache
+    assert len(model_calls) == 1
+
+    # a streaming request replays the cached completion
+    stream: AsyncStream[ChatCompletionChunk] = await client.chat.completions.create(
+        messages=[{"role": "user", "content": "what is the first name of Obama?"}],
+        model="Response Cache",
+        temperature=0,
+        stream=True,
+    )
+    content: str = ""
+    async for chunk in stream:
+        content += "".join(choice.delta.content or "" for choice in chunk.choices)
+    assert content == "Barack"
+    assert len(model_calls) == 1
+
+    # a different request is not answered from the cache
+    await client.chat.completions.create(
+        messages=[{"role": "user", "content": "what is the last name of Obama?"}],
+        model="Response Cache",
+        temperature=0,
+    )
+    assert len(model_calls) == 2
+
+    # the same request from another caller is not answered from the cache
+    await client.chat.completions.create(
+        messages=[{"role": "user", "content": "what is the first name of Obama?"}],
+        model="Response Cache",
+        temperature=0,
+        extra_headers={"x-openwebui-user-id": "another-user"},
+    )
+    assert len(model_calls) == 3
+
+    assert REGISTRY.get_sample_value(
+        "response_cache_requests_total",
+        {"model": "Response Cache", "result": "hit"},
+    ) == (hits_before + 2)
@@ -0,0 +1,287 @@
+from pathlib import Path
+from typing import List
+
+import httpx
+import numpy as np
+import numpy.typing as npt
+from openai import AsyncOpenAI, AsyncStream
+from openai.types.chat import ChatCompletion, ChatCompletionChunk
+from prometheus_client import REGISTRY
+
+from language_model_gateway.configs.config_schema import (
+    ChatModelConfig,
+    ModelConfig,
+    SemanticCacheConfig,
+)
+from language_model_gateway.container.simple_container import SimpleContainer
+from language_model_gateway.gateway.api_container import get_container_async
+from language_model_gateway.gateway.models.model_factory import ModelFactory
+from language_model_gateway.gateway.semantic_cache.base_embedder import BaseEmbedder
+from language_model_gateway.gateway.semantic_cache.semantic_cache import SemanticCache
+from language_model_gateway.gateway.semantic_cache.semantic_cache_index import (
+    SemanticCacheIndex,
+)
+from language_model_gateway.gateway.utilities.expiring_cache import ExpiringCache
+from language_model_gateway.gateway.utilities.response_cache import ResponseCache
+from tests.gateway.mocks.mock_chat_model import MockChatModel
+from tests.gateway.mocks.mock_embedder import MockEmbedder
+from tests.gateway.mocks.mock_model_factory import MockModelFactory
+from tests.gateway.mocks.mock_slow_chat_model import SlowChatModel
+
+
+async def test_chat_completions_semantic_cache(
+    async_client: httpx.AsyncClient, tmp_path: Path
+) -> None:
+    print("")
+    test_container: SimpleContainer = await get_container_async()
+
+    model_calls: List[str] = []
+
+    def get_response(messages: object) -> str:
+        model_calls.append("called")
+        return f"Open Settings and click Reset Password ({len(model_calls)})"
+
+    test_container.register(
+        ModelFactory,
+        lambda c: MockModelFactory(
+            fn_get_model=lambda chat_model_config: MockChatModel(
+                fn_get_response=get_response
+            )
+        ),
+    )
+    test_container.register(BaseEmbedder, lambda c: MockEmbedder())
+    test_container.lazy_singleton(
+        SemanticCache,
+        lambda c: SemanticCache(
+            embedder=c.resolve(BaseEmbedder), cache_path=str(tmp_path)
+        ),
+    )
+
+    model_config: ChatModelConfig = ChatModelConfig(
+        id="semantic_cache",
+        name="Semantic Cache",
+        description="Semantic Cache",
+        type="langchain",
+        model=ModelConfig(
+            provider="bedrock",
+            model="us.anthropic.claude-3-5-haiku-20241022-v1:0",
+        ),
+        semantic_cache=SemanticCacheConfig(similarity_threshold=0.9),
+    )
+    model_configuration_cache: ExpiringCache[List[ChatModelConfig]] = (
+        test_container.resolve(ExpiringCache)
+    )
+    await model_configuration_cache.set([model_config])
+
+    client = AsyncOpenAI(
+        api_key="fake-api-key",
+        base_url="http://localhost:5000/api/v1",
+        http_client=async_client,
+    )
+    hits_before: float = (
+        REGISTRY.get_sample_value(
+            "semantic_cache_requests_total",
+            {"model": "Semantic Cache", "result": "hit"},
+        )
+        or 0
+    )
+
+    # the answer of a streamed response is cached once the stream completes
+    stream: AsyncStream[ChatCompletionChunk] = await client.chat.completions.create(
+        messages=[{"role": "user", "content": "How do I reset my password?"}],
+        model="Semantic Cache",
+        stream=True,
+    )
+    content: str = ""
+    async for chunk in stream:
+        content += "".join(choice.delta.content or "" for choice in chunk.choices)
+    # the mock model streams word by word with a space after each word
+    assert content.strip() == "Open Settings and click Reset Password (1)"
+
+    # a near-duplicate question is answered from the cache
+    chat_completion: ChatCompletion = await client.chat.completions.create(
+        messages=[{"role": "user", "content": "how do i reset my password"}],
+        model="Semantic Cache",
+    )
+    assert chat_completion.choices[0].message.content == content
+    assert len(model_calls) == 1
+
+    # a different question is not
+    await client.chat.completions.create(
+        messages=[{"role": "user", "content": "What are your opening hours?"}],
+        model="Semantic Cache",
+    )
+    assert len(model_calls) == 2
+
+    assert REGISTRY.get_sample_value(
+        "semantic_cache_requests_total",
+        {"model": "Semantic Cache", "result": "hit"},
+    ) == (hits_before + 1)
+
+    # the answer is not returned to another caller
+    other_client = AsyncOpenAI(
+        api_key="other-api-key",
+        base_url="http://localhost:5000/api/v1",
+        http_client=async_client,
+    )
+    await other_client.chat.completions.create(
+        messages=[{"role": "user", "content": "How do I reset my password?"}],
+        model="Semantic Cache",
+    )
+    assert len(model_calls) == 3
+
+    # a follow-up question depends on the conversation so it is not answered from the cache
+    await client.chat.completions.create(
+        messages=[
+            {"role": "user", "content": "What are your opening hours?"},
+            {"role": "assistant", "content": "9 to 5"},
+            {"role": "user", "content": "How do I reset my password?"},
+        ],
+        model="Semantic Cache",
+    )
+    assert len(model_calls) == 4
+
+    # the index is persisted and read back by a new cache
+    caller: str = ResponseCache.get_caller(
+        headers={"Authorization": "Bearer fake-api-key"}
+    )
+    semantic_cache: SemanticCache = test_container.resolve(SemanticCache)
+    semantic_cache.save()
+    restarted_cache: SemanticCache = SemanticCache(
+        embedder=MockEmbedder(), cache_path=str(tmp_path)
+    )
+    assert (
+        restarted_cache.lookup(
+            model_config=model_config,
+            vector=await restarted_cache.embed_async(
+                question="How do I reset my password"
+            ),
+            caller=caller,
+        )
+        == content
+    )
+
+    # the index is discarded when the model configuration changes
+    changed_config: ChatModelConfig = model_config.model_copy(
+        update={"description": "Changed"}
+    )
+    assert (
+        SemanticCache(embedder=MockEmbedder(), cache_path=str(tmp_path)).lookup(
+            model_config=changed_config,
+            vector=await restarted_cache.embed_async(
+                question="How do I reset my password"
+            ),
+            caller=caller,
+        )
+        is None
+    )
+
+
+def test_semantic_cache_index_is_bounded() -> None:
+    index: SemanticCacheIndex = SemanticCacheIndex(max_entries=3, config_hash="1")
+    for i in range(5):
+        vector: npt.NDArray[np.float32] = np.zeros(8, dtype=np.float32)
+        vector[i] = 1
+        index.add(vector=vector, answer=f"answer {i}", caller="alice")
+
+    assert len(index) == 3
+    # the two oldest entries were overwritten
+    first: npt.NDArray[np.float32] = np.zeros(8, dtype=np.float32)
+    first[0] = 1
+    assert index.search(vector=first, caller="alice")[1] == 0.0
+    last: npt.NDArray[np.float32] = np.zeros(8, dtype=np.float32)
+    last[4] = 1
+    assert index.search(vector=last, caller="alice") == ("answer 4", 1.0)
+    # the entries of other callers are not matched
+    assert index.search(vector=last, caller="bob") == (None, 0.0)
+
+
+async def test_semantic_cache_save_merges_workers(tmp_path: Path) -> None:
+    model_config: ChatModelConfig = ChatModelConfig(
+        id="semantic_cache",
+        name="Semantic Cache",
+        description="Semantic Cache",
+        type="langchain",
+        model=ModelConfig(
+            provider="bedrock",
+            model="us.anthropic.claude-3-5-haiku-20241022-v1:0",
+        ),
+        semantic_cache=SemanticCacheConfig(similarity_threshold=0.9),
+    )
+    # two workers save to the same file and neither overwrites the entries of the other
+    workers: List[SemanticCache] = [
+        SemanticCache(embedder=MockEmbedder(), cache_path=str(tmp_path))
+        for _ in range(2)
+    ]
+    questions: List[str] = ["how do i reset my password", "what are your opening hours"]
+    for worker, question in zip(workers, questions):
+        worker.add(
+            model_config=model_config,
+            vector=await worker.embed_async(question=question),
+            answer=question.upper(),
+            caller="alice",
+        )
+        worker.save()
+
+    restarted_cache: SemanticCache = SemanticCache(
+        embedder=MockEmbedder(), cache_path=str(tmp_path)
+    )
+    for question in questions:
+        assert (
+            restarted_cache.lookup(
+                model_config=model_config,
+                vector=await restarted_cache.embed_async(question=question),
+                caller="alice",
+            )
+            == question.upper()
+        )
+
+
+async def test_chat_completions_semantic_cache_skips_failed_stream(
+    async_client: httpx.AsyncClient,
+) -> None:
+    test_container: SimpleContainer = await get_container_async()
+    slow_model: SlowChatModel = SlowChatModel(
+        response="unused", error=ValueError("model unavailable"), calls=[]
+    )
+    test_container.register(
+        ModelFactory,
+        lambda c: MockModelFactory(fn_get_model=lambda chat_model_config: slow_model),
+    )
+    test_container.register(BaseEmbedder, lambda c: MockEmbedder())
+    test_container.lazy_singleton(
+        SemanticCache, lambda c: SemanticCache(embedder=c.resolve(BaseEmbedder))
+    )
+    model_config: ChatModelConfig = ChatModelConfig(
+        id="semantic_cache",
+        name="Semantic Cache",
+        description="Semantic Cache",
+        type="langchain",
+        model=ModelConfig(
+            provider="bedrock",
+            model="us.anthropic.claude-3-5-haiku-20241022-v1:0",
+        ),
+        semantic_cache=SemanticCacheConfig(similarity_threshold=0.9),
+    )
+    model_configuration_cache: ExpiringCache[List[ChatModelConfig]] = (
+        test_container.resolve(ExpiringCache)
+    )
+    await model_configuration_cache.set([model_config])
+
+    client = AsyncOpenAI(
+        api_key="fake-api-key",
+        base_url="http://localhost:5000/api/v1",
+        http_client=async_client,
+    )
+    for _ in range(2):
+        stream: AsyncStream[ChatCompletionChunk] = await client.chat.completions.create(
+            messages=[{"role": "user", "content": "How do I reset my password?"}],
+            model="Semantic Cache",
+            stream=True,
+        )
+        content: str = ""
+        async for chunk in stream:
+            content += "".join(choice.delta.content or "" for choice in chunk.choices)
+        # the error is streamed to the caller but not cached
+        assert "model unavailable" in content
+    assert slow_model.calls == ["started", "started"]
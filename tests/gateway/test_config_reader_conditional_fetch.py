@@ -0,0 +1,84 @@
+import json
+from typing import List
+
+import boto3
+import httpx
+from moto import mock_aws
+from pytest_httpx import HTTPXMock
+
+from language_model_gateway.configs.config_reader.github_config_reader import (
+    GitHubConfigReader,
+)
+from language_model_gateway.configs.config_reader.s3_config_reader import S3ConfigReader
+from language_model_gateway.configs.config_schema import ChatModelConfig
+
+
+async def test_github_config_reader_reuses_configs_when_not_modified(
+    httpx_mock: HTTPXMock,
+) -> None:
+    api_url: str = "https://api.github.com/repos/owner/repo/contents/configs?ref=main"
+    httpx_mock.add_response(
+        url=api_url,
+        json=[
+            {
+                "type": "file",
+                "name": "model.json",
+                "sha": "abc",
+                "download_url": "https://raw.githubusercontent.com/owner/repo/main/configs/model.json",
+            }
+        ],
+        headers={"ETag": '"v1"'},
+    )
+    httpx_mock.add_response(
+        url="https://raw.githubusercontent.com/owner/repo/main/configs/model.json",
+        json={"id": "model", "name": "Model", "description": "Model"},
+    )
+
+    github_url: str = "https://github.com/owner/repo/tree/main/configs"
+    configs: List[ChatModelConfig] = await GitHubConfigReader().read_model_configs(
+        github_url=github_url
+    )
+    assert [c.name for c in configs] == ["Model"]
+
+    # second read sends the ETag and GitHub says nothing changed
+    def not_modified(request: httpx.Request) -> httpx.Response:
+        assert request.headers["If-None-Match"] == '"v1"'
+        return httpx.Response(status_code=304)
+
+    httpx_mock.add_callback(not_modified, url=api_url)
+    configs_again: List[ChatModelConfig] = (
+        await GitHubConfigReader().read_model_configs(github_url=github_url)
+    )
+    assert configs_again == configs
+    assert configs_again[0] is configs[0]
+
+
+async def test_s3_config_reader_reuses_configs_when_not_modified() -> None:
+    with mock_aws():
+        s3_client = boto3.client("s3", region_name="us-east-1")
+        s3_client.create_bucket(Bucket="config-bucket")
+        s3_client.put_object(
+            Bucket="config-bucket",
+            Key="configs/model.json",
+            Body=json.dumps({"id": "model", "name": "Model", "description": "Model"}),
+        )
+
+        s3_url: str = "s3://config-bucket/configs"
+        configs: List[ChatModelConfig] = await S3ConfigReader().read_model_configs(
+            s3_url=s3_url
+        )
+        configs_again: List[ChatModelConfig] = (
+            await S3ConfigReader().read_model_configs(s3_url=s3_url)
+        )
+        # unchanged objects are not parsed again
+        assert configs_again[0] is configs[0]
+
+        s3_client.put_object(
+            Bucket="config-bucket",
+            Key="configs/model.json",
+            Body=json.dumps({"id": "model", "name": "Changed", "description": "Model"}),
+        )
+        configs_changed: List[ChatModelConfig] = (
+            await S3ConfigReader().read_model_configs(s3_url=s3_url)
+        )
+        assert [c.name for c in configs_changed] == ["Changed"]
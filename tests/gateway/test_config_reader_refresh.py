@@ -0,0 +1,60 @@
+from typing import List, Optional
+
+import pytest
+from prometheus_client import REGISTRY
+
+from language_model_gateway.configs.config_reader.config_reader import ConfigReader
+from language_model_gateway.configs.config_schema import ChatModelConfig
+from language_model_gateway.gateway.converters.compiled_graph_cache import (
+    CompiledGraphCache,
+)
+from language_model_gateway.gateway.utilities.expiring_cache import ExpiringCache
+
+
+async def test_config_reader_serves_stale_configs_while_refreshing(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setenv("CONFIG_STALE_WHILE_REVALIDATE", "1")
+    cache: ExpiringCache[List[ChatModelConfig]] = ExpiringCache(ttl_seconds=0)
+    config_reader = ConfigReader(
+        cache=cache, compiled_graph_cache=CompiledGraphCache(max_size=10)
+    )
+    stale_config = ChatModelConfig(id="stale", name="Stale", description="Stale")
+    await cache.set([stale_config])
+
+    # the expired configs are returned immediately and a refresh is started
+    configs: List[ChatModelConfig] = await config_reader.read_model_configs_async()
+    assert configs == [stale_config]
+    assert ConfigReader._refresh_task is not None
+    assert await ConfigReader._refresh_task is True
+
+    refreshed_configs: Optional[List[ChatModelConfig]] = await cache.get_stale()
+    assert refreshed_configs is not None
+    assert stale_config not in refreshed_configs
+    assert len(refreshed_configs) > 0
+
+
+async def test_config_reader_keeps_previous_configs_when_refresh_fails(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setenv("MODELS_OFFICIAL_PATH", "/tmp/does_not_exist")
+    monkeypatch.delenv("MODELS_TESTING_PATH", raising=False)
+    monkeypatch.delenv("MODELS_ZIP_PATH", raising=False)
+    cache: ExpiringCache[List[ChatModelConfig]] = ExpiringCache(ttl_seconds=60)
+    config_reader = ConfigReader(
+        cache=cache, compiled_graph_cache=CompiledGraphCache(max_size=10)
+    )
+    previous_config = ChatModelConfig(
+        id="previous", name="Previous", description="Previous"
+    )
+    await cache.set([previous_config])
+    failures_before: float = (
+        REGISTRY.get_sample_value("config_refresh_failures_total") or 0
+    )
+
+    assert await config_reader.refresh_model_configs_async() is False
+
+    assert await cache.get() == [previous_config]
+    assert REGISTRY.get_sample_value("config_refresh_failures_total") == (
+        failures_before + 1
+    )
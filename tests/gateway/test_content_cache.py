@@ -0,0 +1,125 @@
+import asyncio
+import os
+from pathlib import Path
+from typing import List, Optional
+
+from prometheus_client import REGISTRY
+from pytest_httpx import HTTPXMock
+
+from language_model_gateway.gateway.http.http_client_factory import HttpClientFactory
+from language_model_gateway.gateway.http.http_fetcher import HttpFetcher
+from language_model_gateway.gateway.tools.url_to_markdown_tool import URLToMarkdownTool
+from language_model_gateway.gateway.utilities.content_cache import ContentCache
+from language_model_gateway.gateway.utilities.parser_pool import ParserPool
+
+
+def get_sample_value(kind: str, result: str) -> float:
+    value: Optional[float] = REGISTRY.get_sample_value(
+        "content_cache_requests_total", {"kind": kind, "result": result}
+    )
+    return value or 0
+
+
+def create_content_cache(
+    *, tmp_path: Path, max_disk_size_bytes: int = 1024 * 1024
+) -> ContentCache:
+    return ContentCache(
+        max_memory_size_bytes=1024 * 1024,
+        cache_directory=str(tmp_path / "content_cache"),
+        max_disk_size_bytes=max_disk_size_bytes,
+    )
+
+
+async def test_content_cache_memory_and_disk_tiers(tmp_path: Path) -> None:
+    calls: List[bytes] = []
+
+    async def convert_async(content: bytes) -> str:
+        calls.append(content)
+        return content.decode("utf-8").upper()
+
+    content_cache: ContentCache = create_content_cache(tmp_path=tmp_path)
+    for _ in range(2):
+        assert (
+            await content_cache.get_or_create_async(
+                kind="test",
+                content=b"hello",
+                options={"mode": "upper"},
+                fn_create=lambda: convert_async(b"hello"),
+            )
+            == "HELLO"
+        )
+    assert calls == [b"hello"]
+
+    # a new worker reads the conversion from the disk tier
+    disk_hits_before: float = get_sample_value("test", "disk_hit")
+    restarted: ContentCache = create_content_cache(tmp_path=tmp_path)
+    assert (
+        await restarted.get_or_create_async(
+            kind="test",
+            content=b"hello",
+            options={"mode": "upper"},
+            fn_create=lambda: convert_async(b"hello"),
+        )
+        == "HELLO"
+    )
+    assert calls == [b"hello"]
+    assert get_sample_value("test", "disk_hit") == disk_hits_before + 1
+
+    # different options are a different conversion
+    await restarted.get_or_create_async(
+        kind="test",
+        content=b"hello",
+        options={"mode": "lower"},
+        fn_create=lambda: convert_async(b"hello"),
+    )
+    assert calls == [b"hello", b"hello"]
+
+
+async def test_content_cache_evicts_least_recently_used_files(tmp_path: Path) -> None:
+    async def convert_async(text: str) -> str:
+        return text
+
+    content_cache: ContentCache = create_content_cache(
+        tmp_path=tmp_path, max_disk_size_bytes=100
+    )
+    for name in ["a", "b", "c"]:
+        await content_cache.get_or_create_async(
+            kind="test",
+            content=name.encode("utf-8"),
+            options={},
+            fn_create=lambda: convert_async(name * 40),
+        )
+        # so the files have different modification times
+        await asyncio.sleep(0.01)
+    files: List[str] = os.listdir(tmp_path / "content_cache")
+    assert len(files) == 2
+    assert (
+        ContentCache.get_key(kind="test", content=b"a", options={}) + ".txt"
+        not in files
+    )
+
+
+async def test_url_to_markdown_tool_uses_content_cache(
+    httpx_mock: HTTPXMock, tmp_path: Path
+) -> None:
+    httpx_mock.add_response(
+        url="https://example.com/page",
+        html="<html><body><h1>Title</h1></body></html>",
+        is_reusable=True,
+    )
+    tool: URLToMarkdownTool = URLToMarkdownTool(
+        http_fetcher=HttpFetcher(
+            http_client_factory=HttpClientFactory(), http_cache=None
+        ),
+        content_cache=create_content_cache(tmp_path=tmp_path),
+        parser_pool=ParserPool(pool_type="thread"),
+    )
+    misses_before: float = get_sample_value("html_to_markdown", "miss")
+    hits_before: float = get_sample_value("html_to_markdown", "memory_hit")
+
+    first, _ = await tool._arun("https://example.com/page")
+    second, _ = await tool._arun("https://example.com/page")
+    assert first == second
+    assert "Title\n=====" in first
+    assert get_sample_value("html_to_markdown", "miss") == misses_before + 1
+    assert get_sample_value("html_to_markdown", "memory_hit") == hits_before + 1
@@ -0,0 +1,39 @@
+import asyncio
+import os
+from pathlib import Path
+from typing import List
+
+from language_model_gateway.gateway.utilities.disk_lru_store import DiskLruStore
+
+
+async def test_disk_lru_store_removes_least_recently_used_entries(
+    tmp_path: Path,
+) -> None:
+    store: DiskLruStore = DiskLruStore(
+        directory=str(tmp_path),
+        max_size_bytes=100,
+        suffix=".body",
+        companion_suffixes=(".json",),
+    )
+    for key in ["a", "b"]:
+        await store.write_async(key=key, files={".body": b"x" * 40, ".json": b"{}"})
+        # so the files have different modification times
+        await asyncio.sleep(0.01)
+    # reading marks a as used so b is removed instead
+    assert store.read("a", suffix=".json") == b"{}"
+    store.mark_used("a")
+    await asyncio.sleep(0.01)
+
+    # the workers of a host share the directory so a new store counts the existing entries
+    restarted_store: DiskLruStore = DiskLruStore(
+        directory=str(tmp_path),
+        max_size_bytes=100,
+        suffix=".body",
+        companion_suffixes=(".json",),
+    )
+    await restarted_store.write_async(
+        key="c", files={".body": b"x" * 40, ".json": b"{}"}
+    )
+    files: List[str] = sorted(os.listdir(tmp_path))
+    # the companion file is removed with the main file
+    assert files == ["a.body", "a.json", "c.body", "c.json"]
@@ -0,0 +1,262 @@
+from typing import Any, Dict, List, Optional
+
+import httpx
+import pytest
+from botocore.exceptions import ClientError
+from langchain_core.language_models import BaseChatModel
+from langchain_core.runnables import RunnableBinding
+from openai import AsyncOpenAI, AsyncStream
+from openai.types.chat import ChatCompletionChunk
+
+from language_model_gateway.configs.config_schema import (
+    ChatModelConfig,
+    HedgingConfig,
+    ModelConfig,
+)
+from language_model_gateway.container.simple_container import SimpleContainer
+from language_model_gateway.gateway.api_container import get_container_async
+from language_model_gateway.gateway.models.chat_bedrock_converse_with_prompt_cache import (
+    ChatBedrockConverseWithPromptCache,
+)
+from language_model_gateway.gateway.models.failover_chat_model import (
+    FailoverChatModel,
+)
+from language_model_gateway.gateway.models.latency_tracker import LatencyTracker
+from language_model_gateway.gateway.models.model_factory import ModelFactory
+from language_model_gateway.gateway.utilities.expiring_cache import ExpiringCache
+from tests.gateway.mocks.mock_model_factory import MockModelFactory
+from tests.gateway.mocks.mock_slow_chat_model import SlowChatModel
+
+
+def create_failover_model(
+    *models: SlowChatModel,
+    time_to_first_token_seconds: Optional[float] = None,
+    hedging: Optional[HedgingConfig] = None,
+) -> FailoverChatModel:
+    return FailoverChatModel(
+        targets=list(models),
+        target_names=[f"model{i}" for i in range(len(models))],
+        time_to_first_token_seconds=time_to_first_token_seconds,
+        hedging=hedging,
+        latency_tracker=LatencyTracker(),
+    )
+
+
+async def stream_text_async(model: BaseChatModel) -> str:
+    return "".join([str(chunk.content) async for chunk in model.astream("Hello")])
+
+
+def throttling_error() -> ClientError:
+    return ClientError(
+        error_response={
+            "Error": {"Code": "ThrottlingException", "Message": "Too many requests"},
+            "ResponseMetadata": {"HTTPStatusCode": 429},
+        },
+        operation_name="ConverseStream",
+    )
+
+
+async def test_failover_on_throttling() -> None:
+    primary = SlowChatModel(response="primary", error=throttling_error(), calls=[])
+    fallback = SlowChatModel(response="fallback answer", calls=[])
+    model = create_failover_model(primary, fallback)
+
+    assert await stream_text_async(model) == "fallback answer "
+    assert (await model.ainvoke("Hello")).content == "fallback answer"
+    assert len(primary.calls) == 2
+
+
+async def test_failover_does_not_retry_client_errors() -> None:
+    primary = SlowChatModel(response="primary", error=ValueError("bad"), calls=[])
+    fallback = SlowChatModel(response="fallback", calls=[])
+    model = create_failover_model(primary, fallback)
+
+    with pytest.raises(ValueError):
+        await stream_text_async(model)
+    assert fallback.calls == []
+
+
+async def test_failover_on_time_to_first_token_deadline() -> None:
+    primary = SlowChatModel(response="primary", delay_seconds=5, calls=[])
+    fallback = SlowChatModel(response="fallback", calls=[])
+    model = create_failover_model(primary, fallback, time_to_first_token_seconds=0.1)
+
+    assert await stream_text_async(model) == "fallback "
+    assert primary.calls == ["started", "cancelled"]
+
+    # the last model raises the timeout if it is also late
+    slow_fallback = SlowChatModel(response="fallback", delay_seconds=5, calls=[])
+    model = create_failover_model(
+        primary, slow_fallback, time_to_first_token_seconds=0.1
+    )
+    with pytest.raises(TimeoutError):
+        await stream_text_async(model)
+
+
+async def test_hedged_request_uses_first_token_and_cancels_loser() -> None:
+    primary = SlowChatModel(response="primary", delay_seconds=5, calls=[])
+    fallback = SlowChatModel(response="hedge", delay_seconds=0.1, calls=[])
+    hedging = HedgingConfig(default_delay_seconds=0.1)
+    model = create_failover_model(primary, fallback, hedging=hedging)
+
+    assert await stream_text_async(model) == "hedge "
+    assert primary.calls == ["started", "cancelled"]
+
+    # a fast first model does not send the hedged request
+    fast_primary = SlowChatModel(response="primary", calls=[])
+    fallback.calls.clear()
+    model = create_failover_model(fast_primary, fallback, hedging=hedging)
+    assert await stream_text_async(model) == "primary "
+    assert fallback.calls == []
+
+
+async def test_hedge_delay_from_percentile() -> None:
+    latency_tracker: LatencyTracker = LatencyTracker(max_samples=100)
+    for i in range(1, 101):
+        latency_tracker.record(key="model0", seconds=i / 100)
+    model = FailoverChatModel(
+        targets=[
+            SlowChatModel(response="a", calls=[]),
+            SlowChatModel(response="b", calls=[]),
+        ],
+        target_names=["model0", "model1"],
+        hedging=HedgingConfig(percentile=95, min_samples=20),
+        latency_tracker=latency_tracker,
+    )
+    assert model.get_hedge_delay_seconds() == 0.95
+
+
+async def test_non_streaming_latency_is_tracked_separately() -> None:
+    latency_tracker: LatencyTracker = LatencyTracker()
+    model = FailoverChatModel(
+        targets=[
+            SlowChatModel(response="a", delay_seconds=0.05, calls=[]),
+            SlowChatModel(response="b", calls=[]),
+        ],
+        target_names=["model0", "model1"],
+        hedging=HedgingConfig(min_samples=1, default_delay_seconds=1),
+        latency_tracker=latency_tracker,
+    )
+    assert (await model.ainvoke("Hello")).content == "a"
+    # the duration of the whole response does not change the delay of streamed calls
+    assert model.get_hedge_delay_seconds() == 1
+    assert 0.05 <= model.get_hedge_delay_seconds(stream=False) < 1
+
+
+def create_tool(name: str) -> Dict[str, Any]:
+    return {
+        "type": "function",
+        "function": {
+            "name": name,
+            "description": f"Runs {name}",
+            "parameters": {"type": "object", "properties": {}},
+        },
+    }
+
+
+async def test_failover_binds_tools_to_bound_and_nested_models() -> None:
+    primary = SlowChatModel(response="primary", calls=[])
+    fallback = SlowChatModel(response="fallback", calls=[])
+    model = create_failover_model(primary, fallback)
+
+    bound = model.bind_tools([create_tool("search")])
+    assert isinstance(bound, FailoverChatModel)
+    # the targets are bindings now and the new tools replace the earlier ones
+    rebound = bound.bind_tools([create_tool("lookup")])
+    assert isinstance(rebound, FailoverChatModel)
+    for target in rebound.targets:
+        assert isinstance(target, RunnableBinding)
+        assert target.bound in (primary, fallback)
+        assert target.kwargs["tools"] == [create_tool("lookup")]
+    assert (await rebound.ainvoke("Hello")).content == "primary"
+
+    # a failover model can be a target of another one
+    nested = FailoverChatModel(
+        targets=[bound],
+        target_names=["inner"],
+        latency_tracker=LatencyTracker(),
+    ).bind_tools([create_tool("lookup")])
+    assert isinstance(nested, FailoverChatModel)
+    assert (await nested.ainvoke("Hello")).content == "primary"
+
+
+def test_model_factory_creates_fallbacks() -> None:
+    model = ModelFactory().get_model(
+        ChatModelConfig(
+            id="failover",
+            name="Failover",
+            description="Failover",
+            model=ModelConfig(
+                provider="bedrock",
+                model="us.anthropic.claude-3-5-haiku-20241022-v1:0",
+                time_to_first_token_seconds=5,
+                fallbacks=[
+                    ModelConfig(
+                        provider="bedrock",
+                        model="anthropic.claude-3-5-haiku-20241022-v1:0",
+                        region="us-west-2",
+                    )
+                ],
+            ),
+        )
+    )
+    assert isinstance(model, FailoverChatModel)
+    assert model.target_names == [
+        "bedrock/us.anthropic.claude-3-5-haiku-20241022-v1:0",
+        "bedrock/anthropic.claude-3-5-haiku-20241022-v1:0@us-west-2",
+    ]
+    fallback = model.targets[1]
+    assert isinstance(fallback, ChatBedrockConverseWithPromptCache)
+    assert fallback.region_name == "us-west-2"
+
+
+async def test_chat_completions_streaming_with_failover(
+    async_client: httpx.AsyncClient,
+) -> None:
+    print("")
+    test_container: SimpleContainer = await get_container_async()
+    test_container.register(
+        ModelFactory,
+        lambda c: MockModelFactory(
+            fn_get_model=lambda chat_model_config: create_failover_model(
+                SlowChatModel(response="primary", error=throttling_error(), calls=[]),
+                SlowChatModel(response="Barack Obama", calls=[]),
+            )
+        ),
+    )
+    model_configuration_cache: ExpiringCache[List[ChatModelConfig]] = (
+        test_container.resolve(ExpiringCache)
+    )
+    await model_configuration_cache.set(
+        [
+            ChatModelConfig(
+                id="failover",
+                name="Failover",
+                description="Failover",
+                type="langchain",
+                model=ModelConfig(
+                    provider="bedrock",
+                    model="us.anthropic.claude-3-5-haiku-20241022-v1:0",
+                ),
+            )
+        ]
+    )
+    try:
+        client = AsyncOpenAI(
+            api_key="fake-api-key",
+            base_url="http://localhost:5000/api/v1",
+            http_client=async_client,
+        )
+        stream: AsyncStream[ChatCompletionChunk] = await client.chat.completions.create(
+            messages=[{"role": "user", "content": "Who was the 44th president?"}],
+            model="Failover",
+            stream=True,
+        )
+        content: str = ""
+        async for chunk in stream:
+            if chunk.choices:
+                content += chunk.choices[0].delta.content or ""
+        # the tokens of the inner model are only sent once
+        assert content.strip() == "Barack Obama"
+    finally:
+        await model_configuration_cache.clear()
@@ -0,0 +1,158 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import List, Optional
+
+import httpx
+from openai import AsyncOpenAI, AsyncStream
+from openai.types.chat import ChatCompletionChunk
+from prometheus_client import REGISTRY
+
+from language_model_gateway.configs.config_schema import ChatModelConfig, ModelConfig
+from language_model_gateway.container.simple_container import SimpleContainer
+from language_model_gateway.gateway.api_container import get_container_async
+from language_model_gateway.gateway.models.model_factory import ModelFactory
+from language_model_gateway.gateway.utilities.expiring_cache import ExpiringCache
+from tests.gateway.mocks.mock_model_factory import MockModelFactory
+from tests.gateway.mocks.mock_slow_chat_model import SlowChatModel
+
+
+def get_sample_value(name: str, labels: dict[str, str]) -> float:
+    value: Optional[float] = REGISTRY.get_sample_value(name, labels)
+    return value or 0
+
+
+async def test_chat_completions_streaming_metrics(
+    async_client: httpx.AsyncClient,
+) -> None:
+    print("")
+    test_container: SimpleContainer = await get_container_async()
+    test_container.register(
+        ModelFactory,
+        lambda c: MockModelFactory(
+            fn_get_model=lambda chat_model_config: SlowChatModel(
+                response="Barack Obama",
+                calls=[],
+                usage_metadata={
+                    "input_tokens": 12,
+                    "output_tokens": 3,
+                    "total_tokens": 15,
+                },
+            )
+        ),
+    )
+    model_configuration_cache: ExpiringCache[List[ChatModelConfig]] = (
+        test_container.resolve(ExpiringCache)
+    )
+    await model_configuration_cache.set(
+        [
+            ChatModelConfig(
+                id="metrics",
+                name="Metrics",
+                description="Metrics",
+                type="langchain",
+                model=ModelConfig(
+                    provider="bedrock",
+                    model="us.anthropic.claude-3-5-haiku-20241022-v1:0",
+                ),
+            )
+        ]
+    )
+    labels: dict[str, str] = {"model": "Metrics", "provider": "bedrock"}
+    time_to_first_token_before: float = get_sample_value(
+        "chat_completion_time_to_first_token_seconds_count", labels
+    )
+    inter_token_before: float = get_sample_value(
+        "chat_completion_inter_token_latency_seconds_count", labels
+    )
+    duration_before: float = get_sample_value(
+        "chat_completion_duration_seconds_count", {**labels, "stream": "true"}
+    )
+    input_tokens_before: float = get_sample_value(
+        "chat_completion_tokens_total", {**labels, "direction": "input"}
+    )
+    output_tokens_before: float = get_sample_value(
+        "chat_completion_tokens_total", {**labels, "direction": "output"}
+    )
+    try:
+        client = AsyncOpenAI(
+            api_key="fake-api-key",
+            base_url="http://localhost:5000/api/v1",
+            http_client=async_client,
+        )
+        stream: AsyncStream[ChatCompletionChunk] = await client.chat.completions.create(
+            messages=[{"role": "user", "content": "Who was the 44th president?"}],
+            model="Metrics",
+            stream=True,
+        )
+        content: str = ""
+        async for chunk in stream:
+            if chunk.choices:
+                content += chunk.choices[0].delta.content or ""
+        assert content.strip() == "Barack Obama"
+
+        assert (
+            get_sample_value(
+                "chat_completion_time_to_first_token_seconds_count", labels
+            )
+            == time_to_first_token_before + 1
+        )
+        assert (
+            get_sample_value(
+                "chat_completion_inter_token_latency_seconds_count", labels
+            )
+            == inter_token_before + 1
+        )
+        assert (
+            get_sample_value(
+                "chat_completion_duration_seconds_count", {**labels, "stream": "true"}
+            )
+            == duration_before + 1
+        )
+        assert (
+            get_sample_value(
+                "chat_completion_tokens_total", {**labels, "direction": "input"}
+            )
+            == input_tokens_before + 12
+        )
+        assert (
+            get_sample_value(
+                "chat_completion_tokens_total", {**labels, "direction": "output"}
+            )
+            == output_tokens_before + 3
+        )
+    finally:
+        await model_configuration_cache.clear()
+
+
+def test_metrics_are_combined_across_workers(tmp_path: Path) -> None:
+    env: dict[str, str] = {**os.environ, "PROMETHEUS_MULTIPROC_DIR": str(tmp_path)}
+    # each process stands in for a uvicorn worker
+    worker_code: str = (
+        "from language_model_gateway.gateway.metrics.gateway_metrics import TOKENS\n"
+        "TOKENS.labels(model='m', provider='bedrock', direction='input').inc(5)\n"
+    )
+    for _ in range(2):
+        subprocess.run([sys.executable, "-c", worker_code], env=env, check=True)
+
+    scrape_code: str = (
+        "import asyncio, httpx\n"
+        "from language_model_gateway.gateway.metrics.metrics_app import create_metrics_app\n"
+        "async def main():\n"
+        "    transport = httpx.ASGITransport(app=create_metrics_app())\n"
+        "    async with httpx.AsyncClient(transport=transport, base_url='http://test') as c:\n"
+        "        print((await c.get('/')).text)\n"
+        "asyncio.run(main())\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", scrape_code],
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    assert (
+        'chat_completion_tokens_total{direction="input",model="m",provider="bedrock"} 10.0'
+        in result.stdout
+    )
@@ -0,0 +1,126 @@
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+from prometheus_client import REGISTRY
+from pytest_httpx import HTTPXMock
+
+from language_model_gateway.gateway.http.http_client_factory import HttpClientFactory
+
+
+async def test_http_client_factory_reuses_clients() -> None:
+    http_client_factory = HttpClientFactory()
+
+    async with http_client_factory.create_http_client(
+        base_url="http://agent", headers={"Authorization": "token"}
+    ) as client1:
+        pass
+    # the client is shared so it stays open after the context exits
+    assert not client1.is_closed
+
+    async with http_client_factory.create_http_client(
+        base_url="http://agent", headers={"Authorization": "token"}
+    ) as client2:
+        assert client2 is client1
+
+    # different default headers get their own client
+    client3: httpx.AsyncClient = http_client_factory.get_http_client(
+        base_url="http://agent"
+    )
+    assert client3 is not client1
+
+    await http_client_factory.aclose()
+    assert client1.is_closed
+    assert client3.is_closed
+
+
+async def test_http_client_factory_records_upstream_latency(
+    httpx_mock: HTTPXMock,
+) -> None:
+    httpx_mock.add_response(url="http://upstream-metrics/ping", text="pong")
+
+    def get_count() -> float:
+        return (
+            REGISTRY.get_sample_value(
+                "upstream_request_duration_seconds_count",
+                {"host": "upstream-metrics", "status_code": "200"},
+            )
+            or 0
+        )
+
+    count_before: float = get_count()
+    http_client_factory = HttpClientFactory()
+    client: httpx.AsyncClient = http_client_factory.get_http_client(
+        base_url="http://upstream-metrics"
+    )
+    response: httpx.Response = await client.get("/ping")
+    assert response.text == "pong"
+    assert get_count() == count_before + 1
+    await http_client_factory.aclose()
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self) -> None:
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+
+def test_http_client_factory_keeps_clients_per_loop() -> None:
+    server: ThreadingHTTPServer = ThreadingHTTPServer(
+        ("127.0.0.1", 0), KeepAliveHandler
+    )
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url: str = f"http://127.0.0.1:{server.server_address[1]}"
+    http_client_factory = HttpClientFactory()
+
+    async def get_client() -> httpx.AsyncClient:
+        client: httpx.AsyncClient = http_client_factory.get_http_client(
+            base_url=base_url
+        )
+        response: httpx.Response = await client.get("/")
+        assert response.text == "ok"
+        return client
+
+    try:
+        # a loop running in another thread keeps using its own client
+        other_loop: asyncio.AbstractEventLoop = asyncio.new_event_loop()
+        other_thread: threading.Thread = threading.Thread(
+            target=other_loop.run_forever, daemon=True
+        )
+        other_thread.start()
+        other_client: httpx.AsyncClient = asyncio.run_coroutine_threadsafe(
+            get_client(), other_loop
+        ).result(timeout=5)
+
+        closed_loop: asyncio.AbstractEventLoop = asyncio.new_event_loop()
+        closed_client: httpx.AsyncClient = closed_loop.run_until_complete(get_client())
+        closed_loop.close()
+
+        async def use_new_loop() -> None:
+            client: httpx.AsyncClient = await get_client()
+            assert client is not other_client and client is not closed_client
+            # the clients of the closed loop are dropped and the others closed with aclose()
+            await http_client_factory.aclose()
+            assert client.is_closed
+
+        asyncio.run(use_new_loop())
+        for _ in range(100):
+            if other_client.is_closed:
+                break
+            time.sleep(0.01)
+        assert other_client.is_closed
+        other_loop.call_soon_threadsafe(other_loop.stop)
+        other_thread.join(timeout=5)
+        other_loop.close()
+    finally:
+        server.shutdown()
+        server.server_close()
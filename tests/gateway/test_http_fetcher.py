@@ -0,0 +1,252 @@
+import asyncio
+import gzip
+from pathlib import Path
+from typing import List
+
+import httpx
+from pytest_httpx import HTTPXMock, IteratorStream
+
+from language_model_gateway.gateway.http.http_cache import HttpCache
+from language_model_gateway.gateway.http.http_client_factory import HttpClientFactory
+from language_model_gateway.gateway.http.http_fetcher import HttpFetcher
+
+
+def create_http_fetcher(
+    *,
+    tmp_path: Path,
+    max_size_bytes: int = 1024 * 1024,
+    max_connections_per_host: int = 4,
+) -> HttpFetcher:
+    return HttpFetcher(
+        http_client_factory=HttpClientFactory(),
+        http_cache=HttpCache(
+            cache_directory=str(tmp_path / "http_cache"), max_size_bytes=max_size_bytes
+        ),
+        max_connections_per_host=max_connections_per_host,
+    )
+
+
+async def test_http_fetcher_caches_fresh_responses(
+    httpx_mock: HTTPXMock, tmp_path: Path
+) -> None:
+    def get_response(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(
+            status_code=200,
+            headers={"Cache-Control": "max-age=60", "Content-Encoding": "gzip"},
+            stream=IteratorStream([gzip.compress(b"<html>cached</html>")]),
+        )
+
+    httpx_mock.add_callback(callback=get_response, url="https://example.com/page")
+    http_fetcher: HttpFetcher = create_http_fetcher(tmp_path=tmp_path)
+
+    first: httpx.Response = await http_fetcher.fetch_async(
+        url="https://example.com/page"
+    )
+    second: httpx.Response = await http_fetcher.fetch_async(
+        url="https://example.com/page"
+    )
+    assert first.text == "<html>cached</html>"
+    # the body is stored decoded so the cached response is not decoded again
+    assert second.text == "<html>cached</html>"
+    assert len(httpx_mock.get_requests()) == 1
+
+    # the cache survives a restart
+    restarted: HttpFetcher = create_http_fetcher(tmp_path=tmp_path)
+    third: httpx.Response = await restarted.fetch_async(url="https://example.com/page")
+    assert third.text == "<html>cached</html>"
+    assert len(httpx_mock.get_requests()) == 1
+
+
+async def test_http_fetcher_revalidates_stale_responses(
+    httpx_mock: HTTPXMock, tmp_path: Path
+) -> None:
+    httpx_mock.add_response(
+        url="https://example.com/doc.pdf",
+        headers={"Cache-Control": "no-cache", "ETag": '"v1"'},
+        content=b"%PDF-1.4 content",
+    )
+    httpx_mock.add_response(
+        url="https://example.com/doc.pdf",
+        status_code=304,
+        match_headers={"If-None-Match": '"v1"'},
+    )
+    http_fetcher: HttpFetcher = create_http_fetcher(tmp_path=tmp_path)
+
+    first: httpx.Response = await http_fetcher.fetch_async(
+        url="https://example.com/doc.pdf"
+    )
+    second: httpx.Response = await http_fetcher.fetch_async(
+        url="https://example.com/doc.pdf"
+    )
+    assert first.content == b"%PDF-1.4 content"
+    assert second.status_code == 200
+    assert second.content == b"%PDF-1.4 content"
+    assert len(httpx_mock.get_requests()) == 2
+
+
+async def test_http_fetcher_does_not_cache_no_store(
+    httpx_mock: HTTPXMock, tmp_path: Path
+) -> None:
+    httpx_mock.add_response(
+        url="https://example.com/private",
+        headers={"Cache-Control": "no-store"},
+        content=b"secret",
+        is_reusable=True,
+    )
+    http_fetcher: HttpFetcher = create_http_fetcher(tmp_path=tmp_path)
+
+    await http_fetcher.fetch_async(url="https://example.com/private")
+    await http_fetcher.fetch_async(url="https://example.com/private")
+    assert len(httpx_mock.get_requests()) == 2
+
+
+async def test_http_fetcher_does_not_cache_private(
+    httpx_mock: HTTPXMock, tmp_path: Path
+) -> None:
+    httpx_mock.add_response(
+        url="https://example.com/account",
+        headers={"Cache-Control": "private, max-age=60"},
+        content=b"account of one user",
+        is_reusable=True,
+    )
+    http_fetcher: HttpFetcher = create_http_fetcher(tmp_path=tmp_path)
+
+    await http_fetcher.fetch_async(url="https://example.com/account")
+    await http_fetcher.fetch_async(url="https://example.com/account")
+    assert len(httpx_mock.get_requests()) == 2
+
+
+async def test_http_fetcher_does_not_cache_authorized_or_cookies(
+    httpx_mock: HTTPXMock, tmp_path: Path
+) -> None:
+    httpx_mock.add_response(
+        url="https://example.com/me",
+        headers={"Cache-Control": "max-age=60"},
+        content=b"profile of one user",
+        is_reusable=True,
+    )
+    httpx_mock.add_response(
+        url="https://example.com/shared",
+        headers={"Cache-Control": "public, max-age=60", "Set-Cookie": "session=1"},
+        content=b"shared",
+        is_reusable=True,
+    )
+    http_fetcher: HttpFetcher = create_http_fetcher(tmp_path=tmp_path)
+
+    # a response to an authorized request is only stored if it is marked shareable
+    for _ in range(2):
+        await http_fetcher.fetch_async(
+            url="https://example.com/me", headers={"Authorization": "Bearer token"}
+        )
+    assert len(httpx_mock.get_requests(url="https://example.com/me")) == 2
+
+    for _ in range(2):
+        response: httpx.Response = await http_fetcher.fetch_async(
+            url="https://example.com/shared",
+            headers={"Authorization": "Bearer token"},
+        )
+    assert len(httpx_mock.get_requests(url="https://example.com/shared")) == 1
+    # the cookie of the first caller is not replayed
+    assert response.content == b"shared"
+    assert "set-cookie" not in response.headers
+
+
+async def test_http_fetcher_redacts_credentials_in_cache(
+    httpx_mock: HTTPXMock, tmp_path: Path
+) -> None:
+    httpx_mock.add_response(
+        url="https://example.com/api?api_key=secret-key&url=https%3A%2F%2Fexample.org",
+        headers={"Cache-Control": "max-age=60"},
+        content=b"scraped",
+    )
+    http_fetcher: HttpFetcher = create_http_fetcher(tmp_path=tmp_path)
+
+    response: httpx.Response = await http_fetcher.fetch_async(
+        url="https://example.com/api",
+        params={"api_key": "secret-key", "url": "https://example.org"},
+    )
+    assert response.content == b"scraped"
+    # the response is cached without the api key being written to disk
+    stored: bytes = b"".join(
+        path.read_bytes() for path in (tmp_path / "http_cache").iterdir()
+    )
+    assert b"scraped" in stored
+    assert b"secret-key" not in stored
+    assert b"api_key=REDACTED" in stored
+
+
+async def test_http_fetcher_collapses_concurrent_fetches(
+    httpx_mock: HTTPXMock, tmp_path: Path
+) -> None:
+    async def get_response(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(0.1)
+        return httpx.Response(status_code=200, content=b"shared")
+
+    httpx_mock.add_callback(callback=get_response, url="https://example.com/slow")
+    http_fetcher: HttpFetcher = create_http_fetcher(tmp_path=tmp_path)
+
+    responses: List[httpx.Response] = await asyncio.gather(
+        *[http_fetcher.fetch_async(url="https://example.com/slow") for _ in range(5)]
+    )
+    assert [r.text for r in responses] == ["shared"] * 5
+    assert len(httpx_mock.get_requests()) == 1
+
+
+async def test_http_fetcher_limits_requests_per_host(
+    httpx_mock: HTTPXMock, tmp_path: Path
+) -> None:
+    in_flight: int = 0
+    max_in_flight: int = 0
+
+    async def get_response(request: httpx.Request) -> httpx.Response:
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.05)
+        in_flight -= 1
+        return httpx.Response(status_code=200, content=b"page")
+
+    httpx_mock.add_callback(callback=get_response, is_reusable=True)
+    http_fetcher: HttpFetcher = create_http_fetcher(
+        tmp_path=tmp_path, max_connections_per_host=2
+    )
+
+    await asyncio.gather(
+        *[http_fetcher.fetch_async(url=f"https://example.com/{i}") for i in range(6)]
+    )
+    assert max_in_flight == 2
+    assert len(httpx_mock.get_requests()) == 6
+
+
+async def test_http_cache_evicts_least_recently_used(
+    httpx_mock: HTTPXMock, tmp_path: Path
+) -> None:
+    for name in ["a", "b", "c"]:
+        httpx_mock.add_response(
+            url=f"https://example.com/{name}",
+            headers={"Cache-Control": "max-age=60"},
+            content=name.encode("utf-8") * 40,
+        )
+    httpx_mock.add_response(
+        url="https://example.com/b",
+        headers={"Cache-Control": "max-age=60"},
+        content=b"b" * 40,
+    )
+    http_fetcher: HttpFetcher = create_http_fetcher(
+        tmp_path=tmp_path, max_size_bytes=100
+    )
+
+    await http_fetcher.fetch_async(url="https://example.com/a")
+    await http_fetcher.fetch_async(url="https://example.com/b")
+    await asyncio.sleep(0.01)
+    # a is used more recently than b so b is removed when c is stored
+    await http_fetcher.fetch_async(url="https://example.com/a")
+    await http_fetcher.fetch_async(url="https://example.com/c")
+    await http_fetcher.fetch_async(url="https://example.com/a")
+    await http_fetcher.fetch_async(url="https://example.com/b")
+    assert [str(r.url) for r in httpx_mock.get_requests()] == [
+        "https://example.com/a",
+        "https://example.com/b",
+        "https://example.com/c",
+        "https://example.com/b",
+    ]
@@ -0,0 +1,141 @@
+import random
+from typing import List
+
+import httpx
+import pytest
+from botocore.exceptions import ClientError
+from langchain_openai import ChatOpenAI
+
+from language_model_gateway.configs.config_schema import (
+    ChatModelConfig,
+    ModelConfig,
+    ModelEndpointConfig,
+)
+from language_model_gateway.container.simple_container import SimpleContainer
+from language_model_gateway.gateway.api import create_app
+from language_model_gateway.gateway.api_container import get_container_async
+from language_model_gateway.gateway.models.chat_bedrock_converse_with_prompt_cache import (
+    ChatBedrockConverseWithPromptCache,
+)
+from language_model_gateway.gateway.models.endpoint_router import EndpointRouter
+from language_model_gateway.gateway.models.load_balanced_chat_model import (
+    LoadBalancedChatModel,
+)
+from language_model_gateway.gateway.models.model_factory import ModelFactory
+from tests.gateway.mocks.mock_slow_chat_model import SlowChatModel
+
+
+def test_endpoint_router_prefers_fast_idle_endpoints() -> None:
+    router: EndpointRouter = EndpointRouter(random_generator=random.Random(42))
+    keys: List[str] = ["us-east-1", "us-west-2", "eu-west-1"]
+    for key, latency_seconds in zip(keys, [0.5, 0.1, 2.0]):
+        router.start(key=key)
+        router.finish(key=key, latency_seconds=latency_seconds, error=False)
+
+    chosen: List[str] = [keys[router.choose(keys=keys)] for _ in range(100)]
+    # the slowest endpoint loses every comparison
+    assert "eu-west-1" not in chosen
+    assert chosen.count("us-west-2") > chosen.count("us-east-1")
+
+    # requests in flight make the fast endpoint look slower
+    for _ in range(10):
+        router.start(key="us-west-2")
+    assert router.choose(keys=keys[:2]) == 0
+
+    # errors add a penalty
+    router.start(key="us-east-1")
+    router.finish(key="us-east-1", latency_seconds=None, error=True)
+    state = router.get_state()
+    assert state["us-east-1"]["errors"] == 1
+    assert state["us-east-1"]["ewma_error_rate"] > 0
+    assert state["us-west-2"]["in_flight"] == 10
+
+
+async def test_load_balanced_model_retries_another_endpoint() -> None:
+    router: EndpointRouter = EndpointRouter()
+    throttled = SlowChatModel(
+        response="throttled",
+        error=ClientError(
+            error_response={"Error": {"Code": "ThrottlingException"}},
+            operation_name="ConverseStream",
+        ),
+        calls=[],
+    )
+    healthy = SlowChatModel(response="Barack Obama", calls=[])
+    model = LoadBalancedChatModel(
+        targets=[throttled, healthy],
+        target_names=["us-east-1", "us-west-2"],
+        router=router,
+    )
+
+    for _ in range(5):
+        content: str = "".join(
+            [str(chunk.content) async for chunk in model.astream("Hello")]
+        )
+        assert content == "Barack Obama "
+        assert (await model.ainvoke("Hello")).content == "Barack Obama"
+
+    state = router.get_state()
+    assert state["us-east-1"]["errors"] == len(throttled.calls)
+    assert state["us-west-2"]["requests"] == 10
+    assert state["us-west-2"]["in_flight"] == 0
+    assert state["us-east-1"]["cost"] > state["us-west-2"]["cost"]
+
+
+def test_model_factory_creates_endpoints(monkeypatch: pytest.MonkeyPatch) -> None:
+    # ChatOpenAI requires a key even though the endpoint is not called
+    monkeypatch.setenv("OPENAI_API_KEY", "fake-api-key")
+    model = ModelFactory().get_model(
+        ChatModelConfig(
+            id="load_balanced",
+            name="Load Balanced",
+            description="Load Balanced",
+            model=ModelConfig(
+                provider="bedrock",
+                model="us.anthropic.claude-3-5-haiku-20241022-v1:0",
+                endpoints=[
+                    ModelEndpointConfig(region="us-east-1"),
+                    ModelEndpointConfig(region="us-west-2"),
+                    ModelEndpointConfig(
+                        provider="openai",
+                        model="claude-3-5-haiku",
+                        url="http://litellm:4000/v1",
+                    ),
+                ],
+            ),
+        )
+    )
+    assert isinstance(model, LoadBalancedChatModel)
+    assert model.target_names == [
+        "bedrock/us.anthropic.claude-3-5-haiku-20241022-v1:0@us-east-1",
+        "bedrock/us.anthropic.claude-3-5-haiku-20241022-v1:0@us-west-2",
+        "openai/claude-3-5-haiku@http://litellm:4000/v1",
+    ]
+    bedrock_endpoint = model.targets[1]
+    assert isinstance(bedrock_endpoint, ChatBedrockConverseWithPromptCache)
+    assert bedrock_endpoint.region_name == "us-west-2"
+    openai_endpoint = model.targets[2]
+    assert isinstance(openai_endpoint, ChatOpenAI)
+    assert openai_endpoint.openai_api_base == "http://litellm:4000/v1"
+
+
+async def test_admin_endpoints(
+    async_client: httpx.AsyncClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    # the admin endpoints are off by default
+    response: httpx.Response = await async_client.get("/admin/endpoints")
+    assert response.status_code == 404
+
+    test_container: SimpleContainer = await get_container_async()
+    router: EndpointRouter = test_container.resolve(EndpointRouter)
+    router.start(key="bedrock/model@us-east-1")
+    router.finish(key="bedrock/model@us-east-1", latency_seconds=0.2, error=False)
+
+    monkeypatch.setenv("ENABLE_ADMIN_ENDPOINTS", "1")
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=create_app()), base_url="http://test"
+    ) as admin_client:
+        response = await admin_client.get("/admin/endpoints")
+    assert response.status_code == 200
+    endpoints = response.json()["endpoints"]
+    assert endpoints["bedrock/model@us-east-1"]["ewma_latency_seconds"] == 0.2
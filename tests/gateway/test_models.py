@@ -1,8 +1,18 @@
+import time
+from typing import List
+
 import httpx
+import pytest
 from openai import AsyncOpenAI
 from openai.pagination import AsyncPage
 from openai.types import Model
 
+from language_model_gateway.configs.config_reader.config_reader import ConfigReader
+from language_model_gateway.configs.config_schema import ChatModelConfig
+from language_model_gateway.configs.model_registry import ModelRegistry
+from language_model_gateway.container.simple_container import SimpleContainer
+from language_model_gateway.gateway.api_container import get_container_async
+
 
 async def test_models(async_client: httpx.AsyncClient) -> None:
     # init client and connect to localhost server
@@ -22,3 +32,43 @@ async def test_models(async_client: httpx.AsyncClient) -> None:
         assert model.id
 
     assert i > 0, f"Expected at least one model, but got {i}"
+
+
+async def test_models_etag(async_client: httpx.AsyncClient) -> None:
+    response: httpx.Response = await async_client.get("/api/v1/models")
+    assert response.status_code == 200
+    etag: str | None = response.headers.get("ETag")
+    assert etag
+
+    # the same etag is returned until the model configurations are reloaded
+    response = await async_client.get("/api/v1/models")
+    assert response.headers.get("ETag") == etag
+
+    response = await async_client.get("/api/v1/models", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+
+    # reloading the same model configurations rebuilds the registry but keeps the etag
+    test_container: SimpleContainer = await get_container_async()
+    config_reader: ConfigReader = test_container.resolve(ConfigReader)
+    await config_reader.clear_cache()
+    configs: List[ChatModelConfig] = await config_reader.read_model_configs_async()
+    # built with the configurations instead of on the first lookup
+    assert ConfigReader._model_registry is not None
+    assert ConfigReader._model_registry.configs is configs
+    response = await async_client.get("/api/v1/models", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+
+
+def test_model_registry_etag_does_not_depend_on_build_time(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    configs: List[ChatModelConfig] = [
+        ChatModelConfig(id="general", name="General", description="General")
+    ]
+    first: ModelRegistry = ModelRegistry(configs=configs)
+    built_at: float = time.time()
+    monkeypatch.setattr(time, "time", lambda: built_at + 3600)
+    second: ModelRegistry = ModelRegistry(configs=list(configs))
+    assert second.models_response_body != first.models_response_body
+    assert second.models_response_etag == first.models_response_etag
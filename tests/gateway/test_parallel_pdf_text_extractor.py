@@ -0,0 +1,159 @@
+import base64
+from typing import Any, List, Tuple
+
+from langchain_core.runnables.schema import StreamEvent
+
+from language_model_gateway.gateway.aws.aws_client_factory import AwsClientFactory
+from language_model_gateway.gateway.file_managers.file_manager_factory import (
+    FileManagerFactory,
+)
+from language_model_gateway.gateway.http.http_client_factory import HttpClientFactory
+from language_model_gateway.gateway.http.http_fetcher import HttpFetcher
+from language_model_gateway.gateway.ocr.ocr_extractor_factory import OCRExtractorFactory
+from language_model_gateway.gateway.tools.pdf_extraction_tool import PDFExtractionTool
+from language_model_gateway.gateway.tools.resilient_base_tool import (
+    TOOL_PROGRESS_EVENT,
+)
+from language_model_gateway.gateway.utilities.content_cache import ContentCache
+from language_model_gateway.gateway.utilities.parallel_pdf_text_extractor import (
+    ParallelPdfTextExtractor,
+    PdfTextExtractionResult,
+)
+from language_model_gateway.gateway.utilities.parser_pool import ParserPool
+
+
+def create_pdf(page_count: int) -> bytes:
+    """Creates a PDF whose page i has the text 'Page i'"""
+    objects: List[bytes] = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids ["
+        + b" ".join(f"{4 + 2 * i} 0 R".encode() for i in range(page_count))
+        + f"] /Count {page_count} >>".encode(),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    for i in range(page_count):
+        stream: bytes = f"BT /F1 12 Tf 72 720 Td (Page {i}) Tj ET".encode()
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * i} 0 R >>".encode()
+        )
+        objects.append(
+            f"<< /Length {len(stream)} >>\nstream\n".encode() + stream + b"\nendstream"
+        )
+    pdf: bytes = b"%PDF-1.4\n"
+    offsets: List[int] = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(pdf))
+        pdf += f"{number} 0 obj\n".encode() + body + b"\nendobj\n"
+    xref_offset: int = len(pdf)
+    pdf += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    pdf += b"".join(f"{offset:010d} 00000 n \n".encode() for offset in offsets)
+    pdf += (
+        f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\n"
+        f"startxref\n{xref_offset}\n%%EOF\n"
+    ).encode()
+    return pdf
+
+
+async def test_parallel_pdf_text_extractor_extracts_pages_in_order() -> None:
+    progress: List[Tuple[int, int]] = []
+
+    async def on_progress(first: int, last: int) -> None:
+        progress.append((first, last))
+
+    extractor: ParallelPdfTextExtractor = ParallelPdfTextExtractor(
+        parser_pool=ParserPool(pool_type="thread", max_workers=2), pages_per_job=2
+    )
+    result: PdfTextExtractionResult = await extractor.extract_text_async(
+        pdf_bytes=create_pdf(5), total_pages=5, fn_progress=on_progress
+    )
+    assert result.text.split() == [word for i in range(5) for word in ("Page", str(i))]
+    assert progress == [(0, 1), (2, 3), (4, 4)]
+    assert result.end_page == 4
+    assert not result.truncated
+
+
+async def test_parallel_pdf_text_extractor_stops_at_max_characters() -> None:
+    progress: List[Tuple[int, int]] = []
+
+    async def on_progress(first: int, last: int) -> None:
+        progress.append((first, last))
+
+    extractor: ParallelPdfTextExtractor = ParallelPdfTextExtractor(
+        parser_pool=ParserPool(pool_type="thread", max_workers=1),
+        pages_per_job=1,
+        jobs_per_worker=8,
+    )
+    result: PdfTextExtractionResult = await extractor.extract_text_async(
+        pdf_bytes=create_pdf(10),
+        total_pages=10,
+        start_page=2,
+        max_characters=10,
+        fn_progress=on_progress,
+    )
+    # each page is 'Page n' and a newline so the budget is reached on the second page
+    assert progress == [(2, 2), (3, 3)]
+    assert result.text == "Page 2\nPag"
+    assert result.end_page == 3
+    assert result.truncated
+
+
+def test_parallel_pdf_text_extractor_limits_jobs_per_worker() -> None:
+    extractor: ParallelPdfTextExtractor = ParallelPdfTextExtractor(
+        parser_pool=ParserPool(pool_type="thread", max_workers=2),
+        pages_per_job=1,
+        jobs_per_worker=4,
+    )
+    # every job parses the whole PDF so a large one is not split into a job per page
+    page_ranges: List[Tuple[int, int]] = extractor.get_page_ranges(
+        start_page=0, end_page=99
+    )
+    assert len(page_ranges) == 8
+    assert page_ranges[0] == (0, 12) and page_ranges[-1] == (91, 99)
+    # small PDFs still get pages_per_job pages per job
+    assert len(extractor.get_page_ranges(start_page=0, end_page=3)) == 4
+
+
+async def test_pdf_extraction_tool_streams_progress() -> None:
+    tool: PDFExtractionTool = PDFExtractionTool(
+        ocr_extractor_factory=OCRExtractorFactory(
+            aws_client_factory=AwsClientFactory(),
+            file_manager_factory=FileManagerFactory(
+                aws_client_factory=AwsClientFactory()
+            ),
+        ),
+        http_fetcher=HttpFetcher(
+            http_client_factory=HttpClientFactory(), http_cache=None
+        ),
+        content_cache=ContentCache(
+            max_memory_size_bytes=1024 * 1024,
+            cache_directory=None,
+            max_disk_size_bytes=1024 * 1024,
+        ),
+        parser_pool=ParserPool(pool_type="thread"),
+        pages_per_job=2,
+    )
+    tool_input: dict[str, Any] = {
+        "base64_pdf": base64.b64encode(create_pdf(3)).decode("utf-8")
+    }
+    events: List[StreamEvent] = [
+        event async for event in tool.astream_events(tool_input, version="v2")
+    ]
+    assert [
+        event["data"].get("artifact")
+        for event in events
+        if event["event"] == "on_custom_event" and event["name"] == TOOL_PROGRESS_EVENT
+    ] == [
+        "PDFExtractionAgent: Extracted text from pages 0 to 1 of 3",
+        "PDFExtractionAgent: Extracted text from pages 2 to 2 of 3",
+    ]
+    text, artifact = await tool._arun(**tool_input, max_characters=7)
+    assert text == "Page 0"
+    # the budget was reached in the first job so only its pages were extracted
+    assert artifact.startswith("PDFExtractionAgent: Extracted text from pages 0 to 1 ")
+    assert "Stopped after 7 characters" in artifact
+    # a cache hit reports the same pages
+    assert await tool._arun(**tool_input, max_characters=7) == (text, artifact)
+    text, artifact = await tool._arun(**tool_input)
+    assert artifact.startswith("PDFExtractionAgent: Extracted text from pages 0 to 2 ")
+    assert "Stopped after" not in artifact
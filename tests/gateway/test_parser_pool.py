@@ -0,0 +1,92 @@
+import asyncio
+import os
+import signal
+import time
+
+import pytest
+
+from language_model_gateway.gateway.utilities.html_to_markdown_converter import (
+    HtmlToMarkdownConverter,
+)
+from language_model_gateway.gateway.utilities.parser_pool import (
+    ParserPool,
+    ParserPoolFullError,
+)
+
+
+def ignore_timeout_and_sleep(seconds: float) -> int:
+    """Behaves like a job stuck in native code that the worker cannot interrupt"""
+    signal.signal(signal.SIGALRM, signal.SIG_IGN)
+    time.sleep(seconds)
+    return os.getpid()
+
+
+async def test_parser_pool_runs_jobs_in_worker_processes() -> None:
+    parser_pool: ParserPool = ParserPool(max_workers=1, timeout_seconds=0.5)
+    try:
+        markdown: str = await parser_pool.run_async(
+            HtmlToMarkdownConverter.get_markdown_from_html, "<h1>Title</h1>"
+        )
+        assert markdown.strip() == "Title\n====="
+
+        # the job is interrupted inside the worker
+        started_at: float = time.monotonic()
+        with pytest.raises(TimeoutError):
+            await parser_pool.run_async(time.sleep, 10)
+        assert time.monotonic() - started_at < 5
+
+        # and the worker can run the next job
+        assert (
+            await parser_pool.run_async(
+                HtmlToMarkdownConverter.get_plain_text_from_html, "<p>Hello</p>"
+            )
+            == "Hello"
+        )
+    finally:
+        parser_pool.shutdown()
+
+
+async def test_parser_pool_caps_worker_memory() -> None:
+    parser_pool: ParserPool = ParserPool(
+        max_workers=1, max_memory_bytes=1024 * 1024 * 1024
+    )
+    try:
+        with pytest.raises(MemoryError):
+            await parser_pool.run_async(bytearray, 2 * 1024 * 1024 * 1024)
+    finally:
+        parser_pool.shutdown()
+
+
+async def test_parser_pool_rejects_jobs_when_full() -> None:
+    parser_pool: ParserPool = ParserPool(
+        pool_type="thread", max_workers=1, max_queue_size=1
+    )
+    try:
+        jobs = [
+            asyncio.create_task(parser_pool.run_async(time.sleep, 0.2))
+            for _ in range(2)
+        ]
+        await asyncio.sleep(0.05)
+        with pytest.raises(ParserPoolFullError):
+            await parser_pool.run_async(time.sleep, 0.2)
+        await asyncio.gather(*jobs)
+        # there is room again once the jobs finish
+        await parser_pool.run_async(time.sleep, 0)
+    finally:
+        parser_pool.shutdown()
+
+
+async def test_parser_pool_kills_stuck_workers() -> None:
+    parser_pool: ParserPool = ParserPool(max_workers=1, timeout_seconds=0.5)
+    try:
+        worker_pid: int = await parser_pool.run_async(ignore_timeout_and_sleep, 0)
+        with pytest.raises(TimeoutError):
+            await parser_pool.run_async(ignore_timeout_and_sleep, 60)
+        # the stuck worker is killed instead of being left running
+        await asyncio.sleep(0.5)
+        with pytest.raises(ProcessLookupError):
+            os.kill(worker_pid, 0)
+        # and later jobs run in a new worker
+        assert await parser_pool.run_async(ignore_timeout_and_sleep, 0) != worker_pid
+    finally:
+        parser_pool.shutdown()
@@ -0,0 +1,257 @@
+import base64
+import json
+from typing import List, Optional, Tuple
+from unittest.mock import MagicMock
+
+import httpx
+from starlette.datastructures import Headers
+
+from language_model_gateway.configs.config_schema import ChatModelConfig, ModelConfig
+from language_model_gateway.container.simple_container import SimpleContainer
+from language_model_gateway.gateway.api_container import get_container_async
+from language_model_gateway.gateway.http.rate_limit_middleware import (
+    RateLimitMiddleware,
+    UsageMeter,
+)
+from language_model_gateway.gateway.models.model_factory import ModelFactory
+from language_model_gateway.gateway.utilities.expiring_cache import ExpiringCache
+from language_model_gateway.gateway.utilities.rate_limit_store import (
+    InMemoryRateLimitStore,
+    RateLimitStore,
+)
+from language_model_gateway.gateway.utilities.rate_limiter import RateLimiter
+from tests.gateway.mocks.mock_chat_model import MockChatModel
+from tests.gateway.mocks.mock_model_factory import MockModelFactory
+from tests.gateway.mocks.mock_slow_chat_model import SlowChatModel
+
+
+class LocalSharedRateLimitStore(RateLimitStore):
+    """Stands in for a store shared between workers (e.g. Redis)"""
+
+    def __init__(self) -> None:
+        self.shared: InMemoryRateLimitStore = InMemoryRateLimitStore(max_size=100)
+        self.keys: List[str] = []
+
+    async def consume_async(
+        self,
+        *,
+        key: str,
+        amount: float,
+        capacity: float,
+        refill_per_second: float,
+        allow_debt: bool,
+    ) -> float:
+        self.keys.append(key)
+        return await self.shared.consume_async(
+            key=key,
+            amount=amount,
+            capacity=capacity,
+            refill_per_second=refill_per_second,
+            allow_debt=allow_debt,
+        )
+
+
+async def test_rate_limit_requests_per_minute(
+    async_client: httpx.AsyncClient,
+) -> None:
+    print("")
+    test_container: SimpleContainer = await get_container_async()
+    test_container.register(
+        ModelFactory,
+        lambda c: MockModelFactory(
+            fn_get_model=lambda chat_model_config: MockChatModel(
+                fn_get_response=lambda messages: "Barack"
+            )
+        ),
+    )
+    test_container.lazy_singleton(
+        RateLimiter,
+        lambda c: RateLimiter(
+            store=InMemoryRateLimitStore(max_size=100), requests_per_minute=2
+        ),
+    )
+    model_configuration_cache: ExpiringCache[List[ChatModelConfig]] = (
+        test_container.resolve(ExpiringCache)
+    )
+    await model_configuration_cache.set(
+        [
+            ChatModelConfig(
+                id="rate_limit",
+                name="Rate Limit",
+                description="Rate Limit",
+                type="langchain",
+                model=ModelConfig(
+                    provider="bedrock",
+                    model="us.anthropic.claude-3-5-haiku-20241022-v1:0",
+                ),
+            )
+        ]
+    )
+
+    async def post(headers: dict[str, str]) -> httpx.Response:
+        return await async_client.post(
+            "/api/v1/chat/completions",
+            json={
+                "model": "Rate Limit",
+                "messages": [{"role": "user", "content": "Hello"}],
+            },
+            headers=headers,
+        )
+
+    try:
+        for _ in range(2):
+            assert (await post({"X-OpenWebUI-User-Id": "alice"})).status_code == 200
+        response: httpx.Response = await post({"X-OpenWebUI-User-Id": "alice"})
+        assert response.status_code == 429
+        assert int(response.headers["Retry-After"]) >= 1
+
+        # other tenants and requests without a tenant are not affected
+        assert (await post({"X-OpenWebUI-User-Id": "bob"})).status_code == 200
+        assert (await post({})).status_code == 200
+    finally:
+        await model_configuration_cache.clear()
+
+
+async def test_rate_limit_tokens_per_minute_with_shared_store() -> None:
+    store: LocalSharedRateLimitStore = LocalSharedRateLimitStore()
+    # two workers sharing the store
+    worker1: RateLimiter = RateLimiter(store=store, tokens_per_minute=100)
+    worker2: RateLimiter = RateLimiter(store=store, tokens_per_minute=100)
+
+    assert await worker1.check_request_async(key="alice") == 0
+    # the response used more tokens than the budget so the tenant owes tokens
+    await worker1.charge_tokens_async(key="alice", tokens=150)
+
+    retry_after_seconds: float = await worker2.check_request_async(key="alice")
+    # 50 tokens owed at 100 tokens a minute
+    assert 29 < retry_after_seconds <= 30
+    assert await worker2.check_request_async(key="bob") == 0
+    assert "tpm:alice" in store.keys
+
+
+def test_usage_meter_reads_usage_of_responses() -> None:
+    usage_meter: UsageMeter = UsageMeter()
+    usage_meter.observe(
+        {
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [(b"content-type", b"text/event-stream; charset=utf-8")],
+        }
+    )
+    chunks: str = (
+        'data: {"choices": [], "usage": {"total_tokens": 12}}\n\n'
+        'data: {"choices": [], "usage": {"total_tokens": 12}}\n\n'
+        "data: [DONE]\n\n"
+    )
+    # split inside an event
+    for body in [chunks[:30].encode(), chunks[30:].encode()]:
+        usage_meter.observe(
+            {"type": "http.response.body", "body": body, "more_body": True}
+        )
+    # the last usage frame has the usage of the whole response
+    assert usage_meter.total_tokens == 12
+
+    usage_meter = UsageMeter()
+    usage_meter.observe(
+        {
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [(b"content-type", b"application/json")],
+        }
+    )
+    usage_meter.observe(
+        {
+            "type": "http.response.body",
+            "body": json.dumps({"usage": {"total_tokens": 7}}).encode(),
+        }
+    )
+    assert usage_meter.total_tokens == 7
+
+
+def test_rate_limit_key_from_bearer_token() -> None:
+    middleware: RateLimitMiddleware = RateLimitMiddleware(
+        app=MagicMock(), key_header="authorization"
+    )
+    payload: str = (
+        base64.urlsafe_b64encode(json.dumps({"sub": "user-1"}).encode())
+        .decode()
+        .rstrip("=")
+    )
+    key: Optional[str] = middleware.get_key(
+        headers=Headers({"Authorization": f"Bearer header.{payload}.signature"})
+    )
+    assert key is not None and "user-1" not in key
+    # a token with a forged signature for the same subject is a different tenant
+    assert key != middleware.get_key(
+        headers=Headers({"Authorization": f"Bearer header.{payload}.forged"})
+    )
+    assert middleware.get_key(headers=Headers({})) is None
+
+
+class RecordingRateLimiter(RateLimiter):
+    """Records the tokens charged to each tenant"""
+
+    def __init__(self) -> None:
+        super().__init__(
+            store=InMemoryRateLimitStore(max_size=100), tokens_per_minute=1000
+        )
+        self.charged: List[Tuple[str, int]] = []
+
+    async def charge_tokens_async(self, *, key: str, tokens: int) -> None:
+        self.charged.append((key, tokens))
+        await super().charge_tokens_async(key=key, tokens=tokens)
+
+
+async def test_rate_limit_charges_usage_of_agent_stream_once(
+    async_client: httpx.AsyncClient,
+) -> None:
+    test_container: SimpleContainer = await get_container_async()
+    test_container.register(
+        ModelFactory,
+        lambda c: MockModelFactory(
+            fn_get_model=lambda chat_model_config: SlowChatModel(
+                response="hi there",
+                calls=[],
+                usage_metadata={
+                    "input_tokens": 10,
+                    "output_tokens": 5,
+                    "total_tokens": 15,
+                },
+            )
+        ),
+    )
+    rate_limiter: RecordingRateLimiter = RecordingRateLimiter()
+    test_container.singleton(RateLimiter, rate_limiter)
+    model_configuration_cache: ExpiringCache[List[ChatModelConfig]] = (
+        test_container.resolve(ExpiringCache)
+    )
+    await model_configuration_cache.set(
+        [
+            ChatModelConfig(
+                id="rate_limit",
+                name="Rate Limit",
+                description="Rate Limit",
+                type="langchain",
+                model=ModelConfig(
+                    provider="bedrock",
+                    model="us.anthropic.claude-3-5-haiku-20241022-v1:0",
+                ),
+            )
+        ]
+    )
+    try:
+        response: httpx.Response = await async_client.post(
+            "/api/v1/chat/completions",
+            json={
+                "model": "Rate Limit",
+                "messages": [{"role": "user", "content": "Hello"}],
+                "stream": True,
+            },
+            headers={"X-OpenWebUI-User-Id": "alice"},
+        )
+        assert response.status_code == 200
+        # the graph sends a usage frame as each of its nodes ends
+        assert response.text.count('"total_tokens": 15') > 1
+        assert rate_limiter.charged == [("alice", 15)]
+    finally:
+        await model_configuration_cache.clear()
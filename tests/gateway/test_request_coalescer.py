@@ -0,0 +1,178 @@
+import asyncio
+from typing import AsyncGenerator, AsyncIterator, List, Set, cast
+
+from starlette.responses import JSONResponse, StreamingResponse
+
+from language_model_gateway.configs.config_schema import ChatModelConfig
+from language_model_gateway.gateway.schema.openai.completions import ChatRequest
+from language_model_gateway.gateway.utilities.request_coalescer import (
+    RequestCoalescer,
+)
+from language_model_gateway.gateway.utilities.response_cache import ResponseCache
+
+
+async def test_request_coalescer_shares_non_streaming_response() -> None:
+    coalescer = RequestCoalescer()
+    calls: List[str] = []
+
+    async def call() -> StreamingResponse | JSONResponse:
+        calls.append("called")
+        await asyncio.sleep(0.05)
+        return JSONResponse(content={"answer": len(calls)})
+
+    responses = await asyncio.gather(
+        *[
+            coalescer.run_async(key="1", model="test", max_wait_seconds=10, fn=call)
+            for _ in range(3)
+        ]
+    )
+    assert len(calls) == 1
+    assert [r.body for r in responses] == [b'{"answer":1}'] * 3
+    # each request gets its own response object
+    assert len({id(r) for r in responses}) == 3
+
+    # a request after the call finished makes its own call
+    await coalescer.run_async(key="1", model="test", max_wait_seconds=10, fn=call)
+    assert len(calls) == 2
+
+
+async def test_request_coalescer_does_not_wait_longer_than_max_wait() -> None:
+    coalescer = RequestCoalescer()
+    calls: List[str] = []
+
+    async def call() -> StreamingResponse | JSONResponse:
+        calls.append("called")
+        answer: int = len(calls)
+        await asyncio.sleep(0.2 if answer == 1 else 0)
+        return JSONResponse(content={"answer": answer})
+
+    first = asyncio.create_task(
+        coalescer.run_async(key="1", model="test", max_wait_seconds=0.05, fn=call)
+    )
+    await asyncio.sleep(0)
+    second: StreamingResponse | JSONResponse = await coalescer.run_async(
+        key="1", model="test", max_wait_seconds=0.05, fn=call
+    )
+    assert second.body == b'{"answer":2}'
+    assert (await first).body == b'{"answer":1}'
+
+
+async def read_async(iterator: AsyncIterator[str]) -> str:
+    return await iterator.__anext__()
+
+
+async def test_request_coalescer_replays_stream_to_late_joiners() -> None:
+    coalescer = RequestCoalescer()
+    calls: List[str] = []
+    release: asyncio.Event = asyncio.Event()
+
+    async def generate() -> AsyncGenerator[str, None]:
+        yield "a"
+        await release.wait()
+        yield "b"
+
+    async def call() -> StreamingResponse | JSONResponse:
+        calls.append("called")
+        return StreamingResponse(content=generate(), media_type="text/event-stream")
+
+    first: StreamingResponse | JSONResponse = await coalescer.run_async(
+        key="1", model="test", max_wait_seconds=10, fn=call
+    )
+    assert isinstance(first, StreamingResponse)
+    first_iterator = cast(AsyncIterator[str], first.body_iterator)
+    assert await read_async(first_iterator) == "a"
+
+    # the late joiner gets the buffered prefix and then the live tail
+    second: StreamingResponse | JSONResponse = await coalescer.run_async(
+        key="1", model="test", max_wait_seconds=10, fn=call
+    )
+    assert isinstance(second, StreamingResponse)
+    assert second.media_type == "text/event-stream"
+    second_iterator = cast(AsyncIterator[str], second.body_iterator)
+    assert await read_async(second_iterator) == "a"
+
+    release.set()
+    assert await read_async(first_iterator) == "b"
+    assert await read_async(second_iterator) == "b"
+    assert len(calls) == 1
+
+
+async def test_request_coalescer_cancels_stream_when_all_subscribers_leave() -> None:
+    coalescer = RequestCoalescer()
+    closed: asyncio.Event = asyncio.Event()
+
+    async def generate() -> AsyncGenerator[str, None]:
+        try:
+            yield "a"
+            await asyncio.sleep(10)
+            yield "b"
+        finally:
+            closed.set()
+
+    async def call() -> StreamingResponse | JSONResponse:
+        return StreamingResponse(content=generate())
+
+    response: StreamingResponse | JSONResponse = await coalescer.run_async(
+        key="1", model="test", max_wait_seconds=10, fn=call
+    )
+    assert isinstance(response, StreamingResponse)
+    iterator = cast(AsyncGenerator[str, None], response.body_iterator)
+    assert await iterator.__anext__() == "a"
+    await iterator.aclose()
+
+    await asyncio.wait_for(closed.wait(), timeout=1)
+
+
+async def test_request_coalescer_does_not_join_large_streams() -> None:
+    coalescer = RequestCoalescer()
+    calls: List[str] = []
+    release: asyncio.Event = asyncio.Event()
+
+    async def generate() -> AsyncGenerator[str, None]:
+        yield "ab"
+        await release.wait()
+        yield "c"
+
+    async def call() -> StreamingResponse | JSONResponse:
+        calls.append("called")
+        return StreamingResponse(content=generate(), media_type="text/event-stream")
+
+    first: StreamingResponse | JSONResponse = await coalescer.run_async(
+        key="1", model="test", max_wait_seconds=10, fn=call, max_buffer_bytes=1
+    )
+    assert isinstance(first, StreamingResponse)
+    first_iterator = cast(AsyncIterator[str], first.body_iterator)
+    assert await read_async(first_iterator) == "ab"
+
+    # more than max_buffer_bytes would have to be replayed so the request makes its own call
+    second: StreamingResponse | JSONResponse = await coalescer.run_async(
+        key="1", model="test", max_wait_seconds=10, fn=call, max_buffer_bytes=1
+    )
+    assert len(calls) == 2
+    assert isinstance(second, StreamingResponse)
+    second_iterator = cast(AsyncIterator[str], second.body_iterator)
+    assert await read_async(second_iterator) == "ab"
+
+    release.set()
+    assert await read_async(first_iterator) == "c"
+    assert await read_async(second_iterator) == "c"
+
+
+def test_request_coalescer_key_includes_caller() -> None:
+    model_config: ChatModelConfig = ChatModelConfig(
+        id="coalescing", name="Coalescing", description="Coalescing", type="openai"
+    )
+    chat_request: ChatRequest = ChatRequest(
+        model="Coalescing", messages=[{"role": "user", "content": "Hello"}]
+    )
+    keys: Set[str] = {
+        ResponseCache.get_key(
+            model_config=model_config, chat_request=chat_request, headers=headers
+        )
+        for headers in [
+            {"x-openwebui-user-id": "a"},
+            {"x-openwebui-user-id": "b"},
+            {"Authorization": "Bearer a"},
+        ]
+    }
+    assert len(keys) == 3
@@ -0,0 +1,138 @@
+from typing import Dict, List
+
+import httpx
+import pytest
+from opentelemetry import trace
+from opentelemetry.sdk.trace import ReadableSpan, TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import (
+    InMemorySpanExporter,
+)
+
+from language_model_gateway.configs.config_schema import ChatModelConfig, ModelConfig
+from language_model_gateway.container.simple_container import SimpleContainer
+from language_model_gateway.gateway.api_container import get_container_async
+from language_model_gateway.gateway.models.model_factory import ModelFactory
+from language_model_gateway.gateway.utilities.expiring_cache import ExpiringCache
+from language_model_gateway.gateway.utilities.request_timings import RequestTimings
+from tests.gateway.mocks.mock_model_factory import MockModelFactory
+from tests.gateway.mocks.mock_slow_chat_model import SlowChatModel
+
+_span_exporter: InMemorySpanExporter = InMemorySpanExporter()
+
+
+@pytest.fixture(scope="module")
+def span_exporter() -> InMemorySpanExporter:
+    # the global tracer provider can only be set once per process
+    if not isinstance(trace.get_tracer_provider(), TracerProvider):
+        tracer_provider: TracerProvider = TracerProvider()
+        tracer_provider.add_span_processor(SimpleSpanProcessor(_span_exporter))
+        trace.set_tracer_provider(tracer_provider)
+    return _span_exporter
+
+
+def parse_server_timing(value: str) -> Dict[str, float]:
+    durations: Dict[str, float] = {}
+    for entry in value.split(","):
+        name, duration = entry.strip().split(";dur=")
+        durations[name] = float(duration)
+    return durations
+
+
+def test_request_timings_sums_phases() -> None:
+    timings: RequestTimings = RequestTimings()
+    timings.add(name="tool", start=1.0, end=1.5)
+    timings.add(name="tool", start=2.0, end=2.25)
+    timings.add(name="model", start=1.0, end=3.0)
+
+    durations: Dict[str, float] = parse_server_timing(timings.get_server_timing())
+    assert list(durations) == ["tool", "model", "total"]
+    assert durations["tool"] == 750.0
+    assert durations["model"] == 2000.0
+    assert timings.get_server_sent_event_comment().startswith(": server-timing tool;")
+
+
+async def test_chat_completions_timings(
+    async_client: httpx.AsyncClient, span_exporter: InMemorySpanExporter
+) -> None:
+    print("")
+    test_container: SimpleContainer = await get_container_async()
+    test_container.register(
+        ModelFactory,
+        lambda c: MockModelFactory(
+            fn_get_model=lambda chat_model_config: SlowChatModel(
+                response="Barack Obama", delay_seconds=0.05, calls=[]
+            )
+        ),
+    )
+    model_configuration_cache: ExpiringCache[List[ChatModelConfig]] = (
+        test_container.resolve(ExpiringCache)
+    )
+    await model_configuration_cache.set(
+        [
+            ChatModelConfig(
+                id="timings",
+                name="Timings",
+                description="Timings",
+                type="langchain",
+                model=ModelConfig(
+                    provider="bedrock",
+                    model="us.anthropic.claude-3-5-haiku-20241022-v1:0",
+                ),
+            )
+        ]
+    )
+    span_exporter.clear()
+    try:
+        response: httpx.Response = await async_client.post(
+            "/api/v1/chat/completions",
+            json={
+                "model": "Timings",
+                "messages": [{"role": "user", "content": "Who was 44th president?"}],
+            },
+        )
+        assert response.status_code == 200
+        durations: Dict[str, float] = parse_server_timing(
+            response.headers["Server-Timing"]
+        )
+        for name in ["config", "admission", "graph", "model", "serialization"]:
+            assert name in durations
+        assert durations["model"] >= 50
+        assert durations["total"] >= durations["model"]
+
+        response = await async_client.post(
+            "/api/v1/chat/completions",
+            json={
+                "model": "Timings",
+                "messages": [{"role": "user", "content": "Who was 44th president?"}],
+                "stream": True,
+            },
+        )
+        assert response.status_code == 200
+        # the timings are sent in a comment after the last event
+        last_frame: str = response.text.strip().split("\n\n")[-1]
+        assert last_frame.startswith(": server-timing ")
+        streamed_durations: Dict[str, float] = parse_server_timing(
+            last_frame.removeprefix(": server-timing ")
+        )
+        assert streamed_durations["model_ttft"] >= 50
+        assert streamed_durations["model"] >= streamed_durations["model_ttft"]
+
+        spans: List[ReadableSpan] = list(span_exporter.get_finished_spans())
+        roots: List[ReadableSpan] = [s for s in spans if s.name == "chat_completion"]
+        assert [dict(s.attributes or {})["stream"] for s in roots] == ["false", "true"]
+        streaming_root: ReadableSpan = roots[1]
+        assert streaming_root.context is not None
+        children: List[ReadableSpan] = [
+            s
+            for s in spans
+            if s.parent is not None
+            and s.parent.span_id == streaming_root.context.span_id
+        ]
+        assert "model_ttft" in [s.name for s in children]
+        for child in children:
+            assert child.start_time is not None and child.end_time is not None
+            assert streaming_root.start_time is not None
+            assert streaming_root.start_time <= child.start_time <= child.end_time
+    finally:
+        await model_configuration_cache.clear()
@@ -0,0 +1,54 @@
+import asyncio
+from typing import AsyncGenerator, List, Optional
+
+from openai.types import CompletionUsage
+
+from language_model_gateway.configs.config_schema import StreamCoalescingConfig
+from language_model_gateway.gateway.converters.stream_coalescer import (
+    StreamCoalescer,
+)
+
+
+async def test_stream_coalescer_flushes_by_size_and_time() -> None:
+    coalescer = StreamCoalescer(
+        config=StreamCoalescingConfig(max_bytes=10, max_delay_ms=50)
+    )
+
+    async def get_tokens() -> AsyncGenerator[str, None]:
+        for token in ["first", "a", "b", "c", "defghijklmn", "o"]:
+            yield token
+        # stall so the pending content is sent by time
+        await asyncio.sleep(0.2)
+        yield "p"
+
+    frames: List[str] = []
+    token: Optional[str]
+    async for token in coalescer.iterate_async(get_tokens()):
+        if token is None:
+            frames.append(coalescer.flush()[0])
+        elif coalescer.add(content=token, usage=None):
+            frames.append(coalescer.flush()[0])
+    if coalescer.has_pending:
+        frames.append(coalescer.flush()[0])
+
+    # first token is sent at once, then by size, then by time and the rest at the end
+    assert frames == ["first", "abcdefghijklmn", "o", "p"]
+
+
+def test_stream_coalescer_sums_usage() -> None:
+    coalescer = StreamCoalescer(config=StreamCoalescingConfig(max_bytes=100))
+    coalescer.add(content="a", usage=None)
+    coalescer.flush()
+    coalescer.add(
+        content="b",
+        usage=CompletionUsage(prompt_tokens=1, completion_tokens=2, total_tokens=3),
+    )
+    coalescer.add(
+        content="c",
+        usage=CompletionUsage(prompt_tokens=1, completion_tokens=2, total_tokens=3),
+    )
+    content, usage = coalescer.flush()
+    assert content == "bc"
+    assert usage == CompletionUsage(
+        prompt_tokens=2, completion_tokens=4, total_tokens=6
+    )
@@ -0,0 +1,49 @@
+import asyncio
+import time
+from typing import Any, Dict, List
+
+from langchain_core.messages import AIMessage, ToolMessage
+from langchain_core.tools import tool
+
+from language_model_gateway.gateway.converters.streaming_tool_node import (
+    StreamingToolNode,
+)
+
+
+@tool
+async def slow_search(query: str) -> str:
+    """Searches slowly"""
+    await asyncio.sleep(0.2)
+    return f"results for {query}"
+
+
+@tool
+async def stuck_tool(query: str) -> str:
+    """Never finishes in time"""
+    await asyncio.sleep(10)
+    return "too late"
+
+
+async def test_streaming_tool_node_limits_concurrency_and_time() -> None:
+    tool_node = StreamingToolNode(
+        [slow_search, stuck_tool],
+        max_concurrency={"slow_search": 2},
+        timeout_seconds={"stuck_tool": 0.1},
+    )
+    tool_calls: List[Dict[str, Any]] = [
+        {"name": "slow_search", "args": {"query": str(i)}, "id": str(i)}
+        for i in range(4)
+    ] + [{"name": "stuck_tool", "args": {"query": "x"}, "id": "stuck"}]
+
+    start: float = time.perf_counter()
+    result: Dict[str, List[ToolMessage]] = await tool_node.ainvoke(
+        {"messages": [AIMessage(content="", tool_calls=tool_calls)]}
+    )
+    elapsed: float = time.perf_counter() - start
+
+    messages: List[ToolMessage] = result["messages"]
+    assert [m.content for m in messages[:4]] == [f"results for {i}" for i in range(4)]
+    assert messages[4].status == "error"
+    assert "did not finish" in str(messages[4].content)
+    # four calls with two at a time take two rounds and the stuck tool is cut off
+    assert 0.4 <= elapsed < 1
@@ -2,9 +2,25 @@ import os
 
 import pytest
 
+from language_model_gateway.gateway.http.http_client_factory import HttpClientFactory
+from language_model_gateway.gateway.http.http_fetcher import HttpFetcher
 from language_model_gateway.gateway.tools.scraping_bee_web_scraper_tool import (
     ScrapingBeeWebScraperTool,
 )
+from language_model_gateway.gateway.utilities.content_cache import ContentCache
+from language_model_gateway.gateway.utilities.parser_pool import ParserPool
+
+
+def create_http_fetcher() -> HttpFetcher:
+    return HttpFetcher(http_client_factory=HttpClientFactory(), http_cache=None)
+
+
+def create_content_cache() -> ContentCache:
+    return ContentCache(
+        max_memory_size_bytes=1024 * 1024,
+        cache_directory=None,
+        max_disk_size_bytes=1024 * 1024,
+    )
 
 
 @pytest.mark.skipif(
@@ -13,7 +29,12 @@ from language_model_gateway.gateway.tools.scraping_bee_web_scraper_tool import (
 )
 async def test_scraping_bee_tool_tool_async() -> None:
     print("")
-    tool = ScrapingBeeWebScraperTool(api_key=os.environ["SCRAPING_BEE_API_KEY"])
+    tool = ScrapingBeeWebScraperTool(
+        api_key=os.environ["SCRAPING_BEE_API_KEY"],
+        http_fetcher=create_http_fetcher(),
+        content_cache=create_content_cache(),
+        parser_pool=ParserPool(),
+    )
     result, message = await tool._arun(url="https://www.example.com")
     print(result)
     assert "This domain is for use in illustrative examples in documents." in result
@@ -27,6 +48,9 @@ async def test_scraping_bee_tool_tool_complex_async() -> None:
     print("")
     tool = ScrapingBeeWebScraperTool(
         api_key=os.environ["SCRAPING_BEE_API_KEY"],
+        http_fetcher=create_http_fetcher(),
+        content_cache=create_content_cache(),
+        parser_pool=ParserPool(),
         premium_proxy=True,
         return_markdown=True,
     )
@@ -45,6 +69,9 @@ async def test_scraping_bee_tool_tool_complex_answer_query_async() -> None:
     print("")
     tool = ScrapingBeeWebScraperTool(
         api_key=os.environ["SCRAPING_BEE_API_KEY"],
+        http_fetcher=create_http_fetcher(),
+        content_cache=create_content_cache(),
+        parser_pool=ParserPool(),
         premium_proxy=True,
         return_markdown=True,
     )
@@ -62,7 +89,12 @@ async def test_scraping_bee_tool_tool_complex_answer_query_async() -> None:
 )
 async def test_scraping_bee_tool_tool_printable_async() -> None:
     print("")
-    tool = ScrapingBeeWebScraperTool(api_key=os.environ["SCRAPING_BEE_API_KEY"])
+    tool = ScrapingBeeWebScraperTool(
+        api_key=os.environ["SCRAPING_BEE_API_KEY"],
+        http_fetcher=create_http_fetcher(),
+        content_cache=create_content_cache(),
+        parser_pool=ParserPool(),
+    )
     result, message = await tool._arun(
         url="https://www.johnmuirhealth.com/fad/doctor/profilePrintable/1174545909"
     )
@@ -1,15 +1,33 @@
+from language_model_gateway.gateway.http.http_client_factory import HttpClientFactory
+from language_model_gateway.gateway.http.http_fetcher import HttpFetcher
 from language_model_gateway.gateway.tools.url_to_markdown_tool import URLToMarkdownTool
+from language_model_gateway.gateway.utilities.content_cache import ContentCache
+from language_model_gateway.gateway.utilities.parser_pool import ParserPool
+
+
+def create_tool() -> URLToMarkdownTool:
+    return URLToMarkdownTool(
+        http_fetcher=HttpFetcher(
+            http_client_factory=HttpClientFactory(), http_cache=None
+        ),
+        content_cache=ContentCache(
+            max_memory_size_bytes=1024 * 1024,
+            cache_directory=None,
+            max_disk_size_bytes=1024 * 1024,
+        ),
+        parser_pool=ParserPool(),
+    )
 
 
 async def test_url_to_markdown_tool_async() -> None:
-    tool = URLToMarkdownTool()
+    tool = create_tool()
     content, artifact = await tool._arun("https://www.example.com")
     print(content)
     assert "This domain is for use in illustrative examples in documents." in content
 
 
 async def test_url_to_markdown_tool_complex_async() -> None:
-    tool = URLToMarkdownTool()
+    tool = create_tool()
     content, artifact = await tool._arun(
         "https://www.johnmuirhealth.com/doctor/David-Chang-MD/1174545909"
     )